@@ -0,0 +1,64 @@
+# coding: utf-8
+"""
+Compare speed of JSON backends on snapshots of radar.
+
+Usage:
+
+    python benchmarks/json_backends.py [--count 2000] [--repeat 5]
+
+"""
+import argparse
+import random
+import timeit
+
+from il2fb.commons.spatial import Point3D
+from il2fb.ds.middleware.device_link.structures import MovingAircraftPosition
+
+from il2fb.ds.airbridge import json
+
+
+def make_payload(count: int) -> list:
+    random.seed(0)
+    return [
+        MovingAircraftPosition(
+            index=i,
+            id=f"r0100{i}",
+            is_human=bool(i % 2),
+            member_index=None,
+            pos=Point3D(
+                x=random.uniform(0, 200000),
+                y=random.uniform(0, 200000),
+                z=random.uniform(0, 5000),
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    payload = make_payload(args.count)
+
+    for name in json.get_available_backends():
+        json.use_backend(name)
+
+        for indent in (None, json.PRETTY_INDENT):
+            timings = timeit.repeat(
+                lambda: json.dumpb(payload, indent=indent),
+                repeat=args.repeat,
+                number=args.number,
+            )
+            best = min(timings) / args.number
+            print(
+                f"{name:>8} indent={indent!s:<4} "
+                f"{best * 1000:8.3f} ms per {args.count} positions"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+# coding: utf-8
+
+import asyncio
+import json
+import logging
+
+from typing import Awaitable, Iterator, List, Optional
+
+from il2fb.ds.airbridge.caching import EncodedPayload
+
+from il2fb.ds.airbridge.api.operations import Operations
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_BATCH_TIMEOUT = 10
+DEFAULT_BATCH_MAX_OPERATIONS = 32
+
+BATCH_STATUS_SUCCESS = 'success'
+BATCH_STATUS_FAILURE = 'failure'
+BATCH_STATUS_TIMEOUT = 'timeout'
+
+
+class BatchOperation:
+    __slots__ = ['name', 'payload', 'key', ]
+
+    def __init__(self, name: str, payload: dict):
+        self.name = name
+        self.payload = payload
+        self.key = (name, json.dumps(payload, sort_keys=True))
+
+
+def load_batch(
+    items: List[dict],
+    operations: Operations,
+    max_operations: int,
+) -> List[BatchOperation]:
+    """
+    Validate operations requested by a batch. Each operation is defined by
+    its name and an optional payload with keyword arguments:
+
+        {"operation": "get_humans_list", "payload": {"timeout": 5}}
+
+    """
+    if not isinstance(items, list):
+        raise ValueError("list of operations is expected")
+
+    if not items:
+        raise ValueError("list of operations is empty")
+
+    if len(items) > max_operations:
+        raise ValueError(
+            f"too many operations ({len(items)} > {max_operations})"
+        )
+
+    results = []
+
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f"operation #{i} is not a mapping")
+
+        name = item.get('operation')
+        if not isinstance(name, str):
+            raise ValueError(f"name of operation #{i} is not a string")
+
+        if name not in operations:
+            raise ValueError(f"unknown operation '{name}'")
+
+        payload = item.get('payload') or {}
+        if not isinstance(payload, dict):
+            raise ValueError(f"payload of operation '{name}' is not a mapping")
+
+        results.append(BatchOperation(name, payload))
+
+    return results
+
+
+def _split_into_stages(
+    operations: List[BatchOperation],
+) -> Iterator[List[int]]:
+    """
+    Group indices of operations into stages which are executed one after
+    another. Consecutive read-only operations form a single stage and are
+    executed concurrently. Any other operation forms a stage of its own, so
+    reads which follow it observe its effect.
+
+    """
+    stage = []
+
+    for i, operation in enumerate(operations):
+        if Operations.is_read_only(operation.name):
+            stage.append(i)
+            continue
+
+        if stage:
+            yield stage
+            stage = []
+
+        yield [i]
+
+    if stage:
+        yield stage
+
+
+class BatchExecutor:
+    """
+    Execute lists of operations under a single deadline.
+
+    Identical read-only operations of a single stage are executed once and
+    share their result. Operations which are not finished before deadline
+    are cancelled and operations which are not started are skipped. Both
+    are reported with ``timeout`` status.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        operations: Operations,
+        timeout: float=DEFAULT_BATCH_TIMEOUT,
+        max_operations: int=DEFAULT_BATCH_MAX_OPERATIONS,
+    ):
+        self._loop = loop
+        self._operations = operations
+        self._timeout = timeout
+        self._max_operations = max_operations
+
+        self._batches_count = 0
+        self._operations_count = 0
+        self._deduplicated_count = 0
+        self._failures_count = 0
+        self._timeouts_count = 0
+        self._total_duration = 0
+
+    @property
+    def operations(self) -> Operations:
+        return self._operations
+
+    async def execute(
+        self,
+        items: List[dict],
+        timeout: Optional[float]=None,
+    ) -> Awaitable[dict]:
+
+        operations = load_batch(items, self._operations, self._max_operations)
+
+        if timeout is None or timeout > self._timeout:
+            timeout = self._timeout
+
+        start_time = self._loop.time()
+        deadline = start_time + timeout
+
+        results = [None] * len(operations)
+        deduplicated_count = 0
+
+        for stage in _split_into_stages(operations):
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+
+            deduplicated_count += (await self._execute_stage(
+                operations=operations,
+                indices=stage,
+                results=results,
+                timeout=remaining,
+            ))
+
+        results = [
+            result or dict(status=BATCH_STATUS_TIMEOUT)
+            for result in results
+        ]
+        duration = self._loop.time() - start_time
+
+        self._batches_count += 1
+        self._operations_count += len(operations)
+        self._deduplicated_count += deduplicated_count
+        self._total_duration += duration
+
+        for result in results:
+            if result['status'] == BATCH_STATUS_FAILURE:
+                self._failures_count += 1
+            elif result['status'] == BATCH_STATUS_TIMEOUT:
+                self._timeouts_count += 1
+
+        return {
+            'results': results,
+            'deduplicated_count': deduplicated_count,
+            'duration': duration,
+        }
+
+    async def _execute_stage(
+        self,
+        operations: List[BatchOperation],
+        indices: List[int],
+        results: List[Optional[dict]],
+        timeout: float,
+    ) -> Awaitable[int]:
+
+        tasks = {}
+
+        for i in indices:
+            operation = operations[i]
+            if operation.key not in tasks:
+                tasks[operation.key] = self._loop.create_task(
+                    self._execute_operation(operation)
+                )
+
+        done, pending = await asyncio.wait(
+            tasks.values(),
+            timeout=timeout,
+            loop=self._loop,
+        )
+
+        for task in pending:
+            task.cancel()
+
+        for i in indices:
+            task = tasks[operations[i].key]
+            if task in done:
+                results[i] = task.result()
+
+        return len(indices) - len(tasks)
+
+    async def _execute_operation(
+        self,
+        operation: BatchOperation,
+    ) -> Awaitable[dict]:
+
+        try:
+            result = await self._operations.get(operation.name)(
+                **operation.payload
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOG.exception(
+                f"failed to execute batched operation '{operation.name}' "
+                f"(payload={operation.payload})"
+            )
+            return dict(
+                status=BATCH_STATUS_FAILURE,
+                detail=(str(e) or e.__class__.__name__),
+            )
+
+        if isinstance(result, EncodedPayload):
+            result = result.data
+
+        return dict(
+            status=BATCH_STATUS_SUCCESS,
+            payload=result,
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            'batches_count': self._batches_count,
+            'operations_count': self._operations_count,
+            'deduplicated_count': self._deduplicated_count,
+            'failures_count': self._failures_count,
+            'timeouts_count': self._timeouts_count,
+            'avg_duration': (
+                self._total_duration / self._batches_count
+                if self._batches_count
+                else 0
+            ),
+        }
@@ -2,22 +2,41 @@
 
 import asyncio
 
-from typing import Optional
+from typing import Dict, Optional, Union
 
 from aiohttp import web
 
 from il2fb.ds.middleware.console.client import ConsoleClient
 from il2fb.parsers.mission import MissionParser
 
+from il2fb.ds.airbridge.caching import ConsoleQueriesCache
+from il2fb.ds.airbridge.caching import StationaryActorsCache
 from il2fb.ds.airbridge.dedicated_server.instance import DedicatedServer
+from il2fb.ds.airbridge.missions.archives import MissionsArchiver
+from il2fb.ds.airbridge.missions.content import MissionsContentIndex
+from il2fb.ds.airbridge.missions.content import ResumableUploads
+from il2fb.ds.airbridge.missions.index import MissionsIndex
+from il2fb.ds.airbridge.missions.parsing import ParsedMissionsCache
+from il2fb.ds.airbridge.missions.rotation import MissionsRotator
+from il2fb.ds.airbridge.missions.search import MissionsSearchIndex
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+from il2fb.ds.airbridge.missions.validation import MissionsValidator
 from il2fb.ds.airbridge.radar import Radar
+from il2fb.ds.airbridge.serialization import SerializationScheduler
 
 from il2fb.ds.airbridge.streaming.facilities import ChatStreamingFacility
 from il2fb.ds.airbridge.streaming.facilities import EventsStreamingFacility
+from il2fb.ds.airbridge.streaming.facilities import MissionsStreamingFacility
 from il2fb.ds.airbridge.streaming.facilities import NotParsedStringsStreamingFacility
 from il2fb.ds.airbridge.streaming.facilities import RadarStreamingFacility
 
+from il2fb.ds.airbridge.api.batch import BatchExecutor
+from il2fb.ds.airbridge.api.http.caching import RenderedResponsesCache
 from il2fb.ds.airbridge.api.http.constants import ACCESS_LOG_FORMAT
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_CACHE_MAX_AGES
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_COMPRESSION_MIN_SIZE
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_STREAMING_CHUNK_SIZE
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_STREAMING_MIN_SIZE
 from il2fb.ds.airbridge.api.http.routes import setup_routes
 from il2fb.ds.airbridge.api.http.security import AuthorizationBackend
 from il2fb.ds.airbridge.api.http.security import setup_authorization
@@ -27,15 +46,35 @@ from il2fb.ds.airbridge.api.http.security import setup_cors
 def build_http_api(
     loop: asyncio.AbstractEventLoop,
     dedicated_server: DedicatedServer,
-    console_client: ConsoleClient,
+    console_client: Union[ConsoleClient, ConsoleQueriesCache],
     radar: Radar,
+    stationary_actors_cache: StationaryActorsCache,
+    serialization_scheduler: Optional[SerializationScheduler],
+    batch_executor: BatchExecutor,
     chat_stream: ChatStreamingFacility,
     events_stream: EventsStreamingFacility,
     not_parsed_strings_stream: NotParsedStringsStreamingFacility,
     radar_stream: RadarStreamingFacility,
     mission_parser: MissionParser,
+    missions_storage: MissionsStorage,
+    parsed_missions_cache: Optional[ParsedMissionsCache]=None,
+    missions_validator: Optional[MissionsValidator]=None,
+    missions_index: Optional[MissionsIndex]=None,
+    missions_search_index: Optional[MissionsSearchIndex]=None,
+    missions_stream: Optional[MissionsStreamingFacility]=None,
+    missions_rotator: Optional[MissionsRotator]=None,
+    missions_content_index: Optional[MissionsContentIndex]=None,
+    missions_uploads: Optional[ResumableUploads]=None,
+    missions_archiver: Optional[MissionsArchiver]=None,
+    console_queries_cache: Optional[ConsoleQueriesCache]=None,
     authorization_backend: Optional[AuthorizationBackend]=None,
     cors_options: Optional[dict]=None,
+    compression_min_size: Optional[int]=DEFAULT_COMPRESSION_MIN_SIZE,
+    ws_compression_min_sizes: Optional[Dict[str, int]]=None,
+    cache_max_ages: Optional[Dict[str, int]]=None,
+    rendered_responses_cache: Optional[RenderedResponsesCache]=None,
+    streaming_min_size: Optional[int]=DEFAULT_STREAMING_MIN_SIZE,
+    streaming_chunk_size: int=DEFAULT_STREAMING_CHUNK_SIZE,
     **kwargs
 ):
 
@@ -49,13 +88,37 @@ def build_http_api(
 
     app['dedicated_server'] = dedicated_server
     app['console_client'] = console_client
+    app['console_queries_cache'] = console_queries_cache
     app['radar'] = radar
+    app['stationary_actors_cache'] = stationary_actors_cache
     app['mission_parser'] = mission_parser
+    app['missions_storage'] = missions_storage
+    app['parsed_missions_cache'] = parsed_missions_cache
+    app['missions_validator'] = missions_validator
+    app['missions_index'] = missions_index
+    app['missions_search_index'] = missions_search_index
+    app['missions_rotator'] = missions_rotator
+    app['missions_content_index'] = missions_content_index
+    app['missions_uploads'] = missions_uploads
+    app['missions_archiver'] = missions_archiver
+    app['serialization_scheduler'] = serialization_scheduler
+    app['batch_executor'] = batch_executor
 
     app['chat_stream'] = chat_stream
     app['events_stream'] = events_stream
     app['not_parsed_strings_stream'] = not_parsed_strings_stream
     app['radar_stream'] = radar_stream
+    app['missions_stream'] = missions_stream
+
+    app['compression_min_size'] = compression_min_size
+    app['ws_compression_min_sizes'] = ws_compression_min_sizes or {}
+
+    app['cache_max_ages'] = dict(DEFAULT_CACHE_MAX_AGES)
+    app['cache_max_ages'].update(cache_max_ages or {})
+    app['rendered_responses_cache'] = rendered_responses_cache
+
+    app['streaming_min_size'] = streaming_min_size
+    app['streaming_chunk_size'] = streaming_chunk_size
 
     setup_routes(app.router)
     setup_cors(app, cors_options or {})
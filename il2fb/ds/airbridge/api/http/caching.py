@@ -0,0 +1,108 @@
+# coding: utf-8
+
+import collections
+import logging
+import os
+
+from pathlib import Path
+from typing import Hashable, Optional
+
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_RENDERED_RESPONSES_CACHE_SIZE
+
+
+LOG = logging.getLogger(__name__)
+
+
+def get_file_version(path: Path) -> str:
+    """
+    Get version of file's contents derived from its metadata. Replaced file
+    gets new version even if its size and modification time are same.
+
+    """
+    return get_stat_version(path.stat())
+
+
+def get_stat_version(stat: os.stat_result) -> str:
+    return f"{stat.st_ino:x}.{stat.st_mtime_ns:x}.{stat.st_size:x}"
+
+
+class RenderedResponse:
+    """
+    Rendered body of response along with its metadata and version of data it
+    was rendered from.
+
+    """
+    __slots__ = ['version', 'etag', 'body', 'content_type', 'charset', ]
+
+    def __init__(
+        self,
+        version: str,
+        etag: str,
+        body: bytes,
+        content_type: str,
+        charset: Optional[str]=None,
+    ):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        self.content_type = content_type
+        self.charset = charset
+
+    def __repr__(self) -> str:
+        return (
+            f"<RenderedResponse version={self.version} size={len(self.body)}>"
+        )
+
+
+class RenderedResponsesCache:
+    """
+    LRU cache of rendered responses.
+
+    Keys identify representations of resources, e.g. route, query and format
+    of response. An entry is valid while version of data it was rendered from
+    stays unchanged, so repeated requests skip both retrieval of data and its
+    encoding.
+
+    """
+
+    def __init__(self, max_size: int=DEFAULT_RENDERED_RESPONSES_CACHE_SIZE):
+        self._max_size = max_size
+        self._entries = collections.OrderedDict()
+
+        self._hits_count = 0
+        self._misses_count = 0
+
+    @property
+    def hits_count(self) -> int:
+        return self._hits_count
+
+    @property
+    def misses_count(self) -> int:
+        return self._misses_count
+
+    def get(self, key: Hashable, version: str) -> Optional[RenderedResponse]:
+        entry = self._entries.get(key)
+
+        if entry is None or entry.version != version:
+            self._misses_count += 1
+            return
+
+        self._entries.move_to_end(key)
+        self._hits_count += 1
+        return entry
+
+    def put(self, key: Hashable, entry: RenderedResponse) -> None:
+        if self._max_size <= 0:
+            return
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
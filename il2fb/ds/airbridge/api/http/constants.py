@@ -3,3 +3,19 @@
 ACCESS_LOG_FORMAT = '"%r" %s %b B %Tf s %a %l %u "%{Referrer}i" "%{User-Agent}i"'
 
 DEFAULT_AUTH_TOKEN_HEADER_NAME = "X-Airbridge-Token"
+
+DEFAULT_COMPRESSION_MIN_SIZE = 1024
+
+DEFAULT_RENDERED_RESPONSES_CACHE_SIZE = 128
+
+DEFAULT_CACHE_MAX_AGES = {
+    'radar': 0,
+    'stationary_actors': 0,
+    'humans': 0,
+    'server_info': 0,
+    'mission_info': 0,
+    'missions': 0,
+}
+
+DEFAULT_STREAMING_MIN_SIZE = 2 ** 20  # 1 MiB
+DEFAULT_STREAMING_CHUNK_SIZE = 64 * 2 ** 10  # 64 KiB
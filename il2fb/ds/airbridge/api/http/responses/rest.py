@@ -1,12 +1,318 @@
 # coding: utf-8
 
 import abc
+import asyncio
+import hashlib
+import secrets
 
-from typing import Any
+from typing import Any, Awaitable, Dict, Hashable, Iterator, List, Optional, Tuple
 
 from aiohttp import web
 
 from il2fb.ds.airbridge import json
+from il2fb.ds.airbridge.caching import EncodedPayload
+from il2fb.ds.airbridge.codecs import Codec, DEFAULT_CODEC
+from il2fb.ds.airbridge.codecs import get_codec, get_codec_by_media_type
+
+from il2fb.ds.airbridge.api.http.caching import RenderedResponse
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_STREAMING_CHUNK_SIZE
+
+
+CONTENT_ENCODINGS = ('gzip', 'deflate', )
+
+VARY = 'Accept, Accept-Encoding'
+
+# versions of data kept in memory start over after restart, so they are
+# prefixed with tag of process to keep their ETags unique
+_INSTANCE_TAG = secrets.token_hex(4)
+
+
+def accepts_encoding(accept_encoding: str, encoding: str) -> bool:
+    """
+    Tell whether value of 'Accept-Encoding' header allows given encoding.
+    Explicit mention of encoding takes precedence over wildcard.
+
+    """
+    wildcard = None
+
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+
+        if name == encoding:
+            return _get_quality(params) > 0
+
+        if name == '*' and wildcard is None:
+            wildcard = _get_quality(params) > 0
+
+    return bool(wildcard)
+
+
+def _get_quality(params: str) -> float:
+    params = params.strip().replace(' ', '')
+    if not params.startswith('q='):
+        return 1
+
+    try:
+        return float(params[2:])
+    except ValueError:
+        return 0
+
+
+def negotiate_content_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Choose content encoding of response which is accepted by client.
+    ``gzip`` is preferred over ``deflate``.
+
+    """
+    for encoding in CONTENT_ENCODINGS:
+        if accepts_encoding(accept_encoding, encoding):
+            return encoding
+
+
+def get_compression_min_size(request: web.Request) -> Optional[int]:
+    """
+    Get minimal size of body of response which is compressed. ``None`` means
+    that compression of responses is disabled.
+
+    """
+    return request.app.get('compression_min_size')
+
+
+def maybe_enable_compression(
+    response: web.Response,
+    request: web.Request,
+) -> None:
+    min_size = get_compression_min_size(request)
+    if min_size is not None and len(response.body) >= min_size:
+        # gzip or deflate is negotiated by aiohttp
+        response.enable_compression()
+
+
+def should_stream(request: web.Request, size_hint: int) -> bool:
+    """
+    Tell whether payload must be encoded and sent incrementally, judging by
+    estimated size of its representation.
+
+    """
+    min_size = request.app.get('streaming_min_size')
+    return min_size is not None and size_hint >= min_size
+
+
+def make_streaming_success(
+    request: web.Request,
+    payload: Any,
+    pretty: bool=False,
+    version: Optional[str]=None,
+    max_age: Optional[int]=None,
+) -> 'RESTStreamingSuccess':
+
+    return RESTStreamingSuccess(
+        payload=payload,
+        pretty=pretty,
+        chunk_size=request.app.get(
+            'streaming_chunk_size', DEFAULT_STREAMING_CHUNK_SIZE,
+        ),
+        etag=make_etag(request, version) if version is not None else None,
+        max_age=max_age,
+    )
+
+
+async def encode_payload(
+    request: web.Request,
+    payload: Any,
+    codec: Codec,
+    indent: Optional[int]=None,
+    compact_types: bool=False,
+) -> Awaitable[bytes]:
+    """
+    Encode payload either inline or by a worker, if serialization scheduler
+    is set up and payload is large.
+
+    """
+    scheduler = request.app.get('serialization_scheduler')
+
+    if scheduler is None:
+        return codec.encode(payload, indent=indent, compact_types=compact_types)
+
+    return (await scheduler.encode(
+        payload,
+        codec=codec,
+        indent=indent,
+        compact_types=compact_types,
+    ))
+
+
+def get_max_age(request: web.Request, source: str) -> Optional[int]:
+    """
+    Get number of seconds during which data from given source can be
+    considered fresh by clients.
+
+    """
+    return request.app.get('cache_max_ages', {}).get(source)
+
+
+def get_cache_control(max_age: Optional[int]) -> str:
+    # responses may depend on authorization, so they are not stored by
+    # shared caches
+    if max_age:
+        return f"private, max-age={int(max_age)}"
+
+    return "private, no-cache"
+
+
+def get_instance_version(version: Hashable) -> str:
+    """
+    Make version of data which is unique across restarts of process.
+
+    """
+    return f"{_INSTANCE_TAG}.{version}"
+
+
+def get_cache_key(request: web.Request) -> Tuple:
+    """
+    Get key of representation of requested resource, which includes route,
+    query and format of response.
+
+    """
+    codec, compact_types = negotiate_codec(request)
+    query = tuple(sorted(
+        (key, value)
+        for key, value in request.query.items()
+        if key != 'timeout'
+    ))
+    return (request.path, query, codec.name, compact_types)
+
+
+def make_etag(request: web.Request, version: str) -> str:
+    """
+    Make weak ETag of representation of requested resource from version of
+    its data.
+
+    """
+    key = hashlib.blake2b(
+        repr(get_cache_key(request)).encode(),
+        digest_size=4,
+    ).hexdigest()
+    return f'W/"{version}-{key}"'
+
+
+def is_not_modified(request: web.Request, etag: str) -> bool:
+    """
+    Tell whether representation of resource is cached by client, according
+    to 'If-None-Match' header. Weak comparison is used.
+
+    """
+    value = request.headers.get('If-None-Match')
+    if not value:
+        return False
+
+    if value.strip() == '*':
+        return True
+
+    etag = _strip_weakness(etag)
+    return any(
+        _strip_weakness(item.strip()) == etag
+        for item in value.split(',')
+    )
+
+
+def _strip_weakness(etag: str) -> str:
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def get_cached_response(
+    request: web.Request,
+    version: str,
+    max_age: Optional[int]=None,
+) -> Optional[web.Response]:
+    """
+    Get response for requested resource without retrieving and encoding of
+    its data, if version of data is known in advance.
+
+    ``RESTNotModified`` is returned if client has actual representation.
+    Otherwise, previously rendered response is returned if it's still
+    actual. ``None`` is returned if data has to be retrieved.
+
+    """
+    etag = make_etag(request, version)
+    if is_not_modified(request, etag):
+        return RESTNotModified(etag=etag, max_age=max_age)
+
+    cache = request.app.get('rendered_responses_cache')
+    if cache is None:
+        return
+
+    entry = cache.get(get_cache_key(request), version)
+    if entry is not None:
+        return RESTRenderedSuccess(entry=entry, max_age=max_age)
+
+
+def _parse_accept(accept: str) -> List[Tuple[str, Dict[str, str]]]:
+    """
+    Get media types listed in value of 'Accept' header along with their
+    parameters in order of preference.
+
+    """
+    items = []
+
+    for item in accept.split(','):
+        media_type, *params = item.split(';')
+
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+
+        params = dict(
+            (key.strip().lower(), value.strip().lower())
+            for key, _, value in (param.partition('=') for param in params)
+        )
+
+        try:
+            quality = float(params.pop('q', 1))
+        except ValueError:
+            quality = 0
+
+        if quality > 0:
+            items.append((quality, media_type, params))
+
+    # sorting is stable, so order of items with same quality is kept
+    items.sort(key=lambda x: x[0], reverse=True)
+    return [(media_type, params) for _, media_type, params in items]
+
+
+def negotiate_codec(request: web.Request) -> Tuple[Codec, bool]:
+    """
+    Choose codec for response and tell whether client asked for numeric tags
+    of types.
+
+    Codec can be selected either via ``format`` query parameter or via
+    'Accept' header. Numeric tags of types are requested either via
+    ``compact_types`` query parameter or via ``types=compact`` parameter of
+    media type in 'Accept' header. JSON is used if nothing suitable is found,
+    including the case when requested codec is not installed.
+
+    """
+    compact_types = 'compact_types' in request.query
+
+    name = request.query.get('format')
+    if name:
+        try:
+            return get_codec(name), compact_types
+        except ValueError:
+            return DEFAULT_CODEC, compact_types
+
+    for media_type, params in _parse_accept(request.headers.get('Accept', '')):
+        if media_type in {'*/*', 'application/*'}:
+            codec = DEFAULT_CODEC
+        else:
+            codec = get_codec_by_media_type(media_type)
+
+        if codec:
+            compact_types |= (params.get('types') == 'compact')
+            return codec, compact_types
+
+    return DEFAULT_CODEC, compact_types
 
 
 class RESTResponse(web.Response, abc.ABC):
@@ -35,23 +341,110 @@ class RESTResponse(web.Response, abc.ABC):
         if detail:
             payload['detail'] = str(detail)
 
-        indent = 2 if pretty else None
-        text = json.dumps(payload, indent=indent) + '\n'
+        self._payload = payload
+        self._indent = 2 if pretty else None
 
         kwargs.setdefault('status', self.status)
 
         super().__init__(
-            text=text,
             charset=charset,
             content_type=content_type,
             **kwargs
         )
 
+    async def prepare(self, request: web.Request) -> Awaitable[Any]:
+        # payload is rendered only when request is known, as its format is
+        # negotiated with client
+        if not self.prepared:
+            await self._render(request)
+            self._maybe_enable_compression(request)
+
+        return (await super().prepare(request))
+
+    async def _render(self, request: web.Request) -> Awaitable[None]:
+        codec, compact_types = negotiate_codec(request)
+        body = await encode_payload(
+            request,
+            self._payload,
+            codec=codec,
+            indent=self._indent,
+            compact_types=compact_types,
+        )
+
+        if codec.is_binary:
+            self.charset = None
+            self.content_type = codec.media_type
+        else:
+            body += b'\n'
+
+        self.body = body
+        self.headers['Vary'] = VARY
+
+    def _maybe_enable_compression(self, request: web.Request) -> None:
+        maybe_enable_compression(self, request)
+
 
 class RESTSuccess(RESTResponse):
     status = 200
 
 
+class RESTCacheableSuccess(RESTSuccess):
+    """
+    Successful response which can be cached by clients.
+
+    If version of data is known, response carries ETag derived from it and
+    is put to cache of rendered responses. Status is changed to ``304`` if
+    client already has same representation. Data without versions is not
+    validated by ETags, as data would have to be retrieved anyway.
+
+    """
+
+    def __init__(
+        self,
+        payload: Any=None,
+        pretty: bool=False,
+        version: Optional[str]=None,
+        max_age: Optional[int]=None,
+        **kwargs
+    ):
+        super().__init__(payload=payload, pretty=pretty, **kwargs)
+
+        self._version = version
+        self._max_age = max_age
+        self._is_not_modified = False
+
+    async def _render(self, request: web.Request) -> Awaitable[None]:
+        await super()._render(request)
+
+        self.headers['Cache-Control'] = get_cache_control(self._max_age)
+
+        if self._version is None:
+            return
+
+        etag = make_etag(request, self._version)
+        self._maybe_cache(request, etag)
+        self.headers['ETag'] = etag
+
+        if is_not_modified(request, etag):
+            self._is_not_modified = True
+            self.set_status(RESTNotModified.status)
+
+    def _maybe_cache(self, request: web.Request, etag: str) -> None:
+        cache = request.app.get('rendered_responses_cache')
+        if cache is not None:
+            cache.put(get_cache_key(request), RenderedResponse(
+                version=self._version,
+                etag=etag,
+                body=self.body,
+                content_type=self.content_type,
+                charset=self.charset,
+            ))
+
+    def _maybe_enable_compression(self, request: web.Request) -> None:
+        if not self._is_not_modified:
+            super()._maybe_enable_compression(request)
+
+
 class RESTBadRequest(RESTResponse):
     status = 400
     detail = "Bad request"
@@ -62,9 +455,226 @@ class RESTNotFound(RESTBadRequest):
     detail = "Resource not found"
 
 
+class RESTConflict(RESTBadRequest):
+    status = 409
+    detail = "Conflict"
+
+
 class RESTInternalServerError(RESTResponse):
     status = 500
     detail = (
         "The server encountered an unexpected condition that prevented it "
         "from fulfilling the request"
     )
+
+
+class RESTStreamingSuccess(web.StreamResponse):
+    """
+    Successful response with payload which is encoded incrementally and is
+    sent by chunks via chunked transfer encoding.
+
+    Not more than ``chunk_size`` bytes of encoded payload are buffered at a
+    time, and control is passed to event loop between chunks, so very large
+    payloads neither block other requests nor inflate memory usage.
+
+    Only JSON is encoded incrementally. Payload is encoded at once for other
+    formats, but is still sent by chunks.
+
+    """
+
+    def __init__(
+        self,
+        payload: Any,
+        pretty: bool=False,
+        chunk_size: int=DEFAULT_STREAMING_CHUNK_SIZE,
+        etag: Optional[str]=None,
+        max_age: Optional[int]=None,
+        **kwargs
+    ):
+        headers = kwargs.pop('headers', None) or {}
+        headers['Vary'] = VARY
+
+        if etag:
+            headers['ETag'] = etag
+            headers['Cache-Control'] = get_cache_control(max_age)
+
+        kwargs.setdefault('status', 200)
+        super().__init__(headers=headers, **kwargs)
+
+        self._payload = payload
+        self._indent = 2 if pretty else None
+        self._chunk_size = chunk_size
+
+    async def prepare(self, request: web.Request) -> Awaitable[Any]:
+        if self.prepared:
+            return (await super().prepare(request))
+
+        codec, compact_types = negotiate_codec(request)
+
+        self.content_type = codec.media_type
+        if not codec.is_binary:
+            self.charset = 'utf-8'
+
+        self.enable_chunked_encoding()
+
+        if get_compression_min_size(request) is not None:
+            # size of body is unknown in advance
+            self.enable_compression()
+
+        writer = await super().prepare(request)
+
+        if request.method == 'HEAD':
+            return writer
+
+        if codec.is_binary:
+            body = await encode_payload(
+                request,
+                self._payload,
+                codec=codec,
+                compact_types=compact_types,
+            )
+            chunks = (
+                body[i:i + self._chunk_size]
+                for i in range(0, len(body), self._chunk_size)
+            )
+        else:
+            chunks = self._iter_json_chunks(compact_types)
+
+        for chunk in chunks:
+            self.write(chunk)
+            await self.drain()
+            await asyncio.sleep(0)
+
+        return writer
+
+    def _iter_json_chunks(self, compact_types: bool) -> Iterator[bytes]:
+        buffer = []
+        size = 0
+
+        for item in json.iterencode(
+            self._payload,
+            indent=self._indent,
+            compact_types=compact_types,
+        ):
+            buffer.append(item)
+            size += len(item)
+
+            if size >= self._chunk_size:
+                yield ''.join(buffer).encode()
+                buffer.clear()
+                size = 0
+
+        buffer.append('\n')
+        yield ''.join(buffer).encode()
+
+
+class RESTNotModified(web.Response):
+    status = 304
+
+    def __init__(self, etag: str, max_age: Optional[int]=None, **kwargs):
+        headers = kwargs.pop('headers', None) or {}
+        headers.update({
+            'ETag': etag,
+            'Cache-Control': get_cache_control(max_age),
+            'Vary': VARY,
+        })
+        super().__init__(status=self.status, headers=headers, **kwargs)
+
+
+class RESTRenderedSuccess(web.Response):
+    """
+    Successful response with body taken from cache of rendered responses.
+
+    """
+
+    def __init__(
+        self,
+        entry: RenderedResponse,
+        max_age: Optional[int]=None,
+        **kwargs
+    ):
+        headers = kwargs.pop('headers', None) or {}
+        headers.update({
+            'ETag': entry.etag,
+            'Cache-Control': get_cache_control(max_age),
+            'Vary': VARY,
+        })
+        kwargs.setdefault('status', 200)
+
+        super().__init__(
+            body=entry.body,
+            headers=headers,
+            content_type=entry.content_type,
+            charset=entry.charset,
+            **kwargs
+        )
+
+    async def prepare(self, request: web.Request) -> Awaitable[Any]:
+        if not self.prepared:
+            maybe_enable_compression(self, request)
+
+        return (await super().prepare(request))
+
+
+class RESTEncodedSuccess(web.Response):
+    """
+    Successful response with payload which was encoded in advance.
+
+    Compressed copy of payload is sent if client accepts gzip or deflate
+    encoding and if payload is not smaller than ``compression_min_size``.
+    Compressed copies are cached by payload, so hot payloads are compressed
+    only once.
+
+    """
+
+    def __init__(
+        self,
+        payload: EncodedPayload,
+        accept_encoding: str='',
+        codec: Optional[Codec]=None,
+        compact_types: bool=False,
+        compression_min_size: Optional[int]=0,
+        etag: Optional[str]=None,
+        max_age: Optional[int]=None,
+        charset: str='utf-8',
+        **kwargs
+    ):
+        codec = codec or DEFAULT_CODEC
+
+        headers = kwargs.pop('headers', None) or {}
+        headers['Vary'] = VARY
+
+        if etag:
+            headers['ETag'] = etag
+            headers['Cache-Control'] = get_cache_control(max_age)
+
+        body = payload.get_encoded(
+            codec=codec,
+            compact_types=compact_types,
+        )
+
+        if (
+            compression_min_size is not None
+            and len(body) >= compression_min_size
+        ):
+            content_encoding = negotiate_content_encoding(accept_encoding)
+            if content_encoding:
+                body = payload.get_encoded(
+                    codec=codec,
+                    compact_types=compact_types,
+                    content_encoding=content_encoding,
+                )
+                headers['Content-Encoding'] = content_encoding
+
+        kwargs.setdefault('status', 200)
+        kwargs.setdefault('content_type', codec.media_type)
+
+        if codec.is_binary:
+            charset = None
+
+        super().__init__(
+            body=body,
+            headers=headers,
+            charset=charset,
+            **kwargs
+        )
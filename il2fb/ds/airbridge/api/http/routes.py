@@ -13,6 +13,9 @@ from il2fb.ds.airbridge.api.http.views.streaming import StreamingView
 def setup_routes(router: AbstractRouter) -> None:
     router.add_get('/', misc.get_health)
     router.add_get('/info', misc.get_server_info)
+    router.add_post('/batch', misc.execute_batch)
+    router.add_get('/metrics', misc.get_metrics)
+    router.add_get('/schema/types', misc.get_types_schema)
     router.add_get('/streaming', StreamingView)
 
     _setup_humans_routes(router)
@@ -67,6 +70,9 @@ def _setup_missions_routes(router: AbstractRouter) -> None:
     router.add_post(
         '/missions/{file_path:[^{}]+\.mis}/load', missions.load_mission,
     )
+    router.add_get(
+        '/missions/{file_path:[^{}]+\.mis}/status', missions.get_mission_status,
+    )
     router.add_delete(
         '/missions/{file_path:[^{}]+\.mis}', missions.delete_mission,
     )
@@ -85,6 +91,48 @@ def _setup_missions_routes(router: AbstractRouter) -> None:
     router.add_get(
         '/missions', missions.browse_missions,
     )
+    router.add_get(
+        '/missions-search', missions.search_missions,
+    )
+    router.add_post(
+        '/missions-manifest', missions.reconcile_missions_manifest,
+    )
+    router.add_post(
+        '/missions-uploads', missions.open_missions_upload,
+    )
+    router.add_get(
+        '/missions-uploads/{upload_id:[0-9a-f]+}', missions.get_missions_upload,
+    )
+    router.add_patch(
+        '/missions-uploads/{upload_id:[0-9a-f]+}', missions.write_missions_upload,
+    )
+    router.add_delete(
+        '/missions-uploads/{upload_id:[0-9a-f]+}', missions.abort_missions_upload,
+    )
+    router.add_get(
+        '/missions-rotation', missions.get_missions_rotation,
+    )
+    router.add_post(
+        '/missions-rotation/start', missions.start_missions_rotation,
+    )
+    router.add_post(
+        '/missions-rotation/stop', missions.stop_missions_rotation,
+    )
+    router.add_post(
+        '/missions-rotation/skip', missions.skip_rotated_mission,
+    )
+    router.add_get(
+        '/missions-archive/{dir_path:[^{}]+}', missions.download_missions_archive,
+    )
+    router.add_post(
+        '/missions-archive/{dir_path:[^{}]+}', missions.upload_missions_archive,
+    )
+    router.add_get(
+        '/missions-archive', missions.download_missions_archive,
+    )
+    router.add_post(
+        '/missions-archive', missions.upload_missions_archive,
+    )
 
 
 def _setup_radar_routes(router: AbstractRouter) -> None:
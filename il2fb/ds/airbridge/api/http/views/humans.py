@@ -3,8 +3,10 @@
 import logging
 
 from il2fb.ds.airbridge.api.http.responses.rest import RESTBadRequest
+from il2fb.ds.airbridge.api.http.responses.rest import RESTCacheableSuccess
 from il2fb.ds.airbridge.api.http.responses.rest import RESTInternalServerError
 from il2fb.ds.airbridge.api.http.responses.rest import RESTSuccess
+from il2fb.ds.airbridge.api.http.responses.rest import get_max_age
 from il2fb.ds.airbridge.api.http.security import with_authorization
 
 
@@ -35,7 +37,11 @@ async def get_humans_list(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=items, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=items,
+            pretty=pretty,
+            max_age=get_max_age(request, 'humans'),
+        )
 
 
 @with_authorization
@@ -62,7 +68,11 @@ async def get_humans_count(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=result,
+            pretty=pretty,
+            max_age=get_max_age(request, 'humans'),
+        )
 
 
 @with_authorization
@@ -93,7 +103,11 @@ async def get_humans_statistics(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=items, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=items,
+            pretty=pretty,
+            max_age=get_max_age(request, 'humans'),
+        )
 
 
 @with_authorization
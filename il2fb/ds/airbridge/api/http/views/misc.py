@@ -2,9 +2,14 @@
 
 import logging
 
+from il2fb.ds.airbridge import json
 from il2fb.ds.airbridge.api.http.responses.rest import RESTBadRequest
+from il2fb.ds.airbridge.api.http.responses.rest import RESTCacheableSuccess
 from il2fb.ds.airbridge.api.http.responses.rest import RESTInternalServerError
 from il2fb.ds.airbridge.api.http.responses.rest import RESTSuccess
+from il2fb.ds.airbridge.api.http.responses.rest import get_instance_version
+from il2fb.ds.airbridge.api.http.responses.rest import get_max_age
+from il2fb.ds.airbridge.api.http.security import with_authorization
 
 
 LOG = logging.getLogger(__name__)
@@ -17,6 +22,17 @@ async def get_health(request):
     return RESTSuccess(payload=payload, pretty=pretty)
 
 
+async def get_types_schema(request):
+    pretty = 'pretty' in request.query
+    payload = json.type_tags.to_primitive()
+
+    return RESTCacheableSuccess(
+        payload=payload,
+        pretty=pretty,
+        version=get_instance_version(payload['version']),
+    )
+
+
 async def get_server_info(request):
     pretty = 'pretty' in request.query
     timeout = request.query.get('timeout')
@@ -39,5 +55,120 @@ async def get_server_info(request):
             detail="failed to get server info",
             pretty=pretty,
         )
+    else:
+        return RESTCacheableSuccess(
+            payload=result,
+            pretty=pretty,
+            max_age=get_max_age(request, 'server_info'),
+        )
+
+
+@with_authorization
+async def execute_batch(request):
+    pretty = 'pretty' in request.query
+
+    try:
+        body = await request.json(loads=json.loads)
+        items = body['operations']
+        timeout = body.get('timeout')
+
+        if timeout is not None:
+            timeout = float(timeout)
+
+    except Exception:
+        LOG.exception("HTTP failed to execute batch: incorrect input data")
+        return RESTBadRequest(
+            detail="incorrect input data",
+            pretty=pretty,
+        )
+
+    try:
+        result = await request.app['batch_executor'].execute(items, timeout)
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        LOG.exception("HTTP failed to execute batch: incorrect input data")
+        return RESTBadRequest(
+            detail=(str(e) or "incorrect input data"),
+            pretty=pretty,
+        )
+    except Exception:
+        LOG.exception("HTTP failed to execute batch")
+        return RESTInternalServerError(
+            detail="failed to execute batch",
+            pretty=pretty,
+        )
     else:
         return RESTSuccess(payload=result, pretty=pretty)
+
+
+@with_authorization
+async def get_metrics(request):
+    pretty = 'pretty' in request.query
+    payload = {}
+
+    radar = request.app.get('radar')
+    if radar is not None:
+        payload['radar'] = radar.get_stats()
+
+    radar_stream = request.app.get('radar_stream')
+    if radar_stream is not None:
+        payload['radar_stream'] = radar_stream.get_stats()
+
+    stationary_actors_cache = request.app.get('stationary_actors_cache')
+    if stationary_actors_cache is not None:
+        payload['stationary_actors_cache'] = (
+            stationary_actors_cache.get_stats()
+        )
+
+    scheduler = request.app.get('serialization_scheduler')
+    if scheduler is not None:
+        payload['serialization'] = scheduler.get_stats()
+
+    storage = request.app.get('missions_storage')
+    if storage is not None:
+        payload['missions_storage'] = storage.get_stats()
+
+    parsed_missions_cache = request.app.get('parsed_missions_cache')
+    if parsed_missions_cache is not None:
+        payload['parsed_missions_cache'] = parsed_missions_cache.get_stats()
+
+    missions_index = request.app.get('missions_index')
+    if missions_index is not None:
+        payload['missions_index'] = missions_index.get_stats()
+
+    missions_search_index = request.app.get('missions_search_index')
+    if missions_search_index is not None:
+        payload['missions_search_index'] = missions_search_index.get_stats()
+
+    missions_content_index = request.app.get('missions_content_index')
+    if missions_content_index is not None:
+        payload['missions_content_index'] = missions_content_index.get_stats()
+
+    missions_uploads = request.app.get('missions_uploads')
+    if missions_uploads is not None:
+        payload['missions_uploads'] = missions_uploads.get_stats()
+
+    missions_archiver = request.app.get('missions_archiver')
+    if missions_archiver is not None:
+        payload['missions_archiver'] = missions_archiver.get_stats()
+
+    console_queries_cache = request.app.get('console_queries_cache')
+    if console_queries_cache is not None:
+        payload['console_queries_cache'] = console_queries_cache.get_stats()
+
+    batch_executor = request.app.get('batch_executor')
+    if batch_executor is not None:
+        payload['batch'] = batch_executor.get_stats()
+
+    missions_rotator = request.app.get('missions_rotator')
+    if missions_rotator is not None:
+        payload['missions_rotator'] = missions_rotator.get_stats()
+
+    cache = request.app.get('rendered_responses_cache')
+    if cache is not None:
+        payload['rendered_responses_cache'] = {
+            'size': len(cache),
+            'hits_count': cache.hits_count,
+            'misses_count': cache.misses_count,
+        }
+
+    return RESTSuccess(payload=payload, pretty=pretty)
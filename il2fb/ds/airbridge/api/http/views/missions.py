@@ -1,16 +1,46 @@
 # coding: utf-8
 
 import logging
-import re
+import os
+import posixpath
+import time
 
-from stat import S_ISREG, S_ISDIR
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, List, Optional
 
+from aiohttp import web
 from aiohttp.web import FileResponse
 
+from il2fb.ds.airbridge import json
+
+from il2fb.ds.airbridge.missions.archives import ARCHIVE_MEDIA_TYPES
+from il2fb.ds.airbridge.missions.archives import DEFAULT_ARCHIVE_FORMAT
+from il2fb.ds.airbridge.missions.content import UploadOffsetMismatch
+from il2fb.ds.airbridge.missions.content import load_manifest
+from il2fb.ds.airbridge.missions.index import browse_tree
+from il2fb.ds.airbridge.missions.index import normalize_relative_path
+from il2fb.ds.airbridge.missions.index import scan_directory
+from il2fb.ds.airbridge.missions.index import scan_tree
+from il2fb.ds.airbridge.missions.rotation import load_playlist
+from il2fb.ds.airbridge.missions.search import MissionsSearchQuery
+from il2fb.ds.airbridge.missions.storage import DEFAULT_UPLOAD_BUFFER_SIZE
+from il2fb.ds.airbridge.missions.storage import is_mission_file_name
+
+from il2fb.ds.airbridge.api.http.caching import get_stat_version
 from il2fb.ds.airbridge.api.http.responses.rest import RESTBadRequest
+from il2fb.ds.airbridge.api.http.responses.rest import RESTCacheableSuccess
+from il2fb.ds.airbridge.api.http.responses.rest import RESTConflict
 from il2fb.ds.airbridge.api.http.responses.rest import RESTInternalServerError
 from il2fb.ds.airbridge.api.http.responses.rest import RESTNotFound
+from il2fb.ds.airbridge.api.http.responses.rest import RESTNotModified
 from il2fb.ds.airbridge.api.http.responses.rest import RESTSuccess
+from il2fb.ds.airbridge.api.http.responses.rest import get_cache_control
+from il2fb.ds.airbridge.api.http.responses.rest import get_cached_response
+from il2fb.ds.airbridge.api.http.responses.rest import get_max_age
+from il2fb.ds.airbridge.api.http.responses.rest import is_not_modified
+from il2fb.ds.airbridge.api.http.responses.rest import make_etag
+from il2fb.ds.airbridge.api.http.responses.rest import make_streaming_success
+from il2fb.ds.airbridge.api.http.responses.rest import should_stream
 from il2fb.ds.airbridge.api.http.security import with_authorization
 
 
@@ -20,11 +50,25 @@ LOG = logging.getLogger(__name__)
 @with_authorization
 async def browse_missions(request):
     pretty = 'pretty' in request.query
-    root_dir = request.app['dedicated_server'].missions_dir
+    recursive = 'recursive' in request.query
+    details = 'details' in request.query
+    prefix = request.query.get('prefix')
+    offset = request.query.get('offset')
+    limit = request.query.get('limit')
 
     try:
-        relative_dir = request.match_info.get('dir_path', '')
-        absolute_dir = (root_dir / relative_dir).resolve()
+        relative_dir = normalize_relative_path(
+            request.match_info.get('dir_path', '')
+        )
+
+        offset = int(offset) if offset is not None else 0
+        if offset < 0:
+            raise ValueError("offset must be non-negative")
+
+        if limit is not None:
+            limit = int(limit)
+            if limit < 0:
+                raise ValueError("limit must be non-negative")
     except Exception:
         LOG.exception("HTTP failed to browse missions: incorrect input data")
         return RESTBadRequest(
@@ -33,32 +77,85 @@ async def browse_missions(request):
         )
 
     try:
-        dirs = []
-        files = []
+        result = await _browse_missions(
+            request, relative_dir, recursive, prefix, offset, limit, details,
+        )
+    except Exception:
+        LOG.exception("HTTP failed to browse missions")
+        return RESTInternalServerError(
+            detail="failed to browse missions",
+            pretty=pretty,
+        )
+
+    if result is None:
+        return RESTNotFound(pretty=pretty)
+
+    return RESTSuccess(payload=result, pretty=pretty)
+
+
+async def _browse_missions(
+    request: web.Request,
+    relative_dir: str,
+    recursive: bool,
+    prefix: Optional[str],
+    offset: int,
+    limit: Optional[int],
+    details: bool,
+) -> Awaitable[Optional[dict]]:
 
-        result = {
-            'dirs': dirs,
-            'files': files
-        }
+    index = request.app.get('missions_index')
 
-        for node in absolute_dir.iterdir():
-            st_mode = node.stat().st_mode
+    if index is not None and index.is_ready:
+        return index.browse(
+            relative_dir, recursive, prefix, offset, limit, details,
+        )
+
+    # directory is scanned on demand until index is built or if it's disabled
+    storage = request.app['missions_storage']
+
+    if recursive:
+        dirs = await storage.run(scan_tree, storage.root_dir, relative_dir)
+    else:
+        directory = await storage.run(
+            scan_directory, storage.root_dir / relative_dir,
+        )
+        dirs = {relative_dir: directory} if directory else {}
 
-            if S_ISDIR(st_mode):
-                dirs.append(node.name)
-            elif (
-                S_ISREG(st_mode) and
-                node.suffix.lower() in {'.mis', '.properties'}
-            ):
-                files.append(node.name)
+    return browse_tree(
+        dirs, relative_dir, recursive, prefix, offset, limit, details,
+    )
 
-        dirs.sort()
-        files.sort()
 
+@with_authorization
+async def search_missions(request):
+    pretty = 'pretty' in request.query
+    search_index = request.app.get('missions_search_index')
+
+    if search_index is None:
+        return RESTNotFound(
+            detail="search of missions is disabled",
+            pretty=pretty,
+        )
+
+    try:
+        query = MissionsSearchQuery({
+            key: value
+            for key, value in request.query.items()
+            if key != 'pretty'
+        })
     except Exception:
-        LOG.exception("HTTP failed to browse missions")
+        LOG.exception("HTTP failed to search missions: incorrect input data")
+        return RESTBadRequest(
+            detail="incorrect input data",
+            pretty=pretty,
+        )
+
+    try:
+        result = search_index.search(query)
+    except Exception:
+        LOG.exception("HTTP failed to search missions")
         return RESTInternalServerError(
-            detail="failed to browse missions",
+            detail="failed to search missions",
             pretty=pretty,
         )
     else:
@@ -70,11 +167,11 @@ async def get_mission(request):
     pretty = 'pretty' in request.query
     as_json = 'json' in request.query
 
-    root_dir = request.app['dedicated_server'].missions_dir
+    storage = request.app['missions_storage']
 
     try:
         relative_path = request.match_info['file_path']
-        absolute_path = (root_dir / relative_path)
+        absolute_path = (storage.root_dir / relative_path)
     except Exception:
         LOG.exception("HTTP failed to get mission: incorrect input data")
         return RESTBadRequest(
@@ -82,12 +179,29 @@ async def get_mission(request):
             pretty=pretty,
         )
 
-    if not absolute_path.exists():
+    try:
+        stat = await storage.stat(absolute_path)
+    except Exception:
+        LOG.exception(f"HTTP failed to get mission `{absolute_path}`")
+        return RESTInternalServerError(
+            detail="failed to get mission",
+            pretty=pretty,
+        )
+
+    if stat is None:
         return RESTNotFound()
 
+    version = get_stat_version(stat)
+
+    max_age = get_max_age(request, 'missions')
+
     if as_json:
+        response = get_cached_response(request, version, max_age)
+        if response is not None:
+            return response
+
         try:
-            result = request.app['mission_parser'].parse(str(absolute_path))
+            result = await _parse_mission(request, absolute_path, stat)
         except Exception:
             LOG.exception(f"HTTP failed to parse mission `{absolute_path}`")
             return RESTInternalServerError(
@@ -95,19 +209,97 @@ async def get_mission(request):
                 pretty=pretty,
             )
         else:
-            return RESTSuccess(payload=result, pretty=pretty)
+            # size of mission file is used as estimation of size of
+            # response, as parsed mission is not smaller than its source
+            if should_stream(request, stat.st_size):
+                return make_streaming_success(
+                    request,
+                    payload=result,
+                    pretty=pretty,
+                    version=version,
+                    max_age=max_age,
+                )
+
+            return RESTCacheableSuccess(
+                payload=result,
+                pretty=pretty,
+                version=version,
+                max_age=max_age,
+            )
     else:
-        return FileResponse(absolute_path)
+        etag = make_etag(request, version)
+        if is_not_modified(request, etag):
+            return RESTNotModified(etag=etag, max_age=max_age)
+
+        response = FileResponse(absolute_path)
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = get_cache_control(max_age)
+        return response
+
+
+def _parse_mission(
+    request: web.Request,
+    path: Path,
+    stat: os.stat_result,
+) -> Awaitable[Any]:
+
+    parsed_missions_cache = request.app.get('parsed_missions_cache')
+
+    if parsed_missions_cache is None:
+        return request.app['missions_storage'].parse(
+            path, request.app['mission_parser'],
+        )
+
+    return parsed_missions_cache.get(path, stat)
+
+
+@with_authorization
+async def get_mission_status(request):
+    pretty = 'pretty' in request.query
+    storage = request.app['missions_storage']
+    validator = request.app.get('missions_validator')
+
+    if validator is None:
+        return RESTNotFound(
+            detail="validation of missions is disabled",
+            pretty=pretty,
+        )
+
+    try:
+        relative_path = request.match_info['file_path']
+        absolute_path = (storage.root_dir / relative_path)
+    except Exception:
+        LOG.exception(
+            "HTTP failed to get mission status: incorrect input data"
+        )
+        return RESTBadRequest(
+            detail="incorrect input data",
+            pretty=pretty,
+        )
+
+    try:
+        result = await validator.get_result(absolute_path)
+    except Exception:
+        LOG.exception(f"HTTP failed to get status of mission `{absolute_path}`")
+        return RESTInternalServerError(
+            detail="failed to get mission status",
+            pretty=pretty,
+        )
+
+    if result is None:
+        return RESTNotFound(pretty=pretty)
+
+    return RESTSuccess(payload=result.to_primitive(), pretty=pretty)
 
 
 @with_authorization
 async def upload_mission(request):
     pretty = 'pretty' in request.query
-    root_dir = request.app['dedicated_server'].missions_dir
+    storage = request.app['missions_storage']
 
     try:
         relative_dir = request.match_info.get('dir_path', '')
-        absolute_dir = (root_dir / relative_dir)
+        absolute_dir = (storage.root_dir / relative_dir)
     except Exception:
         LOG.exception(
             "HTTP failed to upload mission: incorrect input data"
@@ -117,9 +309,6 @@ async def upload_mission(request):
             pretty=pretty,
         )
 
-    if not absolute_dir.exists():
-        absolute_dir.mkdir(parents=True, exist_ok=True)
-
     try:
         reader = await request.multipart()
     except Exception:
@@ -129,46 +318,388 @@ async def upload_mission(request):
             pretty=pretty,
         )
 
+    upload = storage.begin_upload(absolute_dir)
+
     try:
         while True:
             part = await reader.next()
             if not part:
                 break
 
-            absolute_file = absolute_dir / part.filename
-
-            if absolute_file.suffix.lower() not in {'.mis', '.properties'}:
+            if not is_mission_file_name(part.filename):
+                await upload.abort()
                 return RESTBadRequest(
                     detail="incorrect input data",
                     pretty=pretty,
                 )
 
-            # may rewrite existing file
-            with open(absolute_file, 'wb') as f:
-                while True:
-                    chunk = await part.read_chunk()
-                    if chunk:
-                        f.write(chunk)
-                    else:
-                        break
+            await upload.add_file(part.filename)
+
+            while True:
+                chunk = await part.read_chunk()
+                if chunk:
+                    await upload.write(chunk)
+                else:
+                    break
+
+        # may rewrite existing files
+        paths = await upload.commit()
     except Exception:
         LOG.exception("HTTP failed to upload mission")
+        await upload.abort()
         return RESTInternalServerError(
             detail="failed to upload mission",
             pretty=pretty,
         )
     else:
+        index = request.app.get('missions_index')
+        if index is not None:
+            index.invalidate_path(absolute_dir)
+
+        _maybe_validate_missions(request, paths)
         return RESTSuccess(pretty=pretty)
 
 
+@with_authorization
+async def reconcile_missions_manifest(request):
+    pretty = 'pretty' in request.query
+    content_index = request.app.get('missions_content_index')
+
+    if content_index is None:
+        return RESTNotFound(
+            detail="content index of missions is disabled",
+            pretty=pretty,
+        )
+
+    try:
+        body = await request.json(loads=json.loads)
+        manifest = load_manifest(body['files'])
+        reuse = bool(body.get('reuse', True))
+    except Exception:
+        LOG.exception(
+            "HTTP failed to reconcile manifest of missions: incorrect input "
+            "data"
+        )
+        return RESTBadRequest(
+            detail="incorrect input data",
+            pretty=pretty,
+        )
+
+    try:
+        result = await content_index.reconcile(manifest, reuse=reuse)
+    except Exception:
+        LOG.exception("HTTP failed to reconcile manifest of missions")
+        return RESTInternalServerError(
+            detail="failed to reconcile manifest of missions",
+            pretty=pretty,
+        )
+    else:
+        root_dir = request.app['missions_storage'].root_dir
+        _maybe_validate_missions(request, [
+            root_dir / relative_path
+            for relative_path in result['reused']
+        ])
+        return RESTSuccess(payload=result, pretty=pretty)
+
+
+@with_authorization
+async def open_missions_upload(request):
+    pretty = 'pretty' in request.query
+    uploads = request.app.get('missions_uploads')
+
+    if uploads is None:
+        return RESTNotFound(
+            detail="resumable uploads of missions are disabled",
+            pretty=pretty,
+        )
+
+    try:
+        body = await request.json(loads=json.loads)
+        session = await uploads.open(
+            relative_path=body['path'],
+            sha256=str(body['sha256']),
+            size=int(body['size']),
+        )
+    except Exception:
+        LOG.exception(
+            "HTTP failed to open upload of mission: incorrect input data"
+        )
+        return RESTBadRequest(
+            detail="incorrect input data",
+            pretty=pretty,
+        )
+    else:
+        return RESTSuccess(payload=session.to_primitive(), pretty=pretty)
+
+
+@with_authorization
+async def get_missions_upload(request):
+    pretty = 'pretty' in request.query
+    uploads = request.app.get('missions_uploads')
+    session = uploads and uploads.get(request.match_info['upload_id'])
+
+    if session is None:
+        return RESTNotFound(pretty=pretty)
+
+    return RESTSuccess(payload=session.to_primitive(), pretty=pretty)
+
+
+@with_authorization
+async def write_missions_upload(request):
+    pretty = 'pretty' in request.query
+    uploads = request.app.get('missions_uploads')
+
+    if uploads is None:
+        return RESTNotFound(pretty=pretty)
+
+    try:
+        upload_id = request.match_info['upload_id']
+        offset = int(request.headers['Upload-Offset'])
+    except Exception:
+        LOG.exception(
+            "HTTP failed to write upload of mission: incorrect input data"
+        )
+        return RESTBadRequest(
+            detail="incorrect input data",
+            pretty=pretty,
+        )
+
+    try:
+        session = await uploads.write(
+            upload_id=upload_id,
+            offset=offset,
+            chunks=_iter_body(request),
+        )
+    except UploadOffsetMismatch as e:
+        return RESTConflict(
+            payload={'offset': e.offset, },
+            detail=str(e),
+            pretty=pretty,
+        )
+    except ValueError as e:
+        LOG.exception("HTTP failed to write upload of mission")
+        return RESTBadRequest(
+            detail=str(e),
+            pretty=pretty,
+        )
+    except Exception:
+        LOG.exception("HTTP failed to write upload of mission")
+        return RESTInternalServerError(
+            detail="failed to write upload of mission",
+            pretty=pretty,
+        )
+
+    if session is None:
+        return RESTNotFound(pretty=pretty)
+
+    payload = session.to_primitive()
+    payload['is_complete'] = session.is_complete
+
+    if session.is_complete:
+        _maybe_validate_missions(request, [
+            request.app['missions_storage'].root_dir / session.relative_path,
+        ])
+
+    return RESTSuccess(payload=payload, pretty=pretty)
+
+
+async def _iter_body(request) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await request.content.read(DEFAULT_UPLOAD_BUFFER_SIZE)
+        if not chunk:
+            break
+
+        yield chunk
+
+
+@with_authorization
+async def abort_missions_upload(request):
+    pretty = 'pretty' in request.query
+    uploads = request.app.get('missions_uploads')
+
+    try:
+        is_found = uploads is not None and (await uploads.abort(
+            request.match_info['upload_id'],
+        ))
+    except Exception:
+        LOG.exception("HTTP failed to abort upload of mission")
+        return RESTInternalServerError(
+            detail="failed to abort upload of mission",
+            pretty=pretty,
+        )
+
+    if not is_found:
+        return RESTNotFound(pretty=pretty)
+
+    return RESTSuccess(pretty=pretty)
+
+
+def _maybe_validate_missions(request, paths: List[Path]) -> None:
+    paths = [path for path in paths if path.suffix.lower() == '.mis']
+
+    # parsing of missions during validation warms up cache as well
+    validator = request.app.get('missions_validator')
+    parsed_missions_cache = request.app.get('parsed_missions_cache')
+
+    if validator is not None:
+        validator.submit(paths)
+    elif parsed_missions_cache is not None:
+        parsed_missions_cache.prewarm(paths)
+
+
+@with_authorization
+async def download_missions_archive(request):
+    pretty = 'pretty' in request.query
+    archiver = request.app.get('missions_archiver')
+
+    if archiver is None:
+        return RESTNotFound(
+            detail="archives of missions are disabled",
+            pretty=pretty,
+        )
+
+    try:
+        relative_dir = normalize_relative_path(
+            request.match_info.get('dir_path', '')
+        )
+        archive_format = request.query.get('format', DEFAULT_ARCHIVE_FORMAT)
+        media_type = ARCHIVE_MEDIA_TYPES[archive_format]
+    except Exception:
+        LOG.exception(
+            "HTTP failed to download archive of missions: incorrect input data"
+        )
+        return RESTBadRequest(
+            detail="incorrect input data",
+            pretty=pretty,
+        )
+
+    try:
+        relative_paths = await archiver.list_files(relative_dir)
+    except Exception:
+        LOG.exception("HTTP failed to download archive of missions")
+        return RESTInternalServerError(
+            detail="failed to download archive of missions",
+            pretty=pretty,
+        )
+
+    if relative_paths is None:
+        return RESTNotFound(pretty=pretty)
+
+    file_name = posixpath.basename(relative_dir) or 'missions'
+
+    response = web.StreamResponse(headers={
+        'Content-Disposition': (
+            f'attachment; filename="{file_name}.{archive_format}"'
+        ),
+    })
+    response.content_type = media_type
+    response.enable_chunked_encoding()
+
+    started_at = time.perf_counter()
+    stream = archiver.stream(relative_dir, relative_paths, archive_format)
+
+    await response.prepare(request)
+    stream.start()
+
+    try:
+        while True:
+            chunk = await stream.read()
+            if not chunk:
+                break
+
+            response.write(chunk)
+            await response.drain()
+    except Exception:
+        # response is already started, so connection is dropped and client
+        # does not take partial archive as complete one
+        LOG.exception("HTTP failed to stream archive of missions")
+        raise
+    finally:
+        stream.close()
+
+    duration = time.perf_counter() - started_at
+    archiver.record_download(stream.size, duration)
+
+    LOG.info(
+        f"HTTP archive of missions `{relative_dir or '.'}` was sent "
+        f"(size={stream.size}, duration={duration:.3f}s, "
+        f"throughput={stream.size / (duration or 1):.0f}B/s)"
+    )
+
+    return response
+
+
+@with_authorization
+async def upload_missions_archive(request):
+    pretty = 'pretty' in request.query
+    archiver = request.app.get('missions_archiver')
+
+    if archiver is None:
+        return RESTNotFound(
+            detail="archives of missions are disabled",
+            pretty=pretty,
+        )
+
+    storage = request.app['missions_storage']
+
+    try:
+        relative_dir = normalize_relative_path(
+            request.match_info.get('dir_path', '')
+        )
+        archive_format = request.query.get('format', DEFAULT_ARCHIVE_FORMAT)
+        if archive_format not in ARCHIVE_MEDIA_TYPES:
+            raise ValueError(f"unknown format of archive '{archive_format}'")
+    except Exception:
+        LOG.exception(
+            "HTTP failed to upload archive of missions: incorrect input data"
+        )
+        return RESTBadRequest(
+            detail="incorrect input data",
+            pretty=pretty,
+        )
+
+    try:
+        result = await archiver.extract(
+            relative_dir=relative_dir,
+            chunks=_iter_body(request),
+            archive_format=archive_format,
+        )
+    except ValueError as e:
+        LOG.exception("HTTP failed to upload archive of missions")
+        return RESTBadRequest(
+            detail=str(e),
+            pretty=pretty,
+        )
+    except Exception:
+        LOG.exception("HTTP failed to upload archive of missions")
+        return RESTInternalServerError(
+            detail="failed to upload archive of missions",
+            pretty=pretty,
+        )
+
+    paths = [
+        storage.root_dir / relative_path
+        for relative_path in result['files']
+    ]
+
+    index = request.app.get('missions_index')
+    if index is not None:
+        for dir_path in {path.parent for path in paths}:
+            index.invalidate_path(dir_path)
+
+    _maybe_validate_missions(request, paths)
+
+    return RESTSuccess(payload=result, pretty=pretty)
+
+
 @with_authorization
 async def delete_mission(request):
     pretty = 'pretty' in request.query
-    root_dir = request.app['dedicated_server'].missions_dir
+    storage = request.app['missions_storage']
 
     try:
         relative_path = request.match_info['file_path']
-        absolute_path = (root_dir / relative_path)
+        absolute_path = (storage.root_dir / relative_path)
     except Exception:
         LOG.exception("HTTP failed to delete mission: incorrect input data")
         return RESTBadRequest(
@@ -176,18 +707,23 @@ async def delete_mission(request):
             pretty=pretty,
         )
 
-    if not absolute_path.exists():
+    if not (await storage.exists(absolute_path)):
         return RESTNotFound()
 
     try:
-        absolute_path.unlink()
+        await storage.delete(absolute_path)
 
-        properties_pattern = f"^{absolute_path.stem}(_\w{{2}})?.properties$"
+        parsed_missions_cache = request.app.get('parsed_missions_cache')
+        if parsed_missions_cache is not None:
+            await parsed_missions_cache.discard(absolute_path)
 
-        for node in absolute_path.parent.iterdir():
-            if node.is_file() and re.match(properties_pattern, node.name):
-                node.unlink()
+        validator = request.app.get('missions_validator')
+        if validator is not None:
+            validator.discard(absolute_path)
 
+        index = request.app.get('missions_index')
+        if index is not None:
+            index.invalidate_path(absolute_path)
     except Exception:
         LOG.exception("HTTP failed to delete mission")
         return RESTInternalServerError(
@@ -203,14 +739,14 @@ async def load_mission(request):
     pretty = 'pretty' in request.query
     timeout = request.query.get('timeout')
 
-    root_dir = request.app['dedicated_server'].missions_dir
+    storage = request.app['missions_storage']
 
     try:
         if timeout is not None:
             timeout = float(timeout)
 
         relative_path = request.match_info['file_path']
-        absolute_path = (root_dir / relative_path)
+        absolute_path = (storage.root_dir / relative_path)
     except Exception:
         LOG.exception("HTTP failed to load mission: incorrect input data")
         return RESTBadRequest(
@@ -218,7 +754,7 @@ async def load_mission(request):
             pretty=pretty,
         )
 
-    if not absolute_path.exists():
+    if not (await storage.exists(absolute_path)):
         return RESTNotFound()
 
     try:
@@ -234,6 +770,8 @@ async def load_mission(request):
         )
     else:
         return RESTSuccess(pretty=pretty)
+    finally:
+        request.app['stationary_actors_cache'].invalidate()
 
 
 @with_authorization
@@ -262,7 +800,11 @@ async def get_current_mission_info(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=result,
+            pretty=pretty,
+            max_age=get_max_age(request, 'mission_info'),
+        )
 
 
 @with_authorization
@@ -341,3 +883,91 @@ async def unload_current_mission(request):
         )
     else:
         return RESTSuccess(pretty=pretty)
+    finally:
+        request.app['stationary_actors_cache'].invalidate()
+
+
+@with_authorization
+async def get_missions_rotation(request):
+    pretty = 'pretty' in request.query
+    rotator = request.app.get('missions_rotator')
+
+    if rotator is None:
+        return RESTNotFound(
+            detail="rotation of missions is disabled",
+            pretty=pretty,
+        )
+
+    return RESTSuccess(payload=rotator.get_status(), pretty=pretty)
+
+
+@with_authorization
+async def start_missions_rotation(request):
+    pretty = 'pretty' in request.query
+    rotator = request.app.get('missions_rotator')
+
+    if rotator is None:
+        return RESTNotFound(
+            detail="rotation of missions is disabled",
+            pretty=pretty,
+        )
+
+    try:
+        data = await request.read()
+        body = json.loads(data) if data else {}
+
+        if 'playlist' in body:
+            rotator.set_playlist(
+                playlist=load_playlist(body['playlist']),
+                position=int(body.get('position', 0)),
+            )
+
+        rotator.start()
+    except Exception:
+        LOG.exception(
+            "HTTP failed to start rotation of missions: incorrect input data"
+        )
+        return RESTBadRequest(
+            detail="incorrect input data",
+            pretty=pretty,
+        )
+    else:
+        return RESTSuccess(payload=rotator.get_status(), pretty=pretty)
+
+
+@with_authorization
+async def stop_missions_rotation(request):
+    pretty = 'pretty' in request.query
+    rotator = request.app.get('missions_rotator')
+
+    if rotator is None:
+        return RESTNotFound(
+            detail="rotation of missions is disabled",
+            pretty=pretty,
+        )
+
+    rotator.stop()
+    return RESTSuccess(payload=rotator.get_status(), pretty=pretty)
+
+
+@with_authorization
+async def skip_rotated_mission(request):
+    pretty = 'pretty' in request.query
+    rotator = request.app.get('missions_rotator')
+
+    if rotator is None:
+        return RESTNotFound(
+            detail="rotation of missions is disabled",
+            pretty=pretty,
+        )
+
+    try:
+        rotator.skip()
+    except Exception:
+        LOG.exception("HTTP failed to skip rotated mission")
+        return RESTBadRequest(
+            detail="rotation of missions is not running",
+            pretty=pretty,
+        )
+    else:
+        return RESTSuccess(pretty=pretty)
@@ -2,15 +2,82 @@
 
 import logging
 
+from il2fb.ds.airbridge.caching import EncodedPayload
+from il2fb.ds.airbridge.caching import StationaryActorsCache
+
 from il2fb.ds.airbridge.api.http.responses.rest import RESTBadRequest
+from il2fb.ds.airbridge.api.http.responses.rest import RESTCacheableSuccess
+from il2fb.ds.airbridge.api.http.responses.rest import RESTEncodedSuccess
 from il2fb.ds.airbridge.api.http.responses.rest import RESTInternalServerError
-from il2fb.ds.airbridge.api.http.responses.rest import RESTSuccess
+from il2fb.ds.airbridge.api.http.responses.rest import RESTNotModified
+from il2fb.ds.airbridge.api.http.responses.rest import get_cached_response
+from il2fb.ds.airbridge.api.http.responses.rest import get_compression_min_size
+from il2fb.ds.airbridge.api.http.responses.rest import get_instance_version
+from il2fb.ds.airbridge.api.http.responses.rest import get_max_age
+from il2fb.ds.airbridge.api.http.responses.rest import is_not_modified
+from il2fb.ds.airbridge.api.http.responses.rest import make_etag
+from il2fb.ds.airbridge.api.http.responses.rest import make_streaming_success
+from il2fb.ds.airbridge.api.http.responses.rest import negotiate_codec
+from il2fb.ds.airbridge.api.http.responses.rest import should_stream
 from il2fb.ds.airbridge.api.http.security import with_authorization
 
 
 LOG = logging.getLogger(__name__)
 
 
+def _get_cached_stationary_response(request, key: str):
+    """
+    Answer conditional request for positions of stationary actors without
+    requesting them, if they are cached already.
+
+    """
+    version = request.app['stationary_actors_cache'].get_version(key)
+    if version is not None:
+        return get_cached_response(
+            request,
+            version=get_instance_version(version),
+            max_age=get_max_age(request, 'stationary_actors'),
+        )
+
+
+def _make_encoded_success(request, payload: EncodedPayload, pretty: bool):
+    version = get_instance_version(payload.version)
+    max_age = get_max_age(request, 'stationary_actors')
+
+    if pretty and should_stream(request, len(payload.json)):
+        return make_streaming_success(
+            request,
+            payload=payload.data,
+            pretty=pretty,
+            version=version,
+            max_age=max_age,
+        )
+
+    if pretty:
+        return RESTCacheableSuccess(
+            payload=payload.data,
+            pretty=pretty,
+            version=version,
+            max_age=max_age,
+        )
+
+    etag = make_etag(request, version)
+    if is_not_modified(request, etag):
+        return RESTNotModified(etag=etag, max_age=max_age)
+
+    codec, compact_types = negotiate_codec(request)
+
+    return RESTEncodedSuccess(
+        payload=payload,
+        accept_encoding=request.headers.get('Accept-Encoding', ''),
+        codec=codec,
+        compact_types=compact_types,
+        compression_min_size=get_compression_min_size(request),
+        etag=etag,
+        max_age=max_age,
+    )
+
+
 @with_authorization
 async def get_all_ships_positions(request):
     pretty = 'pretty' in request.query
@@ -37,7 +104,11 @@ async def get_all_ships_positions(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=result,
+            pretty=pretty,
+            max_age=get_max_age(request, 'radar'),
+        )
 
 
 @with_authorization
@@ -66,7 +137,11 @@ async def get_moving_ships_positions(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=result,
+            pretty=pretty,
+            max_age=get_max_age(request, 'radar'),
+        )
 
 
 @with_authorization
@@ -98,7 +173,11 @@ async def get_stationary_ships_positions(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=result,
+            pretty=pretty,
+            max_age=get_max_age(request, 'radar'),
+        )
 
 
 @with_authorization
@@ -130,7 +209,11 @@ async def get_moving_aircrafts_positions(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=result,
+            pretty=pretty,
+            max_age=get_max_age(request, 'radar'),
+        )
 
 
 @with_authorization
@@ -162,7 +245,11 @@ async def get_moving_ground_units_positions(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=result,
+            pretty=pretty,
+            max_age=get_max_age(request, 'radar'),
+        )
 
 
 @with_authorization
@@ -182,8 +269,16 @@ async def get_all_houses_positions(request):
             pretty=pretty,
         )
 
+    response = _get_cached_stationary_response(
+        request, StationaryActorsCache.HOUSES,
+    )
+    if response is not None:
+        return response
+
     try:
-        result = await request.app['radar'].get_all_houses_positions(timeout)
+        result = await request.app['stationary_actors_cache'].get_houses_positions(
+            timeout=timeout,
+        )
     except Exception:
         LOG.exception("HTTP failed to get all houses positions")
         return RESTInternalServerError(
@@ -191,7 +286,7 @@ async def get_all_houses_positions(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return _make_encoded_success(request, result, pretty)
 
 
 @with_authorization
@@ -212,8 +307,14 @@ async def get_stationary_objects_positions(request):
             pretty=pretty,
         )
 
+    response = _get_cached_stationary_response(
+        request, StationaryActorsCache.STATIONARY_OBJECTS,
+    )
+    if response is not None:
+        return response
+
     try:
-        result = await request.app['radar'].get_stationary_objects_positions(
+        result = await request.app['stationary_actors_cache'].get_stationary_objects_positions(
             timeout=timeout,
         )
     except Exception:
@@ -223,7 +324,7 @@ async def get_stationary_objects_positions(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return _make_encoded_success(request, result, pretty)
 
 
 @with_authorization
@@ -255,7 +356,11 @@ async def get_all_moving_actors_positions(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return RESTCacheableSuccess(
+            payload=result,
+            pretty=pretty,
+            max_age=get_max_age(request, 'radar'),
+        )
 
 
 @with_authorization
@@ -276,8 +381,14 @@ async def get_all_stationary_actors_positions(request):
             pretty=pretty,
         )
 
+    response = _get_cached_stationary_response(
+        request, StationaryActorsCache.ALL,
+    )
+    if response is not None:
+        return response
+
     try:
-        result = await request.app['radar'].get_all_stationary_actors_positions(
+        result = await request.app['stationary_actors_cache'].get_all_stationary_actors_positions(
             timeout=timeout,
         )
     except Exception:
@@ -287,4 +398,4 @@ async def get_all_stationary_actors_positions(request):
             pretty=pretty,
         )
     else:
-        return RESTSuccess(payload=result, pretty=pretty)
+        return _make_encoded_success(request, result, pretty)
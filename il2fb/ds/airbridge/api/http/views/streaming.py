@@ -3,13 +3,15 @@
 import logging
 
 from enum import IntEnum
-from typing import Any, Awaitable
+from typing import Any, Awaitable, Optional
 
 from aiohttp import web, WSMsgType
 
+from il2fb.ds.airbridge import codecs
 from il2fb.ds.airbridge import json
 from il2fb.ds.airbridge.api.http.responses.ws import WSSuccess, WSFailure
 from il2fb.ds.airbridge.api.http.security import with_authorization
+from il2fb.ds.airbridge.streaming.facilities import StreamingFacility
 from il2fb.ds.airbridge.streaming.subscribers.base import StreamingSubscriber
 
 
@@ -29,6 +31,9 @@ class STREAMING_OPCODE(IntEnum):
     SUBSCRIBE_TO_RADAR = 30
     UNSUBSCRIBE_FROM_RADAR = 31
 
+    SUBSCRIBE_TO_MISSIONS = 40
+    UNSUBSCRIBE_FROM_MISSIONS = 41
+
 
 class StreamingView(StreamingSubscriber, web.View):
 
@@ -39,9 +44,19 @@ class StreamingView(StreamingSubscriber, web.View):
         self._events_stream = self.request.app['events_stream']
         self._not_parsed_strings_stream = self.request.app['not_parsed_strings_stream']
         self._radar_stream = self.request.app['radar_stream']
+        self._missions_stream = self.request.app.get('missions_stream')
 
         self._ws = None
         self._subscriptions = []
+        self._compact_types = 'compact_types' in self.request.query
+
+        # maps names of facilities to minimal sizes of compressed messages
+        self._compression_min_sizes = self.request.app.get(
+            'ws_compression_min_sizes', {},
+        )
+        self._serialization_scheduler = self.request.app.get(
+            'serialization_scheduler',
+        )
 
         self._operations = {
             STREAMING_OPCODE.SUBSCRIBE_TO_CHAT: self._subscribe_to_chat,
@@ -55,13 +70,18 @@ class StreamingView(StreamingSubscriber, web.View):
 
             STREAMING_OPCODE.SUBSCRIBE_TO_RADAR: self._subscribe_to_radar,
             STREAMING_OPCODE.UNSUBSCRIBE_FROM_RADAR: self._unsubscribe_from_radar,
+
+            STREAMING_OPCODE.SUBSCRIBE_TO_MISSIONS: self._subscribe_to_missions,
+            STREAMING_OPCODE.UNSUBSCRIBE_FROM_MISSIONS: self._unsubscribe_from_missions,
         }
 
     @with_authorization
     async def get(self):
         LOG.debug("ws streaming connection was established")
 
-        self._ws = web.WebSocketResponse()
+        self._ws = web.WebSocketResponse(
+            compress=bool(self._compression_min_sizes),
+        )
         await self._ws.prepare(self.request)
 
         async for msg in self._ws:
@@ -111,40 +131,139 @@ class StreamingView(StreamingSubscriber, web.View):
     async def _unsubscribe_from_all(self) -> Awaitable[None]:
         subscriptions, self._subscriptions = self._subscriptions, []
 
-        for subscription in subscriptions:
-            await subscription.unsubscribe(self)
+        for facility, subscriber in subscriptions:
+            await facility.unsubscribe(subscriber)
+
+    async def _subscribe(
+        self,
+        facility: StreamingFacility,
+        format: Optional[str]=None,
+        **kwargs
+    ) -> Awaitable[None]:
+        subscriber = _WSStreamingSubscriber(
+            view=self,
+            codec=codecs.get_codec(format),
+            compression_min_size=self._compression_min_sizes.get(
+                facility.name,
+            ),
+        )
+        await facility.subscribe(subscriber, **kwargs)
+        self._subscriptions.append((facility, subscriber))
+
+    async def _unsubscribe(self, facility: StreamingFacility) -> Awaitable[None]:
+        for i, (subscribed_facility, subscriber) in enumerate(self._subscriptions):
+            if subscribed_facility is facility:
+                break
+        else:
+            raise ValueError("subscription does not exist")
+
+        del self._subscriptions[i]
+        await facility.unsubscribe(subscriber)
 
     async def _subscribe_to_chat(self, **kwargs) -> Awaitable[None]:
-        await self._chat_stream.subscribe(self, **kwargs)
-        self._subscriptions.append(self._chat_stream)
+        await self._subscribe(self._chat_stream, **kwargs)
 
     async def _unsubscribe_from_chat(self) -> Awaitable[None]:
-        await self._chat_stream.unsubscribe(self)
-        self._subscriptions.remove(self._chat_stream)
+        await self._unsubscribe(self._chat_stream)
 
     async def _subscribe_to_events(self, **kwargs) -> Awaitable[None]:
-        await self._events_stream.subscribe(self, **kwargs)
-        self._subscriptions.append(self._events_stream)
+        await self._subscribe(self._events_stream, **kwargs)
 
     async def _unsubscribe_from_events(self) -> Awaitable[None]:
-        await self._events_stream.unsubscribe(self)
-        self._subscriptions.remove(self._events_stream)
+        await self._unsubscribe(self._events_stream)
 
     async def _subscribe_to_not_parsed_strings(self, **kwargs) -> Awaitable[None]:
-        await self._not_parsed_strings_stream.subscribe(self, **kwargs)
-        self._subscriptions.append(self._not_parsed_strings_stream)
+        await self._subscribe(self._not_parsed_strings_stream, **kwargs)
 
     async def _unsubscribe_from_not_parsed_strings(self) -> Awaitable[None]:
-        await self._not_parsed_strings_stream.unsubscribe(self)
-        self._subscriptions.remove(self._not_parsed_strings_stream)
+        await self._unsubscribe(self._not_parsed_strings_stream)
 
     async def _subscribe_to_radar(self, **kwargs) -> Awaitable[None]:
-        await self._radar_stream.subscribe(self, **kwargs)
-        self._subscriptions.append(self._radar_stream)
+        await self._subscribe(self._radar_stream, **kwargs)
 
     async def _unsubscribe_from_radar(self) -> Awaitable[None]:
-        await self._radar_stream.unsubscribe(self)
-        self._subscriptions.remove(self._radar_stream)
+        await self._unsubscribe(self._radar_stream)
+
+    async def _subscribe_to_missions(self, **kwargs) -> Awaitable[None]:
+        if self._missions_stream is None:
+            raise ValueError("streaming of missions changes is disabled")
+
+        await self._subscribe(self._missions_stream, **kwargs)
+
+    async def _unsubscribe_from_missions(self) -> Awaitable[None]:
+        await self._unsubscribe(self._missions_stream)
+
+    async def write(self, o: Any) -> Awaitable[None]:
+        await self.send(o, codec=codecs.DEFAULT_CODEC)
+
+    async def send(
+        self,
+        o: Any,
+        codec: codecs.Codec,
+        compression_min_size: Optional[int]=None,
+    ) -> Awaitable[None]:
+        if self._serialization_scheduler is None:
+            data = codec.encode(o, compact_types=self._compact_types)
+        else:
+            data = await self._serialization_scheduler.encode(
+                o,
+                codec=codec,
+                compact_types=self._compact_types,
+            )
+
+        compress = (
+            compression_min_size is not None
+            and len(data) >= compression_min_size
+        )
+        self._set_message_compression(compress)
+
+        if codec.is_binary:
+            await self._ws.send_bytes(data)
+        else:
+            await self._ws.send_str(data.decode())
+
+    def _set_message_compression(self, compress: bool) -> None:
+        # permessage-deflate allows to compress messages selectively, but
+        # aiohttp compresses either all messages or none of them, so
+        # compression is toggled for each message via writer; state of
+        # compressor is not affected by messages which are not compressed
+        writer = self._ws._writer
+        if writer is not None and self._ws.compress:
+            writer.compress = self._ws.compress if compress else 0
+
+
+class _WSStreamingSubscriber(StreamingSubscriber):
+    """
+    Subscription of WebSocket connection to a single streaming facility.
+
+    Each subscription has its own codec, so some streams of connection can be
+    sent as binary frames while others are sent as text frames. Compression
+    of messages is configured per facility.
+
+    """
+
+    def __init__(
+        self,
+        view: StreamingView,
+        codec: codecs.Codec,
+        compression_min_size: Optional[int]=None,
+    ):
+        self._view = view
+        self._codec = codec
+        self._compression_min_size = compression_min_size
+
+    async def _subscribe_to_missions(self, **kwargs) -> Awaitable[None]:
+        if self._missions_stream is None:
+            raise ValueError("streaming of missions changes is disabled")
+
+        await self._subscribe(self._missions_stream, **kwargs)
+
+    async def _unsubscribe_from_missions(self) -> Awaitable[None]:
+        await self._unsubscribe(self._missions_stream)
 
     async def write(self, o: Any) -> Awaitable[None]:
-        await self._ws.send_str(json.dumps(o))
+        await self._view.send(
+            o,
+            codec=self._codec,
+            compression_min_size=self._compression_min_size,
+        )
@@ -4,16 +4,17 @@ import logging
 
 from enum import IntEnum
 
-from typing import Awaitable, Optional, Any
+from typing import Awaitable, List, Optional, Any
 
 from nats.aio.client import Msg
 
-from il2fb.commons.organization import Belligerents
-from il2fb.ds.middleware.console.client import ConsoleClient
-
+from il2fb.ds.airbridge import codecs
 from il2fb.ds.airbridge import json
+from il2fb.ds.airbridge.caching import EncodedPayload
 from il2fb.ds.airbridge.nats import NATSClient
-from il2fb.ds.airbridge.radar import Radar
+from il2fb.ds.airbridge.serialization import SerializationScheduler
+
+from il2fb.ds.airbridge.api.batch import BatchExecutor
 
 
 LOG = logging.getLogger(__name__)
@@ -21,6 +22,8 @@ LOG = logging.getLogger(__name__)
 
 class NATS_OPCODE(IntEnum):
     GET_SERVER_INFO = 0
+    GET_TYPES_SCHEMA = 1
+    BATCH = 2
 
     GET_HUMANS_LIST = 10
     GET_HUMANS_COUNT = 11
@@ -38,6 +41,7 @@ class NATS_OPCODE(IntEnum):
     BEGIN_MISSION = 42
     END_MISSION = 43
     UNLOAD_MISSION = 44
+    SEARCH_MISSIONS = 45
 
     GET_ALL_SHIPS_POSITIONS = 50
     GET_MOVING_SHIPS_POSITIONS = 51
@@ -63,49 +67,18 @@ class NATSSubscriber:
         self,
         nats_client: NATSClient,
         subject: str,
-        console_client: ConsoleClient,
-        radar: Radar,
+        batch_executor: BatchExecutor,
+        serialization_scheduler: Optional[SerializationScheduler]=None,
         trace=False,
     ):
         self._nats_client = nats_client
         self._subject = subject
-        self._console_client = console_client
-        self._radar = radar
+        self._batch_executor = batch_executor
+        self._operations = batch_executor.operations
+        self._serialization_scheduler = serialization_scheduler
         self._trace = trace
 
         self._ssid = None
-        self._operations = {
-            NATS_OPCODE.GET_SERVER_INFO: self._console_client.get_server_info,
-
-            NATS_OPCODE.GET_HUMANS_LIST: self._console_client.get_humans_list,
-            NATS_OPCODE.GET_HUMANS_COUNT: self._console_client.get_humans_count,
-            NATS_OPCODE.GET_HUMANS_STATISTICS: self._console_client.get_humans_statistics,
-
-            NATS_OPCODE.KICK_ALL_HUMANS: self._console_client.kick_all_humans,
-            NATS_OPCODE.KICK_HUMAN_BY_CALLSIGN: self._console_client.kick_human_by_callsign,
-
-            NATS_OPCODE.CHAT_TO_ALL: self._console_client.chat_to_all,
-            NATS_OPCODE.CHAT_TO_HUMAN: self._console_client.chat_to_human,
-            NATS_OPCODE.CHAT_TO_BELLIGERENT: self._chat_to_belligerent,
-
-            NATS_OPCODE.GET_MISSION_INFO: self._console_client.get_mission_info,
-            NATS_OPCODE.LOAD_MISSION: self._console_client.load_mission,
-            NATS_OPCODE.BEGIN_MISSION: self._console_client.begin_mission,
-            NATS_OPCODE.END_MISSION: self._console_client.end_mission,
-            NATS_OPCODE.UNLOAD_MISSION: self._console_client.unload_mission,
-
-            NATS_OPCODE.GET_ALL_SHIPS_POSITIONS: self._radar.get_all_ships_positions,
-            NATS_OPCODE.GET_MOVING_SHIPS_POSITIONS: self._radar.get_moving_ships_positions,
-            NATS_OPCODE.GET_STATIONARY_SHIPS_POSITIONS: self._radar.get_stationary_ships_positions,
-
-            NATS_OPCODE.GET_MOVING_AIRCRAFTS_POSITIONS: self._radar.get_moving_aircrafts_positions,
-            NATS_OPCODE.GET_MOVING_GROUND_UNITS_POSITIONS: self._radar.get_moving_ground_units_positions,
-            NATS_OPCODE.GET_ALL_MOVING_ACTORS_POSITIONS: self._radar.get_all_moving_actors_positions,
-
-            NATS_OPCODE.GET_ALL_HOUSES_POSITIONS: self._radar.get_all_houses_positions,
-            NATS_OPCODE.GET_STATIONARY_OBJECTS_POSITIONS: self._radar.get_stationary_objects_positions,
-            NATS_OPCODE.GET_ALL_STATIONARY_ACTORS_POSITIONS: self._radar.get_all_stationary_actors_positions,
-        }
 
     async def start(self) -> Awaitable[None]:
         self._ssid = await self._nats_client.subscribe(
@@ -125,8 +98,12 @@ class NATSSubscriber:
             f"nats request (data={request.data}, subscriber='{request.reply}')"
         )
 
+        codec = codecs.DEFAULT_CODEC
+
         try:
-            result = await self._handle_message(request.data)
+            msg = json.loads(request.data)
+            codec = codecs.get_codec(msg.get('format'))
+            result = await self._handle_message(msg)
         except Exception as e:
             LOG.exception(
                 f"failed to handle nats request (data={request.data})"
@@ -143,8 +120,7 @@ class NATSSubscriber:
 
         if request.reply:
             try:
-                data = json.dumps(response)
-                data = data.encode()
+                data = await self._encode_response(response, codec)
                 await self._nats_client.publish(request.reply, data)
             except Exception:
                 LOG.exception(
@@ -155,17 +131,41 @@ class NATSSubscriber:
                     f"nats response (data={data})"
                 )
 
-    async def _handle_message(self, msg: bytes) -> Awaitable[Optional[Any]]:
-        msg = msg.decode()
-        msg = json.loads(msg)
+    async def _encode_response(
+        self,
+        response: dict,
+        codec: codecs.Codec,
+    ) -> Awaitable[bytes]:
+
+        payload = response.get('payload')
+
+        if isinstance(payload, EncodedPayload):
+            # reuse encoded payload instead of encoding it once again
+            return codec.encode_map([
+                ('status', codec.encode(response['status'])),
+                ('payload', payload.get_encoded(codec)),
+            ])
+
+        if self._serialization_scheduler is None:
+            return codec.encode(response)
+
+        return (await self._serialization_scheduler.encode(
+            response,
+            codec=codec,
+        ))
 
+    async def _handle_message(self, msg: dict) -> Awaitable[Optional[Any]]:
         opcode = msg['opcode']
 
         if self._trace:
             LOG.debug(f"nats opcode: {opcode}")
 
         opcode = NATS_OPCODE(opcode)
-        operation = self._operations[opcode]
+        operation = (
+            self._batch
+            if opcode == NATS_OPCODE.BATCH
+            else self._operations.get(opcode.name.lower())
+        )
 
         if self._trace:
             LOG.debug(f"nats operation: {operation.__name__}")
@@ -182,11 +182,22 @@ class NATSSubscriber:
 
         return result
 
-    async def _chat_to_belligerent(
+    async def _batch(
         self,
-        message: str,
-        addressee: int,
-    ) -> Awaitable[None]:
+        operations: List[dict],
+        timeout: Optional[float]=None,
+    ) -> Awaitable[dict]:
+
+        items = []
+
+        for item in operations:
+            if 'opcode' in item:
+                opcode = NATS_OPCODE(item['opcode'])
+                if opcode == NATS_OPCODE.BATCH:
+                    raise ValueError("nested batches are not supported")
+
+                item = dict(item, operation=opcode.name.lower())
+
+            items.append(item)
 
-        addressee = Belligerents.get_by_value(addressee)
-        await self._console_client.chat_to_belligerent(message, addressee)
+        return (await self._batch_executor.execute(items, timeout))
@@ -0,0 +1,132 @@
+# coding: utf-8
+
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from il2fb.commons.organization import Belligerents
+from il2fb.ds.middleware.console.client import ConsoleClient
+
+from il2fb.ds.airbridge import json
+from il2fb.ds.airbridge.caching import ConsoleQueriesCache
+from il2fb.ds.airbridge.caching import StationaryActorsCache
+from il2fb.ds.airbridge.missions.search import MissionsSearchIndex
+from il2fb.ds.airbridge.missions.search import MissionsSearchQuery
+from il2fb.ds.airbridge.radar import Radar
+
+
+Operation = Callable[..., Awaitable[Any]]
+
+
+class Operations:
+    """
+    Named operations which can be requested via NATS API and via batches.
+
+    Names of operations are same as lower-cased names of NATS opcodes.
+    Operations are called with keyword arguments taken from payloads of
+    requests.
+
+    """
+
+    def __init__(
+        self,
+        console_client: Union[ConsoleClient, ConsoleQueriesCache],
+        radar: Radar,
+        stationary_actors_cache: StationaryActorsCache,
+        missions_search_index: Optional[MissionsSearchIndex]=None,
+    ):
+        self._console_client = console_client
+        self._radar = radar
+        self._stationary_actors_cache = stationary_actors_cache
+        self._missions_search_index = missions_search_index
+
+        self._operations = {
+            'get_server_info': self._console_client.get_server_info,
+            'get_types_schema': self._get_types_schema,
+
+            'get_humans_list': self._console_client.get_humans_list,
+            'get_humans_count': self._console_client.get_humans_count,
+            'get_humans_statistics': self._console_client.get_humans_statistics,
+
+            'kick_all_humans': self._console_client.kick_all_humans,
+            'kick_human_by_callsign': self._console_client.kick_human_by_callsign,
+
+            'chat_to_all': self._console_client.chat_to_all,
+            'chat_to_human': self._console_client.chat_to_human,
+            'chat_to_belligerent': self._chat_to_belligerent,
+
+            'get_mission_info': self._console_client.get_mission_info,
+            'load_mission': self._load_mission,
+            'begin_mission': self._console_client.begin_mission,
+            'end_mission': self._console_client.end_mission,
+            'unload_mission': self._unload_mission,
+            'search_missions': self._search_missions,
+
+            'get_all_ships_positions': self._radar.get_all_ships_positions,
+            'get_moving_ships_positions': self._radar.get_moving_ships_positions,
+            'get_stationary_ships_positions': self._radar.get_stationary_ships_positions,
+
+            'get_moving_aircrafts_positions': self._radar.get_moving_aircrafts_positions,
+            'get_moving_ground_units_positions': self._radar.get_moving_ground_units_positions,
+            'get_all_moving_actors_positions': self._radar.get_all_moving_actors_positions,
+
+            'get_all_houses_positions': self._stationary_actors_cache.get_houses_positions,
+            'get_stationary_objects_positions': self._stationary_actors_cache.get_stationary_objects_positions,
+            'get_all_stationary_actors_positions': self._stationary_actors_cache.get_all_stationary_actors_positions,
+        }
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._operations
+
+    def get(self, name: str) -> Operation:
+        try:
+            return self._operations[name]
+        except KeyError:
+            raise ValueError(f"unknown operation '{name}'")
+
+    @staticmethod
+    def is_read_only(name: str) -> bool:
+        """
+        Tell whether operation does not change state of server, so it can be
+        run concurrently with other operations and its result can be shared.
+
+        """
+        return name.startswith('get_') or name == 'search_missions'
+
+    async def _get_types_schema(self) -> Awaitable[dict]:
+        return json.type_tags.to_primitive()
+
+    async def _load_mission(
+        self,
+        file_path: str,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+
+        try:
+            await self._console_client.load_mission(file_path, timeout)
+        finally:
+            self._stationary_actors_cache.invalidate()
+
+    async def _unload_mission(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+
+        try:
+            await self._console_client.unload_mission(timeout)
+        finally:
+            self._stationary_actors_cache.invalidate()
+
+    async def _search_missions(self, **params) -> Awaitable[dict]:
+        if self._missions_search_index is None:
+            raise ValueError("search of missions is disabled")
+
+        query = MissionsSearchQuery(params)
+        return self._missions_search_index.search(query)
+
+    async def _chat_to_belligerent(
+        self,
+        message: str,
+        addressee: int,
+    ) -> Awaitable[None]:
+
+        addressee = Belligerents.get_by_value(addressee)
+        await self._console_client.chat_to_belligerent(message, addressee)
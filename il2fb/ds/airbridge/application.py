@@ -1,41 +1,100 @@
 # coding: utf-8
 
 import asyncio
+import importlib
+import inspect
 import itertools
 import logging
+import os
 import queue
 import threading
 
-from typing import Awaitable
+from pathlib import Path
+from typing import Any, Awaitable, Dict, Optional, Union
 
 from ddict import DotAccessDict
 
+from il2fb.commons.structures import BaseStructure
+
 from il2fb.ds.middleware.console.client import ConsoleClient
 from il2fb.ds.middleware.device_link.client import DeviceLinkClient
 
 from il2fb.parsers.game_log.parsers import GameLogEventParser
 from il2fb.parsers.mission import MissionParser
 
+from il2fb.ds.airbridge import json
+from il2fb.ds.airbridge.caching import ConsoleQueriesCache
+from il2fb.ds.airbridge.caching import DEFAULT_CONSOLE_QUERIES_REQUEST_TIMEOUT
+from il2fb.ds.airbridge.caching import StationaryActorsCache
+from il2fb.ds.airbridge.caching import DEFAULT_STATIONARY_ACTORS_REQUEST_TIMEOUT
 from il2fb.ds.airbridge.dedicated_server.console import ConsoleProxy
 from il2fb.ds.airbridge.dedicated_server.device_link import DeviceLinkProxy
 from il2fb.ds.airbridge.dedicated_server.instance import DedicatedServer
 from il2fb.ds.airbridge.dedicated_server.game_log import GameLogWorker
-
+from il2fb.ds.airbridge.missions.archives import DEFAULT_ARCHIVE_BUFFER_SIZE
+from il2fb.ds.airbridge.missions.archives import DEFAULT_ARCHIVE_CHUNK_SIZE
+from il2fb.ds.airbridge.missions.archives import DEFAULT_ARCHIVE_MAX_UPLOAD_SIZE
+from il2fb.ds.airbridge.missions.archives import MissionsArchiver
+from il2fb.ds.airbridge.missions.content import DEFAULT_CONTENT_HASHING_CONCURRENCY
+from il2fb.ds.airbridge.missions.content import DEFAULT_CONTENT_SYNC_PERIOD
+from il2fb.ds.airbridge.missions.content import DEFAULT_UPLOAD_SESSION_TTL
+from il2fb.ds.airbridge.missions.content import MissionsContentIndex
+from il2fb.ds.airbridge.missions.content import ResumableUploads
+from il2fb.ds.airbridge.missions.index import DEFAULT_INDEX_RESCAN_PERIOD
+from il2fb.ds.airbridge.missions.index import MissionsIndex
+from il2fb.ds.airbridge.missions.parsing import DEFAULT_PARSE_CACHE_MAX_SIZE
+from il2fb.ds.airbridge.missions.parsing import DEFAULT_PARSE_MAX_WORKERS
+from il2fb.ds.airbridge.missions.parsing import ParsedMissionsCache
+from il2fb.ds.airbridge.missions.rotation import DEFAULT_ROTATION_MISSION_DURATION
+from il2fb.ds.airbridge.missions.rotation import DEFAULT_ROTATION_STEP_TIMEOUT
+from il2fb.ds.airbridge.missions.rotation import MissionsRotator
+from il2fb.ds.airbridge.missions.rotation import load_playlist
+from il2fb.ds.airbridge.missions.search import DEFAULT_SEARCH_CONCURRENCY
+from il2fb.ds.airbridge.missions.search import DEFAULT_SEARCH_SYNC_PERIOD
+from il2fb.ds.airbridge.missions.search import MissionsSearchIndex
+from il2fb.ds.airbridge.missions.storage import DEFAULT_STORAGE_MAX_PENDING
+from il2fb.ds.airbridge.missions.storage import DEFAULT_STORAGE_MAX_WORKERS
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+from il2fb.ds.airbridge.missions.validation import DEFAULT_VALIDATION_CONCURRENCY
+from il2fb.ds.airbridge.missions.validation import MissionsValidator
+
+from il2fb.ds.airbridge.api.batch import DEFAULT_BATCH_MAX_OPERATIONS
+from il2fb.ds.airbridge.api.batch import DEFAULT_BATCH_TIMEOUT
+from il2fb.ds.airbridge.api.batch import BatchExecutor
 from il2fb.ds.airbridge.api.http import build_http_api
+from il2fb.ds.airbridge.api.http.caching import RenderedResponsesCache
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_COMPRESSION_MIN_SIZE
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_RENDERED_RESPONSES_CACHE_SIZE
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_STREAMING_CHUNK_SIZE
+from il2fb.ds.airbridge.api.http.constants import DEFAULT_STREAMING_MIN_SIZE
 from il2fb.ds.airbridge.api.http.security import AuthorizationBackend
 from il2fb.ds.airbridge.api.nats import NATSSubscriber
+from il2fb.ds.airbridge.api.operations import Operations
 
 from il2fb.ds.airbridge.nats import NATSClient
 from il2fb.ds.airbridge.nats import NATSStreamingClient
 
+from il2fb.ds.airbridge.radar import DEFAULT_CHUNKS_CONCURRENCY
+from il2fb.ds.airbridge.radar import DEFAULT_DRAIN_PERIOD
+from il2fb.ds.airbridge.radar import DEFAULT_RETRIES
 from il2fb.ds.airbridge.radar import Radar
-
+from il2fb.ds.airbridge.rtt import RTTEstimator
+from il2fb.ds.airbridge.serialization import DEFAULT_MAX_WORKERS
+from il2fb.ds.airbridge.serialization import DEFAULT_OFFLOADING_MIN_SIZE
+from il2fb.ds.airbridge.serialization import EXECUTOR_TYPE_THREAD
+from il2fb.ds.airbridge.serialization import SerializationScheduler
+
+from il2fb.ds.airbridge.streaming.facilities import DEFAULT_RADAR_COALESCING_TOLERANCE
+from il2fb.ds.airbridge.streaming.facilities import DEFAULT_RADAR_JITTER
+from il2fb.ds.airbridge.streaming.facilities import DEFAULT_MISSIONS_COALESCING_DELAY
 from il2fb.ds.airbridge.streaming.facilities import ChatStreamingFacility
 from il2fb.ds.airbridge.streaming.facilities import EventsStreamingFacility
+from il2fb.ds.airbridge.streaming.facilities import MissionsStreamingFacility
 from il2fb.ds.airbridge.streaming.facilities import NotParsedStringsStreamingFacility
 from il2fb.ds.airbridge.streaming.facilities import RadarStreamingFacility
 
 from il2fb.ds.airbridge.streaming.subscribers.loaders import load_subscribers_with_subscription_options
+from il2fb.ds.airbridge.streaming.throttling import AdaptiveRefreshController
 from il2fb.ds.airbridge.tls import load_tls_context
 from il2fb.ds.airbridge.watch_dog import TextFileWatchDog
 
@@ -43,6 +102,18 @@ from il2fb.ds.airbridge.watch_dog import TextFileWatchDog
 LOG = logging.getLogger(__name__)
 
 
+TYPED_STRUCTURES_MODULES = [
+    'il2fb.parsers.game_log.events',
+    'il2fb.ds.middleware.console.events',
+    'il2fb.ds.middleware.console.structures',
+    'il2fb.ds.middleware.device_link.structures',
+    'il2fb.ds.airbridge.dedicated_server.game_log',
+    'il2fb.ds.airbridge.missions.events',
+    'il2fb.ds.airbridge.radar',
+    'il2fb.ds.airbridge.structures',
+]
+
+
 class Airbridge:
 
     def __init__(
@@ -61,19 +132,65 @@ class Airbridge:
         self._state = state
         self._trace = trace
 
+        json.use_backend(
+            (config.get('serialization') or {}).get(
+                'json_backend', json.DEFAULT_BACKEND,
+            )
+        )
+
         self.dedicated_server = dedicated_server
 
         self.console_client = console_client
         self._console_client_proxy = None
+        self.console_queries_cache = self._maybe_make_console_queries_cache(
+            config=config.ds.get('console_cache'),
+        )
 
         self.device_link_client = device_link_client
         self._device_link_client_proxy = None
 
-        self.radar = Radar(
-            device_link_client=self.device_link_client,
+        self.radar = self._make_radar(
+            config=config.get('radar'),
+        )
+        self.serialization_scheduler = self._maybe_make_serialization_scheduler(
+            config=config.get('serialization'),
+        )
+        self.stationary_actors_cache = self._make_stationary_actors_cache(
+            config=(config.get('radar') or {}).get('stationary_actors'),
         )
 
         self._mission_parser = MissionParser()
+        self.missions_storage = self._make_missions_storage(
+            config=(config.get('missions') or {}).get('storage'),
+        )
+        self.missions_index = self._maybe_make_missions_index(
+            config=(config.get('missions') or {}).get('index'),
+        )
+        self.parsed_missions_cache = self._maybe_make_parsed_missions_cache(
+            config=(config.get('missions') or {}).get('parse_cache'),
+        )
+        self.missions_validator = self._maybe_make_missions_validator(
+            config=(config.get('missions') or {}).get('validation'),
+        )
+        self.missions_search_index = self._maybe_make_missions_search_index(
+            config=(config.get('missions') or {}).get('search'),
+        )
+        self.missions_content_index = self._maybe_make_missions_content_index(
+            config=(config.get('missions') or {}).get('content'),
+        )
+        self.missions_uploads = self._maybe_make_missions_uploads(
+            config=(config.get('missions') or {}).get('content'),
+        )
+        self.missions_archiver = self._maybe_make_missions_archiver(
+            config=(config.get('missions') or {}).get('archives'),
+        )
+        self.missions_rotator = self._maybe_make_missions_rotator(
+            config=(config.get('missions') or {}).get('rotation'),
+        )
+
+        self.batch_executor = self._make_batch_executor(
+            config=(config.get('api') or {}).get('batch'),
+        )
 
         self._game_log_event_parser = GameLogEventParser()
         self._game_log_string_queue = queue.Queue()
@@ -82,6 +199,13 @@ class Airbridge:
             string_producer=self._game_log_string_queue.get,
             string_parser=self._game_log_event_parser.parse,
         )
+        self._game_log_worker.subscribe_to_events(
+            subscriber=self.stationary_actors_cache.handle_game_log_event,
+        )
+        if self.console_queries_cache:
+            self._game_log_worker.subscribe_to_events(
+                subscriber=self.console_queries_cache.handle_game_log_event,
+            )
         self._game_log_worker_thread = None
 
         self._game_log_watch_dog = TextFileWatchDog(
@@ -101,15 +225,31 @@ class Airbridge:
             loop=loop,
             console_client=console_client,
             game_log_worker=self._game_log_worker,
+            missions_rotator=self.missions_rotator,
         )
         self.not_parsed_strings_stream = NotParsedStringsStreamingFacility(
             loop=loop,
             game_log_worker=self._game_log_worker,
         )
+        radar_stream_config = config.streaming.radar
         self.radar_stream = RadarStreamingFacility(
             loop=loop,
             radar=self.radar,
-            request_timeout=config.streaming.radar.get('request_timeout'),
+            request_timeout=radar_stream_config.get('request_timeout'),
+            coalescing_tolerance=radar_stream_config.get(
+                'coalescing_tolerance', DEFAULT_RADAR_COALESCING_TOLERANCE,
+            ),
+            jitter=radar_stream_config.get(
+                'jitter', DEFAULT_RADAR_JITTER,
+            ),
+            refresh_controller=self._maybe_make_refresh_controller(
+                config=radar_stream_config.get('throttling'),
+            ),
+            stationary_actors_cache=self.stationary_actors_cache,
+        )
+        missions_stream_config = config.streaming.get('missions') or {}
+        self.missions_stream = self._maybe_make_missions_stream(
+            config=missions_stream_config,
         )
 
         self.nats_client = None
@@ -121,21 +261,423 @@ class Airbridge:
         self._http_api_handler = None
         self._http_api_server = None
 
+        self._register_type_tags()
+
         self._streaming_facility_to_static_subscribers_config_map = {
             self.chat_stream: config.streaming.chat.subscribers,
             self.events_stream: config.streaming.events.subscribers,
             self.not_parsed_strings_stream: config.streaming.not_parsed_strings.subscribers,
             self.radar_stream: config.streaming.radar.subscribers,
         }
+        if self.missions_stream:
+            self._streaming_facility_to_static_subscribers_config_map[
+                self.missions_stream
+            ] = missions_stream_config.get('subscribers') or {}
+
         self._static_streaming_subscribers = {}
 
+    @staticmethod
+    def _register_type_tags() -> None:
+        # known types are registered in same order on every start, so their
+        # numeric tags stay same until set of types changes
+        classes = []
+
+        for module_name in TYPED_STRUCTURES_MODULES:
+            module = importlib.import_module(module_name)
+            classes.extend(
+                obj
+                for name, obj in inspect.getmembers(module, inspect.isclass)
+                if (
+                    issubclass(obj, BaseStructure)
+                    and obj.__module__ == module.__name__
+                )
+            )
+
+        json.type_tags.register_many(classes)
+
+    def _maybe_make_console_queries_cache(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[ConsoleQueriesCache]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', False):
+            return
+
+        return ConsoleQueriesCache(
+            loop=self.loop,
+            console_client=self.console_client,
+            ttls=config.get('ttl'),
+            request_timeout=config.get(
+                'request_timeout',
+                DEFAULT_CONSOLE_QUERIES_REQUEST_TIMEOUT,
+            ),
+        )
+
+    @property
+    def console_queries(self) -> Union[ConsoleQueriesCache, ConsoleClient]:
+        """
+        Console client to be used by APIs: caching facade if it is enabled.
+
+        """
+        if self.console_queries_cache is None:
+            return self.console_client
+
+        return self.console_queries_cache
+
+    def _make_radar(self, config: Optional[DotAccessDict]) -> Radar:
+        config = config or {}
+        options = {}
+
+        chunking_config = config.get('chunking')
+        if chunking_config and chunking_config.get('is_enabled', True):
+            options['chunk_size'] = chunking_config['chunk_size']
+            options['chunks_concurrency'] = chunking_config.get(
+                'concurrency', DEFAULT_CHUNKS_CONCURRENCY,
+            )
+
+        rtt_estimator = self._maybe_make_rtt_estimator(
+            config=config.get('adaptive_timeouts'),
+        )
+
+        return Radar(
+            device_link_client=self.device_link_client,
+            retries=config.get('retries', DEFAULT_RETRIES),
+            attempt_timeout=config.get('attempt_timeout'),
+            rtt_estimator=rtt_estimator,
+            drain_period=config.get('drain_period', DEFAULT_DRAIN_PERIOD),
+            loop=self.loop,
+            **options
+        )
+
+    def _make_stationary_actors_cache(
+        self,
+        config: Optional[DotAccessDict],
+    ) -> StationaryActorsCache:
+
+        config = config or {}
+
+        return StationaryActorsCache(
+            loop=self.loop,
+            radar=self.radar,
+            request_timeout=config.get(
+                'request_timeout',
+                DEFAULT_STATIONARY_ACTORS_REQUEST_TIMEOUT,
+            ),
+            serialization_scheduler=self.serialization_scheduler,
+        )
+
+    @staticmethod
+    def _maybe_make_rtt_estimator(
+        config: Optional[DotAccessDict],
+    ) -> Optional[RTTEstimator]:
+
+        if not (config and config.get('is_enabled', True)):
+            return
+
+        options = {
+            key: config[key]
+            for key in (
+                'initial_timeout',
+                'min_timeout',
+                'max_timeout',
+            )
+            if key in config
+        }
+        return RTTEstimator(**options)
+
+    def _make_missions_storage(
+        self, config: Optional[DotAccessDict],
+    ) -> MissionsStorage:
+
+        config = config or {}
+
+        return MissionsStorage(
+            loop=self.loop,
+            root_dir=self.dedicated_server.missions_dir,
+            max_workers=config.get(
+                'max_workers', DEFAULT_STORAGE_MAX_WORKERS,
+            ),
+            max_pending=config.get(
+                'max_pending', DEFAULT_STORAGE_MAX_PENDING,
+            ),
+        )
+
+    def _maybe_make_missions_index(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[MissionsIndex]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', True):
+            return
+
+        return MissionsIndex(
+            loop=self.loop,
+            storage=self.missions_storage,
+            rescan_period=config.get(
+                'rescan_period', DEFAULT_INDEX_RESCAN_PERIOD,
+            ),
+            use_inotify=config.get('use_inotify', True),
+        )
+
+    def _maybe_make_parsed_missions_cache(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[ParsedMissionsCache]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', True):
+            return
+
+        persistence_dir = config.get('persistence_dir')
+        if persistence_dir:
+            persistence_dir = Path(persistence_dir).resolve()
+
+        return ParsedMissionsCache(
+            loop=self.loop,
+            storage=self.missions_storage,
+            max_size=config.get('max_size', DEFAULT_PARSE_CACHE_MAX_SIZE),
+            max_workers=config.get('max_workers', DEFAULT_PARSE_MAX_WORKERS),
+            executor_type=config.get('executor', EXECUTOR_TYPE_THREAD),
+            persistence_dir=persistence_dir or None,
+        )
+
+    def _maybe_make_missions_validator(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[MissionsValidator]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', False):
+            return
+
+        return MissionsValidator(
+            loop=self.loop,
+            storage=self.missions_storage,
+            parse=self._parse_mission,
+            concurrency=config.get(
+                'concurrency', DEFAULT_VALIDATION_CONCURRENCY,
+            ),
+        )
+
+    def _maybe_make_missions_search_index(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[MissionsSearchIndex]:
+
+        config = config or {}
+
+        if not (self.missions_index and config.get('is_enabled', False)):
+            return
+
+        persistence_path = config.get('persistence_path')
+        if persistence_path:
+            persistence_path = Path(persistence_path).resolve()
+
+        return MissionsSearchIndex(
+            loop=self.loop,
+            index=self.missions_index,
+            parse=self._parse_mission,
+            concurrency=config.get(
+                'concurrency', DEFAULT_SEARCH_CONCURRENCY,
+            ),
+            sync_period=config.get(
+                'sync_period', DEFAULT_SEARCH_SYNC_PERIOD,
+            ),
+            persistence_path=persistence_path or None,
+        )
+
+    def _maybe_make_missions_content_index(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[MissionsContentIndex]:
+
+        config = config or {}
+
+        if not (self.missions_index and config.get('is_enabled', False)):
+            return
+
+        persistence_path = config.get('persistence_path')
+        if persistence_path:
+            persistence_path = Path(persistence_path).resolve()
+
+        return MissionsContentIndex(
+            loop=self.loop,
+            index=self.missions_index,
+            concurrency=config.get(
+                'concurrency', DEFAULT_CONTENT_HASHING_CONCURRENCY,
+            ),
+            sync_period=config.get(
+                'sync_period', DEFAULT_CONTENT_SYNC_PERIOD,
+            ),
+            persistence_path=persistence_path or None,
+        )
+
+    def _maybe_make_missions_uploads(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[ResumableUploads]:
+
+        if not self.missions_content_index:
+            return
+
+        config = config or {}
+
+        return ResumableUploads(
+            loop=self.loop,
+            storage=self.missions_storage,
+            content_index=self.missions_content_index,
+            session_ttl=config.get(
+                'upload_session_ttl', DEFAULT_UPLOAD_SESSION_TTL,
+            ),
+        )
+
+    def _maybe_make_missions_archiver(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[MissionsArchiver]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', True):
+            return
+
+        return MissionsArchiver(
+            loop=self.loop,
+            storage=self.missions_storage,
+            index=self.missions_index,
+            chunk_size=config.get('chunk_size', DEFAULT_ARCHIVE_CHUNK_SIZE),
+            buffer_size=config.get(
+                'buffer_size', DEFAULT_ARCHIVE_BUFFER_SIZE,
+            ),
+            max_upload_size=config.get(
+                'max_upload_size', DEFAULT_ARCHIVE_MAX_UPLOAD_SIZE,
+            ),
+        )
+
+    def _maybe_make_missions_rotator(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[MissionsRotator]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', True):
+            return
+
+        return MissionsRotator(
+            loop=self.loop,
+            console_client=self.console_queries,
+            storage=self.missions_storage,
+            parse=self._parse_mission,
+            playlist=load_playlist(config.get('playlist') or []),
+            mission_duration=config.get(
+                'mission_duration', DEFAULT_ROTATION_MISSION_DURATION,
+            ),
+            step_timeout=config.get(
+                'step_timeout', DEFAULT_ROTATION_STEP_TIMEOUT,
+            ),
+            repeat=config.get('repeat', True),
+            on_mission_loaded=self.stationary_actors_cache.invalidate,
+        )
+
+    def _parse_mission(
+        self,
+        path: Path,
+        stat: os.stat_result,
+    ) -> Awaitable[Any]:
+
+        if self.parsed_missions_cache:
+            return self.parsed_missions_cache.get(path, stat)
+
+        return self.missions_storage.parse(path, self._mission_parser)
+
+    def _make_batch_executor(
+        self, config: Optional[DotAccessDict],
+    ) -> BatchExecutor:
+
+        config = config or {}
+
+        operations = Operations(
+            console_client=self.console_queries,
+            radar=self.radar,
+            stationary_actors_cache=self.stationary_actors_cache,
+            missions_search_index=self.missions_search_index,
+        )
+        return BatchExecutor(
+            loop=self.loop,
+            operations=operations,
+            timeout=config.get('timeout', DEFAULT_BATCH_TIMEOUT),
+            max_operations=config.get(
+                'max_operations', DEFAULT_BATCH_MAX_OPERATIONS,
+            ),
+        )
+
+    def _maybe_make_serialization_scheduler(
+        self, config: Optional[DotAccessDict],
+    ) -> Optional[SerializationScheduler]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', True):
+            return
+
+        return SerializationScheduler(
+            loop=self.loop,
+            min_size=config.get('min_size', DEFAULT_OFFLOADING_MIN_SIZE),
+            max_workers=config.get('max_workers', DEFAULT_MAX_WORKERS),
+            executor_type=config.get('executor', EXECUTOR_TYPE_THREAD),
+        )
+
+    def _maybe_make_missions_stream(
+        self, config: DotAccessDict,
+    ) -> Optional[MissionsStreamingFacility]:
+
+        if not self.missions_index:
+            return
+
+        return MissionsStreamingFacility(
+            loop=self.loop,
+            missions_index=self.missions_index,
+            coalescing_delay=config.get(
+                'coalescing_delay', DEFAULT_MISSIONS_COALESCING_DELAY,
+            ),
+        )
+
+    def _maybe_make_refresh_controller(
+        self, config: DotAccessDict,
+    ) -> Optional[AdaptiveRefreshController]:
+
+        if not (config and config.get('is_enabled', True)):
+            return
+
+        options = {
+            key: config[key]
+            for key in (
+                'min_refresh_period',
+                'max_stretch',
+                'target_utilization',
+                'max_cpu_usage',
+            )
+            if key in config
+        }
+        return AdaptiveRefreshController(
+            cpu_usage_getter=self.dedicated_server.get_cpu_usage,
+            **options
+        )
+
     async def start(self) -> Awaitable[None]:
         await self._maybe_start_nats_clients()
+
+        if self.console_queries_cache:
+            self.console_queries_cache.start()
+
         await self._maybe_start_static_streaming_subscribers()
         self._start_streaming_facilities()
+        self._maybe_start_missions_index()
+        self._maybe_start_missions_validator()
+        self._maybe_start_missions_search_index()
+        self._maybe_start_missions_content_index()
         self._start_game_log_processing()
         await self._maybe_start_proxies()
         await self._maybe_start_api()
+        self._maybe_start_missions_rotator()
 
     async def _maybe_start_nats_clients(self) -> Awaitable[None]:
         config = self._config.nats
@@ -211,6 +753,38 @@ class Airbridge:
         self.not_parsed_strings_stream.start()
         self.radar_stream.start()
 
+        if self.missions_stream:
+            self.missions_stream.start()
+
+    def _maybe_start_missions_index(self) -> None:
+        if self.missions_index:
+            self.missions_index.start()
+
+    def _maybe_start_missions_validator(self) -> None:
+        if self.missions_validator:
+            self.missions_validator.start()
+
+    def _maybe_start_missions_search_index(self) -> None:
+        if self.missions_search_index:
+            self.missions_search_index.start()
+
+    def _maybe_start_missions_content_index(self) -> None:
+        if self.missions_content_index:
+            self.missions_content_index.start()
+
+        if self.missions_uploads:
+            self.missions_uploads.start()
+
+    def _maybe_start_missions_rotator(self) -> None:
+        config = (self._config.get('missions') or {}).get('rotation') or {}
+
+        if (
+            self.missions_rotator
+            and config.get('playlist')
+            and config.get('autostart', True)
+        ):
+            self.missions_rotator.start()
+
     def _start_game_log_processing(self) -> None:
         self._start_game_log_worker()
         self._start_game_log_watch_dog()
@@ -271,8 +845,8 @@ class Airbridge:
             self._nats_api = NATSSubscriber(
                 nats_client=self.nats_client,
                 subject=config.subject,
-                console_client=self.console_client,
-                radar=self.radar,
+                batch_executor=self.batch_executor,
+                serialization_scheduler=self.serialization_scheduler,
                 trace=self._trace,
             )
             await self._nats_api.start()
@@ -286,14 +860,43 @@ class Airbridge:
         api_options = dict(
             loop=self.loop,
             dedicated_server=self.dedicated_server,
-            console_client=self.console_client,
+            console_client=self.console_queries,
+            console_queries_cache=self.console_queries_cache,
             radar=self.radar,
+            stationary_actors_cache=self.stationary_actors_cache,
+            serialization_scheduler=self.serialization_scheduler,
+            batch_executor=self.batch_executor,
             chat_stream=self.chat_stream,
             events_stream=self.events_stream,
             not_parsed_strings_stream=self.not_parsed_strings_stream,
             radar_stream=self.radar_stream,
             mission_parser=self._mission_parser,
+            missions_storage=self.missions_storage,
+            parsed_missions_cache=self.parsed_missions_cache,
+            missions_validator=self.missions_validator,
+            missions_index=self.missions_index,
+            missions_search_index=self.missions_search_index,
+            missions_rotator=self.missions_rotator,
+            missions_content_index=self.missions_content_index,
+            missions_uploads=self.missions_uploads,
+            missions_archiver=self.missions_archiver,
             cors_options=config.cors,
+            compression_min_size=self._get_http_compression_min_size(
+                config=config.get('compression'),
+            ),
+            ws_compression_min_sizes=self._get_ws_compression_min_sizes(),
+            cache_max_ages=(config.get('caching') or {}).get('max_age'),
+            rendered_responses_cache=self._maybe_make_rendered_responses_cache(
+                config=config.get('caching'),
+            ),
+            streaming_min_size=self._get_http_streaming_min_size(
+                config=config.get('chunked_encoding'),
+            ),
+            streaming_chunk_size=(
+                (config.get('chunked_encoding') or {}).get(
+                    'chunk_size', DEFAULT_STREAMING_CHUNK_SIZE,
+                )
+            ),
             debug=self._trace,
         )
 
@@ -315,15 +918,109 @@ class Airbridge:
             config.bind.port,
         )
 
+    @staticmethod
+    def _get_http_compression_min_size(
+        config: Optional[DotAccessDict],
+    ) -> Optional[int]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', True):
+            return
+
+        return config.get('min_size', DEFAULT_COMPRESSION_MIN_SIZE)
+
+    @staticmethod
+    def _get_http_streaming_min_size(
+        config: Optional[DotAccessDict],
+    ) -> Optional[int]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', True):
+            return
+
+        return config.get('min_size', DEFAULT_STREAMING_MIN_SIZE)
+
+    @staticmethod
+    def _maybe_make_rendered_responses_cache(
+        config: Optional[DotAccessDict],
+    ) -> Optional[RenderedResponsesCache]:
+
+        config = config or {}
+
+        if not config.get('is_enabled', True):
+            return
+
+        return RenderedResponsesCache(
+            max_size=config.get(
+                'max_size', DEFAULT_RENDERED_RESPONSES_CACHE_SIZE,
+            ),
+        )
+
+    def _get_ws_compression_min_sizes(self) -> Dict[str, int]:
+        results = {}
+
+        for facility in [
+            self.chat_stream,
+            self.events_stream,
+            self.not_parsed_strings_stream,
+            self.radar_stream,
+            self.missions_stream,
+        ]:
+            if facility is None:
+                continue
+
+            config = self._config.streaming.get(facility.name) or {}
+            config = config.get('ws_compression') or {}
+
+            if config.get('is_enabled', True):
+                results[facility.name] = config.get(
+                    'min_size', DEFAULT_COMPRESSION_MIN_SIZE,
+                )
+
+        return results
+
     async def stop(self) -> Awaitable[None]:
+        if self.missions_rotator:
+            self.missions_rotator.stop()
+
         await self._maybe_stop_proxies()
         self._game_log_watch_dog.stop()
         await self._maybe_stop_api()
         self._maybe_stop_game_log_processing()
+        self.stationary_actors_cache.stop()
+
+        if self.console_queries_cache:
+            self.console_queries_cache.stop()
+
         await self._stop_streaming_facilities()
         await self._maybe_stop_static_streaming_subscribers()
         await self._maybe_stop_nats_clients()
 
+        if self.missions_uploads:
+            self.missions_uploads.stop()
+
+        if self.missions_content_index:
+            self.missions_content_index.stop()
+
+        if self.missions_search_index:
+            self.missions_search_index.stop()
+
+        if self.missions_validator:
+            self.missions_validator.stop()
+
+        if self.parsed_missions_cache:
+            self.parsed_missions_cache.stop()
+
+        if self.missions_index:
+            self.missions_index.stop()
+
+        self.missions_storage.shutdown()
+
+        if self.serialization_scheduler:
+            self.serialization_scheduler.shutdown()
+
     async def _maybe_stop_proxies(self) -> None:
         awaitables = []
 
@@ -368,16 +1065,23 @@ class Airbridge:
         self.not_parsed_strings_stream.stop()
         self.radar_stream.stop()
 
+        if self.missions_stream:
+            self.missions_stream.stop()
+
         await self._wait_streaming_facilities()
 
     async def _wait_streaming_facilities(self) -> Awaitable[None]:
-        await asyncio.gather(
+        awaitables = [
             self.chat_stream.wait_stopped(),
             self.events_stream.wait_stopped(),
             self.not_parsed_strings_stream.wait_stopped(),
             self.radar_stream.wait_stopped(),
-            loop=self.loop,
-        )
+        ]
+
+        if self.missions_stream:
+            awaitables.append(self.missions_stream.wait_stopped())
+
+        await asyncio.gather(*awaitables, loop=self.loop)
 
     async def _maybe_stop_static_streaming_subscribers(self) -> Awaitable[None]:
         subscriber_groups = self._static_streaming_subscribers.values()
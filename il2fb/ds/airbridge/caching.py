@@ -0,0 +1,673 @@
+# coding: utf-8
+
+import asyncio
+import functools
+import gzip
+import itertools
+import logging
+import zlib
+
+from typing import Any, Awaitable, Dict, Optional
+
+from il2fb.commons.events import Event
+from il2fb.commons.organization import Belligerent
+
+from il2fb.ds.middleware.console import events as console_events
+from il2fb.ds.middleware.console.client import ConsoleClient
+
+from il2fb.parsers.game_log import events as game_log_events
+
+from il2fb.ds.airbridge import codecs
+from il2fb.ds.airbridge import json
+from il2fb.ds.airbridge.radar import AllStationaryActorsPositions
+from il2fb.ds.airbridge.radar import Radar
+from il2fb.ds.airbridge.serialization import SerializationScheduler
+from il2fb.ds.airbridge.serialization import estimate_size
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_STATIONARY_ACTORS_REQUEST_TIMEOUT = 10
+
+
+class EncodedPayload:
+    """
+    Payload along with its JSON representation and gzip-compressed copy of
+    that representation, which are computed once and served many times.
+
+    JSON representation ends with a newline, same as for REST responses.
+    Representations produced by other codecs, with numeric tags of types or
+    with other content encodings are computed on first demand and are cached
+    as well.
+
+    """
+    __slots__ = [
+        'data', 'version', 'json', 'json_gzipped',
+        '_compression_level', '_encoded',
+    ]
+
+    def __init__(
+        self,
+        data: Any,
+        version: int,
+        compression_level: int=6,
+    ):
+        self.data = data
+        self.version = version
+        self.json = json.dumpb(data) + b'\n'
+        self.json_gzipped = gzip.compress(
+            self.json,
+            compresslevel=compression_level,
+        )
+
+        self._compression_level = compression_level
+        self._encoded = {
+            (codecs.JSONCodec.name, False, None): self.json,
+            (codecs.JSONCodec.name, False, 'gzip'): self.json_gzipped,
+        }
+
+    def get_encoded(
+        self,
+        codec: Optional[codecs.Codec]=None,
+        compact_types: bool=False,
+        content_encoding: Optional[str]=None,
+    ) -> bytes:
+        """
+        Get representation of payload produced by codec and optionally
+        compressed with ``gzip`` or ``deflate`` content encoding.
+
+        """
+        codec = codec or codecs.DEFAULT_CODEC
+        key = (codec.name, compact_types, content_encoding)
+
+        result = self._encoded.get(key)
+        if result is not None:
+            return result
+
+        if content_encoding == 'gzip':
+            result = gzip.compress(
+                self.get_encoded(codec, compact_types),
+                compresslevel=self._compression_level,
+            )
+        elif content_encoding == 'deflate':
+            result = zlib.compress(
+                self.get_encoded(codec, compact_types),
+                self._compression_level,
+            )
+        elif content_encoding is not None:
+            raise ValueError(
+                f"unsupported content encoding '{content_encoding}'"
+            )
+        else:
+            result = codec.encode(self.data, compact_types=compact_types)
+            if not codec.is_binary:
+                result += b'\n'
+
+        self._encoded[key] = result
+        return result
+
+    def __repr__(self) -> str:
+        return (
+            f"<EncodedPayload version={self.version} "
+            f"size={len(self.json)}/{len(self.json_gzipped)}>"
+        )
+
+
+class StationaryActorsCache:
+    """
+    Per-mission cache of positions of stationary actors.
+
+    Positions of houses, stationary objects and stationary ships do not change
+    during a mission, so they are requested from radar only once after mission
+    is loaded and are kept along with their encoded representations.
+
+    Cache is invalidated when mission is loaded or unloaded and when
+    stationary actors are destroyed.
+
+    Entries are requested with ``request_timeout`` regardless of timeouts of
+    callers, so an entry which failed or timed out is requested again by the
+    next caller.
+
+    """
+    HOUSES = 'houses'
+    STATIONARY_OBJECTS = 'stationary_objects'
+    STATIONARY_SHIPS = 'stationary_ships'
+    ALL = 'all'
+
+    mission_events = (
+        game_log_events.MissionIsPlaying,
+    )
+    houses_events = (
+        game_log_events.BuildingWasDestroyedByHumanAircraft,
+        game_log_events.BuildingWasDestroyedByStationaryUnit,
+        game_log_events.BuildingWasDestroyedByMovingUnitMember,
+        game_log_events.BuildingWasDestroyedByMovingUnit,
+        game_log_events.BuildingWasDestroyedByAIAircraft,
+    )
+    stationary_objects_events = (
+        game_log_events.StationaryUnitWasDestroyed,
+        game_log_events.StationaryUnitWasDestroyedByStationaryUnit,
+        game_log_events.StationaryUnitWasDestroyedByMovingUnit,
+        game_log_events.StationaryUnitWasDestroyedByMovingUnitMember,
+        game_log_events.StationaryUnitWasDestroyedByHumanAircraft,
+        game_log_events.StationaryUnitWasDestroyedByAIAircraft,
+    )
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        radar: Radar,
+        request_timeout: float=DEFAULT_STATIONARY_ACTORS_REQUEST_TIMEOUT,
+        compression_level: int=6,
+        serialization_scheduler: Optional[SerializationScheduler]=None,
+    ):
+        self._loop = loop
+        self._radar = radar
+        self._request_timeout = request_timeout
+        self._compression_level = compression_level
+        self._serialization_scheduler = serialization_scheduler
+
+        self._getters = {
+            self.HOUSES: self._radar.get_all_houses_positions,
+            self.STATIONARY_OBJECTS: self._radar.get_stationary_objects_positions,
+            self.STATIONARY_SHIPS: self._radar.get_stationary_ships_positions,
+            self.ALL: self._get_all_stationary_actors_positions,
+        }
+
+        self._entries = {}
+        self._pending = {}
+        self._versions = itertools.count(1)
+        self._generations = {key: 0 for key in self._getters}
+
+        self._hits_count = 0
+        self._misses_count = 0
+        self._shared_count = 0
+        self._failures_count = 0
+        self._invalidations_count = 0
+
+        self._prefill_task = None
+
+    def get_houses_positions(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[EncodedPayload]:
+        return self._get(self.HOUSES, timeout)
+
+    def get_stationary_objects_positions(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[EncodedPayload]:
+        return self._get(self.STATIONARY_OBJECTS, timeout)
+
+    def get_all_stationary_actors_positions(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[EncodedPayload]:
+        return self._get(self.ALL, timeout)
+
+    def get_version(self, key: str) -> Optional[int]:
+        """
+        Get version of cached entry without requesting it if it is missing.
+
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry.version
+
+    async def _get(
+        self,
+        key: str,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[EncodedPayload]:
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._hits_count += 1
+            return entry
+
+        future = self._pending.get(key)
+        if future is None:
+            self._misses_count += 1
+            future = self._loop.create_task(self._fill(key))
+            future.add_done_callback(
+                functools.partial(self._on_fill_done, key)
+            )
+            self._pending[key] = future
+        else:
+            self._shared_count += 1
+
+        if timeout is None:
+            return (await asyncio.shield(future, loop=self._loop))
+        else:
+            return (await asyncio.wait_for(
+                asyncio.shield(future, loop=self._loop),
+                timeout=timeout,
+                loop=self._loop,
+            ))
+
+    async def _fill(self, key: str) -> Awaitable[EncodedPayload]:
+        generation = self._generations[key]
+
+        data = await self._getters[key](timeout=self._request_timeout)
+        make_entry = functools.partial(
+            EncodedPayload,
+            data=data,
+            version=next(self._versions),
+            compression_level=self._compression_level,
+        )
+
+        if self._serialization_scheduler is None:
+            entry = make_entry()
+        else:
+            entry = await self._serialization_scheduler.call(
+                make_entry,
+                size_hint=estimate_size(data),
+            )
+
+        if self._generations[key] == generation:
+            self._entries[key] = entry
+            LOG.debug(f"stationary actors cache: filled {key} ({entry})")
+
+        return entry
+
+    def _on_fill_done(self, key: str, future: asyncio.Future) -> None:
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+        # exception is retrieved also to avoid warnings about unretrieved ones
+        if not future.cancelled() and future.exception():
+            self._failures_count += 1
+
+    async def _get_all_stationary_actors_positions(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[AllStationaryActorsPositions]:
+
+        stationary_objects = await self._get(self.STATIONARY_OBJECTS, timeout)
+        houses = await self._get(self.HOUSES, timeout)
+        ships = await self._get(self.STATIONARY_SHIPS, timeout)
+
+        return AllStationaryActorsPositions(
+            stationary_objects=stationary_objects.data,
+            houses=houses.data,
+            ships=ships.data,
+        )
+
+    def invalidate(self, *keys: str) -> None:
+        """
+        Invalidate given entries or all entries if no keys are given.
+        Compound entry is invalidated along with any of its parts.
+
+        Not thread-safe.
+
+        """
+        keys = set(keys or self._getters)
+        keys.add(self.ALL)
+
+        self._invalidations_count += 1
+
+        for key in keys:
+            self._generations[key] += 1
+            self._entries.pop(key, None)
+            self._pending.pop(key, None)
+
+        LOG.debug(f"stationary actors cache: invalidated {sorted(keys)}")
+
+    def get_stats(self) -> dict:
+        return {
+            'entries_count': len(self._entries),
+            'pending_count': len(self._pending),
+            'hits_count': self._hits_count,
+            'misses_count': self._misses_count,
+            'shared_count': self._shared_count,
+            'failures_count': self._failures_count,
+            'invalidations_count': self._invalidations_count,
+        }
+
+    def prefill(self) -> None:
+        """
+        Fill all entries in background.
+
+        Not thread-safe.
+
+        """
+        if self._prefill_task and not self._prefill_task.done():
+            self._prefill_task.cancel()
+
+        self._prefill_task = self._loop.create_task(self._try_prefill())
+
+    async def _try_prefill(self) -> Awaitable[None]:
+        try:
+            await self._get(self.ALL)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            LOG.exception("stationary actors cache: failed to prefill")
+
+    def handle_game_log_event(self, event: Event) -> None:
+        """
+        Thread-safe handler of game log events.
+
+        """
+        if isinstance(event, self.mission_events):
+            self._loop.call_soon_threadsafe(self._on_mission_loaded)
+        elif isinstance(event, self.houses_events):
+            self._loop.call_soon_threadsafe(self.invalidate, self.HOUSES)
+        elif isinstance(event, self.stationary_objects_events):
+            self._loop.call_soon_threadsafe(
+                self.invalidate, self.STATIONARY_OBJECTS,
+            )
+
+    def _on_mission_loaded(self) -> None:
+        self.invalidate()
+        self.prefill()
+
+    def stop(self) -> None:
+        if self._prefill_task:
+            self._prefill_task.cancel()
+
+
+DEFAULT_CONSOLE_QUERIES_TTLS = {
+    'server_info': 5,
+    'humans_list': 1,
+    'humans_count': 1,
+    'humans_statistics': 1,
+    'mission_info': 1,
+}
+DEFAULT_CONSOLE_QUERIES_REQUEST_TIMEOUT = 10
+
+
+class ConsoleQueriesCache:
+    """
+    Caching facade of console client.
+
+    Results of read-only console commands are kept for a configurable number
+    of seconds (TTL) per command. Concurrent identical queries share a single
+    console request which is in flight. TTL of ``0`` disables caching of a
+    command, but its concurrent queries are still shared.
+
+    Entries are invalidated by write operations made via facade, by human
+    connection events and by mission events of game log. Results of requests
+    which were in flight during invalidation are not cached.
+
+    Console requests are made with ``request_timeout`` regardless of timeouts
+    of callers, so a request which failed or timed out is made again by the
+    next caller.
+
+    """
+    SERVER_INFO = 'server_info'
+    HUMANS_LIST = 'humans_list'
+    HUMANS_COUNT = 'humans_count'
+    HUMANS_STATISTICS = 'humans_statistics'
+    MISSION_INFO = 'mission_info'
+
+    HUMANS = (HUMANS_LIST, HUMANS_COUNT, HUMANS_STATISTICS, )
+
+    mission_events = (
+        game_log_events.MissionIsPlaying,
+        game_log_events.MissionHasBegun,
+        game_log_events.MissionHasEnded,
+    )
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        console_client: ConsoleClient,
+        ttls: Optional[Dict[str, float]]=None,
+        request_timeout: float=DEFAULT_CONSOLE_QUERIES_REQUEST_TIMEOUT,
+    ):
+        self._loop = loop
+        self._console_client = console_client
+        self._request_timeout = request_timeout
+
+        self._ttls = dict(DEFAULT_CONSOLE_QUERIES_TTLS)
+        self._ttls.update(ttls or {})
+
+        self._getters = {
+            self.SERVER_INFO: self._console_client.get_server_info,
+            self.HUMANS_LIST: self._console_client.get_humans_list,
+            self.HUMANS_COUNT: self._console_client.get_humans_count,
+            self.HUMANS_STATISTICS: self._console_client.get_humans_statistics,
+            self.MISSION_INFO: self._console_client.get_mission_info,
+        }
+
+        self._entries = {}
+        self._pending = {}
+        self._generations = {key: 0 for key in self._getters}
+
+        self._hits_count = 0
+        self._misses_count = 0
+        self._shared_count = 0
+        self._invalidations_count = 0
+
+    def start(self) -> None:
+        self._console_client.subscribe_to_human_connection_events(
+            subscriber=self._on_human_connection_event,
+        )
+
+    def stop(self) -> None:
+        self._console_client.unsubscribe_from_human_connection_events(
+            subscriber=self._on_human_connection_event,
+        )
+
+    def get_server_info(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[Any]:
+        return self._get(self.SERVER_INFO, timeout)
+
+    def get_humans_list(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[Any]:
+        return self._get(self.HUMANS_LIST, timeout)
+
+    def get_humans_count(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[Any]:
+        return self._get(self.HUMANS_COUNT, timeout)
+
+    def get_humans_statistics(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[Any]:
+        return self._get(self.HUMANS_STATISTICS, timeout)
+
+    def get_mission_info(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[Any]:
+        return self._get(self.MISSION_INFO, timeout)
+
+    async def _get(
+        self,
+        key: str,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[Any]:
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            result, expires_at = entry
+            if self._loop.time() < expires_at:
+                self._hits_count += 1
+                return result
+
+            del self._entries[key]
+
+        future = self._pending.get(key)
+        if future is None:
+            self._misses_count += 1
+            future = self._loop.create_task(self._fill(key))
+            future.add_done_callback(
+                functools.partial(self._on_fill_done, key)
+            )
+            self._pending[key] = future
+        else:
+            self._shared_count += 1
+
+        if timeout is None:
+            return (await asyncio.shield(future, loop=self._loop))
+        else:
+            return (await asyncio.wait_for(
+                asyncio.shield(future, loop=self._loop),
+                timeout=timeout,
+                loop=self._loop,
+            ))
+
+    async def _fill(self, key: str) -> Awaitable[Any]:
+        generation = self._generations[key]
+
+        result = await self._getters[key](timeout=self._request_timeout)
+
+        ttl = self._ttls.get(key)
+        if ttl and self._generations[key] == generation:
+            self._entries[key] = (result, self._loop.time() + ttl)
+
+        return result
+
+    def _on_fill_done(self, key: str, future: asyncio.Future) -> None:
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+        if not future.cancelled():
+            # retrieve exception to avoid warnings about unretrieved ones
+            future.exception()
+
+    def invalidate(self, *keys: str) -> None:
+        """
+        Invalidate given entries or all entries if no keys are given.
+
+        Not thread-safe.
+
+        """
+        keys = keys or tuple(self._getters)
+
+        for key in keys:
+            self._generations[key] += 1
+            self._entries.pop(key, None)
+            self._pending.pop(key, None)
+
+        self._invalidations_count += 1
+        LOG.debug(f"console queries cache: invalidated {sorted(keys)}")
+
+    def handle_game_log_event(self, event: Event) -> None:
+        """
+        Thread-safe handler of game log events.
+
+        """
+        if isinstance(event, self.mission_events):
+            self._loop.call_soon_threadsafe(
+                self.invalidate, self.MISSION_INFO,
+            )
+
+    def _on_human_connection_event(
+        self,
+        event: console_events.HumanConnectionEvent,
+    ) -> None:
+        self.invalidate(*self.HUMANS)
+
+    async def kick_all_humans(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[int]:
+
+        try:
+            return (await self._console_client.kick_all_humans(timeout))
+        finally:
+            self.invalidate(*self.HUMANS)
+
+    async def kick_human_by_callsign(
+        self,
+        callsign: str,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+
+        try:
+            await self._console_client.kick_human_by_callsign(
+                callsign, timeout,
+            )
+        finally:
+            self.invalidate(*self.HUMANS)
+
+    async def load_mission(
+        self,
+        file_path: str,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+
+        try:
+            await self._console_client.load_mission(file_path, timeout)
+        finally:
+            self.invalidate(self.MISSION_INFO)
+
+    async def begin_mission(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+
+        try:
+            await self._console_client.begin_mission(timeout)
+        finally:
+            self.invalidate(self.MISSION_INFO)
+
+    async def end_mission(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+
+        try:
+            await self._console_client.end_mission(timeout)
+        finally:
+            self.invalidate(self.MISSION_INFO)
+
+    async def unload_mission(
+        self,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+
+        try:
+            await self._console_client.unload_mission(timeout)
+        finally:
+            self.invalidate(self.MISSION_INFO)
+
+    def chat_to_all(
+        self,
+        message: str,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+        return self._console_client.chat_to_all(message, timeout)
+
+    def chat_to_human(
+        self,
+        message: str,
+        addressee: str,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+        return self._console_client.chat_to_human(message, addressee, timeout)
+
+    def chat_to_belligerent(
+        self,
+        message: str,
+        addressee: Belligerent,
+        timeout: Optional[float]=None,
+    ) -> Awaitable[None]:
+        return self._console_client.chat_to_belligerent(
+            message, addressee, timeout,
+        )
+
+    def get_stats(self) -> dict:
+        now = self._loop.time()
+        return {
+            'entries_count': sum(
+                1
+                for result, expires_at in self._entries.values()
+                if now < expires_at
+            ),
+            'pending_count': len(self._pending),
+            'hits_count': self._hits_count,
+            'misses_count': self._misses_count,
+            'shared_count': self._shared_count,
+            'invalidations_count': self._invalidations_count,
+        }
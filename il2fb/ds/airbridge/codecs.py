@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Codecs of data emitted by Airbridge.
+
+JSON is always available. MessagePack and CBOR are available if ``msgpack``
+and ``cbor2`` are installed respectively. All codecs convert objects into
+primitives by serializers of ``il2fb.ds.airbridge.json``, so all of them share
+same schema of data.
+
+"""
+import logging
+
+from typing import Any, Iterable, List, Optional, Tuple
+
+from il2fb.ds.airbridge import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+__all__ = (
+    'Codec', 'JSONCodec', 'MessagePackCodec', 'CBORCodec',
+    'get_codec', 'get_available_codecs', 'get_codec_by_media_type',
+)
+
+
+LOG = logging.getLogger(__name__)
+
+
+class Codec:
+    name = None
+    media_types = ()
+    is_binary = True
+
+    @property
+    def media_type(self) -> str:
+        return self.media_types[0]
+
+    def encode(
+        self,
+        obj: Any,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+    ) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+    def encode_map(self, items: Iterable[Tuple[str, bytes]]) -> bytes:
+        """
+        Build encoded map from string keys and already encoded values.
+
+        Allows to embed payloads which were encoded once into envelopes of
+        responses without decoding and encoding them again.
+
+        """
+        raise NotImplementedError
+
+
+class JSONCodec(Codec):
+    name = 'json'
+    media_types = ('application/json', )
+    is_binary = False
+
+    def encode(
+        self,
+        obj: Any,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+    ) -> bytes:
+        return json.dumpb(obj, indent=indent, compact_types=compact_types)
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+    def encode_map(self, items: Iterable[Tuple[str, bytes]]) -> bytes:
+        item_separator, key_separator = (
+            separator.encode()
+            for separator in json.get_backend().separators
+        )
+        return b''.join([
+            b'{',
+            item_separator.join(
+                json.dumpb(key) + key_separator + value.rstrip()
+                for key, value in items
+            ),
+            b'}',
+        ])
+
+
+class _BinaryCodec(Codec):
+    # major type of maps with less than 16 (MessagePack) or
+    # 24 (CBOR) items which is packed into first byte along with size
+    map_prefix = None
+    map_max_short_size = None
+
+    def encode_map(self, items: Iterable[Tuple[str, bytes]]) -> bytes:
+        items = list(items)
+
+        if len(items) >= self.map_max_short_size:
+            raise ValueError(f"too many items for a map ({len(items)})")
+
+        chunks = [bytes([self.map_prefix | len(items)])]
+        for key, value in items:
+            chunks.append(self.encode(key))
+            chunks.append(value)
+
+        return b''.join(chunks)
+
+
+class MessagePackCodec(_BinaryCodec):
+    name = 'msgpack'
+    media_types = ('application/msgpack', 'application/x-msgpack', )
+
+    map_prefix = 0x80
+    map_max_short_size = 16
+
+    def encode(
+        self,
+        obj: Any,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+    ) -> bytes:
+        return msgpack.packb(
+            obj,
+            default=(
+                json.to_compact_primitive
+                if compact_types
+                else json.to_primitive
+            ),
+            use_bin_type=True,
+        )
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class CBORCodec(_BinaryCodec):
+    name = 'cbor'
+    media_types = ('application/cbor', )
+
+    map_prefix = 0xa0
+    map_max_short_size = 24
+
+    def encode(
+        self,
+        obj: Any,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+    ) -> bytes:
+        # 'cbor2' encodes datetimes natively, so objects are converted into
+        # primitives beforehand to keep same schema as other codecs have
+        obj = _to_primitives(
+            obj,
+            default=(
+                json.to_compact_primitive
+                if compact_types
+                else json.to_primitive
+            ),
+        )
+        return cbor2.dumps(obj)
+
+    def decode(self, data: bytes) -> Any:
+        return cbor2.loads(data)
+
+
+_NATIVE_TYPES = (str, int, float, bytes, type(None))
+
+
+def _to_primitives(obj: Any, default: json.Serializer) -> Any:
+    cls = type(obj)
+
+    if cls in json.PRIMITIVE_TYPES:
+        return obj
+
+    if cls is dict:
+        return {
+            key: _to_primitives(value, default)
+            for key, value in obj.items()
+        }
+
+    if cls is list or cls is tuple:
+        return [_to_primitives(value, default) for value in obj]
+
+    if isinstance(obj, _NATIVE_TYPES):
+        return obj
+
+    return _to_primitives(default(obj), default)
+
+
+_CODECS = [
+    (JSONCodec, json),
+    (MessagePackCodec, msgpack),
+    (CBORCodec, cbor2),
+]
+
+_codecs = {
+    cls.name: cls()
+    for cls, module in _CODECS
+    if module is not None
+}
+
+DEFAULT_CODEC = _codecs[JSONCodec.name]
+
+
+def get_available_codecs() -> List[str]:
+    return list(_codecs.keys())
+
+
+def get_codec(name: Optional[str]=None) -> Codec:
+    if name is None:
+        return DEFAULT_CODEC
+
+    try:
+        return _codecs[name]
+    except KeyError:
+        raise ValueError(f"unknown or not installed format '{name}'")
+
+
+def get_codec_by_media_type(media_type: str) -> Optional[Codec]:
+    media_type = media_type.strip().lower()
+
+    for codec in _codecs.values():
+        if media_type in codec.media_types:
+            return codec
@@ -134,12 +134,304 @@ CONFIG_SCHEMA = {
                     },
                     'required': ['bind', ],
                 },
+                'console_cache': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'request_timeout': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+                        'ttl': {
+                            'type': 'object',
+                            'properties': {
+                                'server_info': {
+                                    'type': 'number',
+                                    'minimum': 0,
+                                },
+                                'humans_list': {
+                                    'type': 'number',
+                                    'minimum': 0,
+                                },
+                                'humans_count': {
+                                    'type': 'number',
+                                    'minimum': 0,
+                                },
+                                'humans_statistics': {
+                                    'type': 'number',
+                                    'minimum': 0,
+                                },
+                                'mission_info': {
+                                    'type': 'number',
+                                    'minimum': 0,
+                                },
+                            },
+                        },
+                    },
+                },
                 'is_interactive': {
                     'type': 'boolean',
                 },
             },
             'required': ['exe_path', ],
         },
+        'radar': {
+            'type': 'object',
+            'properties': {
+                'chunking': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'chunk_size': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                        'concurrency': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                    },
+                    'required': ['chunk_size', ],
+                },
+                'retries': {
+                    'type': 'integer',
+                    'minimum': 0,
+                },
+                'attempt_timeout': {
+                    'type': 'number',
+                    'minimum': 0,
+                },
+                'adaptive_timeouts': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'initial_timeout': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+                        'min_timeout': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+                        'max_timeout': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+                    },
+                },
+                'drain_period': {
+                    'type': 'number',
+                    'minimum': 0,
+                },
+                'stationary_actors': {
+                    'type': 'object',
+                    'properties': {
+                        'request_timeout': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+                    },
+                },
+            },
+        },
+        'missions': {
+            'type': 'object',
+            'properties': {
+                'storage': {
+                    'type': 'object',
+                    'properties': {
+                        'max_workers': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                        'max_pending': {
+                            'type': 'integer',
+                            'minimum': 0,
+                        },
+                    },
+                },
+                'parse_cache': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'max_size': {
+                            'type': 'integer',
+                            'minimum': 0,
+                        },
+                        'max_workers': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                        'executor': {
+                            'type': 'string',
+                            'enum': ['thread', 'process', ],
+                        },
+                        'persistence_dir': {
+                            'type': 'string',
+                        },
+                    },
+                },
+                'validation': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'concurrency': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                    },
+                },
+                'index': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'rescan_period': {
+                            'type': 'number',
+                            'minimum': 1,
+                        },
+                        'use_inotify': {
+                            'type': 'boolean',
+                        },
+                    },
+                },
+                'search': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'concurrency': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                        'sync_period': {
+                            'type': 'number',
+                            'minimum': 1,
+                        },
+                        'persistence_path': {
+                            'type': 'string',
+                        },
+                    },
+                },
+                'content': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'concurrency': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                        'sync_period': {
+                            'type': 'number',
+                            'minimum': 1,
+                        },
+                        'persistence_path': {
+                            'type': 'string',
+                        },
+                        'upload_session_ttl': {
+                            'type': 'number',
+                            'minimum': 1,
+                        },
+                    },
+                },
+                'archives': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'chunk_size': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                        'buffer_size': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                        'max_upload_size': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                    },
+                },
+                'rotation': {
+                    'type': 'object',
+                    'properties': {
+                        'is_enabled': {
+                            'type': 'boolean',
+                        },
+                        'autostart': {
+                            'type': 'boolean',
+                        },
+                        'playlist': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'path': {
+                                        'type': 'string',
+                                    },
+                                    'duration': {
+                                        'type': 'number',
+                                        'minimum': 1,
+                                    },
+                                },
+                                'required': ['path', ],
+                            },
+                        },
+                        'mission_duration': {
+                            'type': 'number',
+                            'minimum': 1,
+                        },
+                        'step_timeout': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+                        'repeat': {
+                            'type': 'boolean',
+                        },
+                    },
+                },
+            },
+        },
+        'serialization': {
+            'type': 'object',
+            'properties': {
+                'is_enabled': {
+                    'type': 'boolean',
+                },
+                'min_size': {
+                    'type': 'integer',
+                    'minimum': 0,
+                },
+                'max_workers': {
+                    'type': 'integer',
+                    'minimum': 1,
+                },
+                'executor': {
+                    'type': 'string',
+                    'enum': ['thread', 'process', ],
+                },
+                'json_backend': {
+                    'type': 'string',
+                    'enum': ['json', 'orjson', 'ujson', ],
+                },
+            },
+        },
         'nats': {
             'type': 'object',
             'properties': {
@@ -195,6 +487,19 @@ CONFIG_SCHEMA = {
                     },
                     'required': ['subject', ],
                 },
+                'batch': {
+                    'type': 'object',
+                    'properties': {
+                        'timeout': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+                        'max_operations': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                    },
+                },
                 'http': {
                     'type': 'object',
                     'properties': {
@@ -227,6 +532,75 @@ CONFIG_SCHEMA = {
                         'cors': {
                             'type': 'object',
                         },
+                        'compression': {
+                            'type': 'object',
+                            'properties': {
+                                'is_enabled': {
+                                    'type': 'boolean',
+                                },
+                                'min_size': {
+                                    'type': 'integer',
+                                    'minimum': 0,
+                                },
+                            },
+                        },
+                        'caching': {
+                            'type': 'object',
+                            'properties': {
+                                'is_enabled': {
+                                    'type': 'boolean',
+                                },
+                                'max_size': {
+                                    'type': 'integer',
+                                    'minimum': 0,
+                                },
+                                'max_age': {
+                                    'type': 'object',
+                                    'properties': {
+                                        'radar': {
+                                            'type': 'integer',
+                                            'minimum': 0,
+                                        },
+                                        'stationary_actors': {
+                                            'type': 'integer',
+                                            'minimum': 0,
+                                        },
+                                        'humans': {
+                                            'type': 'integer',
+                                            'minimum': 0,
+                                        },
+                                        'server_info': {
+                                            'type': 'integer',
+                                            'minimum': 0,
+                                        },
+                                        'mission_info': {
+                                            'type': 'integer',
+                                            'minimum': 0,
+                                        },
+                                        'missions': {
+                                            'type': 'integer',
+                                            'minimum': 0,
+                                        },
+                                    },
+                                },
+                            },
+                        },
+                        'chunked_encoding': {
+                            'type': 'object',
+                            'properties': {
+                                'is_enabled': {
+                                    'type': 'boolean',
+                                },
+                                'min_size': {
+                                    'type': 'integer',
+                                    'minimum': 0,
+                                },
+                                'chunk_size': {
+                                    'type': 'integer',
+                                    'minimum': 1,
+                                },
+                            },
+                        },
                     },
                     'required': ['bind', ],
                 },
@@ -240,6 +614,19 @@ CONFIG_SCHEMA = {
                     'type': 'object',
                     'properties': {
 
+                        'ws_compression': {
+                            'type': 'object',
+                            'properties': {
+                                'is_enabled': {
+                                    'type': 'boolean',
+                                },
+                                'min_size': {
+                                    'type': 'integer',
+                                    'minimum': 0,
+                                },
+                            },
+                        },
+
                         'subscribers': {
                             'type': 'object',
                             'properties': {
@@ -256,6 +643,9 @@ CONFIG_SCHEMA = {
                                                 'encoding': {
                                                     'type': 'string',
                                                 },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
                                             },
                                             'required': ['path', ],
                                         },
@@ -272,6 +662,9 @@ CONFIG_SCHEMA = {
                                                 'subject': {
                                                     'type': 'string',
                                                 },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
                                             },
                                             'required': ['subject', ],
                                         },
@@ -287,6 +680,19 @@ CONFIG_SCHEMA = {
                     'type': 'object',
                     'properties': {
 
+                        'ws_compression': {
+                            'type': 'object',
+                            'properties': {
+                                'is_enabled': {
+                                    'type': 'boolean',
+                                },
+                                'min_size': {
+                                    'type': 'integer',
+                                    'minimum': 0,
+                                },
+                            },
+                        },
+
                         'subscribers': {
                             'type': 'object',
                             'properties': {
@@ -303,6 +709,9 @@ CONFIG_SCHEMA = {
                                                 'encoding': {
                                                     'type': 'string',
                                                 },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
                                             },
                                             'required': ['path', ],
                                         },
@@ -319,6 +728,9 @@ CONFIG_SCHEMA = {
                                                 'subject': {
                                                     'type': 'string',
                                                 },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
                                             },
                                             'required': ['subject', ],
                                         },
@@ -334,6 +746,90 @@ CONFIG_SCHEMA = {
                     'type': 'object',
                     'properties': {
 
+                        'ws_compression': {
+                            'type': 'object',
+                            'properties': {
+                                'is_enabled': {
+                                    'type': 'boolean',
+                                },
+                                'min_size': {
+                                    'type': 'integer',
+                                    'minimum': 0,
+                                },
+                            },
+                        },
+
+                        'subscribers': {
+                            'type': 'object',
+                            'properties': {
+
+                                'file': {
+                                    'type': 'object',
+                                    'properties': {
+                                        'args': {
+                                            'type': 'object',
+                                            'properties': {
+                                                'path': {
+                                                    'type': 'string',
+                                                },
+                                                'encoding': {
+                                                    'type': 'string',
+                                                },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
+                                            },
+                                            'required': ['path', ],
+                                        },
+                                    },
+                                    'required': ['args', ],
+                                },
+
+                                'nats': {
+                                    'type': 'object',
+                                    'properties': {
+                                        'args': {
+                                            'type': 'object',
+                                            'properties': {
+                                                'subject': {
+                                                    'type': 'string',
+                                                },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
+                                            },
+                                            'required': ['subject', ],
+                                        },
+                                    },
+                                    'required': ['args', ],
+                                },
+                            },
+                        },
+                    },
+                },
+
+                'missions': {
+                    'type': 'object',
+                    'properties': {
+
+                        'coalescing_delay': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+
+                        'ws_compression': {
+                            'type': 'object',
+                            'properties': {
+                                'is_enabled': {
+                                    'type': 'boolean',
+                                },
+                                'min_size': {
+                                    'type': 'integer',
+                                    'minimum': 0,
+                                },
+                            },
+                        },
+
                         'subscribers': {
                             'type': 'object',
                             'properties': {
@@ -350,6 +846,9 @@ CONFIG_SCHEMA = {
                                                 'encoding': {
                                                     'type': 'string',
                                                 },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
                                             },
                                             'required': ['path', ],
                                         },
@@ -366,6 +865,9 @@ CONFIG_SCHEMA = {
                                                 'subject': {
                                                     'type': 'string',
                                                 },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
                                             },
                                             'required': ['subject', ],
                                         },
@@ -384,6 +886,51 @@ CONFIG_SCHEMA = {
                         'request_timeout': {
                             'type': 'number',
                         },
+                        'coalescing_tolerance': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+                        'jitter': {
+                            'type': 'number',
+                            'minimum': 0,
+                        },
+                        'throttling': {
+                            'type': 'object',
+                            'properties': {
+                                'is_enabled': {
+                                    'type': 'boolean',
+                                },
+                                'min_refresh_period': {
+                                    'type': 'number',
+                                    'minimum': 0,
+                                },
+                                'max_stretch': {
+                                    'type': 'number',
+                                    'minimum': 1,
+                                },
+                                'target_utilization': {
+                                    'type': 'number',
+                                    'minimum': 0,
+                                },
+                                'max_cpu_usage': {
+                                    'type': 'number',
+                                    'minimum': 0,
+                                },
+                            },
+                        },
+                        'ws_compression': {
+                            'type': 'object',
+                            'properties': {
+                                'is_enabled': {
+                                    'type': 'boolean',
+                                },
+                                'min_size': {
+                                    'type': 'integer',
+                                    'minimum': 0,
+                                },
+                            },
+                        },
+
                         'subscribers': {
                             'type': 'object',
                             'properties': {
@@ -400,6 +947,9 @@ CONFIG_SCHEMA = {
                                                 'encoding': {
                                                     'type': 'string',
                                                 },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
                                             },
                                             'required': ['path', ],
                                         },
@@ -409,6 +959,18 @@ CONFIG_SCHEMA = {
                                                 'subscription_options': {
                                                     'type': 'integer',
                                                 },
+                                                'categories': {
+                                                    'type': 'array',
+                                                    'items': {
+                                                        'enum': [
+                                                            'aircrafts',
+                                                            'ground_units',
+                                                            'ships',
+                                                            'stationary',
+                                                        ],
+                                                    },
+                                                    'minItems': 1,
+                                                },
                                             },
                                         },
                                     },
@@ -424,6 +986,9 @@ CONFIG_SCHEMA = {
                                                 'subject': {
                                                     'type': 'string',
                                                 },
+                                                'compact_types': {
+                                                    'type': 'boolean',
+                                                },
                                             },
                                             'required': ['subject', ],
                                         },
@@ -433,6 +998,18 @@ CONFIG_SCHEMA = {
                                                 'subscription_options': {
                                                     'type': 'integer',
                                                 },
+                                                'categories': {
+                                                    'type': 'array',
+                                                    'items': {
+                                                        'enum': [
+                                                            'aircrafts',
+                                                            'ground_units',
+                                                            'ships',
+                                                            'stationary',
+                                                        ],
+                                                    },
+                                                    'minItems': 1,
+                                                },
                                             },
                                         },
                                     },
@@ -211,6 +211,15 @@ class DedicatedServer:
     def pid(self) -> IntOrNone:
         return self._process and self._process.pid
 
+    def get_cpu_usage(self) -> Optional[float]:
+        """
+        Get CPU usage of server's process in percents since previous call.
+        First call returns meaningless ``0.0``.
+
+        """
+        if self._process_utils:
+            return self._process_utils.cpu_percent(interval=None)
+
     async def start(self) -> Awaitable[None]:
         try:
             await self._spawn_process()
@@ -1,46 +1,670 @@
 # -*- coding: utf-8 -*-
+"""
+JSON serialization with pluggable backends.
 
+``json`` from standard library is used by default. ``orjson`` or ``ujson`` can
+be selected explicitly if installed. They output compact separators only, so
+output of standard library used along with them is compact as well. Otherwise
+output of fast backends is identical to the one of the standard library: if a
+fast backend is not able to produce such output (e.g., for non-ASCII strings,
+floats in exponential notation, non-finite floats or very long integers),
+serialization falls back to the standard library.
+
+"""
+import functools
+import hashlib
 import json as _json
+import logging
+import math
+import operator
+import re
+import threading
 
-from functools import partial
+from typing import (
+    Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union,
+)
 
 from il2fb.commons.events import Event
+from il2fb.commons.structures import BaseStructure
 
 from il2fb.ds.airbridge.structures import TimestampedData
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-__all__ = ('dumps', 'loads', )
+try:
+    import ujson
+except ImportError:
+    ujson = None
 
 
-class JSONEncoder(_json.JSONEncoder):
+__all__ = (
+    'dumps', 'dumpb', 'loads', 'iterencode',
+    'get_backend', 'get_available_backends', 'use_backend', 'DEFAULT_BACKEND',
+    'serializers', 'compact_serializers', 'type_tags',
+)
 
-    def default(self, obj):
-        cls = type(obj)
-
-        if issubclass(cls, TimestampedData):
-            result = {
-                key: getattr(obj, key)
-                for key in cls.__slots__
-            }
-        elif hasattr(obj, 'to_primitive'):
-            result = obj.to_primitive()
-            result['__type__'] = f"{cls.__module__}.{cls.__name__}"
-
-            if issubclass(cls, Event):
-                result.pop('name')
-                result.pop('verbose_name')
-
-        elif hasattr(obj, 'isoformat'):
-            result = obj.isoformat()
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_BACKEND = 'json'
+
+DEFAULT_SEPARATORS = (', ', ': ')
+COMPACT_SEPARATORS = (',', ':')
+PRETTY_INDENT = 2
+
+PRIMITIVE_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+@functools.lru_cache(maxsize=None)
+def _get_slots(cls: type) -> List[str]:
+    """
+    Get names of slots defined by class and all of its bases.
+
+    """
+    return [
+        name
+        for klass in reversed(cls.__mro__)
+        for name in klass.__dict__.get('__slots__', ())
+    ]
+
+
+Serializer = Callable[[Any], Any]
+
+
+def _identity(obj: Any) -> Any:
+    return obj
+
+
+def _isoformat(obj: Any) -> str:
+    return obj.isoformat()
+
+
+def _get_type_name(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__name__}"
+
+
+def _has_default_to_primitive(cls: type) -> bool:
+    """
+    Tell whether instances of class are converted into primitives by
+    implementation of ``BaseStructure`` (or ``Event``) which can be compiled.
+
+    """
+    return (
+        issubclass(cls, BaseStructure) and
+        cls._to_primitive is BaseStructure._to_primitive and
+        cls.to_primitive in (BaseStructure.to_primitive, Event.to_primitive)
+    )
+
+
+class SerializersRegistry(dict):
+    """
+    Maps classes to functions which convert their instances into primitives.
+
+    Functions are compiled by ``compiler`` on first sight of a class and are
+    cached, so the type of each object is inspected just once. Serializers can
+    be registered explicitly as well.
+
+    """
+
+    def __init__(self, compiler: Callable[[type], Serializer]):
+        super().__init__()
+        self._compiler = compiler
+
+    def __missing__(self, cls: type) -> Serializer:
+        serializer = self[cls] = self._compiler(cls)
+        return serializer
+
+    def register(self, cls: type, serializer: Serializer) -> None:
+        self[cls] = serializer
+
+
+class TypeTagsRegistry:
+    """
+    Versioned append-only registry of compact numeric tags of types.
+
+    Tags are assigned in order of registration starting from ``1`` and never
+    change during lifetime of registry. Version of registry is a digest of
+    names of types in order of their tags, so it identifies the whole mapping
+    rather than the number of types in it.
+
+    """
+
+    def __init__(self):
+        self._tags = {}
+        self._names = []
+        self._hash = hashlib.sha1()
+        self._version = self._hash.hexdigest()[:16]
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    def get_tag(self, cls: type) -> int:
+        tag = self._tags.get(cls)
+        if tag is None:
+            tag = self.register(cls)
+        return tag
+
+    def register(self, cls: type) -> int:
+        with self._lock:
+            tag = self._tags.get(cls)
+
+            if tag is None:
+                name = _get_type_name(cls)
+                self._names.append(name)
+                self._hash.update(name.encode() + b'\n')
+                self._version = self._hash.hexdigest()[:16]
+                tag = self._tags[cls] = len(self._names)
+
+        return tag
+
+    def register_many(self, classes: Iterable[type]) -> None:
+        """
+        Register classes in order of their fully-qualified names, so their
+        tags are same across restarts.
+
+        """
+        for cls in sorted(classes, key=_get_type_name):
+            self.register(cls)
+
+    def to_primitive(self, context=None) -> dict:
+        with self._lock:
+            names = list(self._names)
+            version = self._version
+
+        return {
+            'version': version,
+            'types': {
+                str(tag): name
+                for tag, name in enumerate(names, start=1)
+            },
+        }
+
+
+type_tags = TypeTagsRegistry()
+
+
+def _compile_nested_serializer(cls: type) -> Serializer:
+    """
+    Compile serializer of value of structure's field which behaves exactly
+    like ``BaseStructure._to_primitive``.
+
+    """
+    if cls in PRIMITIVE_TYPES or cls in (list, dict, tuple):
+        return _identity
+
+    if (
+        _has_default_to_primitive(cls) and
+        cls.to_primitive is BaseStructure.to_primitive
+    ):
+        return _compile_fields_serializer(cls.__slots__)
+
+    if hasattr(cls, 'to_primitive'):
+        return operator.methodcaller('to_primitive', None)
+
+    if hasattr(cls, 'isoformat'):
+        return _isoformat
+
+    return _identity
+
+
+def _compile_fields_serializer(
+    fields: List[str],
+    type_tag: Optional[Union[str, int]]=None,
+    convert_values: bool=True,
+) -> Serializer:
+    """
+    Compile function which puts values of given fields of object into a dict.
+
+    Access to fields and conversion of their values are unrolled into the body
+    of function, so no intermediate containers are created and primitive
+    values are passed as is.
+
+    """
+    lines = ["def serialize(obj):"]
+    items = []
+
+    for i, key in enumerate(fields):
+        name = f"v{i}"
+        lines.append(f"    {name} = obj.{key}")
+
+        if convert_values:
+            value = (
+                f"{name} if type({name}) in primitive_types "
+                f"else nested_serializers[type({name})]({name})"
+            )
         else:
-            result = super().default(obj)
+            value = name
+
+        items.append(f"{key!r}: {value}")
+
+    if type_tag is not None:
+        items.append(f"'__type__': {type_tag!r}")
+
+    lines.append(f"    return {{{', '.join(items)}}}")
+
+    namespace = {
+        'primitive_types': PRIMITIVE_TYPES,
+        'nested_serializers': _nested_serializers,
+    }
+    exec("\n".join(lines), namespace)
+    return namespace['serialize']
+
+
+def _compile_structure_serializer(
+    cls: type,
+    type_tag: Union[str, int],
+) -> Serializer:
+
+    if _has_default_to_primitive(cls):
+        fields = cls.__slots__
+        if issubclass(cls, Event):
+            fields = [
+                key for key in fields
+                if key not in ('name', 'verbose_name')
+            ]
+
+        return _compile_fields_serializer(fields, type_tag)
+
+    is_event = issubclass(cls, Event)
+
+    def serialize(obj: Any) -> dict:
+        result = obj.to_primitive()
+        result['__type__'] = type_tag
+
+        if is_event:
+            result.pop('name')
+            result.pop('verbose_name')
 
         return result
 
+    return serialize
+
+
+def _compile_serializer(cls: type, compact_types: bool=False) -> Serializer:
+    """
+    Compile serializer of object which is not supported by JSON natively.
+
+    If ``compact_types`` is set, numeric tags of types are used instead of
+    their names.
+
+    """
+    if issubclass(cls, TimestampedData):
+        return _compile_fields_serializer(
+            fields=_get_slots(cls),
+            convert_values=False,
+        )
+
+    if hasattr(cls, 'to_primitive'):
+        return _compile_structure_serializer(
+            cls=cls,
+            type_tag=(
+                type_tags.get_tag(cls)
+                if compact_types
+                else _get_type_name(cls)
+            ),
+        )
+
+    if hasattr(cls, 'isoformat'):
+        return _isoformat
+
+    def serialize(obj: Any) -> None:
+        raise TypeError(
+            f"Object of type '{cls.__name__}' is not JSON serializable"
+        )
+
+    return serialize
+
+
+_nested_serializers = SerializersRegistry(_compile_nested_serializer)
+serializers = SerializersRegistry(_compile_serializer)
+compact_serializers = SerializersRegistry(
+    functools.partial(_compile_serializer, compact_types=True)
+)
+
+
+def to_primitive(obj: Any) -> Any:
+    """
+    Convert object which is not supported by JSON natively into primitive.
+
+    """
+    return serializers[type(obj)](obj)
+
+
+def to_compact_primitive(obj: Any) -> Any:
+    """
+    Same as ``to_primitive``, but uses numeric tags of types.
+
+    """
+    return compact_serializers[type(obj)](obj)
+
+
+class JSONEncoder(_json.JSONEncoder):
+
+    def default(self, obj):
+        return to_primitive(obj)
+
+
+class CompactTypesJSONEncoder(_json.JSONEncoder):
+
+    def default(self, obj):
+        return to_compact_primitive(obj)
+
 
 def object_decoder(obj):
     return obj
 
 
-dumps = partial(_json.dumps, cls=JSONEncoder)
-loads = partial(_json.loads, object_hook=object_decoder)
+class JSONBackend:
+    name = None
+
+    # separators of items and keys of output which is not indented
+    separators = DEFAULT_SEPARATORS
+
+    def dumps(
+        self,
+        obj: Any,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+    ) -> str:
+        raise NotImplementedError
+
+    def dumpb(
+        self,
+        obj: Any,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+    ) -> bytes:
+        return self.dumps(
+            obj,
+            indent=indent,
+            compact_types=compact_types,
+        ).encode()
+
+    def loads(self, s: Union[str, bytes]) -> Any:
+        return _json.loads(s, object_hook=object_decoder)
+
+
+class StdlibJSONBackend(JSONBackend):
+    name = 'json'
+
+    def __init__(self, separators: Tuple[str, str]=DEFAULT_SEPARATORS):
+        self.separators = separators
+
+    def dumps(
+        self,
+        obj: Any,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+    ) -> str:
+        return _json.dumps(
+            obj,
+            cls=CompactTypesJSONEncoder if compact_types else JSONEncoder,
+            indent=indent,
+            separators=None if indent else self.separators,
+        )
+
+
+class _FastJSONBackend(JSONBackend):
+    """
+    Base for backends which output must be checked for compliance with output
+    of standard library.
+
+    """
+    separators = COMPACT_SEPARATORS
+
+    # exponents of floats may be formatted differently
+    non_compliant_pattern = re.compile(rb'e[-+0-9]')
+
+    # tells whether non-finite floats are output as 'null'
+    nullifies_non_finite = False
+
+    def __init__(self):
+        self._fallback = StdlibJSONBackend(separators=COMPACT_SEPARATORS)
+
+    def dumps(
+        self,
+        obj: Any,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+    ) -> str:
+        return self.dumpb(
+            obj,
+            indent=indent,
+            compact_types=compact_types,
+        ).decode()
+
+    def dumpb(
+        self,
+        obj: Any,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+    ) -> bytes:
+        default = to_compact_primitive if compact_types else to_primitive
+
+        if self.nullifies_non_finite:
+            # results of conversions are kept to look for non-finite floats
+            converted = []
+            default = _make_recording_serializer(default, converted)
+        else:
+            converted = None
+
+        if indent and indent != PRETTY_INDENT:
+            result = None
+        else:
+            try:
+                result = self._dumpb(obj, default=default, indent=indent)
+            except (TypeError, ValueError, OverflowError):
+                result = None
+
+        if result is None or not self._is_compliant(result, obj, converted):
+            result = self._fallback.dumpb(
+                obj,
+                indent=indent,
+                compact_types=compact_types,
+            )
+
+        return result
+
+    def _is_compliant(
+        self,
+        result: bytes,
+        obj: Any,
+        converted: Optional[List[Any]]=None,
+    ) -> bool:
+        # non-ASCII chars and DEL are escaped by standard library only
+        try:
+            result.decode('ascii')
+        except UnicodeDecodeError:
+            return False
+
+        if b'\x7f' in result or self.non_compliant_pattern.search(result):
+            return False
+
+        # standard library outputs 'NaN' and 'Infinity' instead of 'null'
+        return not (
+            converted is not None and
+            b'null' in result and (
+                _has_non_finite_floats(obj) or
+                any(map(_has_non_finite_floats, converted))
+            )
+        )
+
+    def _dumpb(
+        self,
+        obj: Any,
+        default: Serializer,
+        indent: Optional[int]=None,
+    ) -> bytes:
+        raise NotImplementedError
+
+
+def _make_recording_serializer(
+    serializer: Serializer,
+    results: List[Any],
+) -> Serializer:
+
+    def serialize(obj: Any) -> Any:
+        result = serializer(obj)
+        results.append(result)
+        return result
+
+    return serialize
+
+
+def _has_non_finite_floats(obj: Any) -> bool:
+    """
+    Look for non-finite floats in primitives. Other objects are skipped, as
+    they are checked after their conversion into primitives.
+
+    """
+    cls = type(obj)
+
+    if cls is float:
+        return not math.isfinite(obj)
+
+    if cls is dict:
+        return any(map(_has_non_finite_floats, obj.values()))
+
+    if cls is list or cls is tuple:
+        return any(map(_has_non_finite_floats, obj))
+
+    if cls in PRIMITIVE_TYPES:
+        return False
+
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+
+    if isinstance(obj, dict):
+        return any(map(_has_non_finite_floats, obj.values()))
+
+    if isinstance(obj, (list, tuple)):
+        return any(map(_has_non_finite_floats, obj))
+
+    return False
+
+
+class ORJSONBackend(_FastJSONBackend):
+    name = 'orjson'
+
+    # floats with exponents from -5 to -7 are formatted without exponent
+    non_compliant_pattern = re.compile(rb'e[-+0-9]|0\.0000')
+    nullifies_non_finite = True
+
+    def _dumpb(
+        self,
+        obj: Any,
+        default: Serializer,
+        indent: Optional[int]=None,
+    ) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+
+        return orjson.dumps(obj, default=default, option=option)
+
+    def loads(self, s: Union[str, bytes]) -> Any:
+        return orjson.loads(s)
+
+
+class UJSONBackend(_FastJSONBackend):
+    name = 'ujson'
+
+    # infinite floats are formatted as 'Inf'
+    non_compliant_pattern = re.compile(rb'e[-+0-9]|Inf')
+
+    def _dumpb(
+        self,
+        obj: Any,
+        default: Serializer,
+        indent: Optional[int]=None,
+    ) -> Optional[bytes]:
+        if indent:
+            # pretty output of ujson differs from one of standard library
+            return
+
+        return ujson.dumps(
+            obj,
+            ensure_ascii=True,
+            escape_forward_slashes=False,
+            default=default,
+        ).encode()
+
+
+_BACKENDS = [
+    (ORJSONBackend, orjson),
+    (UJSONBackend, ujson),
+    (StdlibJSONBackend, _json),
+]
+
+
+def get_available_backends() -> List[str]:
+    return [cls.name for cls, module in _BACKENDS if module is not None]
+
+
+def use_backend(name: str) -> None:
+    global _backend
+
+    for cls, module in _BACKENDS:
+        if cls.name == name:
+            if module is None:
+                raise ValueError(f"JSON backend '{name}' is not installed")
+
+            _backend = cls()
+            LOG.debug(f"use JSON backend '{name}'")
+            return
+
+    raise ValueError(f"unknown JSON backend '{name}'")
+
+
+def get_backend() -> JSONBackend:
+    return _backend
+
+
+def dumps(
+    obj: Any,
+    indent: Optional[int]=None,
+    compact_types: bool=False,
+) -> str:
+    return _backend.dumps(obj, indent=indent, compact_types=compact_types)
+
+
+def dumpb(
+    obj: Any,
+    indent: Optional[int]=None,
+    compact_types: bool=False,
+) -> bytes:
+    return _backend.dumpb(obj, indent=indent, compact_types=compact_types)
+
+
+def loads(s: Union[str, bytes]) -> Any:
+    return _backend.loads(s)
+
+
+def iterencode(
+    obj: Any,
+    indent: Optional[int]=None,
+    compact_types: bool=False,
+) -> Iterator[str]:
+    """
+    Encode object incrementally, chunk by chunk. Output is same as output of
+    ``dumps``.
+
+    Standard library is used regardless of selected backend, as other
+    backends cannot encode incrementally.
+
+    """
+    encoder = (CompactTypesJSONEncoder if compact_types else JSONEncoder)(
+        indent=indent,
+        separators=None if indent else _backend.separators,
+    )
+    return encoder.iterencode(obj)
+
+
+_backend = None
+use_backend(DEFAULT_BACKEND)
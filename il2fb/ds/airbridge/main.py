@@ -4,6 +4,7 @@ import argparse
 import asyncio
 import functools
 import logging
+import multiprocessing
 import sys
 import threading
 
@@ -313,4 +314,6 @@ def main() -> None:
 
 
 if __name__ == '__main__':
+    # workers of process pools of frozen executables must not run 'main()'
+    multiprocessing.freeze_support()
     main()
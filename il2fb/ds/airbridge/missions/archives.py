@@ -0,0 +1,640 @@
+# coding: utf-8
+
+import asyncio
+import logging
+import os
+import posixpath
+import tarfile
+import tempfile
+import time
+import zipfile
+import zlib
+
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, List, Optional
+from typing import Tuple
+
+from il2fb.ds.airbridge.missions.index import MissionsIndex
+from il2fb.ds.airbridge.missions.index import join_relative_path
+from il2fb.ds.airbridge.missions.index import normalize_relative_path
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+from il2fb.ds.airbridge.missions.storage import is_mission_file_name
+
+
+LOG = logging.getLogger(__name__)
+
+
+ARCHIVE_FORMAT_TAR = 'tar'
+ARCHIVE_FORMAT_TAR_GZ = 'tar.gz'
+ARCHIVE_FORMAT_ZIP = 'zip'
+
+ARCHIVE_MEDIA_TYPES = {
+    ARCHIVE_FORMAT_TAR: 'application/x-tar',
+    ARCHIVE_FORMAT_TAR_GZ: 'application/gzip',
+    ARCHIVE_FORMAT_ZIP: 'application/zip',
+}
+
+DEFAULT_ARCHIVE_FORMAT = ARCHIVE_FORMAT_ZIP
+DEFAULT_ARCHIVE_CHUNK_SIZE = 256 * 2 ** 10
+DEFAULT_ARCHIVE_BUFFER_SIZE = 4
+DEFAULT_ARCHIVE_MAX_UPLOAD_SIZE = 256 * 2 ** 20
+
+# zip does not support dates before 1980
+_ZIP_MIN_MTIME = 315532800
+
+
+def list_files(root_dir: Path, relative_dir: str) -> Optional[List[str]]:
+    """
+    List relative paths of all files of missions in a directory and its
+    subdirectories. ``None`` is returned if directory does not exist.
+
+    """
+    path = root_dir / relative_dir
+
+    if not path.is_dir():
+        return None
+
+    results = []
+
+    for dir_path, dir_names, file_names in os.walk(str(path)):
+        dir_names.sort()
+
+        relative_path = Path(dir_path).relative_to(root_dir).as_posix()
+        relative_path = '' if relative_path == '.' else relative_path
+
+        results.extend(
+            posixpath.join(relative_path, name)
+            for name in sorted(file_names)
+            if is_mission_file_name(name)
+        )
+
+    return results
+
+
+class _TarEncoder:
+
+    def __init__(self, compress: bool=False):
+        self._compressor = zlib.compressobj(wbits=31) if compress else None
+        self._size = 0
+
+    def _output(self, data: bytes) -> bytes:
+        if self._compressor:
+            return self._compressor.compress(data)
+
+        return data
+
+    def begin_file(self, name: str, size: int, mtime: float) -> bytes:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(mtime)
+        info.mode = 0o644
+
+        self._size = size
+        return self._output(
+            info.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'surrogateescape')
+        )
+
+    def write(self, data: bytes) -> bytes:
+        return self._output(data)
+
+    def end_file(self) -> bytes:
+        padding = -self._size % tarfile.BLOCKSIZE
+        return self._output(tarfile.NUL * padding)
+
+    def close(self) -> bytes:
+        data = self._output(tarfile.NUL * (tarfile.BLOCKSIZE * 2))
+
+        if self._compressor:
+            data += self._compressor.flush()
+
+        return data
+
+
+class _Sink:
+    """
+    Not seekable file-like object which collects written data, so zip
+    archive is written with data descriptors and can be streamed.
+
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _ZipEncoder:
+
+    def __init__(self):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, 'w', zipfile.ZIP_DEFLATED)
+        self._file = None
+
+    def begin_file(self, name: str, size: int, mtime: float) -> bytes:
+        date_time = time.localtime(max(mtime, _ZIP_MIN_MTIME))[:6]
+
+        info = zipfile.ZipInfo(name, date_time=date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.file_size = size
+
+        self._file = self._zip.open(info, 'w')
+        return self._sink.drain()
+
+    def write(self, data: bytes) -> bytes:
+        self._file.write(data)
+        return self._sink.drain()
+
+    def end_file(self) -> bytes:
+        self._file.close()
+        self._file = None
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._sink.drain()
+
+
+def _make_encoder(archive_format: str) -> Any:
+    if archive_format == ARCHIVE_FORMAT_ZIP:
+        return _ZipEncoder()
+
+    return _TarEncoder(compress=(archive_format == ARCHIVE_FORMAT_TAR_GZ))
+
+
+def _open_file(path: Path) -> Optional[Tuple[BinaryIO, int, float]]:
+    try:
+        f = path.open('rb')
+    except FileNotFoundError:
+        return None
+
+    stat = os.fstat(f.fileno())
+    return f, stat.st_size, stat.st_mtime
+
+
+def _encode_chunk(f: BinaryIO, encoder: Any, size: int) -> bytes:
+    data = f.read(size)
+
+    # file has shrunk after its size was put to archive
+    if len(data) < size:
+        data += b'\0' * (size - len(data))
+
+    return encoder.write(data)
+
+
+class _ThroughputStats:
+    __slots__ = ['count', 'size', 'time', ]
+
+    def __init__(self):
+        self.count = 0
+        self.size = 0
+        self.time = 0.0
+
+    def add(self, size: int, duration: float) -> None:
+        self.count += 1
+        self.size += size
+        self.time += duration
+
+    def to_primitive(self) -> dict:
+        return {
+            'count': self.count,
+            'size': self.size,
+            'time': self.time,
+            'throughput': (self.size / self.time) if self.time else None,
+        }
+
+
+class MissionsArchiveStream:
+    """
+    Archive of files of missions which is produced on the fly.
+
+    Files are read and archive is encoded by workers of storage chunk by
+    chunk. Not more than ``buffer_size`` encoded chunks are kept in memory:
+    production pauses until consumer reads them.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        storage: MissionsStorage,
+        relative_dir: str,
+        relative_paths: List[str],
+        archive_format: str=DEFAULT_ARCHIVE_FORMAT,
+        chunk_size: int=DEFAULT_ARCHIVE_CHUNK_SIZE,
+        buffer_size: int=DEFAULT_ARCHIVE_BUFFER_SIZE,
+    ):
+        self._loop = loop
+        self._storage = storage
+        self._relative_dir = relative_dir
+        self._relative_paths = relative_paths
+        self._archive_format = archive_format
+        self._chunk_size = chunk_size
+
+        self._queue = asyncio.Queue(maxsize=buffer_size, loop=loop)
+        self._task = None
+        self._error = None
+
+        self.size = 0
+
+    def start(self) -> None:
+        self._task = self._loop.create_task(self._produce())
+
+    def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def read(self) -> Awaitable[bytes]:
+        """
+        Get next chunk of archive. Empty chunk means end of archive.
+
+        """
+        chunk = await self._queue.get()
+
+        if chunk is None:
+            if self._error:
+                raise self._error
+
+            return b''
+
+        self.size += len(chunk)
+        return chunk
+
+    async def _put(self, data: bytes) -> Awaitable[None]:
+        if data:
+            await self._queue.put(data)
+
+    async def _produce(self) -> Awaitable[None]:
+        try:
+            encoder = _make_encoder(self._archive_format)
+
+            for relative_path in self._relative_paths:
+                await self._produce_file(encoder, relative_path)
+
+            await self._put(await self._storage.run(encoder.close))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._error = e
+
+        await self._queue.put(None)
+
+    async def _produce_file(
+        self,
+        encoder: Any,
+        relative_path: str,
+    ) -> Awaitable[None]:
+
+        result = await self._storage.run(
+            _open_file, self._storage.root_dir / relative_path,
+        )
+        if result is None:
+            # file was deleted after listing
+            return
+
+        f, size, mtime = result
+        name = (
+            posixpath.relpath(relative_path, self._relative_dir)
+            if self._relative_dir
+            else relative_path
+        )
+
+        try:
+            await self._put(await self._storage.run(
+                encoder.begin_file, name, size, mtime,
+            ))
+
+            left = size
+            while left > 0:
+                chunk_size = min(left, self._chunk_size)
+                await self._put(await self._storage.run(
+                    _encode_chunk, f, encoder, chunk_size,
+                ))
+                left -= chunk_size
+
+            await self._put(await self._storage.run(encoder.end_file))
+        finally:
+            await self._storage.run(f.close)
+
+
+def _open_spool(dir_path: Path) -> Any:
+    dir_path.mkdir(parents=True, exist_ok=True)
+    return tempfile.NamedTemporaryFile(
+        dir=str(dir_path),
+        prefix='.',
+        suffix='.archive',
+        delete=False,
+    )
+
+
+def _remove_spool(f: Any) -> None:
+    f.close()
+
+    try:
+        os.unlink(f.name)
+    except FileNotFoundError:
+        pass
+
+
+def _iter_members(
+    archive: Any,
+    archive_format: str,
+) -> List[Tuple[str, Any, int]]:
+    """
+    Get names, descriptions and sizes of regular files of archive.
+
+    """
+    if archive_format == ARCHIVE_FORMAT_ZIP:
+        return [
+            (info.filename, info, info.file_size)
+            for info in archive.infolist()
+            if not info.filename.endswith('/')
+        ]
+
+    results = []
+
+    for info in archive.getmembers():
+        if info.isdir():
+            continue
+        if not info.isfile():
+            raise ValueError(
+                f"'{info.name}' is not a regular file (links are not allowed)"
+            )
+
+        results.append((info.name, info, info.size))
+
+    return results
+
+
+def _extract_member(
+    archive: Any,
+    archive_format: str,
+    info: Any,
+    target: Path,
+    max_size: int,
+) -> str:
+    """
+    Extract member of archive to a temporary file next to its target and
+    return path of temporary file.
+
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    if archive_format == ARCHIVE_FORMAT_ZIP:
+        src = archive.open(info)
+    else:
+        src = archive.extractfile(info)
+
+    dst = tempfile.NamedTemporaryFile(
+        dir=str(target.parent),
+        prefix='.',
+        suffix='.extract',
+        delete=False,
+    )
+
+    try:
+        with src, dst:
+            size = 0
+
+            for block in iter(lambda: src.read(DEFAULT_ARCHIVE_CHUNK_SIZE), b''):
+                size += len(block)
+                if size > max_size:
+                    raise ValueError("archive is too large")
+
+                dst.write(block)
+
+            dst.flush()
+            os.fsync(dst.fileno())
+    except Exception:
+        os.unlink(dst.name)
+        raise
+
+    return dst.name
+
+
+def _extract_archive(
+    archive_path: str,
+    target_dir: Path,
+    archive_format: str,
+    max_size: int,
+) -> Tuple[List[str], List[str]]:
+    """
+    Extract files of missions from archive into a directory. All files are
+    extracted completely before any of them is moved to its place, so target
+    files are not touched if archive is broken. Other files are skipped.
+
+    """
+    try:
+        if archive_format == ARCHIVE_FORMAT_ZIP:
+            archive = zipfile.ZipFile(archive_path)
+        else:
+            archive = tarfile.open(archive_path, 'r:*')
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise ValueError(f"malformed archive: {e}") from e
+
+    extracted = []
+    skipped = []
+    temp_files = []
+
+    try:
+        with archive:
+            members = []
+            total_size = 0
+
+            for name, info, size in _iter_members(archive, archive_format):
+                relative_path = normalize_relative_path(name)
+
+                if is_mission_file_name(relative_path):
+                    members.append((relative_path, info))
+                    total_size += size
+                else:
+                    skipped.append(relative_path)
+
+            # sizes are declared by archive, actual sizes are checked during
+            # extraction
+            if total_size > max_size:
+                raise ValueError("archive is too large")
+
+            for relative_path, info in members:
+                target = join_relative_path(target_dir, relative_path)
+                temp_files.append((
+                    _extract_member(
+                        archive, archive_format, info, target, max_size,
+                    ),
+                    target,
+                ))
+                extracted.append(relative_path)
+
+        # may rewrite existing files
+        for temp_path, target in temp_files:
+            os.replace(temp_path, str(target))
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, zlib.error) as e:
+        _remove_temp_files(temp_files)
+        raise ValueError(f"malformed archive: {e}") from e
+    except Exception:
+        _remove_temp_files(temp_files)
+        raise
+
+    return extracted, skipped
+
+
+def _remove_temp_files(temp_files: List[Tuple[str, Path]]) -> None:
+    for temp_path, _ in temp_files:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            # file was moved already
+            pass
+
+
+class MissionsArchiver:
+    """
+    Packs directories of missions into archives and unpacks archives into
+    directories of missions without holding whole archives in memory.
+
+    Archives are streamed to clients while they are produced (see
+    ``MissionsArchiveStream``). Uploaded archives are spooled to a temporary
+    file by chunks and are extracted by a worker of storage. Throughput of
+    downloads and uploads is tracked.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        storage: MissionsStorage,
+        index: Optional[MissionsIndex]=None,
+        chunk_size: int=DEFAULT_ARCHIVE_CHUNK_SIZE,
+        buffer_size: int=DEFAULT_ARCHIVE_BUFFER_SIZE,
+        max_upload_size: int=DEFAULT_ARCHIVE_MAX_UPLOAD_SIZE,
+    ):
+        self._loop = loop
+        self._storage = storage
+        self._index = index
+        self._chunk_size = chunk_size
+        self._buffer_size = buffer_size
+        self._max_upload_size = max_upload_size
+
+        self._downloads = _ThroughputStats()
+        self._uploads = _ThroughputStats()
+
+    async def list_files(
+        self,
+        relative_dir: str,
+    ) -> Awaitable[Optional[List[str]]]:
+
+        if self._index is not None and self._index.is_ready:
+            if self._index.browse(relative_dir, limit=0) is None:
+                return None
+
+            return [
+                relative_path
+                for relative_path, _ in self._index.iter_files(relative_dir)
+            ]
+
+        return (await self._storage.run(
+            list_files, self._storage.root_dir, relative_dir,
+        ))
+
+    def stream(
+        self,
+        relative_dir: str,
+        relative_paths: List[str],
+        archive_format: str=DEFAULT_ARCHIVE_FORMAT,
+    ) -> MissionsArchiveStream:
+
+        return MissionsArchiveStream(
+            loop=self._loop,
+            storage=self._storage,
+            relative_dir=relative_dir,
+            relative_paths=relative_paths,
+            archive_format=archive_format,
+            chunk_size=self._chunk_size,
+            buffer_size=self._buffer_size,
+        )
+
+    def record_download(self, size: int, duration: float) -> None:
+        self._downloads.add(size, duration)
+
+    async def extract(
+        self,
+        relative_dir: str,
+        chunks: AsyncIterator[bytes],
+        archive_format: str=DEFAULT_ARCHIVE_FORMAT,
+    ) -> Awaitable[dict]:
+        """
+        Receive archive by chunks and extract files of missions from it into
+        a directory.
+
+        """
+        started_at = time.perf_counter()
+        target_dir = join_relative_path(self._storage.root_dir, relative_dir)
+
+        spool = await self._storage.run(_open_spool, target_dir)
+        size = 0
+
+        try:
+            buffer = []
+            buffered_size = 0
+
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > self._max_upload_size:
+                    raise ValueError("archive is too large")
+
+                buffer.append(chunk)
+                buffered_size += len(chunk)
+
+                if buffered_size >= self._chunk_size:
+                    await self._storage.run(spool.write, b''.join(buffer))
+                    buffer, buffered_size = [], 0
+
+            if buffer:
+                await self._storage.run(spool.write, b''.join(buffer))
+
+            await self._storage.run(spool.flush)
+
+            extracted, skipped = await self._storage.run(
+                _extract_archive,
+                spool.name,
+                target_dir,
+                archive_format,
+                self._max_upload_size,
+            )
+        finally:
+            await self._storage.run(_remove_spool, spool)
+
+        duration = time.perf_counter() - started_at
+        self._uploads.add(size, duration)
+
+        return {
+            'files': [
+                posixpath.join(relative_dir, relative_path)
+                for relative_path in extracted
+            ],
+            'skipped': skipped,
+            'size': size,
+            'duration': duration,
+            'throughput': (size / duration) if duration else None,
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            'downloads': self._downloads.to_primitive(),
+            'uploads': self._uploads.to_primitive(),
+        }
@@ -0,0 +1,723 @@
+# coding: utf-8
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import re
+import time
+
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Iterable, List, Optional
+from typing import Tuple
+
+from il2fb.ds.airbridge.missions.index import MissionsIndex
+from il2fb.ds.airbridge.missions.index import join_relative_path
+from il2fb.ds.airbridge.missions.index import normalize_relative_path
+from il2fb.ds.airbridge.missions.storage import DEFAULT_UPLOAD_BUFFER_SIZE
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+from il2fb.ds.airbridge.missions.storage import is_mission_file_name
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_CONTENT_HASHING_CONCURRENCY = 1
+DEFAULT_CONTENT_SYNC_PERIOD = 5
+DEFAULT_UPLOAD_SESSION_TTL = 24 * 60 * 60
+
+_HASH_BLOCK_SIZE = 256 * 2 ** 10
+
+# time given to index of directory to notice recently written files before
+# their hashes are treated as stale
+_RECORD_GRACE_PERIOD = 10
+_RECORD_FORMAT_VERSION = 1
+_SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def is_sha256(value: Any) -> bool:
+    return isinstance(value, str) and bool(_SHA256_PATTERN.match(value))
+
+
+def hash_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+
+    with path.open('rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            hasher.update(block)
+
+    return hasher.hexdigest()
+
+
+def _copy_file(source: Path, target: Path) -> os.stat_result:
+    """
+    Copy file via temporary file which replaces target atomically.
+
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.parent / f".{target.name}.{os.getpid()}.copy"
+
+    try:
+        with source.open('rb') as src, temp_path.open('wb') as dst:
+            for block in iter(lambda: src.read(_HASH_BLOCK_SIZE), b''):
+                dst.write(block)
+
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        os.replace(str(temp_path), str(target))
+    except Exception:
+        try:
+            temp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+    return target.stat()
+
+
+class _Entry:
+    __slots__ = ['mtime', 'size', 'sha256', ]
+
+    def __init__(self, mtime: float, size: int, sha256: str):
+        self.mtime = mtime
+        self.size = size
+        self.sha256 = sha256
+
+
+def _load_entries(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+
+    if data.get('version') != _RECORD_FORMAT_VERSION:
+        return {}
+
+    return {
+        relative_path: _Entry(mtime, size, sha256)
+        for relative_path, (mtime, size, sha256) in data['entries'].items()
+    }
+
+
+def _save_entries(path: Path, entries: dict) -> None:
+    data = json.dumps({
+        'version': _RECORD_FORMAT_VERSION,
+        'entries': {
+            relative_path: [entry.mtime, entry.size, entry.sha256]
+            for relative_path, entry in entries.items()
+        },
+    })
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    temp_path.write_text(data)
+    os.replace(str(temp_path), str(path))
+
+
+class MissionsContentIndex:
+    """
+    Index of SHA-256 hashes of files of missions keyed by their relative
+    paths.
+
+    Index follows in-memory index of directory of missions: new and changed
+    files are hashed in background by ``concurrency`` consumers, deleted ones
+    are dropped. Hashes of files uploaded via resumable uploads are recorded
+    right away. As sizes and modification times of files are known from index
+    of directory, comparison of a manifest of files with actual contents of
+    directory does not touch disk. Hashes are persisted to a JSON file if its
+    path is given, so files are not hashed again on restart.
+
+    Missing files of a manifest are copied from other files with same
+    contents if there are any, so only really new contents have to be
+    uploaded.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        index: MissionsIndex,
+        concurrency: int=DEFAULT_CONTENT_HASHING_CONCURRENCY,
+        sync_period: float=DEFAULT_CONTENT_SYNC_PERIOD,
+        persistence_path: Optional[Path]=None,
+    ):
+        self._loop = loop
+        self._index = index
+        self._storage = index.storage
+        self._concurrency = concurrency
+        self._sync_period = sync_period
+        self._persistence_path = persistence_path
+
+        self._entries = {}
+        self._paths_by_hash = {}
+        self._recorded_at = {}
+        self._queued = set()
+        self._queue = asyncio.Queue(loop=loop)
+        self._is_dirty = False
+
+        self._tasks = []
+        self._hashed_count = 0
+        self._reused_count = 0
+
+    @property
+    def index(self) -> MissionsIndex:
+        return self._index
+
+    def start(self) -> None:
+        self._tasks = [
+            self._loop.create_task(self._consume())
+            for _ in range(self._concurrency)
+        ]
+        self._tasks.append(self._loop.create_task(self._run()))
+
+    def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+        self._tasks = []
+
+    async def _run(self) -> Awaitable[None]:
+        if self._persistence_path is not None:
+            try:
+                entries = await self._storage.run(
+                    _load_entries, self._persistence_path,
+                )
+            except Exception:
+                LOG.exception(
+                    f"failed to load content index of missions from "
+                    f"`{self._persistence_path}`"
+                )
+            else:
+                for relative_path, entry in entries.items():
+                    self._set_entry(relative_path, entry)
+
+        await self._index.wait_ready()
+
+        while True:
+            try:
+                self._sync()
+                await self._maybe_persist()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                LOG.exception("failed to sync content index of missions")
+
+            await asyncio.sleep(self._sync_period, loop=self._loop)
+
+    def _sync(self) -> None:
+        seen = set()
+
+        for relative_path, f in self._index.iter_files():
+            seen.add(relative_path)
+            self._recorded_at.pop(relative_path, None)
+
+            if (
+                self._get_fresh_entry(relative_path) is None
+                and relative_path not in self._queued
+            ):
+                self._queued.add(relative_path)
+                self._queue.put_nowait(relative_path)
+
+        deadline = self._loop.time() - _RECORD_GRACE_PERIOD
+
+        for relative_path in set(self._entries.keys()) - seen:
+            if self._recorded_at.get(relative_path, deadline) > deadline:
+                continue
+
+            self._recorded_at.pop(relative_path, None)
+            self._drop_entry(relative_path)
+
+    async def _maybe_persist(self) -> Awaitable[None]:
+        if not (self._is_dirty and self._persistence_path):
+            return
+
+        self._is_dirty = False
+        await self._storage.run(
+            _save_entries, self._persistence_path, dict(self._entries),
+        )
+
+    async def _consume(self) -> Awaitable[None]:
+        while True:
+            relative_path = await self._queue.get()
+
+            try:
+                await self.get_hash(relative_path)
+            except asyncio.CancelledError:
+                raise
+            except FileNotFoundError:
+                pass
+            except Exception:
+                LOG.exception(f"failed to hash mission file `{relative_path}`")
+            finally:
+                self._queued.discard(relative_path)
+
+    def _get_fresh_entry(self, relative_path: str) -> Optional[_Entry]:
+        f = self._index.get_file(relative_path)
+        entry = self._entries.get(relative_path)
+
+        if (
+            f is not None
+            and entry is not None
+            and entry.mtime == f.mtime
+            and entry.size == f.size
+        ):
+            return entry
+
+    def _set_entry(self, relative_path: str, entry: _Entry) -> None:
+        self._drop_entry(relative_path)
+        self._entries[relative_path] = entry
+        self._paths_by_hash.setdefault(entry.sha256, set()).add(relative_path)
+        self._is_dirty = True
+
+    def _drop_entry(self, relative_path: str) -> None:
+        entry = self._entries.pop(relative_path, None)
+        if entry is None:
+            return
+
+        paths = self._paths_by_hash.get(entry.sha256)
+        if paths is not None:
+            paths.discard(relative_path)
+            if not paths:
+                del self._paths_by_hash[entry.sha256]
+
+        self._is_dirty = True
+
+    def record(
+        self,
+        relative_path: str,
+        stat: os.stat_result,
+        sha256: str,
+    ) -> None:
+        """
+        Remember hash of a file which was just written.
+
+        """
+        self._set_entry(
+            relative_path, _Entry(stat.st_mtime, stat.st_size, sha256),
+        )
+        self._recorded_at[relative_path] = self._loop.time()
+
+    async def get_hash(self, relative_path: str) -> Awaitable[Optional[str]]:
+        """
+        Get hash of file. File is hashed only if it is unknown or if it has
+        changed. ``None`` is returned if file does not exist.
+
+        """
+        entry = self._get_fresh_entry(relative_path)
+        if entry is not None:
+            return entry.sha256
+
+        if self._index.get_file(relative_path) is None:
+            return None
+
+        path = self._storage.root_dir / relative_path
+        stat = await self._storage.stat(path)
+        if stat is None:
+            return None
+
+        # index of directory may be not refreshed yet after a recent write
+        entry = self._entries.get(relative_path)
+        if (
+            entry is not None
+            and entry.mtime == stat.st_mtime
+            and entry.size == stat.st_size
+        ):
+            return entry.sha256
+
+        sha256 = await self._storage.run(hash_file, path)
+        self._hashed_count += 1
+        self.record(relative_path, stat, sha256)
+
+        return sha256
+
+    def find_path(self, sha256: str) -> Optional[str]:
+        """
+        Find an existing file with given contents.
+
+        """
+        for relative_path in sorted(self._paths_by_hash.get(sha256, ())):
+            if self._get_fresh_entry(relative_path) is not None:
+                return relative_path
+
+    async def reconcile(
+        self,
+        manifest: Iterable[Tuple[str, str]],
+        reuse: bool=True,
+    ) -> Awaitable[dict]:
+        """
+        Compare manifest of relative paths and hashes of files with contents
+        of directory of missions and tell which files have to be uploaded.
+
+        """
+        unchanged = []
+        reused = []
+        missing = []
+
+        for relative_path, sha256 in manifest:
+            if (await self.get_hash(relative_path)) == sha256:
+                unchanged.append(relative_path)
+                continue
+
+            source = self.find_path(sha256) if reuse else None
+
+            if source is None:
+                missing.append(relative_path)
+                continue
+
+            stat = await self._storage.run(
+                _copy_file,
+                self._storage.root_dir / source,
+                self._storage.root_dir / relative_path,
+            )
+            self.record(relative_path, stat, sha256)
+            self._index.invalidate_path(
+                self._storage.root_dir / relative_path
+            )
+            self._reused_count += 1
+            reused.append(relative_path)
+
+        return {
+            'unchanged': unchanged,
+            'reused': reused,
+            'missing': missing,
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            'entries_count': len(self._entries),
+            'pending_count': len(self._queued),
+            'hashed_count': self._hashed_count,
+            'reused_count': self._reused_count,
+        }
+
+
+def load_manifest(items: Iterable[dict]) -> List[Tuple[str, str]]:
+    manifest = []
+
+    for item in items:
+        relative_path = normalize_relative_path(item['path'])
+
+        if not is_mission_file_name(relative_path):
+            raise ValueError(
+                f"'{relative_path}' is not a path of a mission file"
+            )
+
+        sha256 = str(item['sha256']).lower()
+        if not is_sha256(sha256):
+            raise ValueError(f"'{sha256}' is not a SHA-256 hash")
+
+        manifest.append((relative_path, sha256))
+
+    return manifest
+
+
+class UploadOffsetMismatch(ValueError):
+
+    def __init__(self, offset: int):
+        super().__init__(f"upload offset mismatch (expected={offset})")
+        self.offset = offset
+
+
+class UploadSession:
+    """
+    State of resumable upload of a single file.
+
+    Contents are appended to a hidden temporary file next to target file.
+    Name of temporary file is derived from target path, hash and size of
+    file, so upload can be resumed even after restart of Airbridge.
+
+    """
+    __slots__ = [
+        'upload_id', 'relative_path', 'sha256', 'size', 'offset',
+        'temp_path', 'hasher', 'lock', 'touched_at',
+    ]
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        upload_id: str,
+        relative_path: str,
+        sha256: str,
+        size: int,
+        temp_path: Path,
+    ):
+        self.upload_id = upload_id
+        self.relative_path = relative_path
+        self.sha256 = sha256
+        self.size = size
+        self.offset = 0
+        self.temp_path = temp_path
+        self.hasher = hashlib.sha256()
+        self.lock = asyncio.Lock(loop=loop)
+        self.touched_at = time.monotonic()
+
+    @property
+    def is_complete(self) -> bool:
+        return self.offset >= self.size
+
+    def to_primitive(self) -> dict:
+        return {
+            'upload_id': self.upload_id,
+            'path': self.relative_path,
+            'sha256': self.sha256,
+            'size': self.size,
+            'offset': self.offset,
+        }
+
+
+def make_upload_id(relative_path: str, sha256: str, size: int) -> str:
+    key = f"{relative_path}\0{sha256}\0{size}".encode()
+    return hashlib.sha1(key).hexdigest()
+
+
+def _restore_upload(session: UploadSession) -> None:
+    session.temp_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with session.temp_path.open('a+b') as f:
+        f.seek(0)
+
+        # data beyond expected size is garbage
+        f.truncate(min(os.fstat(f.fileno()).st_size, session.size))
+
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+            session.hasher.update(block)
+            session.offset += len(block)
+
+
+def _append_upload(session: UploadSession, data: bytes) -> None:
+    with session.temp_path.open('ab') as f:
+        f.write(data)
+
+    session.hasher.update(data)
+    session.offset += len(data)
+
+
+def _commit_upload(session: UploadSession, target: Path) -> os.stat_result:
+    with session.temp_path.open('rb+') as f:
+        os.fsync(f.fileno())
+
+    os.replace(str(session.temp_path), str(target))
+    return target.stat()
+
+
+def _discard_upload(session: UploadSession) -> None:
+    try:
+        session.temp_path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class ResumableUploads:
+    """
+    Registry of resumable uploads of files of missions.
+
+    Upload is opened for a relative path, SHA-256 hash and size of a file and
+    its contents are sent by chunks at explicit offsets. Client which lost
+    connection opens same upload again and continues from returned offset.
+    Data is hashed while it is written, so completed file is verified
+    without reading it once again. Verified file replaces target file
+    atomically and its hash is recorded by index of contents.
+
+    Uploads which were not touched for ``session_ttl`` seconds are discarded
+    along with their temporary files.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        storage: MissionsStorage,
+        content_index: MissionsContentIndex,
+        session_ttl: float=DEFAULT_UPLOAD_SESSION_TTL,
+        buffer_size: int=DEFAULT_UPLOAD_BUFFER_SIZE,
+    ):
+        self._loop = loop
+        self._storage = storage
+        self._content_index = content_index
+        self._session_ttl = session_ttl
+        self._buffer_size = buffer_size
+
+        self._sessions = {}
+        self._main_task = None
+
+        self._completed_count = 0
+        self._failed_count = 0
+        self._received_size = 0
+
+    def start(self) -> None:
+        self._main_task = self._loop.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._main_task:
+            self._main_task.cancel()
+            self._main_task = None
+
+    async def _run(self) -> Awaitable[None]:
+        while True:
+            await asyncio.sleep(
+                min(self._session_ttl, 60), loop=self._loop,
+            )
+
+            try:
+                await self._expire()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                LOG.exception("failed to expire uploads of missions")
+
+    async def _expire(self) -> Awaitable[None]:
+        deadline = time.monotonic() - self._session_ttl
+
+        for session in list(self._sessions.values()):
+            if session.touched_at < deadline and not session.lock.locked():
+                LOG.info(
+                    f"upload of mission file `{session.relative_path}` has "
+                    f"expired"
+                )
+                await self._drop(session)
+
+    async def _drop(self, session: UploadSession) -> Awaitable[None]:
+        self._sessions.pop(session.upload_id, None)
+        await self._storage.run(_discard_upload, session)
+
+    async def open(
+        self,
+        relative_path: str,
+        sha256: str,
+        size: int,
+    ) -> Awaitable[UploadSession]:
+        relative_path = normalize_relative_path(relative_path)
+
+        if not is_mission_file_name(relative_path):
+            raise ValueError(
+                f"'{relative_path}' is not a path of a mission file"
+            )
+
+        sha256 = sha256.lower()
+        if not is_sha256(sha256):
+            raise ValueError(f"'{sha256}' is not a SHA-256 hash")
+
+        if size < 0:
+            raise ValueError(f"size must not be negative (value={size})")
+
+        upload_id = make_upload_id(relative_path, sha256, size)
+        session = self._sessions.get(upload_id)
+
+        if session is None:
+            relative_dir, name = posixpath.split(relative_path)
+            temp_path = join_relative_path(
+                self._storage.root_dir, relative_dir,
+            ) / f".{upload_id}.upload"
+            session = UploadSession(
+                loop=self._loop,
+                upload_id=upload_id,
+                relative_path=relative_path,
+                sha256=sha256,
+                size=size,
+                temp_path=temp_path,
+            )
+
+            # data of interrupted upload may be left from previous run
+            await self._storage.run(_restore_upload, session)
+            session = self._sessions.setdefault(upload_id, session)
+
+        session.touched_at = time.monotonic()
+        return session
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        return self._sessions.get(upload_id)
+
+    async def write(
+        self,
+        upload_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+    ) -> Awaitable[Optional[UploadSession]]:
+        """
+        Append chunks to upload starting from given offset. Upload is
+        committed as soon as all of its data is received. ``None`` is
+        returned if there is no such upload.
+
+        """
+        session = self._sessions.get(upload_id)
+        if session is None:
+            return None
+
+        async with session.lock:
+            if offset != session.offset:
+                raise UploadOffsetMismatch(session.offset)
+
+            buffer = []
+            buffered_size = 0
+
+            async for chunk in chunks:
+                if session.offset + buffered_size + len(chunk) > session.size:
+                    raise ValueError("upload exceeds declared size")
+
+                buffer.append(chunk)
+                buffered_size += len(chunk)
+
+                if buffered_size >= self._buffer_size:
+                    await self._append(session, buffer)
+                    buffer, buffered_size = [], 0
+
+            await self._append(session, buffer)
+            session.touched_at = time.monotonic()
+
+            if session.is_complete:
+                await self._commit(session)
+
+        return session
+
+    async def _append(
+        self,
+        session: UploadSession,
+        buffer: List[bytes],
+    ) -> Awaitable[None]:
+
+        if buffer:
+            data = b''.join(buffer)
+            await self._storage.run(_append_upload, session, data)
+            self._received_size += len(data)
+
+    async def _commit(self, session: UploadSession) -> Awaitable[None]:
+        if session.hasher.hexdigest() != session.sha256:
+            self._failed_count += 1
+            await self._drop(session)
+            raise ValueError(
+                f"hash of uploaded file `{session.relative_path}` does not "
+                f"match declared one"
+            )
+
+        target = join_relative_path(
+            self._storage.root_dir, session.relative_path,
+        )
+        stat = await self._storage.run(_commit_upload, session, target)
+
+        self._sessions.pop(session.upload_id, None)
+        self._completed_count += 1
+
+        self._content_index.record(session.relative_path, stat, session.sha256)
+        self._content_index.index.invalidate_path(target)
+
+    async def abort(self, upload_id: str) -> Awaitable[bool]:
+        session = self._sessions.get(upload_id)
+        if session is None:
+            return False
+
+        async with session.lock:
+            await self._drop(session)
+
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            'sessions_count': len(self._sessions),
+            'completed_count': self._completed_count,
+            'failed_count': self._failed_count,
+            'received_size': self._received_size,
+        }
@@ -0,0 +1,38 @@
+# coding: utf-8
+
+from il2fb.commons.events import Event
+
+
+class NextMissionWasPrepared(Event):
+    """
+    Next mission of rotation was read and parsed in advance. Invalid missions
+    are skipped by rotation.
+
+    """
+    __slots__ = ['path', 'is_valid', 'error', 'duration', ]
+    verbose_name = "Next mission was prepared"
+
+
+class MissionRotationHasStarted(Event):
+    __slots__ = ['path', ]
+    verbose_name = "Mission rotation has started"
+
+
+class MissionRotationStepWasDone(Event):
+    __slots__ = ['path', 'step', 'duration', ]
+    verbose_name = "Mission rotation step was done"
+
+
+class MissionRotationHasFinished(Event):
+    """
+    New mission has begun. ``gap`` is a time in seconds between ending of
+    previous mission and beginning of new one.
+
+    """
+    __slots__ = ['path', 'gap', ]
+    verbose_name = "Mission rotation has finished"
+
+
+class MissionRotationHasFailed(Event):
+    __slots__ = ['path', 'step', 'error', ]
+    verbose_name = "Mission rotation has failed"
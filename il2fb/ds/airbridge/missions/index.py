@@ -0,0 +1,660 @@
+# coding: utf-8
+"""
+In-memory index of directory of missions.
+
+Index is built once by a full scan of directory and is kept up to date by
+inotify if ``inotify_simple`` is installed and is supported by system.
+Otherwise directory is rescanned periodically.
+
+"""
+import asyncio
+import datetime
+import itertools
+import logging
+import os
+import posixpath
+import re
+import threading
+
+from pathlib import Path, PureWindowsPath
+from typing import (
+    Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple,
+)
+
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+from il2fb.ds.airbridge.missions.storage import is_mission_file_name
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_INDEX_RESCAN_PERIOD = 30
+DEFAULT_INDEX_DEBOUNCE_DELAY = 0.2
+
+_INOTIFY_READ_TIMEOUT = 500
+
+_PROPERTIES_PATTERN = "^{stem}(_\\w{{2}})?\\.properties$"
+
+
+def normalize_relative_path(path: str) -> str:
+    """
+    Normalize path relative to directory of missions. Empty string denotes
+    directory of missions itself.
+
+    Paths with drives (e.g., ``C:/x.mis`` or UNC paths) are rejected on any
+    platform, as they escape directory of missions on Windows.
+
+    """
+    path = path.replace('\\', '/')
+
+    if ':' in path or PureWindowsPath(path).drive:
+        raise ValueError(f"path '{path}' must not contain drives or colons")
+
+    path = posixpath.normpath(path.strip('/') or '.')
+
+    if path == '.':
+        return ''
+
+    if path == '..' or path.startswith('../'):
+        raise ValueError(f"path '{path}' is outside of missions directory")
+
+    return path
+
+
+def join_relative_path(root_dir: Path, relative_path: str) -> Path:
+    """
+    Join directory of missions with normalized relative path and make sure
+    result stays within directory of missions.
+
+    """
+    path = root_dir / relative_path
+
+    root = os.path.abspath(str(root_dir))
+    if os.path.commonpath([root, os.path.abspath(str(path))]) != root:
+        raise ValueError(
+            f"path '{relative_path}' is outside of missions directory"
+        )
+
+    return path
+
+
+class IndexedFile:
+    __slots__ = ['name', 'size', 'mtime', 'properties', ]
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        mtime: float,
+        properties: Optional[List[str]]=None,
+    ):
+        self.name = name
+        self.size = size
+        self.mtime = mtime
+        self.properties = properties or []
+
+    def to_primitive(self, path: str) -> dict:
+        return {
+            'name': path,
+            'size': self.size,
+            'mtime': datetime.datetime.utcfromtimestamp(self.mtime),
+            'properties': self.properties,
+        }
+
+
+class IndexedDirectory:
+    __slots__ = ['dirs', 'files', ]
+
+    def __init__(self, dirs: List[str], files: List[IndexedFile]):
+        self.dirs = dirs
+        self.files = files
+
+
+def scan_directory(path: Path) -> Optional[IndexedDirectory]:
+    dirs = []
+    files = []
+
+    try:
+        entries = list(os.scandir(str(path)))
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                dirs.append(entry.name)
+            elif entry.is_file() and is_mission_file_name(entry.name):
+                stat = entry.stat()
+                files.append(IndexedFile(
+                    name=entry.name,
+                    size=stat.st_size,
+                    mtime=stat.st_mtime,
+                ))
+        except FileNotFoundError:
+            # entry was deleted during scan
+            continue
+
+    dirs.sort()
+    files.sort(key=lambda x: x.name)
+
+    names = [x.name for x in files]
+    for f in files:
+        stem, ext = os.path.splitext(f.name)
+        if ext.lower() == '.mis':
+            pattern = re.compile(_PROPERTIES_PATTERN.format(stem=re.escape(stem)))
+            f.properties = [name for name in names if pattern.match(name)]
+
+    return IndexedDirectory(dirs=dirs, files=files)
+
+
+def scan_tree(
+    root_dir: Path,
+    relative_dir: str='',
+) -> Dict[str, IndexedDirectory]:
+
+    results = {}
+    visited = set()
+    stack = [relative_dir]
+
+    while stack:
+        relative_dir = stack.pop()
+        path = root_dir / relative_dir
+
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+
+        # directories can be linked symbolically to their parents
+        if (stat.st_dev, stat.st_ino) in visited:
+            continue
+
+        visited.add((stat.st_dev, stat.st_ino))
+
+        directory = scan_directory(path)
+        if directory is None:
+            continue
+
+        results[relative_dir] = directory
+        stack.extend(
+            posixpath.join(relative_dir, name)
+            for name in directory.dirs
+        )
+
+    return results
+
+
+def _walk(
+    dirs: Dict[str, IndexedDirectory],
+    relative_dir: str,
+) -> Iterator[Tuple[str, IndexedDirectory]]:
+
+    stack = [relative_dir]
+
+    while stack:
+        path = stack.pop()
+        directory = dirs.get(path)
+
+        if directory is None:
+            continue
+
+        yield path, directory
+
+        stack.extend(
+            posixpath.join(path, name)
+            for name in reversed(directory.dirs)
+        )
+
+
+def browse_tree(
+    dirs: Dict[str, IndexedDirectory],
+    relative_dir: str='',
+    recursive: bool=False,
+    prefix: Optional[str]=None,
+    offset: int=0,
+    limit: Optional[int]=None,
+    details: bool=False,
+) -> Optional[dict]:
+    """
+    List directories and files of missions in a directory. Nested
+    directories and files are listed as well if listing is recursive.
+    Their paths are relative to requested directory in such case.
+
+    Entries can be filtered by prefix of their names, which is
+    case-insensitive. Directories come before files and pagination is
+    applied to the whole list of them. ``None`` is returned if directory
+    does not exist.
+
+    """
+    if relative_dir not in dirs:
+        return
+
+    if prefix:
+        prefix = prefix.lower()
+
+    found_dirs = []
+    found_files = []
+
+    if recursive:
+        walk = _walk(dirs, relative_dir)
+    else:
+        walk = [(relative_dir, dirs[relative_dir]), ]
+
+    for path, directory in walk:
+        if path == relative_dir:
+            base = ''
+        else:
+            base = posixpath.relpath(path, relative_dir or '.')
+
+        for name in directory.dirs:
+            if not prefix or name.lower().startswith(prefix):
+                found_dirs.append(posixpath.join(base, name))
+
+        for f in directory.files:
+            if not prefix or f.name.lower().startswith(prefix):
+                found_files.append((posixpath.join(base, f.name), f))
+
+    if recursive:
+        found_dirs.sort()
+        found_files.sort(key=lambda x: x[0])
+
+    total = len(found_dirs) + len(found_files)
+
+    stop = (offset + limit) if limit is not None else total
+    files_offset = max(0, offset - len(found_dirs))
+    files_stop = max(0, stop - len(found_dirs))
+
+    found_dirs = found_dirs[offset:stop]
+    found_files = found_files[files_offset:files_stop]
+
+    return {
+        'dirs': found_dirs,
+        'files': [
+            f.to_primitive(path) if details else path
+            for path, f in found_files
+        ],
+        'total': total,
+    }
+
+
+FILE_CHANGE_CREATED = 'created'
+FILE_CHANGE_MODIFIED = 'modified'
+FILE_CHANGE_DELETED = 'deleted'
+
+FileChange = Tuple[str, str, Optional[IndexedFile]]
+
+
+def _diff_directories(
+    relative_dir: str,
+    old: Optional[IndexedDirectory],
+    new: Optional[IndexedDirectory],
+) -> List[FileChange]:
+
+    old_files = {f.name: f for f in old.files} if old else {}
+    new_files = {f.name: f for f in new.files} if new else {}
+    changes = []
+
+    for name, f in new_files.items():
+        previous = old_files.get(name)
+
+        if previous is None:
+            change = FILE_CHANGE_CREATED
+        elif previous.size != f.size or previous.mtime != f.mtime:
+            change = FILE_CHANGE_MODIFIED
+        else:
+            continue
+
+        changes.append((change, posixpath.join(relative_dir, name), f))
+
+    for name in old_files.keys() - new_files.keys():
+        changes.append((
+            FILE_CHANGE_DELETED, posixpath.join(relative_dir, name), None,
+        ))
+
+    return changes
+
+
+class MissionsIndex:
+    """
+    In-memory index of directories and files of missions along with their
+    sizes, modification times and localized properties of missions.
+
+    All scans are done by workers of missions storage and the index itself is
+    changed only within event loop, so it can be read without locks. Changed
+    directories are rescanned non-recursively after a short delay which
+    allows to coalesce bursts of changes.
+
+    Subscribers of changes get lists of created, modified and deleted files
+    found by rescans, whatever caused them.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        storage: MissionsStorage,
+        rescan_period: float=DEFAULT_INDEX_RESCAN_PERIOD,
+        use_inotify: bool=True,
+        debounce_delay: float=DEFAULT_INDEX_DEBOUNCE_DELAY,
+    ):
+        self._loop = loop
+        self._storage = storage
+        self._root_dir = storage.root_dir
+        self._rescan_period = rescan_period
+        self._use_inotify = use_inotify and (inotify_simple is not None)
+        self._debounce_delay = debounce_delay
+
+        self._dirs = {}
+        self._ready = asyncio.Event(loop=loop)
+
+        self._dirty = set()
+        self._refresh_handle = None
+        self._refresh_task = None
+        self._main_task = None
+
+        self._inotify = None
+        self._watches = {}
+        self._watches_lock = threading.Lock()
+        self._watcher_thread = None
+        self._do_stop = False
+
+        self._changes_subscribers = []
+
+    @property
+    def storage(self) -> MissionsStorage:
+        return self._storage
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    async def wait_ready(self) -> Awaitable[None]:
+        await self._ready.wait()
+
+    def start(self) -> None:
+        self._main_task = self._loop.create_task(self._run())
+
+    async def _run(self) -> Awaitable[None]:
+        try:
+            await self._rescan()
+            self._ready.set()
+
+            if self._use_inotify and self._try_start_watcher():
+                return
+
+            while True:
+                await asyncio.sleep(self._rescan_period, loop=self._loop)
+                await self._rescan()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            LOG.exception("missions index has failed")
+
+    def subscribe_to_changes(
+        self,
+        subscriber: Callable[[List[FileChange]], None],
+    ) -> None:
+        self._changes_subscribers.append(subscriber)
+
+    def unsubscribe_from_changes(
+        self,
+        subscriber: Callable[[List[FileChange]], None],
+    ) -> None:
+        self._changes_subscribers.remove(subscriber)
+
+    def _notify(self, changes: List[FileChange]) -> None:
+        if not changes:
+            return
+
+        for subscriber in self._changes_subscribers:
+            try:
+                subscriber(changes)
+            except Exception:
+                LOG.exception(
+                    "missions index: failed to notify subscriber of changes"
+                )
+
+    async def _rescan(self) -> Awaitable[None]:
+        dirs = await self._storage.run(scan_tree, self._root_dir)
+        previous, self._dirs = self._dirs, dirs
+        self._maybe_watch(self._dirs.keys())
+
+        if self._changes_subscribers and self.is_ready:
+            self._notify(list(itertools.chain.from_iterable(
+                _diff_directories(key, previous.get(key), dirs.get(key))
+                for key in previous.keys() | dirs.keys()
+            )))
+
+        LOG.debug(f"missions index: scanned {len(self._dirs)} directories")
+
+    def _try_start_watcher(self) -> bool:
+        try:
+            self._inotify = inotify_simple.INotify()
+            self._maybe_watch(self._dirs.keys())
+        except Exception:
+            LOG.exception(
+                "missions index: failed to set up inotify, periodic rescans "
+                "will be used"
+            )
+            self._inotify = None
+            return False
+
+        self._watcher_thread = threading.Thread(
+            target=self._watch,
+            name="missions index watcher",
+            daemon=True,
+        )
+        self._watcher_thread.start()
+        return True
+
+    def _maybe_watch(self, relative_dirs: Iterable[str]) -> None:
+        if self._inotify is None:
+            return
+
+        flags = inotify_simple.flags
+        mask = (
+            flags.CREATE | flags.DELETE | flags.MODIFY | flags.CLOSE_WRITE
+            | flags.MOVED_FROM | flags.MOVED_TO | flags.ATTRIB
+        )
+
+        with self._watches_lock:
+            for relative_dir in relative_dirs:
+                wd = self._inotify.add_watch(
+                    str(self._root_dir / relative_dir), mask,
+                )
+                self._watches[wd] = relative_dir
+
+    def _watch(self) -> None:
+        flags = inotify_simple.flags
+
+        while not self._do_stop:
+            try:
+                events = self._inotify.read(timeout=_INOTIFY_READ_TIMEOUT)
+            except Exception:
+                LOG.exception("missions index: failed to read inotify events")
+                break
+
+            dirty = set()
+            overflowed = False
+
+            for event in events:
+                if event.mask & flags.Q_OVERFLOW:
+                    overflowed = True
+                    continue
+
+                with self._watches_lock:
+                    if event.mask & flags.IGNORED:
+                        self._watches.pop(event.wd, None)
+                        continue
+
+                    relative_dir = self._watches.get(event.wd)
+
+                if relative_dir is not None:
+                    dirty.add(relative_dir)
+
+            try:
+                if overflowed:
+                    self._loop.call_soon_threadsafe(self._schedule_rescan)
+                elif dirty:
+                    self._loop.call_soon_threadsafe(self.invalidate, *dirty)
+            except RuntimeError:
+                # event loop is closed
+                break
+
+        self._inotify.close()
+
+    def _schedule_rescan(self) -> None:
+        LOG.warning("missions index: inotify queue overflow, rescanning")
+        self._loop.create_task(self._try_rescan())
+
+    async def _try_rescan(self) -> Awaitable[None]:
+        try:
+            await self._rescan()
+        except Exception:
+            LOG.exception("missions index: failed to rescan")
+
+    def invalidate(self, *relative_dirs: str) -> None:
+        """
+        Schedule rescan of given directories. Not thread-safe.
+
+        """
+        self._dirty.update(relative_dirs)
+
+        if self._refresh_handle is None and self._refresh_task is None:
+            self._refresh_handle = self._loop.call_later(
+                self._debounce_delay, self._start_refresh,
+            )
+
+    def invalidate_path(self, path: Path) -> None:
+        """
+        Schedule rescan of nearest indexed directory which contains given
+        path, e.g. after files were uploaded or deleted.
+
+        """
+        relative_path = normalize_relative_path(
+            path.relative_to(self._root_dir).as_posix()
+        )
+
+        while relative_path and relative_path not in self._dirs:
+            relative_path = posixpath.dirname(relative_path)
+
+        self.invalidate(relative_path)
+
+    def _start_refresh(self) -> None:
+        self._refresh_handle = None
+        self._refresh_task = self._loop.create_task(self._refresh())
+
+    async def _refresh(self) -> Awaitable[None]:
+        try:
+            while self._dirty:
+                relative_dir = self._dirty.pop()
+                await self._refresh_dir(relative_dir)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            LOG.exception("missions index: failed to refresh")
+        finally:
+            self._refresh_task = None
+
+    async def _refresh_dir(self, relative_dir: str) -> Awaitable[None]:
+        directory = await self._storage.run(
+            scan_directory, self._root_dir / relative_dir,
+        )
+
+        if directory is None:
+            self._drop_tree(relative_dir)
+            return
+
+        previous = self._dirs.get(relative_dir)
+        previous_dirs = set(previous.dirs) if previous else set()
+        self._dirs[relative_dir] = directory
+
+        changes = _diff_directories(relative_dir, previous, directory)
+
+        for name in previous_dirs - set(directory.dirs):
+            self._drop_tree(posixpath.join(relative_dir, name))
+
+        for name in set(directory.dirs) - previous_dirs:
+            tree = await self._storage.run(
+                scan_tree,
+                self._root_dir,
+                posixpath.join(relative_dir, name),
+            )
+            self._dirs.update(tree)
+            self._maybe_watch(tree.keys())
+
+            for key, subdirectory in tree.items():
+                changes.extend(_diff_directories(key, None, subdirectory))
+
+        self._notify(changes)
+
+    def _drop_tree(self, relative_dir: str) -> None:
+        prefix = relative_dir + '/'
+        changes = []
+
+        for key in list(self._dirs.keys()):
+            if key == relative_dir or key.startswith(prefix):
+                changes.extend(
+                    _diff_directories(key, self._dirs.pop(key), None)
+                )
+
+        self._notify(changes)
+
+    def get_file(self, relative_path: str) -> Optional[IndexedFile]:
+        relative_dir, name = posixpath.split(relative_path)
+        directory = self._dirs.get(relative_dir)
+
+        if directory is not None:
+            for f in directory.files:
+                if f.name == name:
+                    return f
+
+    def iter_files(
+        self,
+        relative_dir: str='',
+    ) -> Iterator[Tuple[str, IndexedFile]]:
+        """
+        Iterate over relative paths and descriptions of all files in a
+        directory and its subdirectories.
+
+        """
+        for path, directory in _walk(self._dirs, relative_dir):
+            for f in directory.files:
+                yield posixpath.join(path, f.name), f
+
+    def browse(
+        self,
+        relative_dir: str='',
+        recursive: bool=False,
+        prefix: Optional[str]=None,
+        offset: int=0,
+        limit: Optional[int]=None,
+        details: bool=False,
+    ) -> Optional[dict]:
+        return browse_tree(
+            self._dirs, relative_dir, recursive, prefix, offset, limit, details,
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            'is_ready': self.is_ready,
+            'uses_inotify': self._inotify is not None,
+            'dirs_count': len(self._dirs),
+            'files_count': sum(len(x.files) for x in self._dirs.values()),
+            'pending_count': len(self._dirty),
+        }
+
+    def stop(self) -> None:
+        self._do_stop = True
+
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+
+        for task in (self._main_task, self._refresh_task):
+            if task:
+                task.cancel()
@@ -0,0 +1,305 @@
+# coding: utf-8
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import logging
+import os
+import pickle
+import time
+
+from pathlib import Path
+from typing import Any, Awaitable, Iterable, Optional, Tuple
+
+from il2fb.parsers.mission import MissionParser
+
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_PARSE_CACHE_MAX_SIZE = 64 * 2 ** 20
+DEFAULT_PARSE_MAX_WORKERS = 2
+
+EXECUTOR_TYPE_THREAD = 'thread'
+EXECUTOR_TYPE_PROCESS = 'process'
+
+MissionKey = Tuple[str, int, int]
+
+
+# parser of worker, either process or thread
+_parser = None
+
+
+def get_mission_key(path: Path, stat: os.stat_result) -> MissionKey:
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _get_persistence_path(persistence_dir: Path, path: str) -> Path:
+    # a single file is kept for each mission, so outdated versions of parsed
+    # missions are replaced rather than accumulated
+    name = hashlib.blake2b(path.encode(), digest_size=16).hexdigest()
+    return persistence_dir / f"{name}.pickle"
+
+
+def _parse(
+    key: MissionKey,
+    persistence_dir: Optional[Path],
+) -> Tuple[Any, int]:
+    """
+    Parse mission and return it along with estimated size of memory it
+    occupies. Parsed mission is persisted if persistence directory is given.
+
+    """
+    global _parser
+
+    if _parser is None:
+        _parser = MissionParser()
+
+    result = _parser.parse(key[0])
+
+    # size of pickled form is used as estimation of occupied memory
+    data = pickle.dumps((key, result), protocol=pickle.HIGHEST_PROTOCOL)
+
+    if persistence_dir is not None:
+        try:
+            _persist(_get_persistence_path(persistence_dir, key[0]), data)
+        except Exception:
+            LOG.exception(f"failed to persist parsed mission `{key[0]}`")
+
+    return result, len(data)
+
+
+def _persist(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with temp_path.open('wb') as f:
+        f.write(data)
+
+    os.replace(str(temp_path), str(path))
+
+
+def _load_persisted(
+    key: MissionKey,
+    persistence_dir: Path,
+) -> Optional[Tuple[Any, int]]:
+
+    path = _get_persistence_path(persistence_dir, key[0])
+
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    try:
+        persisted_key, result = pickle.loads(data)
+    except Exception:
+        LOG.exception(f"failed to load persisted mission from `{path}`")
+        return None
+
+    if tuple(persisted_key) != key:
+        return None
+
+    return result, len(data)
+
+
+def _discard_persisted(path: str, persistence_dir: Path) -> None:
+    try:
+        _get_persistence_path(persistence_dir, path).unlink()
+    except FileNotFoundError:
+        pass
+
+
+class _Entry:
+    __slots__ = ['key', 'result', 'size', ]
+
+    def __init__(self, key: MissionKey, result: Any, size: int):
+        self.key = key
+        self.result = result
+        self.size = size
+
+
+class ParsedMissionsCache:
+    """
+    LRU cache of parsed missions.
+
+    Entries are keyed by path, modification time and size of mission files,
+    so changed files are parsed again. Total size of entries is bounded by
+    ``max_size`` bytes. Size of each entry is estimated by size of pickled
+    form of parsed mission.
+
+    On miss, mission is looked up in persistence directory, if it is set,
+    and is parsed by a pool of workers otherwise. Workers are threads by
+    default. Processes run parsing in parallel with event loop, but they
+    require 'multiprocessing.freeze_support()' in frozen executables, which
+    is called by entry point of Airbridge. Parsed missions are
+    persisted by workers, so they survive restarts. Concurrent requests of
+    same mission share a single parsing.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        storage: MissionsStorage,
+        max_size: int=DEFAULT_PARSE_CACHE_MAX_SIZE,
+        max_workers: int=DEFAULT_PARSE_MAX_WORKERS,
+        executor_type: str=EXECUTOR_TYPE_THREAD,
+        persistence_dir: Optional[Path]=None,
+    ):
+        self._loop = loop
+        self._storage = storage
+        self._max_size = max_size
+        self._persistence_dir = persistence_dir
+
+        if executor_type == EXECUTOR_TYPE_PROCESS:
+            executor_class = concurrent.futures.ProcessPoolExecutor
+        elif executor_type == EXECUTOR_TYPE_THREAD:
+            executor_class = concurrent.futures.ThreadPoolExecutor
+        else:
+            raise ValueError(f"unknown type of executor '{executor_type}'")
+
+        self._executor = executor_class(max_workers=max_workers)
+
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._pending = {}
+        self._prewarm_tasks = set()
+
+        self._hits_count = 0
+        self._persisted_hits_count = 0
+        self._misses_count = 0
+        self._parse_time = 0.0
+
+    async def get(
+        self,
+        path: Path,
+        stat: Optional[os.stat_result]=None,
+    ) -> Awaitable[Any]:
+        """
+        Get parsed mission. Status of mission file is retrieved if not given.
+
+        """
+        if stat is None:
+            stat = await self._storage.stat(path)
+            if stat is None:
+                raise FileNotFoundError(f"mission `{path}` does not exist")
+
+        key = get_mission_key(path, stat)
+
+        entry = self._entries.get(key[0])
+        if entry is not None and entry.key == key:
+            self._entries.move_to_end(key[0])
+            self._hits_count += 1
+            return entry.result
+
+        future = self._pending.get(key)
+        if future is None:
+            future = self._loop.create_task(self._fill(key))
+            future.add_done_callback(
+                functools.partial(self._on_fill_done, key)
+            )
+            self._pending[key] = future
+
+        return (await asyncio.shield(future, loop=self._loop))
+
+    async def _fill(self, key: MissionKey) -> Awaitable[Any]:
+        loaded = None
+
+        if self._persistence_dir is not None:
+            loaded = await self._storage.run(
+                _load_persisted, key, self._persistence_dir,
+            )
+
+        if loaded is None:
+            self._misses_count += 1
+
+            started_at = time.perf_counter()
+            loaded = await self._loop.run_in_executor(
+                self._executor, _parse, key, self._persistence_dir,
+            )
+            self._parse_time += time.perf_counter() - started_at
+        else:
+            self._persisted_hits_count += 1
+
+        result, size = loaded
+        self._put(_Entry(key, result, size))
+
+        return result
+
+    def _on_fill_done(self, key: MissionKey, future: asyncio.Future) -> None:
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+        if not future.cancelled():
+            # retrieve exception to avoid warnings about unretrieved ones
+            future.exception()
+
+    def _put(self, entry: _Entry) -> None:
+        if entry.size > self._max_size:
+            return
+
+        self._pop(entry.key[0])
+
+        self._entries[entry.key[0]] = entry
+        self._size += entry.size
+
+        while self._size > self._max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+
+    def _pop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    async def discard(self, path: Path) -> Awaitable[None]:
+        """
+        Forget parsed mission, e.g. when its file is deleted.
+
+        """
+        self._pop(str(path))
+
+        if self._persistence_dir is not None:
+            await self._storage.run(
+                _discard_persisted, str(path), self._persistence_dir,
+            )
+
+    def prewarm(self, paths: Iterable[Path]) -> None:
+        """
+        Parse missions in background, e.g. right after they were uploaded.
+
+        """
+        for path in paths:
+            task = self._loop.create_task(self._try_prewarm(path))
+            self._prewarm_tasks.add(task)
+            task.add_done_callback(self._prewarm_tasks.discard)
+
+    async def _try_prewarm(self, path: Path) -> Awaitable[None]:
+        try:
+            await self.get(path)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            LOG.exception(f"failed to prewarm parsed mission `{path}`")
+
+    def get_stats(self) -> dict:
+        return {
+            'entries_count': len(self._entries),
+            'size': self._size,
+            'max_size': self._max_size,
+            'hits_count': self._hits_count,
+            'persisted_hits_count': self._persisted_hits_count,
+            'misses_count': self._misses_count,
+            'parse_time': self._parse_time,
+        }
+
+    def stop(self) -> None:
+        for task in list(self._prewarm_tasks):
+            task.cancel()
+
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,485 @@
+# coding: utf-8
+
+import asyncio
+import datetime
+import logging
+import posixpath
+
+from typing import Awaitable, Callable, Iterable, List, Optional, Union
+
+from il2fb.commons.events import Event
+from il2fb.ds.middleware.console.client import ConsoleClient
+
+from il2fb.ds.airbridge.missions.events import MissionRotationHasFailed
+from il2fb.ds.airbridge.missions.events import MissionRotationHasFinished
+from il2fb.ds.airbridge.missions.events import MissionRotationHasStarted
+from il2fb.ds.airbridge.missions.events import MissionRotationStepWasDone
+from il2fb.ds.airbridge.missions.events import NextMissionWasPrepared
+from il2fb.ds.airbridge.missions.index import normalize_relative_path
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+from il2fb.ds.airbridge.missions.validation import MissionParseFunction
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_ROTATION_MISSION_DURATION = 3600
+DEFAULT_ROTATION_STEP_TIMEOUT = 10
+
+EventHandler = Callable[[Event], None]
+
+
+class PlaylistEntry:
+    __slots__ = ['path', 'duration', ]
+
+    def __init__(self, path: str, duration: Optional[float]=None):
+        self.path = path
+        self.duration = duration
+
+    def to_primitive(self) -> dict:
+        return {
+            'path': self.path,
+            'duration': self.duration,
+        }
+
+
+def load_playlist(items: Iterable[Union[str, dict]]) -> List[PlaylistEntry]:
+    """
+    Load playlist from paths of missions or from dictionaries with ``path``
+    and optional ``duration`` of mission in seconds.
+
+    """
+    playlist = []
+
+    for item in items:
+        if isinstance(item, str):
+            item = {'path': item, }
+
+        path = normalize_relative_path(item['path'])
+        if posixpath.splitext(path)[1].lower() != '.mis':
+            raise ValueError(f"'{path}' is not a path of a mission")
+
+        duration = item.get('duration')
+        if duration is not None:
+            duration = float(duration)
+            if duration <= 0:
+                raise ValueError(
+                    f"duration of mission must be positive (value={duration})"
+                )
+
+        playlist.append(PlaylistEntry(path, duration))
+
+    return playlist
+
+
+class _Preparation:
+    __slots__ = ['position', 'entry', 'task', 'is_valid', 'error', ]
+
+    def __init__(self, position: int, entry: PlaylistEntry):
+        self.position = position
+        self.entry = entry
+        self.task = None
+        self.is_valid = None
+        self.error = None
+
+    def to_primitive(self) -> dict:
+        if self.is_valid is None:
+            status = 'pending'
+        else:
+            status = 'valid' if self.is_valid else 'invalid'
+
+        return {
+            'path': self.entry.path,
+            'status': status,
+            'error': self.error,
+        }
+
+
+class _GapStats:
+    __slots__ = ['count', 'last', 'max', 'total', ]
+
+    def __init__(self):
+        self.count = 0
+        self.last = None
+        self.max = 0.0
+        self.total = 0.0
+
+    def add(self, gap: float) -> None:
+        self.count += 1
+        self.last = gap
+        self.max = max(self.max, gap)
+        self.total += gap
+
+    def to_primitive(self) -> dict:
+        return {
+            'last': self.last,
+            'max': self.max,
+            'mean': (self.total / self.count) if self.count else None,
+        }
+
+
+class MissionsRotator:
+    """
+    Rotates missions of a playlist on server.
+
+    While a mission is played, the next one is read and parsed in background
+    (normally by cache of parsed missions), so invalid missions are skipped
+    before rotation and parsing does not delay it. Rotation itself is a tight
+    sequence of ``end``, ``unload``, ``load`` and ``begin`` console commands,
+    each of them limited by ``step_timeout``. Failures to end or to unload
+    previous mission are tolerated, as there may be no mission at all.
+
+    Lifecycle events of rotation are passed to subscribers of events. Gap
+    between missions, i.e. time from ending of previous mission to
+    beginning of new one, is measured for each rotation.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        console_client: ConsoleClient,
+        storage: MissionsStorage,
+        parse: MissionParseFunction,
+        playlist: Optional[List[PlaylistEntry]]=None,
+        mission_duration: float=DEFAULT_ROTATION_MISSION_DURATION,
+        step_timeout: Optional[float]=DEFAULT_ROTATION_STEP_TIMEOUT,
+        repeat: bool=True,
+        on_mission_loaded: Optional[Callable[[], None]]=None,
+    ):
+        self._loop = loop
+        self._console_client = console_client
+        self._storage = storage
+        self._parse = parse
+        self._playlist = playlist or []
+        self._mission_duration = mission_duration
+        self._step_timeout = step_timeout
+        self._repeat = repeat
+        self._on_mission_loaded = on_mission_loaded
+
+        self._position = 0
+        self._current = None
+        self._current_began_at = None
+        self._preparation = None
+
+        self._main_task = None
+        self._skip_event = asyncio.Event(loop=loop)
+
+        self._events_subscribers = []
+
+        self._rotations_count = 0
+        self._failures_count = 0
+        self._gaps = _GapStats()
+        self._steps_durations = {}
+
+    @property
+    def is_running(self) -> bool:
+        return self._main_task is not None and not self._main_task.done()
+
+    def subscribe_to_events(self, subscriber: EventHandler) -> None:
+        self._events_subscribers.append(subscriber)
+
+    def unsubscribe_from_events(self, subscriber: EventHandler) -> None:
+        self._events_subscribers.remove(subscriber)
+
+    def _emit(self, event: Event) -> None:
+        for subscriber in self._events_subscribers:
+            try:
+                subscriber(event)
+            except Exception:
+                LOG.exception(
+                    f"failed to pass mission rotation event {event} to "
+                    f"subscriber"
+                )
+
+    def set_playlist(
+        self,
+        playlist: List[PlaylistEntry],
+        position: int=0,
+    ) -> None:
+        """
+        Replace playlist. Current mission continues until its end, after that
+        mission at ``position`` of new playlist is loaded.
+
+        """
+        if playlist and not (0 <= position < len(playlist)):
+            raise ValueError(f"position {position} is out of playlist")
+
+        self._playlist = playlist
+        self._position = position
+        self._cancel_preparation()
+
+        if self.is_running and playlist:
+            self._prepare(position)
+
+    def start(self) -> None:
+        if not self._playlist:
+            raise ValueError("playlist is empty")
+
+        if self.is_running:
+            return
+
+        self._skip_event.clear()
+        self._main_task = self._loop.create_task(self._run())
+
+    def stop(self) -> None:
+        self._cancel_preparation()
+
+        if self._main_task:
+            self._main_task.cancel()
+            self._main_task = None
+
+    def skip(self) -> None:
+        """
+        Rotate to the next mission right now.
+
+        """
+        if not self.is_running:
+            raise ValueError("rotation is not running")
+
+        self._skip_event.set()
+
+    async def _run(self) -> Awaitable[None]:
+        try:
+            await self._rotate_forever()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            LOG.exception("rotation of missions has failed")
+        finally:
+            self._cancel_preparation()
+
+    async def _rotate_forever(self) -> Awaitable[None]:
+        failures_in_row = 0
+
+        while True:
+            preparation = await self._get_next_valid()
+
+            if preparation is None:
+                # position is dropped at the end of non-repeated playlist,
+                # even if its last mission was invalid or has failed to load
+                if not self._playlist:
+                    LOG.warning("rotation of missions: playlist is empty")
+                elif self._position is None:
+                    LOG.info("rotation of missions: playlist has ended")
+                else:
+                    LOG.error(
+                        "rotation of missions: no valid missions to load"
+                    )
+                return
+
+            entry = preparation.entry
+            self._position = self._get_next_position(preparation.position)
+
+            try:
+                await self._rotate(entry)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                failures_in_row += 1
+
+                if failures_in_row >= len(self._playlist):
+                    LOG.error(
+                        "rotation of missions: all missions have failed to "
+                        "be loaded"
+                    )
+                    return
+
+                continue
+            else:
+                failures_in_row = 0
+
+            if self._position is None:
+                LOG.info("rotation of missions: playlist has ended")
+                return
+
+            # next mission is prepared while current one is played
+            self._prepare(self._position)
+            await self._wait_mission_end(
+                entry.duration or self._mission_duration
+            )
+
+    def _get_next_position(self, position: int) -> Optional[int]:
+        position += 1
+
+        if position < len(self._playlist):
+            return position
+
+        return 0 if self._repeat else None
+
+    async def _wait_mission_end(self, duration: float) -> Awaitable[None]:
+        try:
+            await asyncio.wait_for(
+                self._skip_event.wait(), duration, loop=self._loop,
+            )
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._skip_event.clear()
+
+    async def _get_next_valid(self) -> Awaitable[Optional[_Preparation]]:
+        for _ in range(len(self._playlist)):
+            position = self._position
+
+            if position is None:
+                return None
+
+            preparation = self._preparation
+            if preparation is None or preparation.position != position:
+                preparation = self._prepare(position)
+
+            # preparation can be cancelled by replacement of playlist, which
+            # must not stop rotation itself
+            await asyncio.wait([preparation.task, ], loop=self._loop)
+
+            if preparation is not self._preparation:
+                # playlist was replaced during preparation
+                return (await self._get_next_valid())
+
+            if preparation.is_valid:
+                return preparation
+
+            LOG.warning(
+                f"rotation of missions: skip invalid mission "
+                f"`{preparation.entry.path}`"
+            )
+            self._position = self._get_next_position(position)
+
+    def _prepare(self, position: int) -> _Preparation:
+        self._cancel_preparation()
+
+        preparation = _Preparation(position, self._playlist[position])
+        preparation.task = self._loop.create_task(
+            self._try_prepare(preparation)
+        )
+        self._preparation = preparation
+
+        return preparation
+
+    def _cancel_preparation(self) -> None:
+        if self._preparation and self._preparation.task:
+            self._preparation.task.cancel()
+
+        self._preparation = None
+
+    async def _try_prepare(self, preparation: _Preparation) -> Awaitable[None]:
+        path = self._storage.root_dir / preparation.entry.path
+        started_at = self._loop.time()
+
+        try:
+            stat = await self._storage.stat(path)
+            if stat is None:
+                raise FileNotFoundError(f"mission `{path}` does not exist")
+
+            await self._parse(path, stat)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            preparation.is_valid = False
+            preparation.error = str(e) or e.__class__.__name__
+        else:
+            preparation.is_valid = True
+
+        self._emit(NextMissionWasPrepared(
+            path=preparation.entry.path,
+            is_valid=preparation.is_valid,
+            error=preparation.error,
+            duration=self._loop.time() - started_at,
+        ))
+
+    async def _rotate(self, entry: PlaylistEntry) -> Awaitable[None]:
+        path = entry.path
+        timeout = self._step_timeout
+
+        client = self._console_client
+        steps = [
+            ('end', lambda: client.end_mission(timeout), True),
+            ('unload', lambda: client.unload_mission(timeout), True),
+            ('load', lambda: self._load_mission(path, timeout), False),
+            ('begin', lambda: client.begin_mission(timeout), False),
+        ]
+
+        self._emit(MissionRotationHasStarted(path=path))
+        started_at = self._loop.time()
+
+        for step, func, is_tolerated in steps:
+            step_started_at = self._loop.time()
+
+            try:
+                await func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if is_tolerated:
+                    LOG.debug(
+                        f"rotation of missions: failed to {step} previous "
+                        f"mission: {e}"
+                    )
+                    continue
+
+                LOG.exception(
+                    f"rotation of missions: failed to {step} mission `{path}`"
+                )
+                self._failures_count += 1
+                self._emit(MissionRotationHasFailed(
+                    path=path,
+                    step=step,
+                    error=(str(e) or e.__class__.__name__),
+                ))
+                raise
+
+            duration = self._loop.time() - step_started_at
+            self._steps_durations[step] = duration
+            self._emit(MissionRotationStepWasDone(
+                path=path,
+                step=step,
+                duration=duration,
+            ))
+
+        gap = self._loop.time() - started_at
+
+        self._rotations_count += 1
+        self._gaps.add(gap)
+        self._current = entry
+        self._current_began_at = datetime.datetime.utcnow()
+
+        LOG.info(
+            f"rotation of missions: mission `{path}` has begun "
+            f"(gap={gap:.3f}s)"
+        )
+        self._emit(MissionRotationHasFinished(path=path, gap=gap))
+
+    async def _load_mission(
+        self,
+        path: str,
+        timeout: Optional[float],
+    ) -> Awaitable[None]:
+
+        try:
+            await self._console_client.load_mission(
+                file_path=path,
+                timeout=timeout,
+            )
+        finally:
+            if self._on_mission_loaded:
+                self._on_mission_loaded()
+
+    def get_status(self) -> dict:
+        return {
+            'is_running': self.is_running,
+            'current': self._current and self._current.to_primitive(),
+            'current_began_at': self._current_began_at,
+            'next': self._preparation and self._preparation.to_primitive(),
+            'position': self._position,
+            'repeat': self._repeat,
+            'playlist': [x.to_primitive() for x in self._playlist],
+            'stats': self.get_stats(),
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            'rotations_count': self._rotations_count,
+            'failures_count': self._failures_count,
+            'gap': self._gaps.to_primitive(),
+            'steps_durations': dict(self._steps_durations),
+        }
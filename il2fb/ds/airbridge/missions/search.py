@@ -0,0 +1,437 @@
+# coding: utf-8
+
+import asyncio
+import datetime
+import logging
+import os
+import time
+
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Mapping, Optional
+
+from il2fb.ds.airbridge import json
+from il2fb.ds.airbridge.missions.index import MissionsIndex
+from il2fb.ds.airbridge.missions.index import normalize_relative_path
+from il2fb.ds.airbridge.missions.validation import MissionParseFunction
+from il2fb.ds.airbridge.missions.validation import extract_mission_metadata
+from il2fb.ds.airbridge.missions.validation import get_item
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_SEARCH_CONCURRENCY = 2
+DEFAULT_SEARCH_SYNC_PERIOD = 5
+
+SEASONS = ('winter', 'spring', 'summer', 'autumn', )
+TIMES_OF_DAY = ('night', 'morning', 'day', 'evening', )
+
+_RECORD_FORMAT_VERSION = 1
+
+
+def get_season(date: Optional[datetime.date]) -> Optional[str]:
+    # seasons of northern hemisphere, where most of maps are located
+    if date is None:
+        return None
+
+    return SEASONS[(date.month % 12) // 3]
+
+
+def get_time_of_day(time_value: Optional[datetime.time]) -> Optional[str]:
+    if time_value is None:
+        return None
+
+    hour = time_value.hour
+
+    if 5 <= hour < 11:
+        return 'morning'
+    if 11 <= hour < 17:
+        return 'day'
+    if 17 <= hour < 21:
+        return 'evening'
+
+    return 'night'
+
+
+def _to_name(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+
+    name = getattr(value, 'name', None)
+    return str(name if name is not None else value)
+
+
+def _to_isoformat(value: Any) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def extract_search_record(mission: Any) -> dict:
+    """
+    Extract searchable attributes of parsed mission. Record consists of
+    primitive values only, so it can be persisted as JSON.
+
+    """
+    metadata = extract_mission_metadata(mission)
+
+    flights_counts = {}
+    flights = get_item(mission, 'objects', 'flights') or []
+
+    for flight in flights:
+        belligerent = (
+            get_item(flight, 'belligerent')
+            or get_item(flight, 'regiment', 'belligerent')
+        )
+        name = _to_name(belligerent) or 'unknown'
+        flights_counts[name] = flights_counts.get(name, 0) + 1
+
+    date = metadata['date']
+    time_value = metadata['time']
+
+    return {
+        'map': _to_name(metadata['map']),
+        'date': _to_isoformat(date),
+        'season': get_season(date),
+        'time': _to_isoformat(time_value),
+        'time_of_day': get_time_of_day(time_value),
+        'weather': _to_name(metadata['weather']),
+        'objects_counts': metadata['objects_counts'],
+        'flights_counts': flights_counts,
+    }
+
+
+def _split_values(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        values = value
+    else:
+        values = str(value).split(',')
+
+    return [str(x).strip().lower() for x in values if str(x).strip()]
+
+
+def _make_range_predicate(
+    group: str,
+    name: str,
+    bound: str,
+    value: Any,
+) -> Callable[[dict], bool]:
+
+    limit = int(value)
+
+    if bound == 'min':
+        return lambda record: record[group].get(name, 0) >= limit
+
+    if bound == 'max':
+        return lambda record: record[group].get(name, 0) <= limit
+
+    raise ValueError(f"unknown bound '{bound}'")
+
+
+class MissionsSearchQuery:
+    """
+    Compiled filter of records of missions.
+
+    Supported parameters:
+
+    * ``dir``: directory to search in, including its subdirectories;
+    * ``map``: case-insensitive substring of name of map loader;
+    * ``season``, ``time_of_day``, ``weather``: comma-separated lists of
+      allowed values;
+    * ``date_from``, ``date_to``: inclusive bounds of date in ISO format;
+    * ``objects.<kind>.min``, ``objects.<kind>.max``: bounds of counts of
+      objects of a given kind, e.g. ``objects.moving_units.max``;
+    * ``flights.<belligerent>.min``, ``flights.<belligerent>.max``: bounds of
+      counts of flights of a given belligerent, e.g. ``flights.red.min``;
+    * ``offset``, ``limit``: pagination of results.
+
+    """
+
+    def __init__(self, params: Mapping[str, Any]):
+        self.relative_dir = ''
+        self.offset = 0
+        self.limit = None
+        self._predicates = []
+
+        for key, value in params.items():
+            self._add(key, value)
+
+    def _add(self, key: str, value: Any) -> None:
+        if key == 'dir':
+            self.relative_dir = normalize_relative_path(str(value))
+        elif key == 'offset':
+            self.offset = int(value)
+            if self.offset < 0:
+                raise ValueError("offset must be non-negative")
+        elif key == 'limit':
+            self.limit = int(value)
+            if self.limit < 0:
+                raise ValueError("limit must be non-negative")
+        elif key == 'map':
+            needle = str(value).lower()
+            self._predicates.append(
+                lambda record: needle in (record['map'] or '').lower()
+            )
+        elif key in {'season', 'time_of_day', 'weather', }:
+            allowed = set(_split_values(value))
+            self._predicates.append(
+                lambda record: (record[key] or '').lower() in allowed
+            )
+        elif key == 'date_from':
+            since = _parse_date(value).isoformat()
+            self._predicates.append(
+                lambda record: (record['date'] or '') >= since
+            )
+        elif key == 'date_to':
+            until = _parse_date(value).isoformat()
+            self._predicates.append(
+                lambda record: bool(record['date']) and record['date'] <= until
+            )
+        else:
+            parts = key.split('.')
+
+            if len(parts) != 3 or parts[0] not in {'objects', 'flights', }:
+                raise ValueError(f"unknown search parameter '{key}'")
+
+            group = f"{parts[0]}_counts"
+            self._predicates.append(
+                _make_range_predicate(group, parts[1], parts[2], value)
+            )
+
+    def matches(self, relative_path: str, record: dict) -> bool:
+        if (
+            self.relative_dir
+            and not relative_path.startswith(self.relative_dir + '/')
+        ):
+            return False
+
+        return all(predicate(record) for predicate in self._predicates)
+
+
+def _parse_date(value: Any) -> datetime.date:
+    return datetime.datetime.strptime(str(value), '%Y-%m-%d').date()
+
+
+class _Entry:
+    __slots__ = ['mtime', 'size', 'record', ]
+
+    def __init__(self, mtime: float, size: int, record: Optional[dict]):
+        self.mtime = mtime
+        self.size = size
+        self.record = record
+
+
+def _load_entries(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+
+    if data.get('version') != _RECORD_FORMAT_VERSION:
+        return {}
+
+    return {
+        relative_path: _Entry(mtime, size, record)
+        for relative_path, (mtime, size, record) in data['entries'].items()
+    }
+
+
+def _save_entries(path: Path, entries: dict) -> None:
+    data = json.dumps({
+        'version': _RECORD_FORMAT_VERSION,
+        'entries': {
+            relative_path: [entry.mtime, entry.size, entry.record]
+            for relative_path, entry in entries.items()
+        },
+    })
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    temp_path.write_text(data)
+    os.replace(str(temp_path), str(path))
+
+
+class MissionsSearchIndex:
+    """
+    Searchable index of metadata of missions: their maps, dates, seasons,
+    time of day, weather, counts of objects by kinds and counts of flights by
+    belligerents.
+
+    Index follows in-memory index of directory of missions: new and changed
+    missions are parsed by ``concurrency`` consumers (normally by cache of
+    parsed missions which delegates parsing to a pool of processes), deleted
+    ones are dropped. Missions which failed to be parsed are remembered and
+    are not parsed again until they change. Records are persisted to a JSON
+    file if its path is given, so missions are not parsed again on restart.
+
+    Search is done in memory by a linear scan of compiled predicates.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        index: MissionsIndex,
+        parse: MissionParseFunction,
+        concurrency: int=DEFAULT_SEARCH_CONCURRENCY,
+        sync_period: float=DEFAULT_SEARCH_SYNC_PERIOD,
+        persistence_path: Optional[Path]=None,
+    ):
+        self._loop = loop
+        self._index = index
+        self._storage = index.storage
+        self._parse = parse
+        self._concurrency = concurrency
+        self._sync_period = sync_period
+        self._persistence_path = persistence_path
+
+        self._entries = {}
+        self._queued = set()
+        self._queue = asyncio.Queue(loop=loop)
+        self._is_dirty = False
+
+        self._tasks = []
+        self._parsed_count = 0
+        self._failed_count = 0
+
+    def start(self) -> None:
+        self._tasks = [
+            self._loop.create_task(self._consume())
+            for _ in range(self._concurrency)
+        ]
+        self._tasks.append(self._loop.create_task(self._run()))
+
+    def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+        self._tasks = []
+
+    async def _run(self) -> Awaitable[None]:
+        if self._persistence_path is not None:
+            try:
+                self._entries = await self._storage.run(
+                    _load_entries, self._persistence_path,
+                )
+            except Exception:
+                LOG.exception(
+                    f"failed to load search index of missions from "
+                    f"`{self._persistence_path}`"
+                )
+
+        await self._index.wait_ready()
+
+        while True:
+            try:
+                self._sync()
+                await self._maybe_persist()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                LOG.exception("failed to sync search index of missions")
+
+            await asyncio.sleep(self._sync_period, loop=self._loop)
+
+    def _sync(self) -> None:
+        seen = set()
+
+        for relative_path, f in self._index.iter_files():
+            if not relative_path.lower().endswith('.mis'):
+                continue
+
+            seen.add(relative_path)
+            entry = self._entries.get(relative_path)
+
+            if (
+                entry is None
+                or entry.mtime != f.mtime
+                or entry.size != f.size
+            ) and relative_path not in self._queued:
+                self._queued.add(relative_path)
+                self._queue.put_nowait(relative_path)
+
+        for relative_path in set(self._entries.keys()) - seen:
+            del self._entries[relative_path]
+            self._is_dirty = True
+
+    async def _maybe_persist(self) -> Awaitable[None]:
+        if not (self._is_dirty and self._persistence_path):
+            return
+
+        self._is_dirty = False
+        await self._storage.run(
+            _save_entries, self._persistence_path, dict(self._entries),
+        )
+
+    async def _consume(self) -> Awaitable[None]:
+        while True:
+            relative_path = await self._queue.get()
+
+            try:
+                await self._update(relative_path)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                LOG.exception(f"failed to index mission `{relative_path}`")
+            finally:
+                self._queued.discard(relative_path)
+
+    async def _update(self, relative_path: str) -> Awaitable[None]:
+        f = self._index.get_file(relative_path)
+        if f is None:
+            return
+
+        try:
+            mission = await self._parse(
+                self._storage.root_dir / relative_path, None,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOG.warning(f"failed to parse mission `{relative_path}`: {e}")
+            self._failed_count += 1
+            record = None
+        else:
+            self._parsed_count += 1
+            record = extract_search_record(mission)
+
+        self._entries[relative_path] = _Entry(f.mtime, f.size, record)
+        self._is_dirty = True
+
+    def search(self, query: MissionsSearchQuery) -> dict:
+        started_at = time.perf_counter()
+
+        results = [
+            (relative_path, entry.record)
+            for relative_path, entry in self._entries.items()
+            if entry.record is not None
+            and query.matches(relative_path, entry.record)
+        ]
+        results.sort(key=lambda x: x[0])
+
+        total = len(results)
+
+        if query.limit is None:
+            results = results[query.offset:]
+        else:
+            results = results[query.offset:query.offset + query.limit]
+
+        missions = []
+        for relative_path, record in results:
+            mission = dict(record)
+            mission['path'] = relative_path
+            missions.append(mission)
+
+        return {
+            'missions': missions,
+            'total': total,
+            'pending_count': len(self._queued),
+            'search_time': time.perf_counter() - started_at,
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            'entries_count': len(self._entries),
+            'pending_count': len(self._queued),
+            'parsed_count': self._parsed_count,
+            'failed_count': self._failed_count,
+        }
@@ -0,0 +1,347 @@
+# coding: utf-8
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from pathlib import Path
+from stat import S_ISREG, S_ISDIR
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+LOG = logging.getLogger(__name__)
+
+
+MISSION_FILE_SUFFIXES = {'.mis', '.properties', }
+
+DEFAULT_STORAGE_MAX_WORKERS = 4
+DEFAULT_STORAGE_MAX_PENDING = 64
+DEFAULT_UPLOAD_BUFFER_SIZE = 256 * 2 ** 10
+
+
+def is_mission_file_name(name: str) -> bool:
+    return Path(name).suffix.lower() in MISSION_FILE_SUFFIXES
+
+
+class _DurationStats:
+    __slots__ = ['total', 'max', ]
+
+    def __init__(self):
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration: float) -> None:
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def to_primitive(self, count: int) -> dict:
+        return {
+            'total': self.total,
+            'max': self.max,
+            'mean': (self.total / count) if count else 0,
+        }
+
+
+class MissionsStorage:
+    """
+    Asynchronous facade of operations on files of missions.
+
+    All filesystem operations are executed by a dedicated pool of threads, so
+    slow disks and large files do not block event loop. Not more than
+    ``max_workers`` operations are executed at a time and not more than
+    ``max_pending`` operations wait for a free worker. Other callers wait for
+    their turn without occupying queue of the pool.
+
+    Time spent by operations in queue (including waiting for a free slot)
+    and time of their execution are tracked.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        root_dir: Path,
+        max_workers: int=DEFAULT_STORAGE_MAX_WORKERS,
+        max_pending: int=DEFAULT_STORAGE_MAX_PENDING,
+    ):
+        self._loop = loop
+        self._root_dir = root_dir
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="missions storage",
+        )
+        self._slots = asyncio.Semaphore(max_workers + max_pending, loop=loop)
+
+        # operations which are queued or are being executed
+        self._in_flight_count = 0
+        self._max_in_flight_count = 0
+
+        # stats of operations are updated by workers
+        self._stats_lock = threading.Lock()
+        self._executed_count = 0
+        self._failed_count = 0
+        self._wait_time = _DurationStats()
+        self._run_time = _DurationStats()
+
+    @property
+    def root_dir(self) -> Path:
+        return self._root_dir
+
+    async def run(self, func: Callable[..., Any], *args) -> Awaitable[Any]:
+        """
+        Execute blocking function by a worker of pool.
+
+        """
+        submitted_at = time.perf_counter()
+
+        self._in_flight_count += 1
+        self._max_in_flight_count = max(
+            self._max_in_flight_count, self._in_flight_count,
+        )
+
+        try:
+            async with self._slots:
+                return (await self._loop.run_in_executor(
+                    self._executor, self._call, submitted_at, func, args,
+                ))
+        finally:
+            self._in_flight_count -= 1
+
+    def _call(
+        self,
+        submitted_at: float,
+        func: Callable[..., Any],
+        args: tuple,
+    ) -> Any:
+        started_at = time.perf_counter()
+        failed = False
+
+        try:
+            return func(*args)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            finished_at = time.perf_counter()
+
+            with self._stats_lock:
+                self._executed_count += 1
+                self._failed_count += int(failed)
+                self._wait_time.add(started_at - submitted_at)
+                self._run_time.add(finished_at - started_at)
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                'executed_count': self._executed_count,
+                'failed_count': self._failed_count,
+                'in_flight_count': self._in_flight_count,
+                'max_in_flight_count': self._max_in_flight_count,
+                'wait_time': self._wait_time.to_primitive(self._executed_count),
+                'run_time': self._run_time.to_primitive(self._executed_count),
+            }
+
+    def exists(self, path: Path) -> Awaitable[bool]:
+        return self.run(path.exists)
+
+    def stat(self, path: Path) -> Awaitable[Optional[os.stat_result]]:
+        """
+        Get status of file or ``None`` if file does not exist.
+
+        """
+        return self.run(_try_stat, path)
+
+    def browse(self, path: Path) -> Awaitable[dict]:
+        """
+        List subdirectories and files of missions in a directory.
+
+        """
+        return self.run(_browse, path)
+
+    def parse(self, path: Path, parser: Any) -> Awaitable[Any]:
+        return self.run(parser.parse, str(path))
+
+    def delete(self, path: Path) -> Awaitable[None]:
+        """
+        Delete mission along with its localized properties.
+
+        """
+        return self.run(_delete, path)
+
+    def begin_upload(
+        self,
+        dir_path: Path,
+        buffer_size: int=DEFAULT_UPLOAD_BUFFER_SIZE,
+    ) -> 'MissionsUpload':
+        return MissionsUpload(
+            storage=self,
+            dir_path=dir_path,
+            buffer_size=buffer_size,
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+def _try_stat(path: Path) -> Optional[os.stat_result]:
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def _browse(path: Path) -> dict:
+    dirs = []
+    files = []
+
+    for node in path.resolve().iterdir():
+        st_mode = node.stat().st_mode
+
+        if S_ISDIR(st_mode):
+            dirs.append(node.name)
+        elif S_ISREG(st_mode) and is_mission_file_name(node.name):
+            files.append(node.name)
+
+    dirs.sort()
+    files.sort()
+
+    return {
+        'dirs': dirs,
+        'files': files,
+    }
+
+
+def _delete(path: Path) -> None:
+    path.unlink()
+
+    properties_pattern = f"^{path.stem}(_\w{{2}})?.properties$"
+
+    for node in path.parent.iterdir():
+        if node.is_file() and re.match(properties_pattern, node.name):
+            node.unlink()
+
+
+class MissionsUpload:
+    """
+    Upload of one or more files of missions into a directory.
+
+    Contents of files are written into temporary files in target directory.
+    Temporary files replace target files atomically only when upload is
+    committed, so readers never see partially written files and a failed
+    upload leaves no traces.
+
+    Chunks of data are buffered and are written by workers of storage.
+
+    """
+
+    def __init__(
+        self,
+        storage: MissionsStorage,
+        dir_path: Path,
+        buffer_size: int=DEFAULT_UPLOAD_BUFFER_SIZE,
+    ):
+        self._storage = storage
+        self._dir_path = dir_path
+        self._buffer_size = buffer_size
+
+        self._files = []
+        self._buffer = []
+        self._buffered_size = 0
+
+    @property
+    def file_paths(self) -> List[Path]:
+        return [target for target, _ in self._files]
+
+    async def add_file(self, name: str) -> Awaitable[None]:
+        """
+        Start receiving contents of next file. Previous file is finished.
+
+        """
+        if not is_mission_file_name(name):
+            raise ValueError(f"'{name}' is not a name of a mission file")
+
+        await self._flush()
+
+        f = await self._storage.run(self._open_temp_file)
+        self._files.append((self._dir_path / name, f))
+
+    def _open_temp_file(self) -> Any:
+        self._dir_path.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile(
+            dir=str(self._dir_path),
+            prefix='.',
+            suffix='.upload',
+            delete=False,
+        )
+
+    async def write(self, chunk: bytes) -> Awaitable[None]:
+        if not self._files:
+            raise ValueError("no file was added to upload")
+
+        self._buffer.append(chunk)
+        self._buffered_size += len(chunk)
+
+        if self._buffered_size >= self._buffer_size:
+            await self._flush()
+
+    async def _flush(self) -> Awaitable[None]:
+        if not self._buffer:
+            return
+
+        data = b''.join(self._buffer)
+        self._buffer.clear()
+        self._buffered_size = 0
+
+        _, f = self._files[-1]
+        await self._storage.run(f.write, data)
+
+    async def commit(self) -> Awaitable[List[Path]]:
+        """
+        Move uploaded files to their places and return their paths.
+
+        """
+        await self._flush()
+        return (await self._storage.run(self._commit))
+
+    def _commit(self) -> List[Path]:
+        # all files are written completely before any of them is moved, so
+        # target files are not touched if writing fails
+        for _, f in self._files:
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+
+        # may rewrite existing files
+        for target, f in self._files:
+            os.replace(f.name, str(target))
+
+        paths = self.file_paths
+        self._files.clear()
+
+        return paths
+
+    async def abort(self) -> Awaitable[None]:
+        self._buffer.clear()
+        self._buffered_size = 0
+
+        if self._files:
+            await self._storage.run(self._abort)
+
+    def _abort(self) -> None:
+        for _, f in self._files:
+            try:
+                f.close()
+                os.unlink(f.name)
+            except FileNotFoundError:
+                # file was moved already
+                pass
+            except Exception:
+                LOG.exception(f"failed to remove temporary file `{f.name}`")
+
+        self._files.clear()
@@ -0,0 +1,228 @@
+# coding: utf-8
+
+import asyncio
+import datetime
+import logging
+import os
+
+from enum import Enum
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from il2fb.ds.airbridge.missions.parsing import MissionKey
+from il2fb.ds.airbridge.missions.parsing import get_mission_key
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_VALIDATION_CONCURRENCY = 2
+
+MissionParseFunction = Callable[[Path, os.stat_result], Awaitable[Any]]
+
+
+class VALIDATION_STATUS(Enum):
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    VALID = 'valid'
+    INVALID = 'invalid'
+
+
+def get_item(obj: Any, *keys: str) -> Any:
+    for key in keys:
+        if isinstance(obj, dict):
+            obj = obj.get(key)
+        else:
+            obj = getattr(obj, key, None)
+
+        if obj is None:
+            break
+
+    return obj
+
+
+def extract_mission_metadata(mission: Any) -> dict:
+    """
+    Extract brief description of parsed mission: its map, date, weather and
+    counts of objects of each kind.
+
+    """
+    objects = get_item(mission, 'objects') or {}
+
+    if isinstance(objects, dict):
+        objects_counts = {
+            key: len(value)
+            for key, value in objects.items()
+            if isinstance(value, (list, tuple))
+        }
+    else:
+        objects_counts = {}
+
+    return {
+        'map': get_item(mission, 'location_loader'),
+        'date': get_item(mission, 'conditions', 'time_info', 'date'),
+        'time': get_item(mission, 'conditions', 'time_info', 'time'),
+        'weather': get_item(mission, 'conditions', 'meteorology', 'weather'),
+        'objects_counts': objects_counts,
+    }
+
+
+class MissionValidationResult:
+    __slots__ = [
+        'status', 'key', 'error', 'metadata',
+        'queued_at', 'processed_at',
+    ]
+
+    def __init__(self, key: Optional[MissionKey]=None):
+        self.status = VALIDATION_STATUS.PENDING
+        self.key = key
+        self.error = None
+        self.metadata = None
+        self.queued_at = datetime.datetime.utcnow()
+        self.processed_at = None
+
+    def to_primitive(self) -> dict:
+        return {
+            'status': self.status.value,
+            'error': self.error,
+            'metadata': self.metadata,
+            'queued_at': self.queued_at,
+            'processed_at': self.processed_at,
+        }
+
+
+class MissionsValidator:
+    """
+    Background pipeline which validates uploaded missions.
+
+    Missions are put into a queue and are processed by ``concurrency``
+    consumers. Each mission is parsed by parse function (normally by cache
+    of parsed missions which delegates parsing to a pool of processes).
+    Mission is valid if it was parsed successfully. Results of validation
+    along with metadata of missions are kept in memory until files of
+    missions change.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        storage: MissionsStorage,
+        parse: MissionParseFunction,
+        concurrency: int=DEFAULT_VALIDATION_CONCURRENCY,
+    ):
+        self._loop = loop
+        self._storage = storage
+        self._parse = parse
+        self._concurrency = concurrency
+
+        self._queue = asyncio.Queue(loop=loop)
+        self._results = {}
+        self._consumers = []
+
+    def start(self) -> None:
+        self._consumers = [
+            self._loop.create_task(self._consume())
+            for _ in range(self._concurrency)
+        ]
+
+    def stop(self) -> None:
+        for consumer in self._consumers:
+            consumer.cancel()
+
+        self._consumers = []
+
+    def submit(self, paths: Iterable[Path]) -> None:
+        """
+        Queue missions for validation without waiting for results.
+
+        """
+        for path in paths:
+            result = self._results.get(path)
+            if result is None or result.status != VALIDATION_STATUS.PENDING:
+                self._enqueue(path, MissionValidationResult())
+
+    async def get_result(
+        self,
+        path: Path,
+    ) -> Awaitable[Optional[MissionValidationResult]]:
+        """
+        Get result of validation of mission or ``None`` if mission does not
+        exist. Mission is queued for validation if it was not validated yet
+        or if it has changed since last validation.
+
+        """
+        stat = await self._storage.stat(path)
+
+        if stat is None:
+            self._results.pop(path, None)
+            return
+
+        key = get_mission_key(path, stat)
+
+        result = self._results.get(path)
+        if result is not None and result.key in {key, None}:
+            # key is unknown for missions which were just submitted
+            return result
+
+        return self._enqueue(path, MissionValidationResult(key))
+
+    def discard(self, path: Path) -> None:
+        self._results.pop(path, None)
+
+    def _enqueue(
+        self,
+        path: Path,
+        result: MissionValidationResult,
+    ) -> MissionValidationResult:
+
+        self._results[path] = result
+        self._queue.put_nowait((path, result))
+
+        return result
+
+    async def _consume(self) -> Awaitable[None]:
+        while True:
+            path, result = await self._queue.get()
+
+            if self._results.get(path) is not result:
+                # mission was queued again or was deleted while it was queued
+                continue
+
+            try:
+                stat = await self._storage.stat(path)
+
+                if stat is None:
+                    self._results.pop(path, None)
+                    continue
+
+                result.key = get_mission_key(path, stat)
+                await self._validate(path, stat, result)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                LOG.exception(f"failed to validate mission `{path}`")
+
+    async def _validate(
+        self,
+        path: Path,
+        stat: os.stat_result,
+        result: MissionValidationResult,
+    ) -> Awaitable[None]:
+
+        result.status = VALIDATION_STATUS.PROCESSING
+
+        try:
+            mission = await self._parse(path, stat)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOG.warning(f"mission `{path}` is invalid: {e}")
+            result.status = VALIDATION_STATUS.INVALID
+            result.error = str(e) or e.__class__.__name__
+        else:
+            result.status = VALIDATION_STATUS.VALID
+            result.metadata = extract_mission_metadata(mission)
+        finally:
+            result.processed_at = datetime.datetime.utcnow()
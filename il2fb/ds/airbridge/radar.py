@@ -1,19 +1,46 @@
 # coding: utf-8
 
+import asyncio
+import functools
+import itertools
 import logging
 import time
 
-from typing import Awaitable, List
+from enum import Enum
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
 
 from il2fb.commons.structures import BaseStructure
 
 from il2fb.ds.middleware.device_link.client import DeviceLinkClient
+from il2fb.ds.middleware.device_link.constants import MESSAGE_GROUP_MAX_SIZE
+from il2fb.ds.middleware.device_link import requests
 from il2fb.ds.middleware.device_link import structures
 
+from il2fb.ds.airbridge.rtt import RTTEstimator
+
 
 LOG = logging.getLogger(__name__)
 
 
+DEFAULT_CHUNKS_CONCURRENCY = 4
+DEFAULT_RETRIES = 2
+DEFAULT_DRAIN_PERIOD = 1
+
+
+class ACTORS_CATEGORY(Enum):
+    AIRCRAFTS = 'aircrafts'
+    GROUND_UNITS = 'ground_units'
+    SHIPS = 'ships'
+    STATIONARY = 'stationary'
+
+
+MOVING_ACTORS_CATEGORIES = frozenset({
+    ACTORS_CATEGORY.AIRCRAFTS,
+    ACTORS_CATEGORY.GROUND_UNITS,
+    ACTORS_CATEGORY.SHIPS,
+})
+
+
 class CompoundActorsPositions(BaseStructure):
 
     @property
@@ -22,13 +49,17 @@ class CompoundActorsPositions(BaseStructure):
 
 
 class AllMovingActorsPositions(CompoundActorsPositions):
+    """
+    Fields of categories which were not requested are set to ``None``.
+
+    """
     __slots__ = ['aircrafts', 'ground_units', 'ships', ]
 
     def __init__(
         self,
-        aircrafts: List[structures.MovingAircraftPosition],
-        ground_units: List[structures.MovingGroundUnitPosition],
-        ships: List[structures.ShipPosition],
+        aircrafts: Optional[List[structures.MovingAircraftPosition]],
+        ground_units: Optional[List[structures.MovingGroundUnitPosition]],
+        ships: Optional[List[structures.ShipPosition]],
     ):
         self.aircrafts = aircrafts
         self.ground_units = ground_units
@@ -49,10 +80,357 @@ class AllStationaryActorsPositions(CompoundActorsPositions):
         self.ships = ships
 
 
+class ActorsPositions(CompoundActorsPositions):
+    """
+    Positions of moving actors along with positions of stationary ones.
+    Fields of categories which were not requested are set to ``None``.
+
+    """
+    __slots__ = ['aircrafts', 'ground_units', 'ships', 'stationary', ]
+
+    def __init__(
+        self,
+        moving: AllMovingActorsPositions,
+        stationary: Optional[AllStationaryActorsPositions],
+    ):
+        self.aircrafts = moving.aircrafts
+        self.ground_units = moving.ground_units
+        self.ships = moving.ships
+        self.stationary = stationary
+
+    @property
+    def is_empty(self):
+        return (
+            not (self.aircrafts or self.ground_units or self.ships) and
+            (self.stationary is None or self.stationary.is_empty)
+        )
+
+
+class _TimedRequestMixin:
+    """
+    Measures execution time of request and keeps Device Link client busy for
+    ``drain_period`` after request has timed out.
+
+    Responses of Device Link do not carry IDs of requests, so client passes
+    every incoming datagram to request which is executed currently. Datagrams
+    which arrive late for a timed out request are discarded by that request
+    instead of being taken as responses to next requests.
+
+    """
+    execution_time = None
+    drain_period = None
+    on_late_datagram = None
+
+    async def execute(self, writer: Callable[[bytes], None]) -> Awaitable[None]:
+        start_time = time.monotonic()
+        try:
+            await super().execute(writer)
+        finally:
+            self.execution_time = time.monotonic() - start_time
+
+        if self.drain_period and self._has_timed_out():
+            await asyncio.sleep(self.drain_period, loop=self._loop)
+
+    def _has_timed_out(self) -> bool:
+        future = self.result()
+        return (
+            future.done()
+            and not future.cancelled()
+            and isinstance(
+                future.exception(),
+                (TimeoutError, asyncio.TimeoutError),
+            )
+        )
+
+    def data_received(self, data: bytes) -> None:
+        if self.result().done():
+            LOG.debug(
+                f"radar: discard late datagram of {self.__class__.__name__}"
+            )
+            if self.on_late_datagram:
+                self.on_late_datagram()
+            return
+
+        super().data_received(data)
+
+
+@functools.lru_cache()
+def _make_timed_request_class(request_class: type) -> type:
+    return type(request_class.__name__, (_TimedRequestMixin, request_class), {})
+
+
 class Radar:
+    """
+    Provides positions of actors from Device Link.
+
+    If ``chunk_size`` is set, lists of actors are retrieved by chunks of
+    indices. Up to ``chunks_concurrency`` chunks are kept scheduled at once.
+
+    Lost requests are retried up to ``retries`` times. Time of a single
+    attempt is limited by adaptive timeout if ``rtt_estimator`` is given, by
+    ``attempt_timeout`` if it is set or by the rest of total timeout otherwise.
+
+    Responses of Device Link do not carry IDs of requests, so a request is
+    retried only after it has timed out, and Device Link client is kept busy
+    for ``drain_period`` after that to discard late responses of the lost
+    attempt before next request is sent.
 
-    def __init__(self, device_link_client: DeviceLinkClient):
+    """
+
+    def __init__(
+        self,
+        device_link_client: DeviceLinkClient,
+        chunk_size: Optional[int]=None,
+        chunks_concurrency: int=DEFAULT_CHUNKS_CONCURRENCY,
+        retries: int=DEFAULT_RETRIES,
+        attempt_timeout: Optional[float]=None,
+        rtt_estimator: Optional[RTTEstimator]=None,
+        drain_period: float=DEFAULT_DRAIN_PERIOD,
+        loop: asyncio.AbstractEventLoop=None,
+    ):
         self._client = device_link_client
+        self._loop = loop
+
+        self._chunk_size = chunk_size
+        self._chunks_concurrency = chunks_concurrency
+
+        self._retries = retries
+        self._attempt_timeout = attempt_timeout
+        self._rtt_estimator = rtt_estimator
+        self._drain_period = drain_period
+
+        self._is_reliable = bool(chunk_size or attempt_timeout or rtt_estimator)
+
+        self._retries_count = 0
+        self._retried_chunks_count = 0
+        self._late_datagrams_count = 0
+
+        self._get_all_moving_aircrafts_positions = functools.partial(
+            self._get_all_positions,
+            getter=self._client.get_all_moving_aircrafts_positions,
+            count_request_class=requests.GetMovingAircraftsCountRequest,
+            request_class=requests.GetMovingAircraftsPositionsRequest,
+        )
+        self._get_all_moving_ground_units_positions = functools.partial(
+            self._get_all_positions,
+            getter=self._client.get_all_moving_ground_units_positions,
+            count_request_class=requests.GetMovingGroundUnitsCountRequest,
+            request_class=requests.GetMovingGroundUnitsPositionsRequest,
+        )
+        self._get_all_ships_positions = functools.partial(
+            self._get_all_positions,
+            getter=self._client.get_all_ships_positions,
+            count_request_class=requests.GetShipsCountRequest,
+            request_class=requests.GetShipsPositionsRequest,
+        )
+        self._get_all_stationary_objects_positions = functools.partial(
+            self._get_all_positions,
+            getter=self._client.get_all_stationary_objects_positions,
+            count_request_class=requests.GetStationaryObjectsCountRequest,
+            request_class=requests.GetStationaryObjectsPositionsRequest,
+        )
+        self._get_all_houses_positions = functools.partial(
+            self._get_all_positions,
+            getter=self._client.get_all_houses_positions,
+            count_request_class=requests.GetHousesCountRequest,
+            request_class=requests.GetHousesPositionsRequest,
+        )
+
+    @property
+    def retries_count(self) -> int:
+        """
+        Total number of retries of lost requests.
+
+        """
+        return self._retries_count
+
+    @property
+    def late_datagrams_count(self) -> int:
+        """
+        Total number of datagrams which arrived after their requests had
+        timed out and were discarded.
+
+        """
+        return self._late_datagrams_count
+
+    @property
+    def retried_chunks_count(self) -> int:
+        """
+        Total number of chunks which needed at least one retry.
+
+        """
+        return self._retried_chunks_count
+
+    @property
+    def rtt_estimator(self) -> Optional[RTTEstimator]:
+        return self._rtt_estimator
+
+    def get_stats(self) -> dict:
+        stats = {
+            'retries_count': self._retries_count,
+            'retried_chunks_count': self._retried_chunks_count,
+            'late_datagrams_count': self._late_datagrams_count,
+        }
+
+        if self._rtt_estimator is not None:
+            stats['rtt'] = {
+                'srtt': self._rtt_estimator.srtt,
+                'rttvar': self._rtt_estimator.rttvar,
+                'timeout': self._rtt_estimator.timeout,
+            }
+
+        return stats
+
+    async def _get_all_positions(
+        self,
+        timeout: float=None,
+        *,
+        getter: Callable[..., Awaitable[List[Any]]],
+        count_request_class: type,
+        request_class: type,
+    ) -> Awaitable[List[Any]]:
+
+        if not self._is_reliable:
+            return (await getter(timeout=timeout))
+
+        start_time = time.monotonic()
+        deadline = None if timeout is None else start_time + timeout
+
+        count, _ = await self._execute(count_request_class, deadline)
+        if not count:
+            return []
+
+        chunk_size = self._chunk_size or count
+        chunks = [
+            range(start, min(start + chunk_size, count))
+            for start in range(0, count, chunk_size)
+        ]
+        semaphore = asyncio.Semaphore(
+            self._chunks_concurrency,
+            loop=self._loop,
+        )
+        tasks = [
+            asyncio.ensure_future(
+                self._get_chunk(request_class, indices, semaphore, deadline),
+                loop=self._loop,
+            )
+            for indices in chunks
+        ]
+
+        try:
+            results = await asyncio.gather(*tasks, loop=self._loop)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        LOG.debug(
+            f"radar: got {count} positions by {len(chunks)} chunks "
+            f"in {time.monotonic() - start_time:.6f} s"
+        )
+        return list(itertools.chain.from_iterable(results))
+
+    async def _get_chunk(
+        self,
+        request_class: type,
+        indices: range,
+        semaphore: asyncio.Semaphore,
+        deadline: Optional[float]=None,
+    ) -> Awaitable[List[Any]]:
+
+        with (await semaphore):
+            result, retries = await self._execute(
+                request_class,
+                deadline,
+                indices=indices,
+            )
+
+        if retries:
+            self._retried_chunks_count += 1
+
+        return result
+
+    async def _execute(
+        self,
+        request_class: type,
+        deadline: Optional[float]=None,
+        **kwargs
+    ) -> Awaitable[Tuple[Any, int]]:
+        """
+        Execute request with retries.
+
+        Returns result of request along with number of retries it took.
+
+        """
+        request_class = _make_timed_request_class(request_class)
+
+        indices = kwargs.get('indices')
+        exchanges_count = (
+            (len(indices) if indices is not None else 1) //
+            MESSAGE_GROUP_MAX_SIZE
+        ) + 1
+
+        retries = 0
+
+        while True:
+            r = request_class(
+                timeout=self._get_attempt_timeout(
+                    exchanges_count=exchanges_count,
+                    deadline=deadline,
+                ),
+                loop=self._loop,
+                **kwargs
+            )
+            r.drain_period = self._drain_period
+            r.on_late_datagram = self._ack_late_datagram
+            self._client.schedule_request(r)
+
+            try:
+                result = await r.result()
+            except (TimeoutError, asyncio.TimeoutError):
+                if self._rtt_estimator:
+                    self._rtt_estimator.ack_timeout()
+
+                if retries == self._retries:
+                    raise
+
+                retries += 1
+                self._retries_count += 1
+
+                LOG.warning(
+                    f"radar: {request_class.__name__} was lost, retry "
+                    f"(attempt={retries})"
+                )
+            else:
+                if self._rtt_estimator and not retries and r.execution_time:
+                    self._rtt_estimator.ack_sample(
+                        r.execution_time / exchanges_count,
+                    )
+
+                return result, retries
+
+    def _ack_late_datagram(self) -> None:
+        self._late_datagrams_count += 1
+
+    def _get_attempt_timeout(
+        self,
+        exchanges_count: int,
+        deadline: Optional[float]=None,
+    ) -> Optional[float]:
+
+        if self._rtt_estimator:
+            timeout = self._rtt_estimator.timeout * exchanges_count
+        else:
+            timeout = self._attempt_timeout
+
+        if deadline is None:
+            return timeout
+
+        rest = deadline - time.monotonic()
+        if rest <= 0:
+            raise TimeoutError
+
+        return min(rest, timeout) if timeout else rest
 
     async def get_moving_ships_positions(
         self,
@@ -67,7 +445,7 @@ class Radar:
         timeout: float=None,
     ) -> Awaitable[List[structures.ShipPosition]]:
 
-        ships = await self._client.get_all_ships_positions(timeout)
+        ships = await self._get_all_ships_positions(timeout)
         return [ship for ship in ships if not ship.is_stationary]
 
     async def get_stationary_ships_positions(
@@ -83,7 +461,7 @@ class Radar:
         timeout: float=None,
     ) -> Awaitable[List[structures.ShipPosition]]:
 
-        ships = await self._client.get_all_ships_positions(timeout)
+        ships = await self._get_all_ships_positions(timeout)
         return [ship for ship in ships if ship.is_stationary]
 
     async def get_all_ships_positions(
@@ -92,7 +470,7 @@ class Radar:
     ) -> Awaitable[List[structures.ShipPosition]]:
 
         await self._client.refresh_radar()
-        return (await self._client.get_all_ships_positions(timeout))
+        return (await self._get_all_ships_positions(timeout))
 
     async def get_moving_aircrafts_positions(
         self,
@@ -100,7 +478,7 @@ class Radar:
     ) -> Awaitable[List[structures.MovingAircraftPosition]]:
 
         await self._client.refresh_radar()
-        return (await self._client.get_all_moving_aircrafts_positions(timeout))
+        return (await self._get_all_moving_aircrafts_positions(timeout))
 
     async def get_moving_ground_units_positions(
         self,
@@ -108,7 +486,7 @@ class Radar:
     ) -> Awaitable[List[structures.MovingGroundUnitPosition]]:
 
         await self._client.refresh_radar()
-        return (await self._client.get_all_moving_ground_units_positions(
+        return (await self._get_all_moving_ground_units_positions(
             timeout=timeout,
         ))
 
@@ -117,40 +495,61 @@ class Radar:
         timeout: float=None,
     ) -> Awaitable[AllMovingActorsPositions]:
 
-        await self._client.refresh_radar()
+        return (await self.get_moving_actors_positions(
+            categories=MOVING_ACTORS_CATEGORIES,
+            timeout=timeout,
+        ))
 
-        if timeout is None:
-            aircrafts = await self._client.get_all_moving_aircrafts_positions()
-            ground_units = await self._client.get_all_moving_ground_units_positions()
-            ships = await self._get_moving_ships_positions()
-        else:
-            start_time = time.monotonic()
-            aircrafts = await self._client.get_all_moving_aircrafts_positions(
-                timeout=timeout,
+    async def get_moving_actors_positions(
+        self,
+        categories: Iterable[ACTORS_CATEGORY],
+        timeout: float=None,
+    ) -> Awaitable[AllMovingActorsPositions]:
+        """
+        Get positions of moving actors of requested categories only.
+
+        """
+        categories = set(categories)
+        getters = [
+            (category, getter)
+            for category, getter in (
+                (
+                    ACTORS_CATEGORY.AIRCRAFTS,
+                    self._get_all_moving_aircrafts_positions,
+                ),
+                (
+                    ACTORS_CATEGORY.GROUND_UNITS,
+                    self._get_all_moving_ground_units_positions,
+                ),
+                (
+                    ACTORS_CATEGORY.SHIPS,
+                    self._get_moving_ships_positions,
+                ),
             )
+            if category in categories
+        ]
+        results = dict.fromkeys(MOVING_ACTORS_CATEGORIES)
 
-            end_time = time.monotonic()
-            timeout -= (end_time - start_time)
-            start_time = end_time
-            if timeout <= 0:
-                raise TimeoutError
+        await self._client.refresh_radar()
 
-            ground_units = await self._client.get_all_moving_ground_units_positions(
-                timeout=timeout,
-            )
+        start_time = time.monotonic()
 
-            end_time = time.monotonic()
-            timeout -= (end_time - start_time)
-            start_time = end_time
-            if timeout <= 0:
-                raise TimeoutError
+        for category, getter in getters:
+            if timeout is None:
+                results[category] = await getter()
+            else:
+                end_time = time.monotonic()
+                timeout -= (end_time - start_time)
+                start_time = end_time
+                if timeout <= 0:
+                    raise TimeoutError
 
-            ships = await self._get_moving_ships_positions(timeout)
+                results[category] = await getter(timeout=timeout)
 
         return AllMovingActorsPositions(
-            aircrafts=aircrafts,
-            ground_units=ground_units,
-            ships=ships,
+            aircrafts=results[ACTORS_CATEGORY.AIRCRAFTS],
+            ground_units=results[ACTORS_CATEGORY.GROUND_UNITS],
+            ships=results[ACTORS_CATEGORY.SHIPS],
         )
 
     async def get_stationary_objects_positions(
@@ -159,7 +558,7 @@ class Radar:
     ) -> Awaitable[List[structures.StationaryObjectPosition]]:
 
         await self._client.refresh_radar()
-        return (await self._client.get_all_stationary_objects_positions(
+        return (await self._get_all_stationary_objects_positions(
             timeout=timeout,
         ))
 
@@ -169,7 +568,7 @@ class Radar:
     ) -> Awaitable[List[structures.HousePosition]]:
 
         await self._client.refresh_radar()
-        return (await self._client.get_all_houses_positions(timeout))
+        return (await self._get_all_houses_positions(timeout))
 
     async def get_all_stationary_actors_positions(
         self,
@@ -179,12 +578,12 @@ class Radar:
         await self._client.refresh_radar()
 
         if timeout is None:
-            stationary_objects = await self._client.get_all_stationary_objects_positions()
-            houses = await self._client.get_all_houses_positions()
+            stationary_objects = await self._get_all_stationary_objects_positions()
+            houses = await self._get_all_houses_positions()
             ships = await self._get_stationary_ships_positions()
         else:
             start_time = time.monotonic()
-            stationary_objects = await self._client.get_all_stationary_objects_positions(
+            stationary_objects = await self._get_all_stationary_objects_positions(
                 timeout=timeout,
             )
 
@@ -194,7 +593,7 @@ class Radar:
             if timeout <= 0:
                 raise TimeoutError
 
-            houses = await self._client.get_all_houses_positions(timeout)
+            houses = await self._get_all_houses_positions(timeout)
 
             end_time = time.monotonic()
             timeout -= (end_time - start_time)
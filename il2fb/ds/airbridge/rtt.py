@@ -0,0 +1,77 @@
+# coding: utf-8
+
+import logging
+
+from typing import Optional
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_INITIAL_TIMEOUT = 3
+DEFAULT_MIN_TIMEOUT = 1
+DEFAULT_MAX_TIMEOUT = 10
+
+
+class RTTEstimator:
+    """
+    Estimates round-trip time of a single exchange with remote side and
+    derives retransmission timeout from it just like TCP does (RFC 6298).
+
+    Samples of retransmitted exchanges must not be acknowledged (Karn's
+    algorithm). Each timeout doubles current timeout until next sample
+    arrives.
+
+    Defaults are conservative as recommended by RFC 6298: timeout is never
+    lower than 1 second.
+
+    """
+    alpha = 1 / 8
+    beta = 1 / 4
+    k = 4
+
+    def __init__(
+        self,
+        initial_timeout: float=DEFAULT_INITIAL_TIMEOUT,
+        min_timeout: float=DEFAULT_MIN_TIMEOUT,
+        max_timeout: float=DEFAULT_MAX_TIMEOUT,
+    ):
+        self._initial_timeout = initial_timeout
+        self._min_timeout = min_timeout
+        self._max_timeout = max_timeout
+
+        self._srtt = None
+        self._rttvar = None
+        self._backoff = 1
+
+    @property
+    def srtt(self) -> Optional[float]:
+        return self._srtt
+
+    @property
+    def rttvar(self) -> Optional[float]:
+        return self._rttvar
+
+    @property
+    def timeout(self) -> float:
+        if self._srtt is None:
+            timeout = self._initial_timeout
+        else:
+            timeout = self._srtt + self.k * self._rttvar
+
+        timeout = max(self._min_timeout, timeout) * self._backoff
+        return min(self._max_timeout, timeout)
+
+    def ack_sample(self, rtt: float) -> None:
+        if self._srtt is None:
+            self._srtt = rtt
+            self._rttvar = rtt / 2
+        else:
+            self._rttvar += self.beta * (abs(self._srtt - rtt) - self._rttvar)
+            self._srtt += self.alpha * (rtt - self._srtt)
+
+        self._backoff = 1
+
+    def ack_timeout(self) -> None:
+        if self.timeout < self._max_timeout:
+            self._backoff *= 2
@@ -0,0 +1,230 @@
+# coding: utf-8
+"""
+Scheduling of CPU-heavy serialization of payloads.
+
+Small payloads are encoded right in the event loop, as handing them over to
+workers costs more than their encoding. Large payloads (e.g., snapshots of
+radar with thousands of actors or parsed missions) are encoded by a pool of
+workers, so a single large response does not stall other requests and
+streams.
+
+"""
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import time
+
+from typing import Any, Awaitable, Callable, Optional
+
+from il2fb.ds.airbridge import codecs
+
+
+LOG = logging.getLogger(__name__)
+
+
+DEFAULT_OFFLOADING_MIN_SIZE = 2000
+DEFAULT_MAX_WORKERS = 2
+
+EXECUTOR_TYPE_THREAD = 'thread'
+EXECUTOR_TYPE_PROCESS = 'process'
+
+_SEQUENCE_TYPES = (list, tuple, set, frozenset, )
+
+
+def estimate_size(obj: Any, max_depth: int=3) -> int:
+    """
+    Estimate number of values which object consists of.
+
+    Estimation is cheap: items of sequences are assumed to have same size as
+    their first item has, and objects are inspected not deeper than
+    ``max_depth`` levels.
+
+    """
+    if max_depth <= 0:
+        return 1
+
+    if isinstance(obj, (str, bytes)):
+        return 1
+
+    if isinstance(obj, _SEQUENCE_TYPES):
+        if not obj:
+            return 1
+
+        first = next(iter(obj))
+        return len(obj) * estimate_size(first, max_depth - 1)
+
+    if isinstance(obj, dict):
+        return 1 + sum(
+            estimate_size(value, max_depth - 1)
+            for value in obj.values()
+        )
+
+    slots = getattr(type(obj), '__slots__', None)
+    if slots:
+        return 1 + sum(
+            estimate_size(getattr(obj, name, None), max_depth - 1)
+            for name in slots
+        )
+
+    return 1
+
+
+def _encode(
+    codec_name: str,
+    obj: Any,
+    indent: Optional[int],
+    compact_types: bool,
+) -> bytes:
+    # codecs are looked up by names to avoid pickling of them for workers
+    # which are separate processes
+    codec = codecs.get_codec(codec_name)
+    return codec.encode(obj, indent=indent, compact_types=compact_types)
+
+
+class _PathStats:
+    __slots__ = ['count', 'total_time', 'max_time', 'loop_time', ]
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.loop_time = 0.0
+
+    def add(self, duration: float, loop_time: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.loop_time += loop_time
+
+    def to_primitive(self) -> dict:
+        return {
+            'count': self.count,
+            'total_time': self.total_time,
+            'max_time': self.max_time,
+            'mean_time': (self.total_time / self.count) if self.count else 0,
+            'loop_time': self.loop_time,
+        }
+
+
+class SerializationScheduler:
+    """
+    Runs serialization either inline or in a pool of workers depending on
+    estimated size of payloads.
+
+    Workers are threads by default. Threads do not run in parallel with event
+    loop because of GIL, but interpreter switches between them frequently, so
+    event loop is never blocked for long. Processes run in parallel, but
+    payloads and results have to be pickled and transferred between processes.
+
+    Counts and durations of serializations are collected separately for
+    inline and offloaded ones. Time spent by event loop is tracked for both
+    of them: it equals to duration of serialization for inline ones and to
+    time of submission for offloaded ones.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        min_size: int=DEFAULT_OFFLOADING_MIN_SIZE,
+        max_workers: int=DEFAULT_MAX_WORKERS,
+        executor_type: str=EXECUTOR_TYPE_THREAD,
+    ):
+        self._loop = loop
+        self._min_size = min_size
+
+        if executor_type == EXECUTOR_TYPE_PROCESS:
+            executor_class = concurrent.futures.ProcessPoolExecutor
+        elif executor_type == EXECUTOR_TYPE_THREAD:
+            executor_class = concurrent.futures.ThreadPoolExecutor
+        else:
+            raise ValueError(f"unknown type of executor '{executor_type}'")
+
+        self._executor_type = executor_type
+        self._executor = executor_class(max_workers=max_workers)
+
+        self._inline_stats = _PathStats()
+        self._offloaded_stats = _PathStats()
+
+    def should_offload(
+        self,
+        obj: Any,
+        size_hint: Optional[int]=None,
+    ) -> bool:
+        if size_hint is None:
+            size_hint = estimate_size(obj)
+
+        return size_hint >= self._min_size
+
+    async def encode(
+        self,
+        obj: Any,
+        codec: Optional[codecs.Codec]=None,
+        indent: Optional[int]=None,
+        compact_types: bool=False,
+        size_hint: Optional[int]=None,
+    ) -> Awaitable[bytes]:
+        """
+        Encode object by codec. ``size_hint`` is an estimated number of values
+        object consists of. It's estimated by ``estimate_size`` if not given.
+
+        """
+        codec = codec or codecs.DEFAULT_CODEC
+        func = functools.partial(
+            _encode, codec.name, obj, indent, compact_types,
+        )
+
+        if self.should_offload(obj, size_hint):
+            return (await self._run_offloaded(func))
+
+        return self._run_inline(func)
+
+    async def call(
+        self,
+        func: Callable[[], Any],
+        size_hint: int,
+    ) -> Awaitable[Any]:
+        """
+        Call arbitrary serializing function, e.g. constructor of an
+        ``EncodedPayload``. Function and its result must be picklable if
+        workers are processes.
+
+        """
+        if size_hint >= self._min_size:
+            return (await self._run_offloaded(func))
+
+        return self._run_inline(func)
+
+    def _run_inline(self, func: Callable[[], Any]) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return func()
+        finally:
+            duration = time.perf_counter() - started_at
+            self._inline_stats.add(duration, loop_time=duration)
+
+    async def _run_offloaded(
+        self,
+        func: Callable[[], Any],
+    ) -> Awaitable[Any]:
+        started_at = time.perf_counter()
+        future = self._loop.run_in_executor(self._executor, func)
+        loop_time = time.perf_counter() - started_at
+
+        try:
+            return (await future)
+        finally:
+            duration = time.perf_counter() - started_at
+            self._offloaded_stats.add(duration, loop_time=loop_time)
+
+    def get_stats(self) -> dict:
+        return {
+            'executor_type': self._executor_type,
+            'min_size': self._min_size,
+            'inline': self._inline_stats.to_primitive(),
+            'offloaded': self._offloaded_stats.to_primitive(),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
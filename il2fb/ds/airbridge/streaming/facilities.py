@@ -2,13 +2,14 @@
 
 import abc
 import asyncio
-import functools
+import datetime
+import heapq
+import itertools
 import logging
-import math
-import time
+import random
 
 from concurrent.futures import CancelledError
-from typing import Awaitable, Optional
+from typing import Awaitable, FrozenSet, Iterable, List, Optional, Tuple, Union
 
 import janus
 
@@ -21,14 +22,42 @@ from il2fb.parsers.game_log import events as game_log_events
 
 from il2fb.ds.airbridge.dedicated_server.game_log import GameLogWorker
 from il2fb.ds.airbridge.dedicated_server.game_log import NotParsedGameLogString
+from il2fb.ds.airbridge.caching import StationaryActorsCache
+from il2fb.ds.airbridge.missions.index import FILE_CHANGE_CREATED
+from il2fb.ds.airbridge.missions.index import FILE_CHANGE_DELETED
+from il2fb.ds.airbridge.missions.index import FILE_CHANGE_MODIFIED
+from il2fb.ds.airbridge.missions.index import FileChange
+from il2fb.ds.airbridge.missions.index import MissionsIndex
+from il2fb.ds.airbridge.missions.rotation import MissionsRotator
+from il2fb.ds.airbridge.radar import ACTORS_CATEGORY
+from il2fb.ds.airbridge.radar import ActorsPositions
+from il2fb.ds.airbridge.radar import AllMovingActorsPositions
+from il2fb.ds.airbridge.radar import AllStationaryActorsPositions
+from il2fb.ds.airbridge.radar import MOVING_ACTORS_CATEGORIES
 from il2fb.ds.airbridge.radar import Radar
+from il2fb.ds.airbridge.structures import MissionFileChange
+from il2fb.ds.airbridge.structures import PeriodicTimestampedData
 from il2fb.ds.airbridge.structures import TimestampedData
 from il2fb.ds.airbridge.streaming.subscribers.base import StreamingSubscriber
+from il2fb.ds.airbridge.streaming.throttling import AdaptiveRefreshController
 
 
 LOG = logging.getLogger(__name__)
 
 
+DEFAULT_RADAR_COALESCING_TOLERANCE = 0.1
+DEFAULT_RADAR_JITTER = 0.05
+DEFAULT_MISSIONS_COALESCING_DELAY = 0.5
+
+# results of merging of a pending change of a file with a subsequent one,
+# ``None`` means that changes cancel each other
+_MISSION_FILE_CHANGES_MERGES = {
+    (FILE_CHANGE_CREATED, FILE_CHANGE_MODIFIED): FILE_CHANGE_CREATED,
+    (FILE_CHANGE_CREATED, FILE_CHANGE_DELETED): None,
+    (FILE_CHANGE_DELETED, FILE_CHANGE_CREATED): FILE_CHANGE_MODIFIED,
+}
+
+
 class StreamingFacility(metaclass=abc.ABCMeta):
 
     def __init__(self, loop: asyncio.AbstractEventLoop, name: str):
@@ -36,6 +65,10 @@ class StreamingFacility(metaclass=abc.ABCMeta):
         self._name = name
         self._main_task = None
 
+    @property
+    def name(self) -> str:
+        return self._name
+
     @abc.abstractmethod
     async def subscribe(self, subscriber: StreamingSubscriber, **kwargs) -> Awaitable[None]:
         pass
@@ -171,10 +204,12 @@ class EventsStreamingFacility(QueueStreamingFacility):
         loop: asyncio.AbstractEventLoop,
         console_client: ConsoleClient,
         game_log_worker: GameLogWorker,
+        missions_rotator: Optional[MissionsRotator]=None,
         name: str="events",
     ):
         self._console_client = console_client
         self._game_log_worker = game_log_worker
+        self._missions_rotator = missions_rotator
 
         queue = janus.Queue(loop=loop)
         self._queue_thread_safe = queue.sync_q
@@ -188,8 +223,16 @@ class EventsStreamingFacility(QueueStreamingFacility):
         self._console_client.subscribe_to_human_connection_events(
             subscriber=self._consume_human_connection_event,
         )
+        if self._missions_rotator:
+            self._missions_rotator.subscribe_to_events(
+                subscriber=self._consume_event,
+            )
 
     async def _after_last_subscriber(self) -> Awaitable[None]:
+        if self._missions_rotator:
+            self._missions_rotator.unsubscribe_from_events(
+                subscriber=self._consume_event,
+            )
         self._console_client.unsubscribe_from_human_connection_events(
             subscriber=self._consume_human_connection_event,
         )
@@ -197,6 +240,10 @@ class EventsStreamingFacility(QueueStreamingFacility):
             subscriber=self._consume_game_log_event,
         )
 
+    def _consume_event(self, event: Event) -> None:
+        item = TimestampedData(event)
+        self._queue.put_nowait(item)
+
     def _consume_human_connection_event(self, event: Event) -> None:
         item = TimestampedData(event)
         self._queue.put_nowait(item)
@@ -243,171 +290,347 @@ class NotParsedStringsStreamingFacility(QueueStreamingFacility):
         self._queue.put_nowait(item)
 
 
+class MissionsStreamingFacility(QueueStreamingFacility):
+    """
+    Streams changes of files of missions: their creation, modification and
+    deletion. Changes are detected by index of missions, so they include
+    changes made via API as well as external ones.
+
+    Changes are held for ``coalescing_delay`` seconds after the first of
+    them, so bursts of writes to same file result in a single change.
+    Changes which cancel each other (e.g., creation and deletion of a
+    temporary file) are not streamed at all.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        missions_index: MissionsIndex,
+        coalescing_delay: float=DEFAULT_MISSIONS_COALESCING_DELAY,
+        name: str="missions",
+    ):
+        self._missions_index = missions_index
+        self._coalescing_delay = coalescing_delay
+
+        self._pending_changes = {}
+        self._flush_handle = None
+
+        super().__init__(loop=loop, name=name)
+
+    async def _before_first_subscriber(self) -> Awaitable[None]:
+        self._missions_index.subscribe_to_changes(subscriber=self._consume)
+
+    async def _after_last_subscriber(self) -> Awaitable[None]:
+        self._missions_index.unsubscribe_from_changes(subscriber=self._consume)
+
+    def _consume(self, changes: List[FileChange]) -> None:
+        for change, path, f in changes:
+            pending = self._pending_changes.pop(path, None)
+
+            if pending is not None:
+                key = (pending[0], change)
+                change = _MISSION_FILE_CHANGES_MERGES.get(key, change)
+
+            if change is not None:
+                self._pending_changes[path] = (change, f)
+
+        if self._pending_changes and self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(
+                self._coalescing_delay, self._flush,
+            )
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+
+        changes, self._pending_changes = self._pending_changes, {}
+        timestamp = datetime.datetime.utcnow()
+
+        for path, (change, f) in changes.items():
+            item = MissionFileChange(
+                change=change,
+                path=path,
+                size=(f and f.size),
+                mtime=(f and datetime.datetime.utcfromtimestamp(f.mtime)),
+            )
+            self._queue.put_nowait(TimestampedData(item, timestamp))
+
+    def stop(self) -> None:
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        super().stop()
+
+
 class _PeriodicSubscribers(list):
 
-    def __init__(self, refresh_period: float, *args, **kwargs):
+    def __init__(
+        self,
+        refresh_period: float,
+        categories: FrozenSet[ACTORS_CATEGORY],
+        *args,
+        **kwargs
+    ):
         super().__init__(*args, **kwargs)
-        self._refresh_period = refresh_period
-        self._last_refresh_time = None
+        self.refresh_period = refresh_period
+        self.categories = categories
+        self.deadline = None
+        self._slot_time = None
 
-    def needs_refresh(self, when: float) -> bool:
-        return (
-            (self._last_refresh_time is None) or
-            (when - self._last_refresh_time) >= self._refresh_period
-        )
+    @property
+    def key(self):
+        return (self.refresh_period, self.categories)
 
-    def ack_refresh(self, when: float):
-        if self._last_refresh_time is None:
-            self._last_refresh_time = when
-        else:
-            elapsed_time = (when - self._last_refresh_time)
-            _, buzz = divmod(elapsed_time, self._refresh_period)
-            self._last_refresh_time = (when - buzz)
+    def schedule_first_refresh(self, when: float, jitter: float=0) -> None:
+        self._slot_time = when
+        self.deadline = when + jitter
+
+    def ack_refresh(
+        self,
+        when: float,
+        refresh_period: Optional[float]=None,
+        jitter: float=0,
+    ) -> None:
+        """
+        Move deadline to the next slot which is aligned with the previous one.
+        Slots which were missed (e.g., due to slow refresh) are skipped.
+        Jitter is not accumulated, as it is applied to slots only.
+
+        Effective ``refresh_period`` may differ from the requested one if
+        refreshes are throttled.
+
+        """
+        refresh_period = refresh_period or self.refresh_period
+        slot_time = self._slot_time + refresh_period
+
+        if slot_time <= when:
+            missed_count = (when - slot_time) // refresh_period + 1
+            slot_time += missed_count * refresh_period
+
+        self._slot_time = slot_time
+        self.deadline = slot_time + jitter
 
 
 class RadarStreamingFacility(StreamingFacility):
+    """
+    Refreshes radar on deadlines of subscriber groups.
+
+    Subscribers are grouped by their refresh periods and by categories of
+    actors they are interested in. Deadlines of groups are
+    kept in a heap, so arbitrary (float) periods are served without common
+    tick. Groups which have deadlines within coalescing tolerance are served
+    by a single refresh of radar. Only categories requested by those groups
+    are fetched and each group gets only its own categories.
+
+    If refresh controller is set, refresh periods are stretched when radar
+    becomes slow or server becomes overloaded. Effective refresh period is
+    reported to subscribers along with data.
+
+    """
 
     def __init__(
         self,
         loop: asyncio.AbstractEventLoop,
         radar: Radar,
         request_timeout: Optional[float]=None,
+        coalescing_tolerance: float=DEFAULT_RADAR_COALESCING_TOLERANCE,
+        jitter: float=DEFAULT_RADAR_JITTER,
+        refresh_controller: Optional[AdaptiveRefreshController]=None,
+        stationary_actors_cache: Optional[StationaryActorsCache]=None,
         name: str="radar",
     ):
         super().__init__(loop=loop, name=name)
 
         self._radar = radar
         self._request_timeout = request_timeout
+        self._coalescing_tolerance = coalescing_tolerance
+        self._jitter = jitter
+        self._refresh_controller = refresh_controller
+        self._stationary_actors_cache = stationary_actors_cache
 
         self._do_stop = False
 
-        self._resume_event = asyncio.Event(loop=loop)
-        self._resume_event.clear()
+        self._wakeup_event = asyncio.Event(loop=loop)
+        self._wakeup_event.clear()
 
-        self._tick_task = None
-        self._tick_period = None
-        self._tick_period_lock = asyncio.Lock(loop=loop)
+        self._deadlines = []
+        self._deadlines_counter = itertools.count()
 
         self._refresh_task = None
 
         self._subscribers = dict()
+        self._subscribers_groups = dict()
         self._subscribers_lock = asyncio.Lock(loop=loop)
 
     async def subscribe(
         self,
         subscriber: StreamingSubscriber,
         refresh_period: float=5,
+        categories: Optional[Iterable[str]]=None,
         **kwargs
     ) -> Awaitable[None]:
 
+        refresh_period = float(refresh_period)
+        if refresh_period <= 0:
+            raise ValueError(
+                f"refresh period must be positive (value={refresh_period})"
+            )
+
+        categories = self._load_categories(categories)
+        key = (refresh_period, categories)
+
         with await self._subscribers_lock:
-            group = self._subscribers.get(refresh_period)
+            group = self._subscribers.get(key)
 
             if group is None:
-                group = _PeriodicSubscribers(refresh_period, [subscriber, ])
-                self._subscribers[refresh_period] = group
-                await self._maybe_set_new_tick_period()
+                group = _PeriodicSubscribers(
+                    refresh_period,
+                    categories,
+                    [subscriber, ],
+                )
+                group.schedule_first_refresh(
+                    when=self._loop.time(),
+                    jitter=self._get_jitter(),
+                )
+                self._subscribers[key] = group
+                self._push_deadline(group)
+
+                LOG.debug(
+                    f"streaming facility '{self._name}': new group of "
+                    f"subscribers (refresh_period={refresh_period}, "
+                    f"categories={sorted(x.value for x in categories)})"
+                )
+                self._wakeup_event.set()
             else:
                 group.append(subscriber)
 
-            if not self._resume_event.is_set():
-                LOG.debug(f"streaming facility '{self._name}': resume")
-                self._resume_event.set()
+            self._subscribers_groups[subscriber] = group
 
     async def unsubscribe(self, subscriber: StreamingSubscriber) -> Awaitable[None]:
-        # TODO: refactor
-
         with await self._subscribers_lock:
-            for refresh_period, group in self._subscribers.items():
-                if subscriber in group:
-                    group.remove(subscriber)
-
-                    if not group:
-                        del self._subscribers[refresh_period]
-
-                    if self._subscribers:
-                        await self._maybe_set_new_tick_period()
-                    else:
-                        if not self._do_stop:
-                            LOG.debug(
-                                f"streaming facility '{self._name}': pause"
-                            )
-                            self._resume_event.clear()
-
-                        if self._tick_task:
-                            self._tick_task.cancel()
-                        elif self._refresh_task:
-                            self._refresh_task.cancel()
-
-                    break
-
-    async def _maybe_set_new_tick_period(self) -> Awaitable[None]:
-        refresh_periods = self._subscribers.keys()
-        tick_period = functools.reduce(math.gcd, refresh_periods)
-
-        with await self._tick_period_lock:
-            if self._tick_period != tick_period:
-                LOG.debug(
-                    f"streaming facility '{self._name}': set new tick period "
-                    f"(tick_period={tick_period})"
-                )
-                self._tick_period = tick_period
+            group = self._subscribers_groups.pop(subscriber, None)
+            if group is None:
+                return
 
-    async def _run(self) -> Awaitable[None]:
-        # TODO: refactor
+            group.remove(subscriber)
+            if group:
+                return
 
-        while True:
-            if self._do_stop:
-                break
-            elif not self._resume_event.is_set():
-                await self._resume_event.wait()
-                if self._do_stop:
-                    break
+            # deadline of group stays in heap and is discarded lazily
+            del self._subscribers[group.key]
 
-            with await self._tick_period_lock:
-                tick_period = self._tick_period
+            if not self._subscribers:
+                LOG.debug(f"streaming facility '{self._name}': pause")
 
-            try:
-                coroutine = asyncio.sleep(tick_period, loop=self._loop)
-                self._tick_task = asyncio.ensure_future(coroutine, loop=self._loop)
-                await self._tick_task
-            except CancelledError:
-                LOG.debug(
-                    f"streaming facility '{self._name}': tick task "
-                    f"was cancelled"
-                )
-            finally:
-                self._tick_task = None
+                self._deadlines.clear()
 
-            if self._do_stop:
-                break
-            elif not self._resume_event.is_set():
-                await self._resume_event.wait()
-                if self._do_stop:
-                    break
-
-            now = time.monotonic()
-            do_refresh = any(
-                group.needs_refresh(now)
-                for group in self._subscribers.values()
+                if self._refresh_task:
+                    self._refresh_task.cancel()
+
+    def _load_categories(
+        self,
+        categories: Optional[Iterable[str]],
+    ) -> FrozenSet[ACTORS_CATEGORY]:
+
+        if categories is None:
+            return MOVING_ACTORS_CATEGORIES
+
+        categories = frozenset(map(ACTORS_CATEGORY, categories))
+
+        if not categories:
+            raise ValueError("at least one category of actors is expected")
+
+        if (
+            ACTORS_CATEGORY.STATIONARY in categories and
+            not self._stationary_actors_cache
+        ):
+            raise ValueError("stationary actors are not available")
+
+        return categories
+
+    def _is_group_actual(self, group: _PeriodicSubscribers) -> bool:
+        return self._subscribers.get(group.key) is group
+
+    def _get_effective_refresh_period(self, refresh_period: float) -> float:
+        return (
+            self._refresh_controller.get_effective_refresh_period(
+                refresh_period,
             )
-            if not do_refresh:
+            if self._refresh_controller
+            else refresh_period
+        )
+
+    def _get_jitter(self) -> float:
+        return random.uniform(0, self._jitter) if self._jitter else 0
+
+    def _push_deadline(self, group: _PeriodicSubscribers) -> None:
+        entry = (group.deadline, next(self._deadlines_counter), group)
+        heapq.heappush(self._deadlines, entry)
+
+    def _is_deadline_actual(
+        self,
+        deadline: float,
+        group: _PeriodicSubscribers,
+    ) -> bool:
+        return (
+            group.deadline == deadline and
+            self._is_group_actual(group)
+        )
+
+    def _get_next_deadline(self) -> Optional[float]:
+        while self._deadlines:
+            deadline, _, group = self._deadlines[0]
+
+            if self._is_deadline_actual(deadline, group):
+                return deadline
+
+            heapq.heappop(self._deadlines)
+
+    def _pop_due_groups(self, when: float) -> List[_PeriodicSubscribers]:
+        horizon = when + self._coalescing_tolerance
+        groups = []
+
+        while self._deadlines and self._deadlines[0][0] <= horizon:
+            deadline, _, group = heapq.heappop(self._deadlines)
+
+            if self._is_deadline_actual(deadline, group):
+                groups.append(group)
+
+        return groups
+
+    async def _wait_wakeup(self, delay: Optional[float]) -> Awaitable[None]:
+        self._wakeup_event.clear()
+
+        handle = (
+            self._loop.call_later(delay, self._wakeup_event.set)
+            if delay is not None
+            else None
+        )
+        try:
+            await self._wakeup_event.wait()
+        finally:
+            if handle:
+                handle.cancel()
+
+    async def _run(self) -> Awaitable[None]:
+        while not self._do_stop:
+            deadline = self._get_next_deadline()
+
+            if deadline is None:
+                await self._wait_wakeup(None)
                 continue
 
+            delay = deadline - self._loop.time()
+
+            if delay > 0:
+                await self._wait_wakeup(delay)
+                continue
+
+            groups = self._pop_due_groups(self._loop.time())
+
             try:
-                coroutine = self._radar.get_all_moving_actors_positions(
-                    timeout=self._request_timeout,
-                )
-                self._refresh_task = asyncio.ensure_future(
-                    coroutine,
-                    loop=self._loop,
-                )
-                data = await self._refresh_task
-            except CancelledError:
-                LOG.debug(
-                    f"streaming facility '{self._name}': refresh task "
-                    f"was cancelled"
-                )
+                await self._refresh(groups)
             except ConnectionError:
                 LOG.debug(
                     f"streaming facility '{self._name}': connection with "
@@ -415,16 +638,64 @@ class RadarStreamingFacility(StreamingFacility):
                 )
                 break
             finally:
-                self._refresh_task = None
+                now = self._loop.time()
+
+                for group in groups:
+                    if self._is_group_actual(group):
+                        group.ack_refresh(
+                            when=now,
+                            refresh_period=self._get_effective_refresh_period(
+                                group.refresh_period,
+                            ),
+                            jitter=self._get_jitter(),
+                        )
+                        self._push_deadline(group)
 
-            if self._do_stop:
-                break
-            elif not self._resume_event.is_set():
-                await self._resume_event.wait()
-                if self._do_stop:
-                    break
-                else:
-                    continue
+    async def _refresh(
+        self,
+        groups: List[_PeriodicSubscribers],
+    ) -> Awaitable[None]:
+
+        categories = frozenset().union(*(
+            group.categories for group in groups
+        ))
+        start_time = self._loop.time()
+
+        try:
+            coroutine = self._fetch(categories)
+            self._refresh_task = asyncio.ensure_future(
+                coroutine,
+                loop=self._loop,
+            )
+            moving, stationary = await self._refresh_task
+        except CancelledError:
+            LOG.debug(
+                f"streaming facility '{self._name}': refresh task "
+                f"was cancelled"
+            )
+            return
+        except (TimeoutError, asyncio.TimeoutError):
+            LOG.warning(
+                f"streaming facility '{self._name}': refresh has timed out"
+            )
+            self._maybe_ack_refresh_time(self._loop.time() - start_time)
+            return
+        finally:
+            self._refresh_task = None
+
+        self._maybe_ack_refresh_time(self._loop.time() - start_time)
+
+        if self._do_stop:
+            return
+
+        timestamp = datetime.datetime.utcnow()
+        awaitables = []
+
+        for group in groups:
+            if not self._is_group_actual(group):
+                continue
+
+            data = self._select_categories(group.categories, moving, stationary)
 
             if data.is_empty:
                 LOG.debug(
@@ -432,33 +703,109 @@ class RadarStreamingFacility(StreamingFacility):
                 )
                 continue
 
-            item = TimestampedData(data)
-            now = time.monotonic()
-
-            for group in self._subscribers.values():
-                if group.needs_refresh(now):
-                    try:
-                        awaitables = [
-                            subscriber.write(item)
-                            for subscriber in group
-                        ]
-                        await asyncio.gather(*awaitables, loop=self._loop)
-                    except:
-                        LOG.exception(
-                            f"streaming facility '{self._name}': failed to "
-                            f"handle item (item={repr(item)})"
-                        )
-                    else:
-                        group.ack_refresh(now)
+            item = PeriodicTimestampedData(
+                data=data,
+                refresh_period=self._get_effective_refresh_period(
+                    group.refresh_period,
+                ),
+                timestamp=timestamp,
+            )
+            awaitables.extend(
+                subscriber.write(item)
+                for subscriber in group
+            )
+
+        try:
+            await asyncio.gather(*awaitables, loop=self._loop)
+        except:
+            LOG.exception(
+                f"streaming facility '{self._name}': failed to "
+                f"handle data (moving={repr(moving)}, "
+                f"stationary={repr(stationary)})"
+            )
+
+    async def _fetch(
+        self,
+        categories: FrozenSet[ACTORS_CATEGORY],
+    ) -> Awaitable[Tuple[
+        Optional[AllMovingActorsPositions],
+        Optional[AllStationaryActorsPositions],
+    ]]:
+        moving = stationary = None
+        moving_categories = categories & MOVING_ACTORS_CATEGORIES
+
+        if moving_categories:
+            moving = await self._radar.get_moving_actors_positions(
+                categories=moving_categories,
+                timeout=self._request_timeout,
+            )
+
+        if ACTORS_CATEGORY.STATIONARY in categories:
+            payload = await (
+                self._stationary_actors_cache
+                .get_all_stationary_actors_positions(
+                    timeout=self._request_timeout,
+                )
+            )
+            stationary = payload.data
+
+        return moving, stationary
+
+    @staticmethod
+    def _select_categories(
+        categories: FrozenSet[ACTORS_CATEGORY],
+        moving: Optional[AllMovingActorsPositions],
+        stationary: Optional[AllStationaryActorsPositions],
+    ) -> Union[AllMovingActorsPositions, ActorsPositions]:
+
+        def select(category, value):
+            return value if category in categories else None
+
+        moving = AllMovingActorsPositions(
+            aircrafts=select(
+                ACTORS_CATEGORY.AIRCRAFTS, moving and moving.aircrafts,
+            ),
+            ground_units=select(
+                ACTORS_CATEGORY.GROUND_UNITS, moving and moving.ground_units,
+            ),
+            ships=select(
+                ACTORS_CATEGORY.SHIPS, moving and moving.ships,
+            ),
+        )
+
+        if ACTORS_CATEGORY.STATIONARY in categories:
+            return ActorsPositions(moving=moving, stationary=stationary)
+
+        return moving
+
+    def _maybe_ack_refresh_time(self, rtt: float) -> None:
+        if not (self._refresh_controller and self._subscribers):
+            return
+
+        refresh_period = self._get_effective_refresh_period(min(
+            group.refresh_period for group in self._subscribers.values()
+        ))
+        self._refresh_controller.ack_refresh(
+            rtt=rtt,
+            refresh_period=refresh_period,
+        )
+
+    def get_stats(self) -> dict:
+        stats = {
+            'subscribers_count': len(self._subscribers_groups),
+            'groups_count': len(self._subscribers),
+        }
+
+        if self._refresh_controller:
+            stats['throttling'] = self._refresh_controller.get_stats()
+
+        return stats
 
     def stop(self) -> None:
         LOG.debug(f"streaming facility '{self._name}': asked to stop")
 
         self._do_stop = True
-        self._resume_event.set()
-
-        if self._tick_task:
-            self._tick_task.cancel()
+        self._wakeup_event.set()
 
         if self._refresh_task:
             self._refresh_task.cancel()
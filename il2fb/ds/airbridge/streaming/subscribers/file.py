@@ -61,6 +61,16 @@ class TextFileStreamingSink(PluggableStreamingSubscriber):
 
 class JSONFileStreamingSink(TextFileStreamingSink):
 
+    def __init__(
+        self,
+        app,
+        path: StringOrPath,
+        encoding: str='utf-8',
+        compact_types: bool=False,
+    ):
+        super().__init__(app=app, path=path, encoding=encoding)
+        self._compact_types = compact_types
+
     async def write(self, o: Any) -> Awaitable[None]:
-        s = json.dumps(o)
+        s = json.dumps(o, compact_types=self._compact_types)
         await super().write(s)
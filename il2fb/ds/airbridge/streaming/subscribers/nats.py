@@ -16,10 +16,11 @@ LOG = logging.getLogger(__name__)
 
 class NATSStreamingSink(PluggableStreamingSubscriber):
 
-    def __init__(self, app, subject: str):
+    def __init__(self, app, subject: str, compact_types: bool=False):
         super().__init__(app=app)
 
         self._subject = subject
+        self._compact_types = compact_types
         self._queue = asyncio.Queue(loop=app.loop)
         self._queue_task = None
 
@@ -46,7 +47,7 @@ class NATSStreamingSink(PluggableStreamingSubscriber):
             await self._queue_task
 
     async def write(self, o: Any) -> Awaitable[None]:
-        msg = json.dumps(o).encode()
+        msg = json.dumpb(o, compact_types=self._compact_types)
         await self._queue.put(msg)
 
     async def _process_queue(self) -> Awaitable[None]:
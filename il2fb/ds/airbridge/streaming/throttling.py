@@ -0,0 +1,125 @@
+# coding: utf-8
+
+import logging
+
+from typing import Callable, Optional
+
+
+LOG = logging.getLogger(__name__)
+
+
+CPUUsageGetter = Callable[[], Optional[float]]
+
+
+class AdaptiveRefreshController:
+    """
+    Stretches refresh periods of periodic streams when refreshes become slow
+    or when dedicated server is overloaded and shrinks them back after load
+    goes down.
+
+    Stretch grows multiplicatively and decays gradually. Load is considered to
+    be normal while it stays between half of target and target, so stretch
+    does not oscillate.
+
+    """
+    stretch_increase_ratio = 1.5
+    stretch_decrease_ratio = 0.9
+
+    def __init__(
+        self,
+        cpu_usage_getter: Optional[CPUUsageGetter]=None,
+        min_refresh_period: float=0,
+        max_stretch: float=4,
+        target_utilization: float=0.5,
+        max_cpu_usage: float=80,
+        smoothing: float=0.25,
+    ):
+        self._cpu_usage_getter = cpu_usage_getter
+        self._min_refresh_period = min_refresh_period
+        self._max_stretch = max(1.0, max_stretch)
+        self._target_utilization = target_utilization
+        self._max_cpu_usage = max_cpu_usage
+        self._smoothing = smoothing
+
+        self._stretch = 1.0
+        self._rtt = None
+        self._cpu_usage = None
+
+    @property
+    def stretch(self) -> float:
+        return self._stretch
+
+    @property
+    def rtt(self) -> Optional[float]:
+        return self._rtt
+
+    @property
+    def cpu_usage(self) -> Optional[float]:
+        return self._cpu_usage
+
+    def get_effective_refresh_period(self, refresh_period: float) -> float:
+        return max(self._min_refresh_period, refresh_period * self._stretch)
+
+    def ack_refresh(self, rtt: float, refresh_period: float) -> None:
+        """
+        Account duration of a single refresh.
+
+        ``refresh_period`` is the shortest effective period which is being
+        served at the moment.
+
+        """
+        self._rtt = (
+            rtt
+            if self._rtt is None
+            else self._rtt + self._smoothing * (rtt - self._rtt)
+        )
+        self._cpu_usage = self._get_cpu_usage()
+
+        utilization = self._rtt / refresh_period
+        cpu_usage = self._cpu_usage
+
+        is_overloaded = (
+            (utilization > self._target_utilization) or
+            (cpu_usage is not None and cpu_usage > self._max_cpu_usage)
+        )
+        is_underloaded = (
+            (utilization < self._target_utilization / 2) and
+            (cpu_usage is None or cpu_usage < self._max_cpu_usage * 0.75)
+        )
+
+        if is_overloaded:
+            stretch = min(
+                self._max_stretch,
+                self._stretch * self.stretch_increase_ratio,
+            )
+        elif is_underloaded:
+            stretch = max(
+                1.0,
+                self._stretch * self.stretch_decrease_ratio,
+            )
+        else:
+            stretch = self._stretch
+
+        if stretch != self._stretch:
+            LOG.debug(
+                f"refresh stretch was changed from {self._stretch:.2f} to "
+                f"{stretch:.2f} (rtt={self._rtt:.3f}, "
+                f"utilization={utilization:.2f}, cpu_usage={cpu_usage})"
+            )
+            self._stretch = stretch
+
+    def get_stats(self) -> dict:
+        return {
+            'stretch': self._stretch,
+            'rtt': self._rtt,
+            'cpu_usage': self._cpu_usage,
+        }
+
+    def _get_cpu_usage(self) -> Optional[float]:
+        if not self._cpu_usage_getter:
+            return
+
+        try:
+            return self._cpu_usage_getter()
+        except Exception:
+            LOG.exception("failed to get cpu usage")
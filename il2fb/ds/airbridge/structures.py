@@ -2,7 +2,7 @@
 
 import datetime
 
-from typing import Any
+from typing import Any, Optional
 
 from il2fb.commons.structures import BaseStructure
 
@@ -10,8 +10,8 @@ from il2fb.commons.structures import BaseStructure
 class TimestampedData(BaseStructure):
     __slots__ = ['timestamp', 'data', ]
 
-    def __init__(self, data: Any):
-        self.timestamp = datetime.datetime.utcnow()
+    def __init__(self, data: Any, timestamp: Optional[datetime.datetime]=None):
+        self.timestamp = timestamp or datetime.datetime.utcnow()
         self.data = data
 
     def __repr__(self):
@@ -22,3 +22,48 @@ class TimestampedData(BaseStructure):
                 self.timestamp.isoformat(),
             )
         )
+
+
+class PeriodicTimestampedData(TimestampedData):
+    __slots__ = ['refresh_period', ]
+
+    def __init__(
+        self,
+        data: Any,
+        refresh_period: float,
+        timestamp: Optional[datetime.datetime]=None,
+    ):
+        super().__init__(data=data, timestamp=timestamp)
+        self.refresh_period = refresh_period
+
+    def __repr__(self):
+        return (
+            "<PeriodicTimestampedData {0}@{1}/{2}>"
+            .format(
+                repr(self.data),
+                self.timestamp.isoformat(),
+                self.refresh_period,
+            )
+        )
+
+
+class MissionFileChange(BaseStructure):
+    __slots__ = ['change', 'path', 'size', 'mtime', ]
+
+    def __init__(
+        self,
+        change: str,
+        path: str,
+        size: Optional[int]=None,
+        mtime: Optional[datetime.datetime]=None,
+    ):
+        self.change = change
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+
+    def __repr__(self):
+        return (
+            "<MissionFileChange {0} '{1}'>"
+            .format(self.change, self.path)
+        )
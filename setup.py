@@ -95,6 +95,7 @@ setup(
         "il2fb.ds.airbridge.api.http.responses",
         "il2fb.ds.airbridge.api.http.views",
         "il2fb.ds.airbridge.dedicated_server",
+        "il2fb.ds.airbridge.missions",
         "il2fb.ds.airbridge.streaming",
         "il2fb.ds.airbridge.streaming.subscribers",
     ],
@@ -104,6 +105,13 @@ setup(
     ],
     include_package_data=True,
     install_requires=REQUIREMENTS,
+    extras_require={
+        'orjson': ['orjson'],
+        'ujson': ['ujson'],
+        'msgpack': ['msgpack'],
+        'cbor': ['cbor2'],
+        'inotify': ['inotify_simple'],
+    },
     dependency_links=DEPENDENCIES,
     classifiers=[
         "Programming Language :: Python :: 3.6",
@@ -0,0 +1,288 @@
+# coding: utf-8
+
+import asyncio
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from il2fb.ds.airbridge.api.batch import BATCH_STATUS_FAILURE
+from il2fb.ds.airbridge.api.batch import BATCH_STATUS_SUCCESS
+from il2fb.ds.airbridge.api.batch import BATCH_STATUS_TIMEOUT
+from il2fb.ds.airbridge.api.batch import BatchExecutor
+from il2fb.ds.airbridge.api.batch import _split_into_stages
+from il2fb.ds.airbridge.api.batch import load_batch
+
+from il2fb.ds.airbridge.api.http.views import misc
+
+
+class FakeOperations:
+    """
+    Operations which follow naming convention of real ones: names of
+    read-only operations start with ``get_``.
+
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self.calls = []
+        self.cancelled = []
+        self.humans_count = 3
+
+        self._operations = {
+            'get_humans_count': self.get_humans_count,
+            'get_server_info': self.get_server_info,
+            'get_mission_info': self.get_mission_info,
+            'get_slow_info': self.get_slow_info,
+            'kick_all_humans': self.kick_all_humans,
+            'chat_to_all': self.chat_to_all,
+        }
+
+    def __contains__(self, name):
+        return name in self._operations
+
+    def get(self, name):
+        return self._operations[name]
+
+    async def get_humans_count(self):
+        self.calls.append('get_humans_count')
+        return self.humans_count
+
+    async def get_server_info(self, timeout=None):
+        self.calls.append('get_server_info')
+        return {'timeout': timeout}
+
+    async def get_mission_info(self):
+        self.calls.append('get_mission_info')
+        raise ValueError("mission is not loaded")
+
+    async def get_slow_info(self):
+        self.calls.append('get_slow_info')
+        try:
+            await asyncio.sleep(10, loop=self._loop)
+        except asyncio.CancelledError:
+            self.cancelled.append('get_slow_info')
+            raise
+
+    async def kick_all_humans(self):
+        self.calls.append('kick_all_humans')
+        self.humans_count = 0
+
+    async def chat_to_all(self, message):
+        self.calls.append('chat_to_all')
+
+
+def make_items(*names):
+    return [{'operation': name} for name in names]
+
+
+class LoadBatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.operations = FakeOperations(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _load(self, items, max_operations=10):
+        return load_batch(items, self.operations, max_operations)
+
+    def test_load_batch(self):
+        operations = self._load([
+            {'operation': 'get_server_info', 'payload': {'timeout': 5}},
+            {'operation': 'get_humans_count', 'payload': None},
+        ])
+
+        self.assertEqual(
+            [(x.name, x.payload) for x in operations],
+            [('get_server_info', {'timeout': 5}), ('get_humans_count', {})],
+        )
+
+    def test_invalid_batches(self):
+        cases = [
+            ({}, "list of operations is expected"),
+            ([], "list of operations is empty"),
+            (make_items('get_humans_count') * 11, "too many operations"),
+            (['get_humans_count'], "operation #0 is not a mapping"),
+            (make_items('get_humans_count') + [1], "operation #1 is not a"),
+            ([{'payload': {}}], "name of operation #0 is not a string"),
+            ([{'operation': ['x']}], "name of operation #0 is not a string"),
+            (make_items('unknown'), "unknown operation 'unknown'"),
+            (
+                [{'operation': 'get_humans_count', 'payload': [1]}],
+                "is not a mapping",
+            ),
+        ]
+
+        for items, message in cases:
+            with self.assertRaises(ValueError, msg=repr(items)) as context:
+                self._load(items)
+
+            self.assertIn(message, str(context.exception), msg=repr(items))
+
+    def test_split_into_stages(self):
+        operations = self._load(make_items(
+            'get_humans_count',
+            'get_server_info',
+            'kick_all_humans',
+            'get_humans_count',
+            'kick_all_humans',
+            'kick_all_humans',
+            'get_server_info',
+            'get_humans_count',
+        ))
+
+        self.assertEqual(
+            list(_split_into_stages(operations)),
+            [[0, 1], [2], [3], [4], [5], [6, 7]],
+        )
+
+
+class BatchExecutorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.operations = FakeOperations(self.loop)
+        self.executor = BatchExecutor(
+            loop=self.loop,
+            operations=self.operations,
+            timeout=1,
+        )
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _execute(self, items, timeout=None):
+        return self.loop.run_until_complete(
+            self.executor.execute(items, timeout)
+        )
+
+    def test_reads_observe_preceding_writes(self):
+        result = self._execute(make_items(
+            'get_humans_count',
+            'kick_all_humans',
+            'get_humans_count',
+        ))
+
+        self.assertEqual(
+            [x.get('payload') for x in result['results']],
+            [3, None, 0],
+        )
+        self.assertEqual(result['deduplicated_count'], 0)
+        self.assertEqual(
+            self.operations.calls,
+            ['get_humans_count', 'kick_all_humans', 'get_humans_count'],
+        )
+
+    def test_deduplication(self):
+        result = self._execute([
+            {'operation': 'get_humans_count'},
+            {'operation': 'get_humans_count', 'payload': {}},
+            {'operation': 'get_server_info', 'payload': {'timeout': 1}},
+            {'operation': 'get_server_info', 'payload': {'timeout': 2}},
+            {'operation': 'get_server_info', 'payload': {'timeout': 1}},
+            {'operation': 'chat_to_all', 'payload': {'message': 'hi'}},
+            {'operation': 'chat_to_all', 'payload': {'message': 'hi'}},
+            {'operation': 'get_humans_count'},
+        ])
+
+        self.assertEqual(result['deduplicated_count'], 2)
+        self.assertEqual(
+            [x['status'] for x in result['results']],
+            [BATCH_STATUS_SUCCESS] * 8,
+        )
+        self.assertEqual(
+            [x['payload'] for x in result['results'][2:5]],
+            [{'timeout': 1}, {'timeout': 2}, {'timeout': 1}],
+        )
+        self.assertEqual(
+            sorted(self.operations.calls),
+            sorted([
+                'get_humans_count',
+                'get_server_info',
+                'get_server_info',
+                'chat_to_all',
+                'chat_to_all',
+                'get_humans_count',
+            ]),
+        )
+
+        stats = self.executor.get_stats()
+        self.assertEqual(stats['operations_count'], 8)
+        self.assertEqual(stats['deduplicated_count'], 2)
+
+    def test_failures(self):
+        result = self._execute(make_items(
+            'get_mission_info',
+            'get_humans_count',
+        ))
+
+        self.assertEqual(result['results'][0], {
+            'status': BATCH_STATUS_FAILURE,
+            'detail': "mission is not loaded",
+        })
+        self.assertEqual(result['results'][1]['status'], BATCH_STATUS_SUCCESS)
+        self.assertEqual(self.executor.get_stats()['failures_count'], 1)
+
+    def test_deadline(self):
+        result = self._execute(
+            make_items(
+                'get_humans_count',
+                'get_slow_info',
+                'kick_all_humans',
+                'get_humans_count',
+            ),
+            timeout=0.05,
+        )
+
+        self.assertEqual(
+            [x['status'] for x in result['results']],
+            [
+                BATCH_STATUS_SUCCESS,
+                BATCH_STATUS_TIMEOUT,
+                BATCH_STATUS_TIMEOUT,
+                BATCH_STATUS_TIMEOUT,
+            ],
+        )
+
+        # let cancelled operation handle its cancellation
+        self.loop.run_until_complete(asyncio.sleep(0, loop=self.loop))
+
+        self.assertEqual(self.operations.cancelled, ['get_slow_info'])
+        self.assertNotIn('kick_all_humans', self.operations.calls)
+        self.assertEqual(self.operations.humans_count, 3)
+        self.assertEqual(self.executor.get_stats()['timeouts_count'], 3)
+
+    def test_timeout_is_limited(self):
+        started_at = self.loop.time()
+        self.executor._timeout = 0.05
+
+        result = self._execute(make_items('get_slow_info'), timeout=10)
+
+        self.assertLess(self.loop.time() - started_at, 1)
+        self.assertEqual(result['results'][0]['status'], BATCH_STATUS_TIMEOUT)
+
+    def test_non_mapping_item_is_bad_request(self):
+
+        async def post(body):
+            app = web.Application(loop=self.loop)
+            app['batch_executor'] = self.executor
+            app.router.add_post('/batch', misc.execute_batch)
+
+            server = TestServer(app, loop=self.loop)
+            client = TestClient(server, loop=self.loop)
+            await client.start_server()
+            try:
+                response = await client.post('/batch', json=body)
+                return response.status, (await response.json())
+            finally:
+                await client.close()
+
+        status, payload = self.loop.run_until_complete(post({
+            'operations': ['get_humans_count'],
+        }))
+
+        self.assertEqual(status, 400)
+        self.assertEqual(payload['detail'], "operation #0 is not a mapping")
+        self.assertEqual(self.operations.calls, [])
@@ -0,0 +1,175 @@
+# coding: utf-8
+
+import asyncio
+import unittest
+
+from il2fb.ds.airbridge.caching import ConsoleQueriesCache
+from il2fb.ds.airbridge.caching import StationaryActorsCache
+
+
+class FakeRadar:
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.timeouts = []
+        self.failures = 0
+
+    async def get_all_houses_positions(self, timeout=None):
+        self.timeouts.append(timeout)
+
+        if self.failures:
+            self.failures -= 1
+            await asyncio.sleep(timeout, loop=self.loop)
+            raise asyncio.TimeoutError
+
+        return ['house']
+
+    get_stationary_objects_positions = get_all_houses_positions
+    get_stationary_ships_positions = get_all_houses_positions
+
+
+class StationaryActorsCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.radar = FakeRadar(self.loop)
+        self.cache = StationaryActorsCache(
+            loop=self.loop,
+            radar=self.radar,
+            request_timeout=0.05,
+        )
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_request_timeout_is_used(self):
+        entry = self.loop.run_until_complete(
+            self.cache.get_houses_positions()
+        )
+        self.assertEqual(entry.data, ['house'])
+        self.assertEqual(self.radar.timeouts, [0.05])
+
+    def test_cached_entry_is_reused(self):
+        first = self.loop.run_until_complete(
+            self.cache.get_houses_positions()
+        )
+        second = self.loop.run_until_complete(
+            self.cache.get_houses_positions()
+        )
+        self.assertIs(first, second)
+        self.assertEqual(len(self.radar.timeouts), 1)
+
+    def test_timed_out_fill_is_retried(self):
+        self.radar.failures = 1
+
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(self.cache.get_houses_positions())
+
+        entry = self.loop.run_until_complete(
+            self.cache.get_houses_positions()
+        )
+        self.assertEqual(entry.data, ['house'])
+        self.assertEqual(len(self.radar.timeouts), 2)
+
+    def test_stats(self):
+        self.radar.failures = 1
+
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(self.cache.get_houses_positions())
+
+        for i in range(2):
+            self.loop.run_until_complete(self.cache.get_houses_positions())
+
+        self.cache.invalidate(StationaryActorsCache.HOUSES)
+
+        self.assertEqual(self.cache.get_stats(), {
+            'entries_count': 0,
+            'pending_count': 0,
+            'hits_count': 1,
+            'misses_count': 2,
+            'shared_count': 0,
+            'failures_count': 1,
+            'invalidations_count': 1,
+        })
+
+    def test_caller_timeout_does_not_cancel_fill(self):
+        self.radar.failures = 1
+
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(
+                self.cache.get_houses_positions(timeout=0.01)
+            )
+
+        # the same fill is awaited by the next caller
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(self.cache.get_houses_positions())
+
+        self.assertEqual(len(self.radar.timeouts), 1)
+
+
+class FakeConsoleClient:
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.timeouts = []
+        self.failures = 0
+
+    async def get_server_info(self, timeout=None):
+        self.timeouts.append(timeout)
+
+        if self.failures:
+            self.failures -= 1
+            raise asyncio.TimeoutError
+
+        return {'name': "server"}
+
+    get_humans_list = get_server_info
+    get_humans_count = get_server_info
+    get_humans_statistics = get_server_info
+    get_mission_info = get_server_info
+
+
+class ConsoleQueriesCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.console_client = FakeConsoleClient(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_request_timeout_is_finite_by_default(self):
+        cache = ConsoleQueriesCache(
+            loop=self.loop,
+            console_client=self.console_client,
+        )
+        self.loop.run_until_complete(cache.get_server_info())
+
+        self.assertIsNotNone(self.console_client.timeouts[0])
+
+    def test_results_are_reused_during_ttl(self):
+        cache = ConsoleQueriesCache(
+            loop=self.loop,
+            console_client=self.console_client,
+            ttls={ConsoleQueriesCache.SERVER_INFO: 10},
+        )
+        for _ in range(3):
+            self.loop.run_until_complete(cache.get_server_info())
+
+        self.assertEqual(len(self.console_client.timeouts), 1)
+        self.assertEqual(cache.get_stats()['hits_count'], 2)
+
+    def test_failed_request_is_retried(self):
+        cache = ConsoleQueriesCache(
+            loop=self.loop,
+            console_client=self.console_client,
+        )
+        self.console_client.failures = 1
+
+        with self.assertRaises(asyncio.TimeoutError):
+            self.loop.run_until_complete(cache.get_server_info())
+
+        result = self.loop.run_until_complete(cache.get_server_info())
+
+        self.assertEqual(result, {'name': "server"})
+        self.assertEqual(len(self.console_client.timeouts), 2)
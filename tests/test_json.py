@@ -0,0 +1,249 @@
+# coding: utf-8
+
+import datetime
+import json as stdlib_json
+import unittest
+
+from il2fb.commons.actors import Building, HumanAircraft
+from il2fb.commons.events import Event
+from il2fb.commons.organization import Belligerents
+from il2fb.commons.spatial import Point2D, Point3D
+from il2fb.ds.middleware.console.structures import Aircraft, Human
+from il2fb.ds.middleware.device_link.structures import MovingAircraftPosition
+from il2fb.parsers.game_log import events as game_log_events
+
+from il2fb.ds.airbridge import json
+from il2fb.ds.airbridge.structures import TimestampedData
+
+
+FLOATS = [
+    0.0, -0.0, 0.1, 1.5, -2.25, 1e-4, 1e-05, 1.5e-05, 1e-07, 1e-320,
+    1e15, 1e16, 1e22, 1.5e300, 123456789012345678.0,
+    float('nan'), float('inf'), float('-inf'),
+]
+
+PAYLOADS = [
+    None,
+    True,
+    "ascii",
+    "non-ascii: тест",
+    "del: \x7f",
+    "slash: /",
+    2 ** 64,
+    FLOATS,
+    *FLOATS,
+    *[{'nested': [value, None]} for value in FLOATS],
+    {1: 'non-string key'},
+    [datetime.datetime(2017, 1, 2, 3, 4, 5)],
+]
+
+
+class BaselineJSONEncoder(stdlib_json.JSONEncoder):
+    """
+    Encoder which was used before pluggable backends and compiled
+    serializers were introduced.
+
+    """
+
+    def default(self, obj):
+        cls = type(obj)
+
+        if issubclass(cls, TimestampedData):
+            result = {
+                key: getattr(obj, key)
+                for key in cls.__slots__
+            }
+        elif hasattr(obj, 'to_primitive'):
+            result = obj.to_primitive()
+            result['__type__'] = f"{cls.__module__}.{cls.__name__}"
+
+            if issubclass(cls, Event):
+                result.pop('name')
+                result.pop('verbose_name')
+
+        elif hasattr(obj, 'isoformat'):
+            result = obj.isoformat()
+        else:
+            result = super().default(obj)
+
+        return result
+
+
+class CustomStructure:
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_primitive(self, context=None):
+        return {'value': self.value, 'values': [self.value, 0.1]}
+
+
+TIMESTAMP = datetime.datetime(2017, 1, 2, 3, 4, 5, 678)
+
+HUMAN = Human(
+    callsign="john.doe",
+    ping=15,
+    score=0,
+    belligerent=Belligerents.red,
+    aircraft=Aircraft(designation="* Red 1", type="Bf-109G-6_Late"),
+)
+AIRCRAFT_POSITION = MovingAircraftPosition(
+    index=0,
+    id="r01000",
+    is_human=True,
+    member_index=None,
+    pos=Point3D(x=1.5, y=-2.25, z=1e-05),
+)
+MISSION_EVENT = game_log_events.MissionIsPlaying(
+    date=datetime.date(2017, 1, 2),
+    time=datetime.time(3, 4, 5),
+    mission="net/dogfight/тест.mis",
+)
+DESTRUCTION_EVENT = game_log_events.BuildingWasDestroyedByHumanAircraft(
+    time=datetime.time(3, 4, 5),
+    actor=Building(name="Tent"),
+    attacker=HumanAircraft(callsign="john.doe", aircraft="Bf-109G-6_Late"),
+    pos=Point2D(x=100.99, y=200.01),
+)
+
+STRUCTURES_PAYLOADS = [
+    TimestampedData(None, TIMESTAMP),
+    TimestampedData(MISSION_EVENT, TIMESTAMP),
+    TimestampedData([DESTRUCTION_EVENT, float('nan')], TIMESTAMP),
+    CustomStructure(1.5),
+    CustomStructure(TIMESTAMP),
+    CustomStructure(float('inf')),
+    HUMAN,
+    AIRCRAFT_POSITION,
+    MISSION_EVENT,
+    DESTRUCTION_EVENT,
+    [HUMAN, AIRCRAFT_POSITION, {'event': DESTRUCTION_EVENT}],
+]
+
+
+class JSONBackendsConformanceTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        json.use_backend(json.DEFAULT_BACKEND)
+
+    def test_stdlib_is_default_backend(self):
+        self.assertEqual(json.get_backend().name, 'json')
+
+    def test_default_output_is_same_as_output_of_stdlib(self):
+        for payload in PAYLOADS:
+            expected = stdlib_json.dumps(payload, cls=json.JSONEncoder)
+            self.assertEqual(json.dumps(payload), expected)
+            self.assertEqual(''.join(json.iterencode(payload)), expected)
+
+    def test_fast_backends_conform_to_compact_stdlib(self):
+        for name in json.get_available_backends():
+            json.use_backend(name)
+
+            for payload in PAYLOADS:
+                for indent in (None, json.PRETTY_INDENT):
+                    expected = stdlib_json.dumps(
+                        payload,
+                        cls=json.JSONEncoder,
+                        indent=indent,
+                        separators=(
+                            None if indent
+                            else json.get_backend().separators
+                        ),
+                    ).encode()
+                    self.assertEqual(
+                        json.dumpb(payload, indent=indent),
+                        expected,
+                        msg=f"backend={name}",
+                    )
+                    self.assertEqual(
+                        ''.join(json.iterencode(payload, indent=indent)),
+                        expected.decode(),
+                        msg=f"backend={name}",
+                    )
+
+    def test_structures_are_encoded_as_by_baseline_encoder(self):
+        backends = [json.DEFAULT_BACKEND] + json.get_available_backends()
+
+        for name in backends:
+            json.use_backend(name)
+            separators = json.get_backend().separators
+
+            for payload in STRUCTURES_PAYLOADS:
+                for indent in (None, json.PRETTY_INDENT):
+                    expected = stdlib_json.dumps(
+                        payload,
+                        cls=BaselineJSONEncoder,
+                        indent=indent,
+                        separators=None if indent else separators,
+                    )
+                    msg = f"backend={name}, indent={indent}, {payload!r}"
+
+                    self.assertEqual(
+                        json.dumpb(payload, indent=indent),
+                        expected.encode(),
+                        msg=msg,
+                    )
+                    self.assertEqual(
+                        json.dumps(payload, indent=indent),
+                        expected,
+                        msg=msg,
+                    )
+                    self.assertEqual(
+                        ''.join(json.iterencode(payload, indent=indent)),
+                        expected,
+                        msg=msg,
+                    )
+
+    def test_event_names_are_stripped(self):
+        result = json.loads(json.dumps(DESTRUCTION_EVENT))
+
+        self.assertNotIn('name', result)
+        self.assertNotIn('verbose_name', result)
+        self.assertEqual(
+            result['__type__'],
+            "il2fb.parsers.game_log.events."
+            "BuildingWasDestroyedByHumanAircraft",
+        )
+
+    def test_non_finite_floats_are_detected(self):
+        self.assertTrue(json._has_non_finite_floats(
+            {'a': [1, {'b': float('nan')}]},
+        ))
+        self.assertTrue(json._has_non_finite_floats((float('-inf'), )))
+        self.assertFalse(json._has_non_finite_floats(
+            {'a': [1.5, None, 'inf']},
+        ))
+
+
+class TypeTagsRegistryTestCase(unittest.TestCase):
+
+    def test_version_identifies_mapping(self):
+        first, second, third = (
+            json.TypeTagsRegistry(),
+            json.TypeTagsRegistry(),
+            json.TypeTagsRegistry(),
+        )
+        first.register_many([int, str])
+        second.register_many([str, int])
+        third.register(str)
+        third.register(int)
+
+        self.assertEqual(first.version, second.version)
+        self.assertNotEqual(first.version, third.version)
+        self.assertEqual(first.to_primitive(), second.to_primitive())
+
+    def test_version_changes_with_new_types(self):
+        registry = json.TypeTagsRegistry()
+        versions = [registry.version]
+
+        registry.get_tag(int)
+        versions.append(registry.version)
+
+        registry.get_tag(int)
+        versions.append(registry.version)
+
+        registry.get_tag(str)
+        versions.append(registry.version)
+
+        self.assertEqual(len(set(versions)), 3)
+        self.assertEqual(versions[1], versions[2])
@@ -0,0 +1,142 @@
+# coding: utf-8
+
+import io
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from pathlib import Path
+
+from il2fb.ds.airbridge.missions.archives import ARCHIVE_FORMAT_TAR
+from il2fb.ds.airbridge.missions.archives import ARCHIVE_FORMAT_ZIP
+from il2fb.ds.airbridge.missions.archives import _extract_archive
+from il2fb.ds.airbridge.missions.index import join_relative_path
+from il2fb.ds.airbridge.missions.index import normalize_relative_path
+
+
+class RelativePathsTestCase(unittest.TestCase):
+
+    def test_normalize_relative_path(self):
+        for path, expected in (
+            ('', ''),
+            ('/', ''),
+            ('net/dogfight/x.mis', 'net/dogfight/x.mis'),
+            ('net\\dogfight\\x.mis', 'net/dogfight/x.mis'),
+            ('net/./dogfight/../x.mis', 'net/x.mis'),
+            ('/net/x.mis', 'net/x.mis'),
+        ):
+            self.assertEqual(normalize_relative_path(path), expected, path)
+
+    def test_paths_outside_of_missions_dir_are_rejected(self):
+        for path in (
+            '..',
+            '../x.mis',
+            'net/../../x.mis',
+            '..\\x.mis',
+            'C:/x.mis',
+            'C:x.mis',
+            'c:\\Windows\\x.mis',
+            '\\\\server\\share\\x.mis',
+            'x.mis:stream',
+        ):
+            with self.assertRaises(ValueError, msg=path):
+                normalize_relative_path(path)
+
+    def test_join_relative_path(self):
+        root_dir = Path('/missions')
+
+        self.assertEqual(
+            join_relative_path(root_dir, 'net/x.mis'),
+            root_dir / 'net' / 'x.mis',
+        )
+
+        with self.assertRaises(ValueError):
+            join_relative_path(root_dir, '../x.mis')
+
+        with self.assertRaises(ValueError):
+            join_relative_path(root_dir, '/x.mis')
+
+
+class ExtractArchiveTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = Path(self.temp_dir.name)
+        self.target_dir = self.root_dir / 'missions'
+        self.target_dir.mkdir()
+
+        self.archive_path = self.root_dir / 'archive'
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _make_zip(self, names):
+        with zipfile.ZipFile(str(self.archive_path), 'w') as archive:
+            for name in names:
+                archive.writestr(zipfile.ZipInfo(name), b'data')
+
+    def _make_tar(self, names):
+        with tarfile.open(str(self.archive_path), 'w') as archive:
+            for name in names:
+                info = tarfile.TarInfo(name)
+                info.size = 4
+                archive.addfile(info, io.BytesIO(b'data'))
+
+    def _extract(self, archive_format):
+        return _extract_archive(
+            str(self.archive_path),
+            self.target_dir,
+            archive_format,
+            2 ** 20,
+        )
+
+    def _list_files(self):
+        return sorted(
+            str(path.relative_to(self.root_dir).as_posix())
+            for path in self.root_dir.rglob('*')
+            if path.is_file() and path != self.archive_path
+        )
+
+    def test_files_of_missions_are_extracted(self):
+        for archive_format, make_archive in (
+            (ARCHIVE_FORMAT_ZIP, self._make_zip),
+            (ARCHIVE_FORMAT_TAR, self._make_tar),
+        ):
+            make_archive(['net/a.mis', '/b.mis', 'readme.txt'])
+
+            extracted, skipped = self._extract(archive_format)
+
+            self.assertEqual(extracted, ['net/a.mis', 'b.mis'])
+            self.assertEqual(skipped, ['readme.txt'])
+            self.assertEqual(
+                self._list_files(),
+                ['missions/b.mis', 'missions/net/a.mis'],
+                msg=archive_format,
+            )
+
+    def test_members_outside_of_target_dir_are_rejected(self):
+        for archive_format, make_archive in (
+            (ARCHIVE_FORMAT_ZIP, self._make_zip),
+            (ARCHIVE_FORMAT_TAR, self._make_tar),
+        ):
+            for name in (
+                '../evil.mis',
+                'net/../../evil.mis',
+                'C:/evil.mis',
+                'C:evil.mis',
+                'c:\\evil.mis',
+            ):
+                make_archive(['good.mis', name])
+
+                with self.assertRaises(
+                    ValueError,
+                    msg=f"{archive_format}: {name}",
+                ):
+                    self._extract(archive_format)
+
+                # archive is rejected as a whole
+                self.assertEqual(
+                    self._list_files(), [],
+                    msg=f"{archive_format}: {name}",
+                )
@@ -0,0 +1,248 @@
+# coding: utf-8
+
+import asyncio
+import hashlib
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from il2fb.ds.airbridge.missions.content import ResumableUploads
+from il2fb.ds.airbridge.missions.content import UploadOffsetMismatch
+from il2fb.ds.airbridge.missions.content import load_manifest
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+
+from il2fb.ds.airbridge.api.http.views import missions
+
+
+DATA = b'[MAIN]\n  MAP Net1Summer/load.ini\n'
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+class FakeIndex:
+
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate_path(self, path):
+        self.invalidated.append(path)
+
+
+class FakeContentIndex:
+
+    def __init__(self):
+        self.index = FakeIndex()
+        self.recorded = {}
+
+    def record(self, relative_path, stat, sha256):
+        self.recorded[relative_path] = sha256
+
+
+async def iter_chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class LoadManifestTestCase(unittest.TestCase):
+
+    def test_load_manifest(self):
+        self.assertEqual(
+            load_manifest([{'path': '/net\\x.mis', 'sha256': SHA256.upper()}]),
+            [('net/x.mis', SHA256)],
+        )
+
+    def test_paths_outside_of_missions_dir_are_rejected(self):
+        for path in ('../x.mis', 'C:/Windows/x.mis', '\\\\srv\\x\\x.mis'):
+            with self.assertRaises(ValueError, msg=path):
+                load_manifest([{'path': path, 'sha256': SHA256}])
+
+    def test_malformed_items_are_rejected(self):
+        for item in (
+            {'path': 'x.txt', 'sha256': SHA256},
+            {'path': 'x.mis', 'sha256': 'abc'},
+        ):
+            with self.assertRaises(ValueError, msg=str(item)):
+                load_manifest([item])
+
+
+class ResumableUploadsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = Path(self.temp_dir.name)
+        self.storage = MissionsStorage(loop=self.loop, root_dir=self.root_dir)
+        self.content_index = FakeContentIndex()
+        self.uploads = self._make_uploads()
+
+        self.target = self.root_dir / 'net' / 'x.mis'
+
+    def tearDown(self):
+        self.storage.shutdown()
+        self.temp_dir.cleanup()
+        self.loop.close()
+
+    def _make_uploads(self):
+        return ResumableUploads(
+            loop=self.loop,
+            storage=self.storage,
+            content_index=self.content_index,
+        )
+
+    def _open(self, uploads=None, path='net/x.mis', sha256=SHA256, size=None):
+        return self.loop.run_until_complete((uploads or self.uploads).open(
+            relative_path=path,
+            sha256=sha256,
+            size=len(DATA) if size is None else size,
+        ))
+
+    def _write(self, session, offset, *chunks, uploads=None):
+        return self.loop.run_until_complete((uploads or self.uploads).write(
+            upload_id=session.upload_id,
+            offset=offset,
+            chunks=iter_chunks(*chunks),
+        ))
+
+    def _list_files(self):
+        return sorted(
+            path.relative_to(self.root_dir).as_posix()
+            for path in self.root_dir.rglob('*')
+            if path.is_file()
+        )
+
+    def test_upload_is_committed_when_complete(self):
+        session = self._open()
+
+        self._write(session, 0, DATA[:10])
+        self.assertFalse(self.target.exists())
+
+        session = self._write(session, 10, DATA[10:20], DATA[20:])
+
+        self.assertTrue(session.is_complete)
+        self.assertEqual(self.target.read_bytes(), DATA)
+        self.assertEqual(self._list_files(), ['net/x.mis'])
+        self.assertEqual(self.content_index.recorded, {'net/x.mis': SHA256})
+        self.assertIsNone(self.uploads.get(session.upload_id))
+
+    def test_reopened_upload_is_same(self):
+        session = self._open()
+        self._write(session, 0, DATA[:10])
+
+        reopened = self._open()
+
+        self.assertIs(reopened, session)
+        self.assertEqual(reopened.offset, 10)
+
+    def test_offset_mismatch(self):
+        session = self._open()
+        self._write(session, 0, DATA[:10])
+
+        with self.assertRaises(UploadOffsetMismatch) as cm:
+            self._write(session, 5, DATA[5:])
+
+        self.assertEqual(cm.exception.offset, 10)
+        self.assertEqual(session.offset, 10)
+
+    def test_write_beyond_declared_size(self):
+        session = self._open()
+
+        with self.assertRaises(ValueError):
+            self._write(session, 0, DATA, b'extra')
+
+        self.assertEqual(session.offset, 0)
+        self.assertFalse(self.target.exists())
+
+    def test_hash_mismatch_drops_session(self):
+        session = self._open(sha256=hashlib.sha256(b'other').hexdigest())
+
+        with self.assertRaises(ValueError):
+            self._write(session, 0, DATA)
+
+        self.assertIsNone(self.uploads.get(session.upload_id))
+        self.assertEqual(self._list_files(), [])
+        self.assertEqual(self.uploads.get_stats()['failed_count'], 1)
+
+    def test_upload_is_restored_after_restart(self):
+        session = self._open()
+        self._write(session, 0, DATA[:10])
+
+        # temporary file is left by previous run
+        uploads = self._make_uploads()
+        restored = self._open(uploads=uploads)
+
+        self.assertEqual(restored.upload_id, session.upload_id)
+        self.assertEqual(restored.offset, 10)
+
+        self._write(restored, 10, DATA[10:], uploads=uploads)
+
+        self.assertEqual(self.target.read_bytes(), DATA)
+        self.assertEqual(self._list_files(), ['net/x.mis'])
+
+    def test_garbage_beyond_declared_size_is_truncated_on_restore(self):
+        session = self._open()
+        self._write(session, 0, DATA[:10])
+        session.temp_path.write_bytes(DATA + b'garbage')
+
+        restored = self._open(uploads=self._make_uploads())
+
+        self.assertEqual(restored.offset, len(DATA))
+        self.assertEqual(restored.temp_path.read_bytes(), DATA)
+
+    def test_zero_size_upload(self):
+        sha256 = hashlib.sha256(b'').hexdigest()
+        session = self._open(sha256=sha256, size=0)
+
+        self.assertTrue(session.is_complete)
+
+        session = self._write(session, 0)
+
+        self.assertEqual(self.target.read_bytes(), b'')
+        self.assertEqual(self.content_index.recorded, {'net/x.mis': sha256})
+
+    def test_paths_outside_of_missions_dir_are_rejected(self):
+        for path in ('../x.mis', 'C:/Windows/x.mis', 'net/x.txt'):
+            with self.assertRaises(ValueError, msg=path):
+                self._open(path=path)
+
+        with self.assertRaises(ValueError):
+            self._open(size=-1)
+
+    def test_offset_mismatch_is_conflict(self):
+        session = self._open()
+        self._write(session, 0, DATA[:10])
+
+        async def patch(offset):
+            app = web.Application(loop=self.loop)
+            app['missions_uploads'] = self.uploads
+            app['missions_storage'] = self.storage
+            app.router.add_patch(
+                '/missions-uploads/{upload_id}',
+                missions.write_missions_upload,
+            )
+
+            server = TestServer(app, loop=self.loop)
+            client = TestClient(server, loop=self.loop)
+            await client.start_server()
+            try:
+                response = await client.patch(
+                    f'/missions-uploads/{session.upload_id}',
+                    data=DATA[offset:],
+                    headers={'Upload-Offset': str(offset)},
+                )
+                return response.status, (await response.json())
+            finally:
+                await client.close()
+
+        status, payload = self.loop.run_until_complete(patch(0))
+
+        self.assertEqual(status, 409)
+        self.assertEqual(payload['offset'], 10)
+
+        status, payload = self.loop.run_until_complete(patch(10))
+
+        self.assertEqual(status, 200)
+        self.assertTrue(payload['is_complete'])
+        self.assertEqual(self.target.read_bytes(), DATA)
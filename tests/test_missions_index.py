@@ -0,0 +1,240 @@
+# coding: utf-8
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from il2fb.ds.airbridge.missions.index import FILE_CHANGE_CREATED
+from il2fb.ds.airbridge.missions.index import FILE_CHANGE_DELETED
+from il2fb.ds.airbridge.missions.index import FILE_CHANGE_MODIFIED
+from il2fb.ds.airbridge.missions.index import IndexedDirectory
+from il2fb.ds.airbridge.missions.index import IndexedFile
+from il2fb.ds.airbridge.missions.index import MissionsIndex
+from il2fb.ds.airbridge.missions.index import browse_tree
+from il2fb.ds.airbridge.missions.index import scan_tree
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+
+
+def make_dir(dirs, files):
+    return IndexedDirectory(
+        dirs=dirs,
+        files=[IndexedFile(name=name, size=1, mtime=0) for name in files],
+    )
+
+
+class MissionsDirTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _touch(self, relative_path, data=b'data'):
+        path = self.root_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+class ScanTreeTestCase(MissionsDirTestCase):
+
+    def test_scan_tree(self):
+        self._touch('Net/dogfight/a.mis')
+        self._touch('Net/dogfight/a_ru.properties')
+        self._touch('Net/dogfight/a.txt')
+        self._touch('Net/coop/b.mis')
+        self._touch('c.mis')
+
+        dirs = scan_tree(self.root_dir)
+
+        self.assertEqual(
+            sorted(dirs.keys()),
+            ['', 'Net', 'Net/coop', 'Net/dogfight'],
+        )
+        self.assertEqual(dirs['Net'].dirs, ['coop', 'dogfight'])
+        self.assertEqual(
+            [f.name for f in dirs['Net/dogfight'].files],
+            ['a.mis', 'a_ru.properties'],
+        )
+        self.assertEqual(
+            dirs['Net/dogfight'].files[0].properties,
+            ['a_ru.properties'],
+        )
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), "symlinks are not supported")
+    def test_symlink_loop_is_scanned_once(self):
+        self._touch('Net/dogfight/a.mis')
+        os.symlink(
+            str(self.root_dir / 'Net'),
+            str(self.root_dir / 'Net' / 'dogfight' / 'loop'),
+        )
+
+        dirs = scan_tree(self.root_dir)
+
+        self.assertEqual(sorted(dirs.keys()), ['', 'Net', 'Net/dogfight'])
+
+    def test_missing_dir(self):
+        self.assertEqual(scan_tree(self.root_dir, 'missing'), {})
+
+
+class BrowseTreeTestCase(unittest.TestCase):
+
+    dirs = {
+        '': make_dir(['coop', 'dogfight', 'single'], ['a.mis', 'b.mis']),
+        'coop': make_dir([], ['c.mis']),
+        'dogfight': make_dir(['nested'], ['d.mis', 'Da.mis']),
+        'dogfight/nested': make_dir([], ['e.mis']),
+        'single': make_dir([], []),
+    }
+
+    def _browse(self, **kwargs):
+        return browse_tree(self.dirs, **kwargs)
+
+    def test_browse(self):
+        self.assertEqual(self._browse(), {
+            'dirs': ['coop', 'dogfight', 'single'],
+            'files': ['a.mis', 'b.mis'],
+            'total': 5,
+        })
+        self.assertIsNone(self._browse(relative_dir='missing'))
+
+    def test_pagination_across_dirs_and_files(self):
+        self.assertEqual(self._browse(offset=2, limit=2), {
+            'dirs': ['single'],
+            'files': ['a.mis'],
+            'total': 5,
+        })
+        self.assertEqual(self._browse(offset=1, limit=10), {
+            'dirs': ['dogfight', 'single'],
+            'files': ['a.mis', 'b.mis'],
+            'total': 5,
+        })
+        self.assertEqual(self._browse(offset=3, limit=1), {
+            'dirs': [],
+            'files': ['a.mis'],
+            'total': 5,
+        })
+        self.assertEqual(self._browse(offset=0, limit=0), {
+            'dirs': [],
+            'files': [],
+            'total': 5,
+        })
+        self.assertEqual(self._browse(offset=10), {
+            'dirs': [],
+            'files': [],
+            'total': 5,
+        })
+
+    def test_recursive(self):
+        result = self._browse(relative_dir='dogfight', recursive=True)
+        self.assertEqual(result, {
+            'dirs': ['nested'],
+            'files': ['Da.mis', 'd.mis', 'nested/e.mis'],
+            'total': 4,
+        })
+        self.assertEqual(self._browse(recursive=True, offset=3, limit=3), {
+            'dirs': ['single'],
+            'files': ['a.mis', 'b.mis'],
+            'total': 10,
+        })
+
+    def test_prefix_is_case_insensitive(self):
+        self.assertEqual(
+            self._browse(relative_dir='dogfight', prefix='D'),
+            {'dirs': [], 'files': ['d.mis', 'Da.mis'], 'total': 2},
+        )
+        self.assertEqual(
+            self._browse(prefix='S'),
+            {'dirs': ['single'], 'files': [], 'total': 1},
+        )
+        self.assertEqual(
+            self._browse(recursive=True, prefix='e'),
+            {'dirs': [], 'files': ['dogfight/nested/e.mis'], 'total': 1},
+        )
+
+    def test_details(self):
+        result = self._browse(relative_dir='coop', details=True)
+        self.assertEqual(result['files'][0]['name'], 'c.mis')
+        self.assertEqual(result['files'][0]['size'], 1)
+
+
+class MissionsIndexChangesTestCase(MissionsDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.loop = asyncio.new_event_loop()
+        self.storage = MissionsStorage(loop=self.loop, root_dir=self.root_dir)
+        self.index = MissionsIndex(
+            loop=self.loop,
+            storage=self.storage,
+            use_inotify=False,
+        )
+        self.changes = []
+        self.index.subscribe_to_changes(self.changes.extend)
+
+        self._touch('Net/dogfight/a.mis')
+        self._touch('Net/dogfight/b.mis')
+        self.loop.run_until_complete(self.index._rescan())
+
+    def tearDown(self):
+        self.index.stop()
+        self.storage.shutdown()
+        self.loop.close()
+
+        super().tearDown()
+
+    def _refresh(self, relative_dir):
+        self.loop.run_until_complete(self.index._refresh_dir(relative_dir))
+        return sorted((change, path) for change, path, _ in self.changes)
+
+    def test_initial_scan_is_not_reported(self):
+        self.assertEqual(self.changes, [])
+        self.assertIsNotNone(self.index.get_file('Net/dogfight/a.mis'))
+
+    def test_files_changes(self):
+        self._touch('Net/dogfight/a.mis', b'changed')
+        (self.root_dir / 'Net' / 'dogfight' / 'b.mis').unlink()
+        self._touch('Net/dogfight/c.mis')
+
+        self.assertEqual(self._refresh('Net/dogfight'), [
+            (FILE_CHANGE_CREATED, 'Net/dogfight/c.mis'),
+            (FILE_CHANGE_DELETED, 'Net/dogfight/b.mis'),
+            (FILE_CHANGE_MODIFIED, 'Net/dogfight/a.mis'),
+        ])
+        self.assertEqual(self.index.get_file('Net/dogfight/a.mis').size, 7)
+        self.assertIsNone(self.index.get_file('Net/dogfight/b.mis'))
+
+    def test_unchanged_dir_is_not_reported(self):
+        self.assertEqual(self._refresh('Net/dogfight'), [])
+
+    def test_new_tree_is_reported(self):
+        self._touch('Net/coop/x/c.mis')
+
+        self.assertEqual(self._refresh('Net'), [
+            (FILE_CHANGE_CREATED, 'Net/coop/x/c.mis'),
+        ])
+        self.assertIsNotNone(self.index.get_file('Net/coop/x/c.mis'))
+
+    def test_deleted_tree_is_dropped(self):
+        shutil.rmtree(str(self.root_dir / 'Net' / 'dogfight'))
+
+        self.assertEqual(self._refresh('Net'), [
+            (FILE_CHANGE_DELETED, 'Net/dogfight/a.mis'),
+            (FILE_CHANGE_DELETED, 'Net/dogfight/b.mis'),
+        ])
+        self.assertIsNone(self.index.browse('Net/dogfight'))
+
+    def test_deleted_dir_is_dropped_on_its_own_refresh(self):
+        shutil.rmtree(str(self.root_dir / 'Net'))
+
+        self.assertEqual(self._refresh('Net/dogfight'), [
+            (FILE_CHANGE_DELETED, 'Net/dogfight/a.mis'),
+            (FILE_CHANGE_DELETED, 'Net/dogfight/b.mis'),
+        ])
+        self.assertEqual(self.index.get_stats()['files_count'], 0)
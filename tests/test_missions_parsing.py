@@ -0,0 +1,124 @@
+# coding: utf-8
+
+import asyncio
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+from il2fb.ds.airbridge.missions import parsing
+from il2fb.ds.airbridge.missions.parsing import EXECUTOR_TYPE_THREAD
+from il2fb.ds.airbridge.missions.parsing import ParsedMissionsCache
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+
+
+class FakeParser:
+
+    def __init__(self):
+        self.parsed = []
+
+    def parse(self, path):
+        self.parsed.append(path)
+        return {'data': Path(path).read_text()}
+
+
+class ParsedMissionsCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = Path(self.temp_dir.name)
+        self.storage = MissionsStorage(loop=self.loop, root_dir=self.root_dir)
+
+        self.parser = FakeParser()
+        patcher = mock.patch.object(parsing, '_parser', self.parser)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.path = self.root_dir / 'mission.mis'
+        self.path.write_text('first')
+
+    def tearDown(self):
+        self.storage.shutdown()
+        self.temp_dir.cleanup()
+        self.loop.close()
+
+    def _make_cache(self, **kwargs):
+        cache = ParsedMissionsCache(
+            loop=self.loop,
+            storage=self.storage,
+            executor_type=EXECUTOR_TYPE_THREAD,
+            **kwargs
+        )
+        self.addCleanup(cache.stop)
+        return cache
+
+    def _get(self, cache, path=None):
+        return self.loop.run_until_complete(cache.get(path or self.path))
+
+    def test_unchanged_mission_is_parsed_once(self):
+        cache = self._make_cache()
+
+        first = self._get(cache)
+        second = self._get(cache)
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.parser.parsed), 1)
+        self.assertEqual(cache.get_stats()['hits_count'], 1)
+
+    def test_changed_mission_is_parsed_again(self):
+        cache = self._make_cache()
+        self._get(cache)
+
+        self.path.write_text('second')
+        result = self._get(cache)
+
+        self.assertEqual(result, {'data': 'second'})
+        self.assertEqual(len(self.parser.parsed), 2)
+        self.assertEqual(cache.get_stats()['entries_count'], 1)
+
+    def test_concurrent_requests_share_parsing(self):
+        cache = self._make_cache()
+
+        results = self.loop.run_until_complete(asyncio.gather(
+            cache.get(self.path),
+            cache.get(self.path),
+            loop=self.loop,
+        ))
+
+        self.assertIs(results[0], results[1])
+        self.assertEqual(len(self.parser.parsed), 1)
+
+    def test_persisted_mission_survives_restart(self):
+        persistence_dir = self.root_dir / 'persisted'
+
+        self._get(self._make_cache(persistence_dir=persistence_dir))
+
+        cache = self._make_cache(persistence_dir=persistence_dir)
+        result = self._get(cache)
+
+        self.assertEqual(result, {'data': 'first'})
+        self.assertEqual(len(self.parser.parsed), 1)
+        self.assertEqual(cache.get_stats()['persisted_hits_count'], 1)
+
+        self.path.write_text('second')
+        result = self._get(self._make_cache(persistence_dir=persistence_dir))
+
+        self.assertEqual(result, {'data': 'second'})
+        self.assertEqual(len(self.parser.parsed), 2)
+
+    def test_least_recently_used_missions_are_evicted(self):
+        other_path = self.root_dir / 'other.mis'
+        other_path.write_text('other')
+
+        cache = self._make_cache()
+        self._get(cache)
+        size = cache.get_stats()['size']
+
+        cache._max_size = size * 1.5
+        self._get(cache, other_path)
+        self._get(cache)
+
+        self.assertEqual(cache.get_stats()['entries_count'], 1)
+        self.assertEqual(len(self.parser.parsed), 3)
@@ -0,0 +1,269 @@
+# coding: utf-8
+
+import asyncio
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from il2fb.ds.airbridge.missions.events import MissionRotationHasFailed
+from il2fb.ds.airbridge.missions.events import NextMissionWasPrepared
+from il2fb.ds.airbridge.missions.rotation import MissionsRotator
+from il2fb.ds.airbridge.missions.rotation import load_playlist
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+
+
+class FakeConsoleClient:
+    """
+    Console client which loads missions successfully unless ``load_results``
+    tell otherwise: each result is taken by each attempt to load a mission.
+
+    """
+
+    def __init__(self, load_results=None):
+        self.load_results = list(load_results or [])
+        self.loaded = []
+
+    async def end_mission(self, timeout=None):
+        raise ValueError("no mission is loaded")
+
+    async def unload_mission(self, timeout=None):
+        pass
+
+    async def load_mission(self, file_path, timeout=None):
+        self.loaded.append(file_path)
+
+        if self.load_results and not self.load_results.pop(0):
+            raise ValueError(f"failed to load `{file_path}`")
+
+    async def begin_mission(self, timeout=None):
+        pass
+
+
+class MissionsRotatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = Path(self.temp_dir.name)
+        self.storage = MissionsStorage(loop=self.loop, root_dir=self.root_dir)
+
+        for name in ['a.mis', 'b.mis', 'c.mis', 'invalid.mis']:
+            (self.root_dir / name).write_bytes(b'[MAIN]\n')
+
+        self.parsed = []
+        self.events = []
+
+    def tearDown(self):
+        self.storage.shutdown()
+        self.temp_dir.cleanup()
+        self.loop.close()
+
+    async def parse(self, path, stat):
+        self.parsed.append(path.name)
+
+        if path.name == 'invalid.mis':
+            raise ValueError("invalid mission")
+
+    def _make_rotator(self, paths, console_client=None, repeat=False):
+        rotator = MissionsRotator(
+            loop=self.loop,
+            console_client=console_client or FakeConsoleClient(),
+            storage=self.storage,
+            parse=self.parse,
+            playlist=load_playlist(paths),
+            mission_duration=0,
+            repeat=repeat,
+        )
+        rotator.subscribe_to_events(self.events.append)
+        return rotator
+
+    def _rotate(self, rotator):
+        with self.assertLogs(
+            'il2fb.ds.airbridge.missions.rotation', level='INFO',
+        ) as logs:
+            self.loop.run_until_complete(
+                asyncio.wait_for(rotator._rotate_forever(), 5, loop=self.loop)
+            )
+
+        rotator.stop()
+        return '\n'.join(logs.output)
+
+    def test_end_of_non_repeated_playlist(self):
+        console_client = FakeConsoleClient()
+        rotator = self._make_rotator(['a.mis', 'b.mis'], console_client)
+
+        output = self._rotate(rotator)
+
+        self.assertEqual(console_client.loaded, ['a.mis', 'b.mis'])
+        self.assertIsNone(rotator._position)
+        self.assertIn("playlist has ended", output)
+        self.assertEqual(rotator.get_stats()['rotations_count'], 2)
+
+    def test_invalid_missions_are_skipped(self):
+        console_client = FakeConsoleClient()
+        rotator = self._make_rotator(
+            ['a.mis', 'invalid.mis', 'missing.mis', 'c.mis'],
+            console_client,
+        )
+
+        output = self._rotate(rotator)
+
+        self.assertEqual(console_client.loaded, ['a.mis', 'c.mis'])
+        self.assertIn("skip invalid mission `invalid.mis`", output)
+        self.assertIn("skip invalid mission `missing.mis`", output)
+        self.assertIn("playlist has ended", output)
+
+        prepared = [
+            (x.path, x.is_valid)
+            for x in self.events
+            if isinstance(x, NextMissionWasPrepared)
+        ]
+        self.assertEqual(prepared, [
+            ('a.mis', True),
+            ('invalid.mis', False),
+            ('missing.mis', False),
+            ('c.mis', True),
+        ])
+
+    def test_invalid_last_mission_ends_playlist(self):
+        console_client = FakeConsoleClient()
+        rotator = self._make_rotator(['a.mis', 'invalid.mis'], console_client)
+
+        output = self._rotate(rotator)
+
+        self.assertEqual(console_client.loaded, ['a.mis'])
+        self.assertIn("playlist has ended", output)
+        self.assertNotIn("no valid missions", output)
+
+    def test_failed_last_mission_ends_playlist(self):
+        console_client = FakeConsoleClient(load_results=[True, False])
+        rotator = self._make_rotator(['a.mis', 'b.mis'], console_client)
+
+        output = self._rotate(rotator)
+
+        self.assertEqual(console_client.loaded, ['a.mis', 'b.mis'])
+        self.assertIn("failed to load mission `b.mis`", output)
+        self.assertIn("playlist has ended", output)
+        self.assertNotIn("no valid missions", output)
+        self.assertEqual(rotator.get_stats()['failures_count'], 1)
+
+    def test_no_valid_missions(self):
+        console_client = FakeConsoleClient()
+        rotator = self._make_rotator(
+            ['invalid.mis', 'missing.mis'],
+            console_client,
+            repeat=True,
+        )
+
+        output = self._rotate(rotator)
+
+        self.assertEqual(console_client.loaded, [])
+        self.assertIn("no valid missions to load", output)
+
+    def test_failures_in_row_stop_rotation(self):
+        console_client = FakeConsoleClient(load_results=[False, False, False])
+        rotator = self._make_rotator(
+            ['a.mis', 'b.mis', 'c.mis'],
+            console_client,
+            repeat=True,
+        )
+
+        output = self._rotate(rotator)
+
+        self.assertEqual(console_client.loaded, ['a.mis', 'b.mis', 'c.mis'])
+        self.assertIn("all missions have failed to be loaded", output)
+
+        failures = [
+            (x.path, x.step)
+            for x in self.events
+            if isinstance(x, MissionRotationHasFailed)
+        ]
+        self.assertEqual(failures, [
+            ('a.mis', 'load'),
+            ('b.mis', 'load'),
+            ('c.mis', 'load'),
+        ])
+        self.assertEqual(rotator.get_stats()['failures_count'], 3)
+
+    def test_failures_in_row_are_reset_by_success(self):
+        console_client = FakeConsoleClient(
+            load_results=[True, False, True, False, False],
+        )
+        rotator = self._make_rotator(
+            ['a.mis', 'b.mis'],
+            console_client,
+            repeat=True,
+        )
+
+        output = self._rotate(rotator)
+
+        self.assertEqual(
+            console_client.loaded,
+            ['a.mis', 'b.mis', 'a.mis', 'b.mis', 'a.mis'],
+        )
+        self.assertIn("all missions have failed to be loaded", output)
+        self.assertEqual(rotator.get_stats()['rotations_count'], 2)
+        self.assertEqual(rotator.get_stats()['failures_count'], 3)
+
+    def test_playlist_is_replaced_during_preparation(self):
+        parsing_started = asyncio.Event(loop=self.loop)
+        parsing_released = asyncio.Event(loop=self.loop)
+
+        async def parse(path, stat):
+            self.parsed.append(path.name)
+
+            if path.name == 'a.mis':
+                parsing_started.set()
+                await parsing_released.wait()
+
+        console_client = FakeConsoleClient()
+        rotator = self._make_rotator(['a.mis', 'b.mis'], console_client)
+        rotator._parse = parse
+
+        async def run():
+            rotator.start()
+            await parsing_started.wait()
+
+            rotator.set_playlist(load_playlist(['c.mis']))
+            await rotator._main_task
+
+        with self.assertLogs(
+            'il2fb.ds.airbridge.missions.rotation', level='INFO',
+        ) as logs:
+            self.loop.run_until_complete(
+                asyncio.wait_for(run(), 5, loop=self.loop)
+            )
+
+        self.assertEqual(self.parsed, ['a.mis', 'c.mis'])
+        self.assertEqual(console_client.loaded, ['c.mis'])
+        self.assertIn("playlist has ended", '\n'.join(logs.output))
+
+    def test_playlist_is_emptied_during_preparation(self):
+        parsing_started = asyncio.Event(loop=self.loop)
+
+        async def parse(path, stat):
+            parsing_started.set()
+            await asyncio.Event(loop=self.loop).wait()
+
+        console_client = FakeConsoleClient()
+        rotator = self._make_rotator(['a.mis'], console_client)
+        rotator._parse = parse
+
+        async def run():
+            rotator.start()
+            await parsing_started.wait()
+
+            rotator.set_playlist([])
+            await rotator._main_task
+
+        with self.assertLogs(
+            'il2fb.ds.airbridge.missions.rotation', level='INFO',
+        ) as logs:
+            self.loop.run_until_complete(
+                asyncio.wait_for(run(), 5, loop=self.loop)
+            )
+
+        self.assertEqual(console_client.loaded, [])
+        self.assertIn("playlist is empty", '\n'.join(logs.output))
@@ -0,0 +1,96 @@
+# coding: utf-8
+
+import asyncio
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+
+
+class MissionsUploadTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = Path(self.temp_dir.name)
+        self.storage = MissionsStorage(
+            loop=self.loop,
+            root_dir=self.root_dir,
+            max_workers=1,
+        )
+
+        self.target = self.root_dir / 'net' / 'dogfight' / 'mission.mis'
+        self.target.parent.mkdir(parents=True)
+        self.target.write_bytes(b'old')
+
+    def tearDown(self):
+        self.storage.shutdown()
+        self.temp_dir.cleanup()
+        self.loop.close()
+
+    def _list_dir(self):
+        return sorted(x.name for x in self.target.parent.iterdir())
+
+    def _upload(self, upload, chunks):
+        self.loop.run_until_complete(upload.add_file(self.target.name))
+
+        for chunk in chunks:
+            self.loop.run_until_complete(upload.write(chunk))
+
+    def test_target_is_replaced_only_on_commit(self):
+        upload = self.storage.begin_upload(self.target.parent, buffer_size=4)
+        self._upload(upload, [b'new ', b'mission ', b'data'])
+
+        # data is already flushed to a temporary file
+        self.assertEqual(len(self._list_dir()), 2)
+        self.assertEqual(self.target.read_bytes(), b'old')
+
+        paths = self.loop.run_until_complete(upload.commit())
+
+        self.assertEqual(paths, [self.target])
+        self.assertEqual(self.target.read_bytes(), b'new mission data')
+        self.assertEqual(self._list_dir(), ['mission.mis'])
+
+    def test_aborted_upload_leaves_no_traces(self):
+        upload = self.storage.begin_upload(self.target.parent, buffer_size=4)
+        self._upload(upload, [b'partial ', b'data'])
+
+        self.loop.run_until_complete(upload.abort())
+
+        self.assertEqual(self.target.read_bytes(), b'old')
+        self.assertEqual(self._list_dir(), ['mission.mis'])
+
+    def test_failed_commit_does_not_touch_targets(self):
+        other_target = self.target.with_name('mission_ru.properties')
+        other_target.write_bytes(b'old')
+
+        upload = self.storage.begin_upload(self.target.parent)
+        self._upload(upload, [b'new'])
+        self.loop.run_until_complete(upload.add_file(other_target.name))
+
+        # second file cannot be written completely
+        upload._files[-1][1].close()
+        self.loop.run_until_complete(upload.write(b'new'))
+
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(upload.commit())
+
+        self.loop.run_until_complete(upload.abort())
+
+        self.assertEqual(self.target.read_bytes(), b'old')
+        self.assertEqual(other_target.read_bytes(), b'old')
+        self.assertEqual(
+            self._list_dir(),
+            ['mission.mis', 'mission_ru.properties'],
+        )
+
+    def test_name_of_mission_file_is_required(self):
+        upload = self.storage.begin_upload(self.target.parent)
+
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(upload.add_file('mission.txt'))
+
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(upload.write(b'data'))
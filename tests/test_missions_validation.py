@@ -0,0 +1,103 @@
+# coding: utf-8
+
+import asyncio
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from il2fb.ds.airbridge.missions.storage import MissionsStorage
+from il2fb.ds.airbridge.missions.validation import MissionsValidator
+from il2fb.ds.airbridge.missions.validation import VALIDATION_STATUS
+
+
+class MissionsValidatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.storage = MissionsStorage(
+            loop=self.loop,
+            root_dir=Path(self.temp_dir.name),
+            max_workers=1,
+        )
+        self.parsed = []
+        self.validator = MissionsValidator(
+            loop=self.loop,
+            storage=self.storage,
+            parse=self._parse,
+        )
+        self.validator.start()
+
+        self.path = Path(self.temp_dir.name) / 'mission.mis'
+        self.path.write_bytes(b'valid')
+
+    def tearDown(self):
+        self.validator.stop()
+        self.storage.shutdown()
+        self.temp_dir.cleanup()
+        self.loop.close()
+
+    async def _parse(self, path, stat):
+        self.parsed.append(stat.st_size)
+
+        if path.read_bytes() != b'valid':
+            raise ValueError("malformed mission")
+
+        return {}
+
+    def _get_processed_result(self):
+
+        async def get():
+            while True:
+                result = await self.validator.get_result(self.path)
+                if result.processed_at:
+                    return result
+                await asyncio.sleep(0.01, loop=self.loop)
+
+        return self.loop.run_until_complete(
+            asyncio.wait_for(get(), 2, loop=self.loop)
+        )
+
+    def test_result_is_reused_while_file_is_unchanged(self):
+        self.validator.submit([self.path])
+
+        first = self._get_processed_result()
+        second = self._get_processed_result()
+
+        self.assertIs(first, second)
+        self.assertEqual(first.status, VALIDATION_STATUS.VALID)
+        self.assertEqual(self.parsed, [5])
+
+    def test_changed_file_is_queued_again(self):
+        self.validator.submit([self.path])
+        first = self._get_processed_result()
+
+        self.path.write_bytes(b'invalid')
+        second = self._get_processed_result()
+
+        self.assertIsNot(first, second)
+        self.assertNotEqual(first.key, second.key)
+        self.assertEqual(second.status, VALIDATION_STATUS.INVALID)
+        self.assertEqual(second.error, "malformed mission")
+        self.assertEqual(self.parsed, [5, 7])
+
+    def test_file_changed_while_queued_is_validated_once(self):
+        self.validator.submit([self.path])
+        self.path.write_bytes(b'invalid')
+
+        result = self._get_processed_result()
+
+        self.assertEqual(result.status, VALIDATION_STATUS.INVALID)
+        self.assertEqual(self.parsed, [7])
+
+    def test_result_of_deleted_file_is_dropped(self):
+        self.validator.submit([self.path])
+        self._get_processed_result()
+
+        self.path.unlink()
+        result = self.loop.run_until_complete(
+            self.validator.get_result(self.path)
+        )
+
+        self.assertIsNone(result)
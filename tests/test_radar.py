@@ -0,0 +1,104 @@
+# coding: utf-8
+
+import asyncio
+import unittest
+
+from il2fb.ds.middleware.device_link.client import DeviceLinkClient
+
+from il2fb.ds.airbridge.radar import Radar
+
+
+REMOTE_ADDRESS = ('127.0.0.1', 10000)
+
+REFRESH_RADAR_REQUEST = b'R/1001'
+
+
+class FakeTransport:
+
+    def __init__(self, on_sent):
+        self.sent = []
+        self._on_sent = on_sent
+
+    def sendto(self, data):
+        if data != REFRESH_RADAR_REQUEST:
+            self.sent.append(data)
+            self._on_sent(len(self.sent), data)
+
+    def close(self):
+        pass
+
+
+class RadarRetriesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.client = DeviceLinkClient(REMOTE_ADDRESS, loop=self.loop)
+
+    def tearDown(self):
+        self.client.close()
+        self.loop.run_until_complete(asyncio.sleep(0.01, loop=self.loop))
+        self.loop.close()
+
+    def _reply_later(self, delay, data):
+        self.loop.call_later(
+            delay,
+            self.client.datagram_received,
+            data,
+            REMOTE_ADDRESS,
+        )
+
+    def test_late_datagram_is_discarded(self):
+
+        def on_sent(i, data):
+            if i == 1:
+                # response to lost attempt arrives after its timeout
+                self._reply_later(0.15, b'A/1002\\5')
+            else:
+                self._reply_later(0.01, b'A/1002\\0')
+
+        transport = FakeTransport(on_sent)
+        self.client.connection_made(transport)
+
+        radar = Radar(
+            device_link_client=self.client,
+            attempt_timeout=0.1,
+            drain_period=0.2,
+            loop=self.loop,
+        )
+        result = self.loop.run_until_complete(
+            radar.get_moving_aircrafts_positions(timeout=2)
+        )
+
+        self.assertEqual(result, [])
+        self.assertEqual(len(transport.sent), 2)
+        self.assertEqual(radar.retries_count, 1)
+        self.assertEqual(radar.late_datagrams_count, 1)
+        self.assertEqual(radar.get_stats(), {
+            'retries_count': 1,
+            'retried_chunks_count': 0,
+            'late_datagrams_count': 1,
+        })
+
+    def test_no_drain_without_timeout(self):
+
+        def on_sent(i, data):
+            self._reply_later(0.01, b'A/1002\\0')
+
+        transport = FakeTransport(on_sent)
+        self.client.connection_made(transport)
+
+        radar = Radar(
+            device_link_client=self.client,
+            attempt_timeout=0.1,
+            drain_period=10,
+            loop=self.loop,
+        )
+        result = self.loop.run_until_complete(asyncio.wait_for(
+            radar.get_moving_aircrafts_positions(),
+            1,
+            loop=self.loop,
+        ))
+
+        self.assertEqual(result, [])
+        self.assertEqual(radar.retries_count, 0)
+        self.assertEqual(radar.late_datagrams_count, 0)
@@ -0,0 +1,266 @@
+# coding: utf-8
+
+import asyncio
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer, make_mocked_request
+
+from il2fb.ds.airbridge import json
+
+from il2fb.ds.airbridge.caching import StationaryActorsCache
+
+from il2fb.ds.airbridge.api.http.responses.rest import RESTCacheableSuccess
+from il2fb.ds.airbridge.api.http.responses.rest import RESTNotModified
+from il2fb.ds.airbridge.api.http.responses.rest import RESTStreamingSuccess
+from il2fb.ds.airbridge.api.http.responses.rest import accepts_encoding
+from il2fb.ds.airbridge.api.http.responses.rest import get_instance_version
+from il2fb.ds.airbridge.api.http.responses.rest import is_not_modified
+from il2fb.ds.airbridge.api.http.responses.rest import make_etag
+from il2fb.ds.airbridge.api.http.responses.rest import make_streaming_success
+from il2fb.ds.airbridge.api.http.responses.rest import negotiate_content_encoding
+from il2fb.ds.airbridge.api.http.responses.rest import should_stream
+from il2fb.ds.airbridge.api.http.views import radar
+
+
+class AcceptsEncodingTestCase(unittest.TestCase):
+
+    def test_explicit_encoding(self):
+        self.assertTrue(accepts_encoding("gzip", 'gzip'))
+        self.assertTrue(accepts_encoding("deflate, gzip;q=0.5", 'gzip'))
+        self.assertFalse(accepts_encoding("gzip;q=0", 'gzip'))
+        self.assertFalse(accepts_encoding("deflate", 'gzip'))
+        self.assertFalse(accepts_encoding("", 'gzip'))
+
+    def test_wildcard(self):
+        self.assertTrue(accepts_encoding("*", 'gzip'))
+        self.assertFalse(accepts_encoding("*;q=0", 'gzip'))
+
+    def test_explicit_encoding_takes_precedence_over_wildcard(self):
+        self.assertTrue(accepts_encoding("*;q=0, gzip", 'gzip'))
+        self.assertTrue(accepts_encoding("*;q=0, gzip;q=0.1", 'gzip'))
+        self.assertFalse(accepts_encoding("*, gzip;q=0", 'gzip'))
+        self.assertFalse(accepts_encoding("*;q=0, deflate", 'gzip'))
+
+    def test_negotiate_content_encoding(self):
+        self.assertEqual(negotiate_content_encoding("deflate, gzip"), 'gzip')
+        self.assertEqual(
+            negotiate_content_encoding("*;q=0, deflate"),
+            'deflate',
+        )
+        self.assertIsNone(negotiate_content_encoding("*;q=0, br"))
+
+
+class ConditionalRequestsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _make_request(self, path, headers=None, app=None):
+        app = app if app is not None else web.Application(loop=self.loop)
+        return make_mocked_request('GET', path, headers=headers, app=app)
+
+    def test_etag_depends_on_version_and_representation(self):
+        request = self._make_request('/radar/stationary')
+        pretty_request = self._make_request('/radar/stationary?pretty')
+
+        self.assertNotEqual(
+            make_etag(request, 'a.1'),
+            make_etag(request, 'a.2'),
+        )
+        self.assertNotEqual(
+            make_etag(request, 'a.1'),
+            make_etag(pretty_request, 'a.1'),
+        )
+
+    def test_is_not_modified(self):
+        etag = make_etag(self._make_request('/radar/stationary'), 'a.1')
+        strong_etag = etag[2:]
+
+        for value, expected in (
+            (etag, True),
+            (strong_etag, True),
+            (f'W/"other", {etag}', True),
+            ('*', True),
+            ('W/"other"', False),
+        ):
+            request = self._make_request(
+                '/radar/stationary', headers={'If-None-Match': value},
+            )
+            self.assertEqual(is_not_modified(request, etag), expected, value)
+
+        request = self._make_request('/radar/stationary')
+        self.assertFalse(is_not_modified(request, etag))
+
+    def test_versioned_response_is_not_modified(self):
+        etag = make_etag(self._make_request('/info'), 'a.1')
+        request = self._make_request('/info', headers={'If-None-Match': etag})
+
+        response = RESTCacheableSuccess(payload={'x': 1}, version='a.1')
+        self.loop.run_until_complete(response._render(request))
+
+        # class attribute 'status' of REST responses shadows actual status
+        self.assertEqual(response._status, RESTNotModified.status)
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_response_without_version_has_no_etag(self):
+        request = self._make_request('/humans', headers={'If-None-Match': '*'})
+
+        response = RESTCacheableSuccess(payload=[], max_age=5)
+        self.loop.run_until_complete(response._render(request))
+
+        self.assertEqual(response._status, 200)
+        self.assertNotIn('ETag', response.headers)
+        self.assertEqual(
+            response.headers['Cache-Control'], "private, max-age=5",
+        )
+
+
+class StreamingResponsesTestCase(unittest.TestCase):
+
+    payload = [
+        {'id': i, 'name': f"actor {i}", 'pos': {'x': i * 1.5, 'y': -i}}
+        for i in range(500)
+    ]
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_should_stream(self):
+        app = web.Application(loop=self.loop)
+        request = make_mocked_request('GET', '/', app=app)
+        self.assertFalse(should_stream(request, 10 ** 9))
+
+        app['streaming_min_size'] = 100
+        self.assertFalse(should_stream(request, 99))
+        self.assertTrue(should_stream(request, 100))
+
+    def test_json_chunks(self):
+        for pretty in (False, True):
+            response = RESTStreamingSuccess(
+                payload=self.payload,
+                pretty=pretty,
+                chunk_size=1024,
+            )
+            chunks = list(response._iter_json_chunks(compact_types=False))
+
+            self.assertGreater(len(chunks), 1)
+            self.assertTrue(
+                all(len(x) >= 1024 for x in chunks[:-1]),
+                msg=f"pretty={pretty}",
+            )
+            expected = json.dumps(self.payload, indent=(2 if pretty else None))
+            self.assertEqual(
+                b''.join(chunks).decode(),
+                expected + '\n',
+                msg=f"pretty={pretty}",
+            )
+
+    def test_response_is_chunked(self):
+
+        async def handler(request):
+            return make_streaming_success(
+                request,
+                payload=self.payload,
+                version='a.1',
+                max_age=5,
+            )
+
+        async def get():
+            app = web.Application(loop=self.loop)
+            app['streaming_chunk_size'] = 1024
+            app.router.add_get('/', handler)
+
+            server = TestServer(app, loop=self.loop)
+            client = TestClient(server, loop=self.loop)
+            await client.start_server()
+            try:
+                response = await client.get('/')
+                return response, (await response.read())
+            finally:
+                await client.close()
+
+        response, body = self.loop.run_until_complete(get())
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.headers['Transfer-Encoding'], 'chunked')
+        self.assertEqual(
+            response.headers['Cache-Control'], "private, max-age=5",
+        )
+        self.assertTrue(response.headers['ETag'].startswith('W/"a.1-'))
+        self.assertEqual(json.loads(body), self.payload)
+
+
+class FakeRadar:
+
+    def __init__(self):
+        self.calls_count = 0
+
+    async def get_all_houses_positions(self, timeout=None):
+        self.calls_count += 1
+        return ['house']
+
+    get_stationary_objects_positions = get_all_houses_positions
+    get_stationary_ships_positions = get_all_houses_positions
+
+
+class StationaryActorsConditionalRequestsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.radar = FakeRadar()
+
+        self.app = web.Application(loop=self.loop)
+        self.app['stationary_actors_cache'] = StationaryActorsCache(
+            loop=self.loop,
+            radar=self.radar,
+        )
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _get(self, headers=None):
+        request = make_mocked_request(
+            'GET', '/radar/houses', headers=headers, app=self.app,
+        )
+        return self.loop.run_until_complete(
+            radar.get_all_houses_positions(request)
+        )
+
+    def test_conditional_request_skips_retrieval(self):
+        response = self._get()
+        etag = response.headers['ETag']
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.radar.calls_count, 1)
+
+        cache = self.app['stationary_actors_cache']
+        cache._get = None  # must not be called
+
+        response = self._get(headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status, RESTNotModified.status)
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_etag_changes_after_invalidation(self):
+        etag = self._get().headers['ETag']
+
+        self.app['stationary_actors_cache'].invalidate()
+        response = self._get(headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.radar.calls_count, 2)
+
+    def test_version_is_instance_specific(self):
+        self._get()
+        version = self.app['stationary_actors_cache'].get_version(
+            StationaryActorsCache.HOUSES,
+        )
+        self.assertNotEqual(get_instance_version(version), str(version))
@@ -0,0 +1,87 @@
+# coding: utf-8
+
+import asyncio
+import unittest
+
+from il2fb.ds.airbridge import codecs
+from il2fb.ds.airbridge.serialization import EXECUTOR_TYPE_PROCESS
+from il2fb.ds.airbridge.serialization import EXECUTOR_TYPE_THREAD
+from il2fb.ds.airbridge.serialization import SerializationScheduler
+from il2fb.ds.airbridge.serialization import estimate_size
+
+
+PAYLOAD = [
+    {'id': i, 'pos': {'x': i * 1.5, 'y': -i, 'z': 0}, 'name': f"actor {i}"}
+    for i in range(100)
+]
+
+
+class EstimateSizeTestCase(unittest.TestCase):
+
+    def test_estimate_size(self):
+        self.assertEqual(estimate_size("text"), 1)
+        self.assertEqual(estimate_size([]), 1)
+        self.assertEqual(estimate_size([1, 2, 3]), 3)
+        self.assertEqual(estimate_size({'a': 1, 'b': [1, 2]}), 4)
+        self.assertEqual(estimate_size(PAYLOAD), 100 * 7)
+
+    def test_depth_is_limited(self):
+        self.assertEqual(estimate_size([[[[1, 2]]]], max_depth=2), 1)
+
+
+class SerializationSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _make_scheduler(self, **kwargs):
+        scheduler = SerializationScheduler(loop=self.loop, **kwargs)
+        self.addCleanup(scheduler.shutdown)
+        return scheduler
+
+    def _encode(self, scheduler, **kwargs):
+        return self.loop.run_until_complete(
+            scheduler.encode(PAYLOAD, **kwargs)
+        )
+
+    def test_small_payloads_are_encoded_inline(self):
+        scheduler = self._make_scheduler(min_size=10000)
+        result = self._encode(scheduler)
+
+        self.assertEqual(result, codecs.DEFAULT_CODEC.encode(PAYLOAD))
+
+        stats = scheduler.get_stats()
+        self.assertEqual(stats['inline']['count'], 1)
+        self.assertEqual(stats['offloaded']['count'], 0)
+
+    def test_offloaded_encoding_is_same_as_inline(self):
+        for executor_type in (EXECUTOR_TYPE_THREAD, EXECUTOR_TYPE_PROCESS):
+            scheduler = self._make_scheduler(
+                min_size=1,
+                executor_type=executor_type,
+            )
+
+            for indent in (None, 2):
+                result = self._encode(scheduler, indent=indent)
+                self.assertEqual(
+                    result,
+                    codecs.DEFAULT_CODEC.encode(PAYLOAD, indent=indent),
+                    msg=f"executor_type={executor_type}, indent={indent}",
+                )
+
+            stats = scheduler.get_stats()
+            self.assertEqual(stats['inline']['count'], 0)
+            self.assertEqual(stats['offloaded']['count'], 2)
+
+    def test_size_hint_takes_precedence(self):
+        scheduler = self._make_scheduler(min_size=10000)
+        self._encode(scheduler, size_hint=10000)
+
+        self.assertEqual(scheduler.get_stats()['offloaded']['count'], 1)
+
+    def test_unknown_executor_type(self):
+        with self.assertRaises(ValueError):
+            SerializationScheduler(loop=self.loop, executor_type='foo')